@@ -7,7 +7,7 @@ import asyncio
 import io
 import sys
 import time
-from collections.abc import AsyncGenerator, Awaitable, Callable, Iterator
+from collections.abc import AsyncGenerator, Awaitable, Callable, Iterator, Mapping
 from contextlib import asynccontextmanager, contextmanager, redirect_stderr, redirect_stdout
 from dataclasses import dataclass
 from typing import assert_never, Protocol
@@ -25,6 +25,7 @@ from cmk.ccc import tty
 from cmk.ccc import version as cmk_version
 from cmk.checkengine.plugins import AgentBasedPlugins
 from cmk.utils import paths
+from cmk.utils.caching import cache_manager, CacheStatistics
 from cmk.utils.log import logger as cmk_logger
 
 from ._cache import Cache, CacheError
@@ -65,6 +66,10 @@ class HealthCheckResponse(BaseModel, frozen=True):
     last_reload_at: float
 
 
+class CacheStatisticsResponse(BaseModel, frozen=True):
+    caches: Mapping[str, CacheStatistics]
+
+
 def make_application(
     *,
     engine: AutomationEngine,
@@ -95,6 +100,7 @@ def make_application(
 
     app.post("/automation")(_automation_endpoint)
     app.get("/health")(_health_endpoint)
+    app.get("/caches")(_caches_endpoint)
 
     FastAPIInstrumentor.instrument_app(app)
 
@@ -302,3 +308,8 @@ def _redirect_stdin(stream: io.StringIO) -> Iterator[None]:
 async def _health_endpoint(request: Request) -> HealthCheckResponse:
     dependencies: _ApplicationDependencies = request.app.state.dependencies
     return HealthCheckResponse(last_reload_at=dependencies.state.last_reload_at)
+
+
+async def _caches_endpoint(request: Request) -> CacheStatisticsResponse:
+    """Statistics of the caches kept between the automation calls, for diagnostics"""
+    return CacheStatisticsResponse(caches=cache_manager.dump_statistics())
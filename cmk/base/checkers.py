@@ -13,6 +13,7 @@ import logging
 import socket
 import time
 from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Final, Literal, Protocol
@@ -145,6 +146,7 @@ def _fetch_all(
     simulation: bool,
     file_cache_options: FileCacheOptions,
     mode: Mode,
+    max_concurrent_fetchers: int = 1,
 ) -> Sequence[
     tuple[
         SourceInfo,
@@ -152,17 +154,48 @@ def _fetch_all(
         Snapshot,
     ]
 ]:
+    """Fetch the raw data of all sources
+
+    With `max_concurrent_fetchers > 1` the sources are fetched in a bounded
+    thread pool, so that the overall duration is dominated by the slowest
+    source rather than the sum of all of them.  The order of the results
+    always matches the order of the sources.
+
+    Note:
+        The CPU times of the snapshots are process wide.  When fetching
+        concurrently, only the elapsed time is attributable to a single source.
+
+    """
     console.verbose(f"{tty.yellow}+{tty.normal} FETCHING DATA")
-    return [
-        _do_fetch(
-            trigger,
+    jobs = [
+        (
             source.source_info(),
             source.file_cache(simulation=simulation, file_cache_options=file_cache_options),
             source.fetcher(),
-            mode=mode,
         )
         for source in sources
     ]
+    if max_concurrent_fetchers <= 1 or len(jobs) <= 1:
+        return [
+            _do_fetch(trigger, source_info, file_cache, fetcher, mode=mode)
+            for source_info, file_cache, fetcher in jobs
+        ]
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_concurrent_fetchers, len(jobs)), thread_name_prefix="fetcher"
+    )
+    try:
+        return list(
+            executor.map(
+                lambda job: _do_fetch(trigger, *job, mode=mode),
+                jobs,
+            )
+        )
+    finally:
+        # If we have been interrupted (for example by an `MKTimeout`), the pending
+        # fetchers are not started anymore. The running ones are bounded by their own
+        # timeouts, wait for them so that none of them keeps running in the background.
+        executor.shutdown(wait=True, cancel_futures=True)
 
 
 def _do_fetch(
@@ -507,6 +540,7 @@ class CMKFetcher:
             simulation=self.simulation_mode,
             file_cache_options=self.file_cache_options,
             mode=self.mode,
+            max_concurrent_fetchers=self.config_cache.max_concurrent_fetchers(host_name),
         )
 
 
@@ -127,7 +127,7 @@ from cmk.snmplib import (  # these are required in the modules' namespace to loa
 )
 from cmk.utils import config_warnings, ip_lookup, password_store
 from cmk.utils.agent_registration import connection_mode_from_host_config, HostAgentConnectionMode
-from cmk.utils.caching import cache_manager
+from cmk.utils.caching import cache_manager, LRUCache
 from cmk.utils.check_utils import maincheckify, section_name_of
 from cmk.utils.experimental_config import load_experimental_config
 from cmk.utils.host_storage import (
@@ -1558,33 +1558,68 @@ class AutochecksConfigurer:
         )
 
 
+# The caches with an entry per service are limited, the ones with an entry per host are not:
+# They are used for all hosts in turn, a cache smaller than the number of hosts would never hit.
+_SERVICE_CACHE_SIZE: Final = 1_000_000
+
+
 class ConfigCache:
     def __init__(self, loaded_config: LoadedConfigFragment) -> None:
         super().__init__()
         self._loaded_config: Final = loaded_config
         self.hosts_config = Hosts(hosts=(), clusters=(), shadow_hosts=())
-        self.__enforced_services_table: dict[
+        self.__enforced_services_table: LRUCache[
             HostName,
             Mapping[
                 ServiceID,
                 tuple[RulesetName, ConfiguredService],
             ],
-        ] = {}
-        self.__is_piggyback_host: dict[HostName, bool] = {}
-        self.__is_waiting_for_discovery_host: dict[HostName, bool] = {}
-        self.__snmp_config: dict[tuple[HostName, HostAddress, SourceType], SNMPHostConfig] = {}
-        self.__hwsw_inventory_parameters: dict[HostName, HWSWInventoryParameters] = {}
-        self.__explicit_host_attributes: dict[HostName, dict[str, str]] = {}
-        self.__computed_datasources: dict[HostName | HostAddress, ComputedDataSources] = {}
-        self.__discovery_check_parameters: dict[HostName, DiscoveryCheckParameters] = {}
-        self.__active_checks: dict[HostName, Sequence[SSCRules]] = {}
-        self.__special_agents: dict[HostName, Sequence[SSCRules]] = {}
-        self.__hostgroups: dict[HostName, Sequence[str]] = {}
-        self.__contactgroups: dict[HostName, Sequence[_ContactgroupName]] = {}
-        self.__explicit_check_command: dict[HostName, HostCheckCommand] = {}
-        self.__snmp_fetch_interval: dict[HostName, Mapping[SectionName, int | None]] = {}
-        self.__notification_plugin_parameters: dict[tuple[HostName, str], Mapping[str, object]] = {}
-        self.__snmp_backend: dict[HostName, SNMPBackendEnum] = {}
+        ] = cache_manager.make_lru_cache("config_cache_enforced_services_table")
+        self.__is_piggyback_host: LRUCache[HostName, bool] = cache_manager.make_lru_cache(
+            "config_cache_is_piggyback_host"
+        )
+        self.__is_waiting_for_discovery_host: LRUCache[HostName, bool] = (
+            cache_manager.make_lru_cache("config_cache_is_waiting_for_discovery_host")
+        )
+        self.__snmp_config: LRUCache[tuple[HostName, HostAddress, SourceType], SNMPHostConfig] = (
+            cache_manager.make_lru_cache("config_cache_snmp_config")
+        )
+        self.__hwsw_inventory_parameters: LRUCache[HostName, HWSWInventoryParameters] = (
+            cache_manager.make_lru_cache("config_cache_hwsw_inventory_parameters")
+        )
+        self.__explicit_host_attributes: LRUCache[HostName, dict[str, str]] = (
+            cache_manager.make_lru_cache("config_cache_explicit_host_attributes")
+        )
+        self.__computed_datasources: LRUCache[HostName | HostAddress, ComputedDataSources] = (
+            cache_manager.make_lru_cache("config_cache_computed_datasources")
+        )
+        self.__discovery_check_parameters: LRUCache[HostName, DiscoveryCheckParameters] = (
+            cache_manager.make_lru_cache("config_cache_discovery_check_parameters")
+        )
+        self.__active_checks: LRUCache[HostName, Sequence[SSCRules]] = cache_manager.make_lru_cache(
+            "config_cache_active_checks"
+        )
+        self.__special_agents: LRUCache[HostName, Sequence[SSCRules]] = (
+            cache_manager.make_lru_cache("config_cache_special_agents")
+        )
+        self.__hostgroups: LRUCache[HostName, Sequence[str]] = cache_manager.make_lru_cache(
+            "config_cache_hostgroups"
+        )
+        self.__contactgroups: LRUCache[HostName, Sequence[_ContactgroupName]] = (
+            cache_manager.make_lru_cache("config_cache_contactgroups")
+        )
+        self.__explicit_check_command: LRUCache[HostName, HostCheckCommand] = (
+            cache_manager.make_lru_cache("config_cache_explicit_check_command")
+        )
+        self.__snmp_fetch_interval: LRUCache[HostName, Mapping[SectionName, int | None]] = (
+            cache_manager.make_lru_cache("config_cache_snmp_fetch_interval")
+        )
+        self.__notification_plugin_parameters: LRUCache[
+            tuple[HostName, str], Mapping[str, object]
+        ] = cache_manager.make_lru_cache("config_cache_notification_plugin_parameters")
+        self.__snmp_backend: LRUCache[HostName, SNMPBackendEnum] = cache_manager.make_lru_cache(
+            "config_cache_snmp_backend"
+        )
         self.initialize()
 
     def initialize(self) -> ConfigCache:
@@ -1603,10 +1638,10 @@ class ConfigCache:
         # self-contained object that should be passed around (if it really
         # has to exist at all).
         self.autochecks_memoizer = AutochecksMemoizer()
-        self._effective_host_cache: dict[
+        self._effective_host_cache: LRUCache[
             tuple[HostName, ServiceName, tuple[tuple[str, str], ...]],
             HostName,
-        ] = {}
+        ] = cache_manager.make_lru_cache("config_cache_effective_host", maxsize=_SERVICE_CACHE_SIZE)
         self._check_mk_check_interval: dict[HostName, float] = {}
 
         self.hosts_config = make_hosts_config(self._loaded_config)
@@ -2873,6 +2908,12 @@ class ConfigCache:
         )
         return bulk_sizes[0] if bulk_sizes else 10
 
+    def max_concurrent_fetchers(self, hostname: HostName) -> int:
+        entries = self.ruleset_matcher.get_host_values_all(
+            hostname, max_concurrent_fetchers, self.label_manager.labels_of_host
+        )
+        return max(1, entries[0]) if entries else 1
+
     def _snmp_character_encoding(self, hostname: HostName) -> str | None:
         entries = self.ruleset_matcher.get_host_values_all(
             hostname, snmp_character_encodings, self.label_manager.labels_of_host
@@ -3449,10 +3490,9 @@ class ConfigCache:
         if (actual_hostname := self._effective_host_cache.get(key)) is not None:
             return actual_hostname
 
-        self._effective_host_cache[key] = self._effective_host(
-            host_name, service_name, service_labels
-        )
-        return self._effective_host_cache[key]
+        actual_hostname = self._effective_host(host_name, service_name, service_labels)
+        self._effective_host_cache[key] = actual_hostname
+        return actual_hostname
 
     def _effective_host(
         self,
@@ -3920,6 +3960,8 @@ class FetcherFactory:
             snmp_config=snmp_config,
             stored_walk_path=fetcher_config.stored_walk_path,
             walk_cache_path=fetcher_config.walk_cache_path,
+            walk_cache_max_age=snmp_walk_cache_max_age,
+            walk_cache_max_entries=snmp_walk_cache_max_entries,
         )
         return fetcher
 
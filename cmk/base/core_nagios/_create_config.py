@@ -6,11 +6,18 @@
 
 import base64
 import itertools
+import math
+import multiprocessing
+import os
+import re
 import socket
 import sys
+import tempfile
 from collections import Counter
-from collections.abc import Callable, Mapping, Sequence
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import suppress
+from dataclasses import dataclass
 from io import StringIO
 from pathlib import Path
 from socket import AddressFamily
@@ -113,6 +120,7 @@ class NagiosCore(core_config.MonitoringCore):
             precompile_mode=(
                 PrecompileMode.DELAYED if config.delay_precompile else PrecompileMode.INSTANT
             ),
+            workers=_config_workers(),
         )
 
     def _create_core_config(
@@ -159,6 +167,7 @@ class NagiosCore(core_config.MonitoringCore):
             default_address_family=default_address_family,
             ip_address_of=ip_address_of,
             service_depends_on=service_depends_on,
+            workers=_config_workers(),
         )
 
         store.save_text_to_file(cmk.utils.paths.nagios_objects_file, config_buffer.getvalue())
@@ -173,6 +182,7 @@ class NagiosCore(core_config.MonitoringCore):
         ip_address_of: ip_lookup.IPLookup,
         *,
         precompile_mode: PrecompileMode,
+        workers: int,
     ) -> None:
         with suppress(IOError):
             sys.stdout.write("Precompiling host checks...")
@@ -186,6 +196,7 @@ class NagiosCore(core_config.MonitoringCore):
             get_ip_stack_config,
             ip_address_of,
             precompile_mode=precompile_mode,
+            workers=workers,
         )
         with suppress(IOError):
             sys.stdout.write(tty.ok + "\n")
@@ -224,6 +235,146 @@ class NagiosConfig:
     def write_object(self, name: str, spec: ObjectSpec) -> None:
         self._outfile.write(_format_nagios_object(name, spec))
 
+    def next_hostcheck_command(self) -> CoreCommand:
+        return "check-mk-host-custom-%d" % (len(self.hostcheck_commands_to_define) + 1)
+
+
+# Host check commands are numbered over all hosts. The shards number them on their own and
+# mark the numbers, they are shifted when the shards are merged.
+_SHARD_COMMAND_NUMBER = re.compile("\0([0-9]+)\0")
+
+# More shards than workers even out hosts with many or few services
+_SHARDS_PER_WORKER = 4
+
+
+class _NagiosConfigShard(NagiosConfig):
+    """The objects of a part of the hosts, created in a worker process"""
+
+    def next_hostcheck_command(self) -> CoreCommand:
+        return "check-mk-host-custom-\0%d\0" % (len(self.hostcheck_commands_to_define) + 1)
+
+
+@dataclass(frozen=True)
+class _Shard:
+    path: Path
+    notify_host_configs: Mapping[HostName, NotificationHostConfig]
+    services: int
+    hostgroups_to_define: set[HostgroupName]
+    servicegroups_to_define: set[ServicegroupName]
+    contactgroups_to_define: set[_ContactgroupName]
+    checknames_to_define: set[CheckPluginName]
+    active_checks_to_define: dict[str, str]
+    custom_commands_to_define: set[CoreCommandName]
+    hostcheck_commands_to_define: list[tuple[CoreCommand, str]]
+    warnings: Sequence[str]
+
+
+_CreateHosts = Callable[
+    [NagiosConfig, Sequence[HostName], Counter], dict[HostName, NotificationHostConfig]
+]
+
+# Set before the workers are forked, so they share the loaded configuration
+_create_hosts_of_shard: _CreateHosts | None = None
+
+
+def _config_workers() -> int:
+    if not config.nagios_config_multiprocessing["use_multiprocessing"]:
+        return 1
+    cpus = os.cpu_count() or 1
+    return min(config.nagios_config_multiprocessing.get("limit_workers", cpus), cpus)
+
+
+def _create_hosts_in_parallel(
+    cfg: NagiosConfig,
+    hostnames: Sequence[HostName],
+    licensing_counter: Counter,
+    create_hosts: _CreateHosts,
+    workers: int,
+) -> dict[HostName, NotificationHostConfig]:
+    """Create the objects of the hosts in worker processes
+
+    The workers are forked after the configuration has been loaded. Each of them writes
+    the objects of a contiguous part of the hosts to a shard file. The shards are merged
+    in the order of the hosts, so the result is the same as creating them one by one.
+    """
+    global _create_hosts_of_shard
+
+    shard_size = math.ceil(len(hostnames) / (workers * _SHARDS_PER_WORKER))
+    shards = [hostnames[n : n + shard_size] for n in range(0, len(hostnames), shard_size)]
+    cmk.utils.paths.tmp_dir.mkdir(parents=True, exist_ok=True)
+
+    all_notify_host_configs: dict[HostName, NotificationHostConfig] = {}
+    _create_hosts_of_shard = create_hosts
+    try:
+        with (
+            tempfile.TemporaryDirectory(dir=cmk.utils.paths.tmp_dir, prefix="nagios_") as tmp_dir,
+            ProcessPoolExecutor(
+                max_workers=min(workers, len(shards)),
+                mp_context=multiprocessing.get_context("fork"),
+            ) as executor,
+        ):
+            for shard in executor.map(
+                _create_shard, [Path(tmp_dir, str(n)) for n in range(len(shards))], shards
+            ):
+                _merge_shard(cfg, shard, licensing_counter)
+                all_notify_host_configs.update(shard.notify_host_configs)
+    finally:
+        _create_hosts_of_shard = None
+
+    return all_notify_host_configs
+
+
+def _create_shard(path: Path, hostnames: Sequence[HostName]) -> _Shard:
+    assert _create_hosts_of_shard is not None
+    config_warnings.initialize()
+    licensing_counter = Counter("services")
+    with path.open("w") as outfile:
+        cfg = _NagiosConfigShard(outfile, hostnames)
+        notify_host_configs = _create_hosts_of_shard(cfg, hostnames, licensing_counter)
+
+    return _Shard(
+        path=path,
+        notify_host_configs=notify_host_configs,
+        services=licensing_counter["services"],
+        hostgroups_to_define=cfg.hostgroups_to_define,
+        servicegroups_to_define=cfg.servicegroups_to_define,
+        contactgroups_to_define=cfg.contactgroups_to_define,
+        checknames_to_define=cfg.checknames_to_define,
+        active_checks_to_define=cfg.active_checks_to_define,
+        custom_commands_to_define=cfg.custom_commands_to_define,
+        hostcheck_commands_to_define=cfg.hostcheck_commands_to_define,
+        warnings=config_warnings.g_configuration_warnings,
+    )
+
+
+def _merge_shard(cfg: NagiosConfig, shard: _Shard, licensing_counter: Counter) -> None:
+    def renumber(text: str) -> str:
+        return _SHARD_COMMAND_NUMBER.sub(lambda m: str(int(m.group(1)) + offset), text)
+
+    offset = len(cfg.hostcheck_commands_to_define)
+    with shard.path.open() as shard_file:
+        for chunk in _read_chunks(shard_file):
+            cfg.write_str(renumber(chunk) if shard.hostcheck_commands_to_define else chunk)
+
+    licensing_counter["services"] += shard.services
+    cfg.hostgroups_to_define.update(shard.hostgroups_to_define)
+    cfg.servicegroups_to_define.update(shard.servicegroups_to_define)
+    cfg.contactgroups_to_define.update(shard.contactgroups_to_define)
+    cfg.checknames_to_define.update(shard.checknames_to_define)
+    cfg.active_checks_to_define.update(shard.active_checks_to_define)
+    cfg.custom_commands_to_define.update(shard.custom_commands_to_define)
+    cfg.hostcheck_commands_to_define.extend(
+        (renumber(command), renumber(command_line))
+        for command, command_line in shard.hostcheck_commands_to_define
+    )
+    config_warnings.g_configuration_warnings.extend(shard.warnings)
+
+
+def _read_chunks(shard_file: IO[str]) -> Iterator[str]:
+    """Read whole lines, the marked numbers of the host check commands are not split up"""
+    while chunk := shard_file.read(1024 * 1024):
+        yield chunk + shard_file.readline()
+
 
 def _validate_licensing(
     hosts: Hosts, licensing_handler: LicensingHandler, licensing_counter: Counter
@@ -249,27 +400,38 @@ def create_config(
     ],
     ip_address_of: ip_lookup.IPLookup,
     service_depends_on: Callable[[HostAddress, ServiceName], Sequence[ServiceName]],
+    workers: int = 1,
 ) -> None:
     cfg = NagiosConfig(outfile, hostnames)
 
     _output_conf_header(cfg)
 
+    def create_hosts(
+        cfg: NagiosConfig, hostnames: Sequence[HostName], licensing_counter: Counter
+    ) -> dict[HostName, NotificationHostConfig]:
+        return {
+            hostname: _create_nagios_config_host(
+                cfg,
+                config_cache,
+                service_name_config,
+                plugins,
+                hostname,
+                get_ip_stack_config(hostname),
+                default_address_family(hostname),
+                passwords,
+                licensing_counter,
+                ip_address_of,
+                service_depends_on,
+            )
+            for hostname in hostnames
+        }
+
     licensing_counter = Counter("services")
-    all_notify_host_configs: dict[HostName, NotificationHostConfig] = {}
-    for hostname in hostnames:
-        all_notify_host_configs[hostname] = _create_nagios_config_host(
-            cfg,
-            config_cache,
-            service_name_config,
-            plugins,
-            hostname,
-            get_ip_stack_config(hostname),
-            default_address_family(hostname),
-            passwords,
-            licensing_counter,
-            ip_address_of,
-            service_depends_on,
-        )
+    all_notify_host_configs = (
+        _create_hosts_in_parallel(cfg, hostnames, licensing_counter, create_hosts, workers)
+        if workers > 1 and len(hostnames) > 1
+        else create_hosts(cfg, hostnames, licensing_counter)
+    )
 
     _validate_licensing(config_cache.hosts_config, licensing_handler, licensing_counter)
 
@@ -391,7 +553,7 @@ def create_nagios_host_spec(
             host_spec[key] = value
 
     def host_check_via_service_status(service: ServiceName) -> CoreCommand:
-        command = "check-mk-host-custom-%d" % (len(cfg.hostcheck_commands_to_define) + 1)
+        command = cfg.next_hostcheck_command()
         service_with_hostname = replace_macros_in_str(
             service,
             {"$HOSTNAME$": hostname},
@@ -12,15 +12,19 @@ in adhoc mode (about 75%).
 """
 
 import enum
+import hashlib
+import importlib.util
 import itertools
+import multiprocessing
 import os
 import py_compile
 import re
 import socket
 import sys
 from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import assert_never
+from typing import assert_never, NoReturn
 
 import cmk.ccc.debug
 import cmk.checkengine.plugin_backend as agent_based_register
@@ -40,6 +44,7 @@ from cmk.checkengine.plugins import (
 )
 from cmk.discover_plugins import PluginLocation
 from cmk.server_side_calls_backend import load_special_agents
+from cmk.utils.config_path import VersionedConfigPath
 from cmk.utils.ip_lookup import IPLookup, IPStackConfig
 from cmk.utils.log import console
 from cmk.utils.rulesets import RuleSetName
@@ -61,7 +66,12 @@ class PrecompileMode(enum.Enum):
 
 
 class HostCheckStore:
-    """Caring about persistence of the precompiled host check files"""
+    """Caring about persistence of the precompiled host check files
+
+    The fingerprints of the host checks are stored along with them. A host check of the
+    previous configuration that has the same fingerprint is reused instead of compiling
+    it again.
+    """
 
     @staticmethod
     def host_check_file_path(config_path: Path, hostname: HostName) -> Path:
@@ -73,6 +83,46 @@ class HostCheckStore:
         path = HostCheckStore.host_check_file_path(config_path, hostname)
         return path.with_suffix(path.suffix + ".py")
 
+    @staticmethod
+    def fingerprints_file_path(config_path: Path) -> Path:
+        # host names can't start with a dot
+        return config_path / "host_checks" / ".fingerprints"
+
+    @staticmethod
+    def fingerprint(host_check: str) -> str:
+        # The host check contains everything it depends on, except for the Python version
+        return hashlib.sha256(importlib.util.MAGIC_NUMBER + host_check.encode()).hexdigest()
+
+    def load_fingerprints(self, config_path: Path) -> Mapping[HostName, str]:
+        return store.load_object_from_file(self.fingerprints_file_path(config_path), default={})
+
+    def save_fingerprints(self, config_path: Path, fingerprints: Mapping[HostName, str]) -> None:
+        path = self.fingerprints_file_path(config_path)
+        path.parent.mkdir(mode=0o770, exist_ok=True, parents=True)
+        store.save_object_to_file(path, dict(fingerprints))
+
+    def reuse(self, previous_config_path: Path, config_path: Path, hostname: HostName) -> bool:
+        """Link the files of the host check of a previous configuration
+
+        Returns False if they are not available.
+        """
+        try:
+            for path in (
+                self.host_check_source_file_path(previous_config_path, hostname),
+                self.host_check_file_path(previous_config_path, hostname),
+            ):
+                target = config_path / path.relative_to(previous_config_path)
+                target.parent.mkdir(mode=0o770, exist_ok=True, parents=True)
+                if path.is_symlink():  # not yet compiled (delayed mode)
+                    target.symlink_to(os.readlink(path))
+                else:
+                    # Files are replaced, never modified in place, so sharing them is safe.
+                    os.link(path, target)
+        except OSError:
+            return False
+        console.verbose(" unchanged.", file=sys.stderr)
+        return True
+
     def write(
         self,
         config_path: Path,
@@ -95,7 +145,9 @@ class HostCheckStore:
                 py_compile.compile(
                     file=str(source_filename),
                     cfile=str(compiled_filename),
-                    dfile=str(compiled_filename),
+                    dfile=str(
+                        self.host_check_file_path(VersionedConfigPath.LATEST_CONFIG, hostname)
+                    ),
                     doraise=True,
                 )
                 os.chmod(compiled_filename, 0o750)  # nosec B103 # BNS:c29b0e
@@ -115,6 +167,7 @@ def precompile_hostchecks(
     ip_address_of: IPLookup,
     *,
     precompile_mode: PrecompileMode,
+    workers: int = 1,
 ) -> None:
     console.verbose("Creating precompiled host check config...")
     hosts_config = config_cache.hosts_config
@@ -124,6 +177,14 @@ def precompile_hostchecks(
     console.verbose("Precompiling host checks...")
 
     host_check_store = HostCheckStore()
+    previous_config_path = VersionedConfigPath.LATEST_CONFIG
+    previous_fingerprints = (
+        host_check_store.load_fingerprints(previous_config_path)
+        if previous_config_path.resolve() != config_path.resolve()
+        else {}
+    )
+    fingerprints: dict[HostName, str] = {}
+    changed: dict[HostName, str] = {}
     for hostname in {
         # Inconsistent with `create_config` above.
         hn
@@ -137,30 +198,85 @@ def precompile_hostchecks(
             host_check = dump_precompiled_hostcheck(
                 config_cache,
                 service_name_config,
-                config_path,
                 hostname,
                 get_ip_stack_config,
                 plugins,
                 ip_address_of=ip_address_of,
                 precompile_mode=precompile_mode,
             )
-
-            host_check_store.write(
-                config_path, hostname, host_check, precompile_mode=precompile_mode
-            )
         except MKIPAddressLookupError as e:
             console.error(f"Error precompiling checks for host {hostname}: {e}", file=sys.stderr)
+            continue
         except Exception as e:
-            if cmk.ccc.debug.enabled():
-                raise
-            console.error(f"Error precompiling checks for host {hostname}: {e}", file=sys.stderr)
-            sys.exit(5)
+            _handle_precompile_error(hostname, e)
+
+        fingerprints[hostname] = host_check_store.fingerprint(host_check)
+        if previous_fingerprints.get(hostname) != fingerprints[hostname] or not (
+            host_check_store.reuse(previous_config_path, config_path, hostname)
+        ):
+            console.verbose(" changed.", file=sys.stderr)
+            changed[hostname] = host_check
+
+    _write_host_checks(
+        host_check_store,
+        config_path,
+        changed,
+        precompile_mode=precompile_mode,
+        # Delayed compilation merely creates symlinks, that is not worth any processes.
+        workers=workers if precompile_mode is PrecompileMode.INSTANT else 1,
+    )
+    host_check_store.save_fingerprints(config_path, fingerprints)
+
+
+def _write_host_checks(
+    host_check_store: HostCheckStore,
+    config_path: Path,
+    host_checks: Mapping[HostName, str],
+    *,
+    precompile_mode: PrecompileMode,
+    workers: int,
+) -> None:
+    if workers < 2 or len(host_checks) < 2:
+        for hostname, host_check in host_checks.items():
+            try:
+                host_check_store.write(
+                    config_path, hostname, host_check, precompile_mode=precompile_mode
+                )
+            except Exception as e:
+                _handle_precompile_error(hostname, e)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(host_checks)),
+        mp_context=multiprocessing.get_context("fork"),
+    ) as executor:
+        futures: dict[HostName, Future[None]] = {
+            hostname: executor.submit(
+                host_check_store.write,
+                config_path,
+                hostname,
+                host_check,
+                precompile_mode=precompile_mode,
+            )
+            for hostname, host_check in host_checks.items()
+        }
+        for hostname, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                _handle_precompile_error(hostname, e)
+
+
+def _handle_precompile_error(hostname: HostName, e: Exception) -> NoReturn:
+    if cmk.ccc.debug.enabled():
+        raise e
+    console.error(f"Error precompiling checks for host {hostname}: {e}", file=sys.stderr)
+    sys.exit(5)
 
 
 def dump_precompiled_hostcheck(
     config_cache: ConfigCache,
     service_name_config: PassiveServiceNameConfig,
-    config_path: Path,
     hostname: HostName,
     get_ip_stack_config: Callable[[HostName], IPStackConfig],
     plugins: AgentBasedPlugins,
@@ -211,8 +327,12 @@ def dump_precompiled_hostcheck(
     host_check_config = HostCheckConfig(
         delay_precompile=precompile_mode
         is PrecompileMode.DELAYED,  # propagation of enum would break b/c of the repr() below :-(
-        src=str(HostCheckStore.host_check_source_file_path(config_path, hostname)),
-        dst=str(HostCheckStore.host_check_file_path(config_path, hostname)),
+        # The core runs the host checks of the latest configuration. Referring to them (instead
+        # of this configuration) keeps the host check the same, as long as the host is unchanged.
+        src=str(
+            HostCheckStore.host_check_source_file_path(VersionedConfigPath.LATEST_CONFIG, hostname)
+        ),
+        dst=str(HostCheckStore.host_check_file_path(VersionedConfigPath.LATEST_CONFIG, hostname)),
         verify_site_python=verify_site_python,
         locations=locations,
         checks_to_load=legacy_checks_to_load,
@@ -47,6 +47,8 @@ agent_exclude_sections: list[RuleSpec[dict[str, str]]] = []
 snmp_ports: list[RuleSpec[int]] = []
 tcp_connect_timeout = 5.0
 tcp_connect_timeouts: list[RuleSpec[float]] = []
+# Maximum number of data sources fetched concurrently per host (1: fetch sequentially)
+max_concurrent_fetchers: list[RuleSpec[int]] = []
 use_dns_cache = True  # prevent DNS by using own cache file
 delay_precompile = False  # delay Python compilation to Nagios execution
 restart_locking: Literal["abort", "wait"] | None = "abort"
@@ -97,6 +99,10 @@ snmp_communities: list[RuleSpec[SNMPCredentials]] = []
 explicit_snmp_communities: dict[HostName | HostAddress, SNMPCredentials] = {}
 snmp_timing: list[RuleSpec[SNMPTiming]] = []
 snmp_character_encodings: list[RuleSpec[str | None]] = []
+# Walks of OIDs marked as cached are reused for this many seconds (None: until the next discovery)
+snmp_walk_cache_max_age: float | None = None
+# Upper limit of the cached walks kept per host (None: unlimited)
+snmp_walk_cache_max_entries: int | None = 1000
 
 # Custom variables
 explicit_service_custom_variables: dict[tuple[HostName, ServiceName], dict[str, str]] = {}
@@ -172,6 +178,19 @@ dummy_check_commandline = 'echo "ERROR - you did an active check on this service
 nagios_illegal_chars = "`;~!$%^&*|'\"<>?,="
 cmc_illegal_chars = ";\t"  # Tab is an illegal character for CMC and semicolon breaks metric system
 
+
+class NagiosConfigMultiprocessingMandatory(TypedDict):
+    use_multiprocessing: bool
+
+
+class NagiosConfigMultiprocessing(NagiosConfigMultiprocessingMandatory, total=False):
+    limit_workers: int
+
+
+# create the host and service objects of the Nagios configuration and compile the host checks
+# in parallel processes
+nagios_config_multiprocessing: NagiosConfigMultiprocessing = {"use_multiprocessing": False}
+
 # Data to be defined in main.mk
 tag_config: TagConfigSpec = {
     "aux_tags": [],
@@ -940,7 +940,7 @@ modes.register(
 #   '----------------------------------------------------------------------'
 
 
-def mode_update_dns_cache() -> None:
+def mode_update_dns_cache(options: Mapping[str, int]) -> None:
     config_cache = config.load(discovery_rulesets=()).config_cache
     hosts_config = config_cache.hosts_config
     ip_lookup_config = config_cache.ip_lookup_config()
@@ -955,6 +955,7 @@ def mode_update_dns_cache() -> None:
             _forced_ip_lookup()  # this makes little sense.
             or ip_lookup.make_lookup_ip_address(ip_lookup_config)
         ),
+        max_age=options.get("max-age", 0),
     )
 
 
@@ -963,6 +964,18 @@ modes.register(
         long_option="update-dns-cache",
         handler_function=mode_update_dns_cache,
         short_help="Update IP address lookup cache",
+        sub_options=[
+            Option(
+                long_option="max-age",
+                argument=True,
+                argument_descr="SECONDS",
+                argument_conv=int,
+                short_help=(
+                    "Only look up addresses that have not been looked up within the last "
+                    "SECONDS. Failed lookups are retried with an increasing delay."
+                ),
+            ),
+        ],
     )
 )
 
@@ -2076,8 +2089,8 @@ def mode_check_discovery(options: Mapping[str, object], hostname: HostName) -> i
 
     check_results: Sequence[ActiveCheckResult] = []
     with error_handler:
-        fetched = fetcher(hostname, ip_address=None)
         with CPUTracker(console.debug) as tracker:
+            fetched = fetcher(hostname, ip_address=None)
             check_results = execute_check_discovery(
                 hostname,
                 is_cluster=hostname in config_cache.hosts_config.clusters,
@@ -2629,7 +2642,6 @@ def run_checking(
         ) as value_store_manager,
     ):
         console.debug(f"Checkmk version {cmk_version.__version__}")
-        fetched = fetcher(hostname, ip_address=ipaddress)
         check_plugins = CheckerPluginMapper(
             config_cache,
             plugins.check_plugins,
@@ -2639,6 +2651,7 @@ def run_checking(
             rtc_package=None,
         )
         with CPUTracker(console.debug) as tracker:
+            fetched = fetcher(hostname, ip_address=ipaddress)
             checks_result = execute_checkmk_checks(
                 hostname=hostname,
                 fetched=((f[0], f[1]) for f in fetched),
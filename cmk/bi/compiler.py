@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import os
 import time
+from collections.abc import Collection
 from multiprocessing.pool import Pool
 from pathlib import Path
 from typing import TypedDict
@@ -22,7 +23,7 @@ from cmk.bi.data_fetcher import BIStructureFetcher, SiteProgramStart
 from cmk.bi.filesystem import BIFileSystem, get_default_site_filesystem
 from cmk.bi.lib import SitesCallback
 from cmk.bi.packs import BIAggregationPacks
-from cmk.bi.searcher import BISearcher
+from cmk.bi.searcher import BISearcher, host_fingerprints, SearchDependencies
 from cmk.bi.trees import BICompiledAggregation, BICompiledRule, FrozenBIInfo
 from cmk.ccc import store
 from cmk.ccc.exceptions import MKGeneralException
@@ -59,6 +60,8 @@ class BICompiler:
 
         self._aggregation_store = storage.AggregationStore(self._fs.cache)
         self._metadata_store = storage.MetadataStore(self._fs)
+        self._dependency_store = storage.DependencyStore(self._fs.cache)
+        self._index_store = storage.AggregationIndexStore(self._fs.cache)
         self._frozen_store = storage.FrozenAggregationStore(self._fs.var)
         self._lookup_store = storage.LookupStore(redis_client or get_redis_client())
 
@@ -70,19 +73,26 @@ class BICompiler:
     def compiled_aggregations(self) -> dict[str, BICompiledAggregation]:
         return self._compiled_aggregations
 
+    @property
+    def aggregation_index(self) -> storage.AggregationIndex | None:
+        return self._index_store.get()
+
     def get_aggregation_by_name(
         self, aggr_name: str
     ) -> tuple[BICompiledAggregation, BICompiledRule] | None:
         for _name, compiled_aggregation in self._compiled_aggregations.items():
-            for branch in compiled_aggregation.branches:
-                if branch.properties.title == aggr_name:
-                    return compiled_aggregation, branch
+            if branch := compiled_aggregation.branch_by_title(aggr_name):
+                return compiled_aggregation, branch
         return None
 
     def load_compiled_aggregations(self) -> None:
         try:
             self._check_compilation_status()
         finally:
+            stale = self._load_compiled_aggregations()
+        if stale:
+            # E.g. stored by a former version
+            self._check_compilation_status(stale=stale)
             self._load_compiled_aggregations()
 
     def get_frozen_aggr_id(self, frozen_info: FrozenBIInfo) -> str:
@@ -157,6 +167,7 @@ class BICompiler:
 
         if computed_new_frozen_branch:
             self._lookup_store.generate_aggregation_lookups(updated_aggregations)
+            self._index_store.save(storage.AggregationIndex.build(updated_aggregations))
 
         return updated_aggregations
 
@@ -168,17 +179,44 @@ class BICompiler:
         loaded_identifiers = self._get_currently_loaded_aggregation_identifiers()
         return stored_identifiers - loaded_identifiers
 
-    def _load_compiled_aggregations(self) -> None:
+    def _load_compiled_aggregations(self) -> set[storage.Identifier]:
+        """Load the stored aggregations, returns the identifiers of the stale ones"""
+        stale = set()
         for identifier in self._get_vanished_aggregation_identifiers():
-            aggregation = self._aggregation_store.get_by_identifier(identifier)
+            try:
+                aggregation = self._aggregation_store.get_by_identifier(identifier)
+            except storage.StaleAggregation as e:
+                _LOGGER.debug("Stale cached aggregation result %s: %s", identifier, e)
+                stale.add(identifier)
+                continue
+            except storage.AggregationNotFound:
+                continue  # Removed by a concurrent compilation
             _LOGGER.debug("Loaded cached aggregation result: %s", aggregation.id)
             self._compiled_aggregations[aggregation.id] = aggregation
 
         self._compiled_aggregations = self._manage_frozen_branches(self._compiled_aggregations)
-
-    def _check_compilation_status(self) -> None:
+        return stale
+
+    def _drop_stale_aggregations(self, stale: Collection[storage.Identifier]) -> bool:
+        """Delete the aggregations that are still stale, returns whether there were any"""
+        dropped = False
+        for identifier in stale:
+            try:
+                self._aggregation_store.get_by_identifier(identifier)
+            except storage.StaleAggregation:
+                self._aggregation_store.delete_by_identifier(identifier)
+                dropped = True
+            except storage.AggregationNotFound:
+                pass
+        return dropped
+
+    def _check_compilation_status(self, stale: Collection[storage.Identifier] = ()) -> None:
+        """Compile the aggregations if required
+
+        The stale aggregations are deleted from the store, so they are compiled again.
+        """
         current_configstatus = self.compute_current_configstatus()
-        if not self._compilation_required(current_configstatus):
+        if not stale and not self._compilation_required(current_configstatus):
             _LOGGER.debug("No compilation required.")
             return
 
@@ -186,31 +224,89 @@ class BICompiler:
             # Re-check compilation required after lock has been required
             # Another apache might have done the job
             current_configstatus = self.compute_current_configstatus()
-            if not self._compilation_required(current_configstatus):
+            if not self._drop_stale_aggregations(stale) and not self._compilation_required(
+                current_configstatus
+            ):
                 _LOGGER.debug("No compilation required. Another process already compiled it.")
                 return
 
             self.prepare_for_compilation(current_configstatus["online_sites"])
 
-            for aggregation in self._bi_packs.get_all_aggregations():
-                start = time.perf_counter()
-                self._compiled_aggregations[aggregation.id] = aggregation.compile(self.bi_searcher)
-                end = time.perf_counter()
-                _LOGGER.debug(f"Compilation of {aggregation.id} took {end - start:f}")
+            compiled_ids, dependencies = self._compile_aggregations(
+                config_changed=current_configstatus["configfile_timestamp"]
+                > self._metadata_store.get_last_compilation()
+            )
 
             self._verify_aggregation_title_uniqueness(self._compiled_aggregations)
 
-            for compiled_aggregation in self._compiled_aggregations.values():
-                self._store_compiled_aggregation(compiled_aggregation)
+            for aggr_id in compiled_ids:
+                self._store_compiled_aggregation(self._compiled_aggregations[aggr_id])
+            self._dependency_store.save(dependencies)
 
             self._compiled_aggregations = self._manage_frozen_branches(self._compiled_aggregations)
             self._lookup_store.generate_aggregation_lookups(self._compiled_aggregations)
+            self._index_store.save(storage.AggregationIndex.build(self._compiled_aggregations))
 
         known_sites = {kv[0]: kv[1] for kv in current_configstatus.get("known_sites", set())}
         self._cleanup_vanished_aggregations()
         self._bi_structure_fetcher.cleanup_orphaned_files(known_sites)
         self._metadata_store.update_last_compilation(current_configstatus["configfile_timestamp"])
 
+    def _compile_aggregations(
+        self, *, config_changed: bool
+    ) -> tuple[list[str], storage.CompilationDependencies]:
+        """Compile the aggregations affected by the changes
+
+        Returns the IDs of the compiled aggregations and the dependencies of all.
+
+        Unless the configuration has changed, only the aggregations depending on
+        hosts whose structure data has changed are compiled. All others are
+        taken from the aggregation store.
+        """
+        fingerprints = host_fingerprints(self.bi_searcher.hosts)
+        previous = None if config_changed else self._dependency_store.get()
+        changed_hosts = (
+            set()
+            if previous is None
+            else {
+                host_name
+                for host_name in fingerprints.keys() | previous.host_fingerprints.keys()
+                if fingerprints.get(host_name) != previous.host_fingerprints.get(host_name)
+            }
+        )
+
+        dependencies: dict[str, SearchDependencies] = {}
+        compiled_ids = []
+        for aggregation in self._bi_packs.get_all_aggregations():
+            if (
+                previous is not None
+                and (aggregation_dependencies := previous.aggregations.get(aggregation.id))
+                and not aggregation_dependencies.affected_by(changed_hosts, self.bi_searcher.hosts)
+            ):
+                try:
+                    self._compiled_aggregations[aggregation.id] = self._aggregation_store.get(
+                        aggregation.id
+                    )
+                    dependencies[aggregation.id] = aggregation_dependencies
+                    continue
+                except storage.AggregationNotFound:
+                    pass
+
+            start = time.perf_counter()
+            with self.bi_searcher.record_dependencies() as dependencies[aggregation.id]:
+                self._compiled_aggregations[aggregation.id] = aggregation.compile(self.bi_searcher)
+            end = time.perf_counter()
+            _LOGGER.debug(f"Compilation of {aggregation.id} took {end - start:f}")
+            compiled_ids.append(aggregation.id)
+
+        _LOGGER.debug(
+            "Compiled %d of %d aggregations (%d hosts changed)",
+            len(compiled_ids),
+            len(dependencies),
+            len(changed_hosts),
+        )
+        return compiled_ids, storage.CompilationDependencies(fingerprints, dependencies)
+
     def _get_multiprocessing_pool(self, aggregation_count: int) -> Pool:
         # HACK: due to known constraints with multiprocessing in Python, this is a simple way to
         # "inject" the BI searcher dependency to our separate processes. An alternative approach
@@ -246,8 +342,7 @@ class BICompiler:
     ) -> None:
         used_titles: dict[str, str] = {}
         for aggr_id, bi_aggregation in compiled_aggregations.items():
-            for bi_branch in bi_aggregation.branches:
-                branch_title = bi_branch.properties.title
+            for branch_title in bi_aggregation.branch_titles:
                 if branch_title in used_titles:
                     raise MKGeneralException(
                         _(
@@ -4,11 +4,12 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import copy
-from collections.abc import Iterator
+from collections.abc import Collection, Iterator, Mapping, Set
 from typing import NamedTuple
 
 from cmk.bi.data_fetcher import BIStatusFetcher
 from cmk.bi.lib import NodeResultBundle, RequiredBIElement
+from cmk.bi.storage import AggregationIndex
 from cmk.bi.trees import BICompiledAggregation, BICompiledRule
 from cmk.ccc.hostaddress import HostName
 from cmk.ccc.plugin_registry import Registry
@@ -57,9 +58,11 @@ class BIComputer:
         self,
         compiled_aggregations: dict[str, BICompiledAggregation],
         bi_status_fetcher: BIStatusFetcher,
+        aggregation_index: AggregationIndex | None = None,
     ) -> None:
         self._compiled_aggregations = compiled_aggregations
         self._bi_status_fetcher = bi_status_fetcher
+        self._aggregation_index = aggregation_index
         self._legacy_branch_cache: dict = {}
 
     def compute_aggregation_result(
@@ -74,9 +77,8 @@ class BIComputer:
         if not compiled_aggregation:
             return []
 
-        for branch in compiled_aggregation.branches:
-            if branch.properties.title == title:
-                return self.compute_results([(compiled_aggregation, [branch])])
+        if branch := compiled_aggregation.branch_by_title(title):
+            return self.compute_results([(compiled_aggregation, [branch])])
         return []
 
     def compute_result_for_filter(
@@ -90,14 +92,49 @@ class BIComputer:
     def get_required_aggregations(
         self, bi_aggregation_filter: BIAggregationFilter
     ) -> list[tuple[BICompiledAggregation, list[BICompiledRule]]]:
+        indexed_titles = self._indexed_branch_titles(bi_aggregation_filter)
         return [
             (
                 compiled_aggregation,
-                self.get_filtered_aggregation_branches(compiled_aggregation, bi_aggregation_filter),
+                self.get_filtered_aggregation_branches(
+                    compiled_aggregation, bi_aggregation_filter, indexed_titles
+                ),
             )
             for compiled_aggregation in self._compiled_aggregations.values()
         ]
 
+    def _indexed_branch_titles(
+        self, bi_aggregation_filter: BIAggregationFilter
+    ) -> dict[str, Set[str] | None] | None:
+        """The titles of the branches matching the filter, by indexed aggregation
+
+        Aggregations matching none of the filtered groups are left out. None
+        for an aggregation means all of its branches may match. The result is
+        None if there is no index, or the filter can not be looked up in it.
+        """
+        if self._aggregation_index is None or not (
+            bi_aggregation_filter.hosts
+            or bi_aggregation_filter.services
+            or bi_aggregation_filter.group_names
+        ):
+            return None
+
+        aggregation_ids = (
+            self._aggregation_index.aggregations_of_groups(bi_aggregation_filter.group_names)
+            if bi_aggregation_filter.group_names
+            else self._aggregation_index.aggregation_ids
+        )
+        if not (bi_aggregation_filter.hosts or bi_aggregation_filter.services):
+            return dict.fromkeys(aggregation_ids)
+
+        titles: dict[str, set[str]] = {aggr_id: set() for aggr_id in aggregation_ids}
+        for reference in self._aggregation_index.branches(
+            host_names=bi_aggregation_filter.hosts, services=bi_aggregation_filter.services
+        ):
+            if (aggregation_titles := titles.get(reference.aggregation_id)) is not None:
+                aggregation_titles.add(reference.title)
+        return dict(titles)
+
     def get_required_elements(
         self, required_aggregations: list[tuple[BICompiledAggregation, list[BICompiledRule]]]
     ) -> set[RequiredBIElement]:
@@ -132,13 +169,33 @@ class BIComputer:
         self,
         compiled_aggregation: BICompiledAggregation,
         bi_aggregation_filter: BIAggregationFilter,
+        indexed_titles: Mapping[str, Set[str] | None] | None = None,
     ) -> list[BICompiledRule]:
+        titles: Collection[str] = bi_aggregation_filter.aggr_titles
+        if (
+            indexed_titles is not None
+            and self._aggregation_index is not None
+            and compiled_aggregation.id in self._aggregation_index.aggregation_ids
+        ):
+            if compiled_aggregation.id not in indexed_titles:
+                return []
+            if (aggregation_titles := indexed_titles[compiled_aggregation.id]) is not None:
+                if not aggregation_titles:
+                    return []
+                titles = aggregation_titles
+
         if not self._use_aggregation(compiled_aggregation, bi_aggregation_filter):
             return []
 
+        # Stored aggregations only materialize the branches of the filtered hosts
+        candidates = compiled_aggregation.candidate_branches(
+            host_names=bi_aggregation_filter.hosts
+            or [host_name for host_name, _service in bi_aggregation_filter.services],
+            titles=titles,
+        )
         return [
             compiled_branch
-            for compiled_branch in compiled_aggregation.branches
+            for compiled_branch in candidates
             if self._use_aggregation_branch(compiled_branch, bi_aggregation_filter)
         ]
 
@@ -34,12 +34,22 @@ class BIFileSystemCache:
     def last_compilation(self) -> Path:
         return self._root / "last_compilation"
 
+    @functools.cached_property
+    def compilation_dependencies(self) -> Path:
+        return self._root / "compilation_dependencies"
+
+    @functools.cached_property
+    def aggregation_index(self) -> Path:
+        return self._root / "aggregation_index"
+
     def get_site_structure_data_path(self, site_id: str, timestamp: str) -> Path:
         return self.site_structure_data / f"{BI_SITE_CACHE_PREFIX}.{site_id}.{timestamp}"
 
     def clear_compilation_cache(self) -> None:
         self.compilation_lock.unlink(missing_ok=True)
         self.last_compilation.unlink(missing_ok=True)
+        self.compilation_dependencies.unlink(missing_ok=True)
+        self.aggregation_index.unlink(missing_ok=True)
 
         for compilation_path in self.compiled_aggregations.iterdir():
             compilation_path.unlink(missing_ok=True)
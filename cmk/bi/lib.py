@@ -430,6 +430,10 @@ class ABCBISearcher(ABC):
     ) -> tuple[list[BIHostData], dict]:
         raise NotImplementedError()
 
+    def search_host_names(self, pattern: str) -> tuple[list[BIHostData], dict]:
+        """Match the names of all hosts against a pattern"""
+        return self.get_host_name_matches(list(self.hosts.values()), pattern)
+
     @abstractmethod
     def get_service_description_matches(
         self, host_matches: list[BIHostSearchMatch], pattern: str
@@ -3,8 +3,11 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
-from collections.abc import Iterable, Mapping
-from typing import Any
+import hashlib
+from collections.abc import Iterable, Iterator, Mapping
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Self
 
 from cmk.bi.lib import ABCBISearcher, BIHostData, BIHostSearchMatch, BIServiceSearchMatch
 from cmk.utils.labels import LabelGroups
@@ -23,6 +26,128 @@ from cmk.utils.tags import TagGroupID
 
 # Search data used by bi_searcher
 
+
+@dataclass
+class SearchDependencies:
+    """The structure data a compilation depended on
+
+    A change of a host can only change the result of the compilation if
+    * the host has been looked at (matched by a search or looked up by name), or
+    * the host matches one of the searches over all hosts after the change.
+    """
+
+    host_names: set[str] = field(default_factory=set)
+    host_conditions: list[dict] = field(default_factory=list)
+    host_name_patterns: list[str] = field(default_factory=list)
+    # Set if all hosts have been iterated outside of the searches above
+    all_hosts: bool = False
+
+    def serialize(self) -> dict[str, Any]:
+        return {
+            "host_names": sorted(self.host_names),
+            "host_conditions": self.host_conditions,
+            "host_name_patterns": self.host_name_patterns,
+            "all_hosts": self.all_hosts,
+        }
+
+    @classmethod
+    def deserialize(cls, serialized: Mapping[str, Any]) -> Self:
+        return cls(
+            set(serialized["host_names"]),
+            list(serialized["host_conditions"]),
+            list(serialized["host_name_patterns"]),
+            serialized["all_hosts"],
+        )
+
+    def affected_by(self, changed_hosts: Iterable[str], hosts: Mapping[str, BIHostData]) -> bool:
+        """Is the compilation affected by the changed hosts (as found in hosts now)"""
+        changed_hosts = set(changed_hosts)
+        if not changed_hosts:
+            return False
+        if self.all_hosts or not self.host_names.isdisjoint(changed_hosts):
+            return True
+
+        searcher = BISearcher()
+        searcher.set_hosts({name: hosts[name] for name in changed_hosts if name in hosts})
+        return any(searcher.search_hosts(c) for c in self.host_conditions) or any(
+            searcher.search_host_names(p)[0] for p in self.host_name_patterns
+        )
+
+
+def host_fingerprints(hosts: Mapping[str, BIHostData]) -> dict[str, str]:
+    """Fingerprints of the structure data of the hosts, stable across processes"""
+    return {
+        name: hashlib.sha256(
+            repr(
+                (
+                    host.site_id,
+                    _sorted(host.tags),
+                    _sorted(host.labels),
+                    host.folder,
+                    sorted(
+                        (description, _sorted(service.tags), _sorted(service.labels))
+                        for description, service in host.services.items()
+                    ),
+                    host.children,
+                    host.parents,
+                    host.alias,
+                    host.name,
+                )
+            ).encode()
+        ).hexdigest()
+        for name, host in hosts.items()
+    }
+
+
+def _sorted(values: Iterable | Mapping) -> list:
+    # The iteration order of sets and dicts depends on the process, their content does not.
+    return sorted(values.items() if isinstance(values, Mapping) else values)
+
+
+class _RecordingHosts(dict[str, BIHostData]):
+    """The hosts of the searcher, noting which hosts a compilation looks at"""
+
+    def __init__(self, hosts: Mapping[str, BIHostData]) -> None:
+        super().__init__(hosts)
+        self.dependencies: SearchDependencies | None = None
+        self.searching = False
+
+    def __getitem__(self, key: str) -> BIHostData:
+        if self.dependencies is not None:
+            self.dependencies.host_names.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if self.dependencies is not None:
+            self.dependencies.host_names.add(key)
+        return super().get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        if self.dependencies is not None and isinstance(key, str):
+            self.dependencies.host_names.add(key)
+        return super().__contains__(key)
+
+    def __iter__(self) -> Iterator[str]:
+        self._note_iteration()
+        return super().__iter__()
+
+    def keys(self) -> Any:
+        self._note_iteration()
+        return super().keys()
+
+    def values(self) -> Any:
+        self._note_iteration()
+        return super().values()
+
+    def items(self) -> Any:
+        self._note_iteration()
+        return super().items()
+
+    def _note_iteration(self) -> None:
+        if self.dependencies is not None and not self.searching:
+            self.dependencies.all_hosts = True
+
+
 #   .--BISearcher----------------------------------------------------------.
 #   |         ____ ___ ____                      _                         |
 #   |        | __ )_ _/ ___|  ___  __ _ _ __ ___| |__   ___ _ __           |
@@ -37,7 +162,7 @@ class BISearcher(ABCBISearcher):
     def set_hosts(self, hosts: dict[str, BIHostData]) -> None:
         self.cleanup()
         # The key may be a pattern / regex, so `str` is the correct type for the key.
-        self.hosts = hosts
+        self.hosts = _RecordingHosts(hosts)
 
     def cleanup(self) -> None:
         # Note: Do not call clear() on hosts
@@ -46,15 +171,61 @@ class BISearcher(ABCBISearcher):
         self._host_regex_match_cache.clear()
         self._host_regex_miss_cache.clear()
 
+    @contextmanager
+    def record_dependencies(self) -> Iterator[SearchDependencies]:
+        """Record the structure data looked at while in this context"""
+        if not isinstance(self.hosts, _RecordingHosts):
+            self.hosts = _RecordingHosts(self.hosts)
+        hosts = self.hosts
+        hosts.dependencies = dependencies = SearchDependencies()
+        try:
+            yield dependencies
+        finally:
+            hosts.dependencies = None
+
+    @contextmanager
+    def _searching_all_hosts(self) -> Iterator[None]:
+        """Iterating over all hosts is recorded by the search, not as such"""
+        if not isinstance(hosts := self.hosts, _RecordingHosts):
+            yield
+            return
+        hosts.searching = True
+        try:
+            yield
+        finally:
+            hosts.searching = False
+
+    def _record_search(self, condition: dict | str, matched_hosts: Iterable[BIHostData]) -> None:
+        if not isinstance(self.hosts, _RecordingHosts) or self.hosts.dependencies is None:
+            return
+        dependencies = self.hosts.dependencies
+        if isinstance(condition, str):
+            dependencies.host_name_patterns.append(condition)
+        else:
+            dependencies.host_conditions.append(condition)
+        dependencies.host_names.update(host.name for host in matched_hosts)
+
     def search_hosts(self, conditions: dict) -> list[BIHostSearchMatch]:
-        hosts, matched_re_groups = self.filter_host_choice(
-            list(self.hosts.values()), conditions["host_choice"]
-        )
-        matched_hosts = self.filter_host_folder(hosts, conditions["host_folder"])
-        matched_hosts = self.filter_host_tags(matched_hosts, conditions["host_tags"])
-        matched_hosts = self.filter_host_labels(matched_hosts, conditions["host_label_groups"])
+        with self._searching_all_hosts():
+            hosts, matched_re_groups = self.filter_host_choice(
+                list(self.hosts.values()), conditions["host_choice"]
+            )
+            matched_hosts = self.filter_host_folder(hosts, conditions["host_folder"])
+            matched_hosts = self.filter_host_tags(matched_hosts, conditions["host_tags"])
+            matched_hosts = list(
+                self.filter_host_labels(matched_hosts, conditions["host_label_groups"])
+            )
+        self._record_search(conditions, matched_hosts)
         return [BIHostSearchMatch(x, matched_re_groups[x.name]) for x in matched_hosts]
 
+    def search_host_names(self, pattern: str) -> tuple[list[BIHostData], dict]:
+        with self._searching_all_hosts():
+            hosts, matched_re_groups = self.get_host_name_matches(
+                list(self.hosts.values()), pattern
+            )
+        self._record_search(pattern, hosts)
+        return hosts, matched_re_groups
+
     def filter_host_choice(
         self,
         hosts: list[BIHostData],
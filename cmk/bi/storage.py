@@ -4,20 +4,30 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import ast
+import io
+import itertools
+import mmap
 import pickle
 import shutil
+import struct
 import uuid
-from collections.abc import Generator
+from collections.abc import Collection, Generator, Mapping, Sequence
 from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Final, NewType
+from typing import Final, NamedTuple, NewType, Self
 
 from redis import Redis
 
 from cmk.bi.aggregation import BIAggregation
 from cmk.bi.filesystem import BIFileSystem, BIFileSystemCache, BIFileSystemVar
-from cmk.bi.trees import BICompiledAggregation
+from cmk.bi.lib import BIAggregationComputationOptions, BIAggregationGroups
+from cmk.bi.rule import BIRule
+from cmk.bi.searcher import SearchDependencies
+from cmk.bi.trees import BICompiledAggregation, BICompiledRule, LazyBranches
 from cmk.ccc import store
+from cmk.ccc.hostaddress import HostName
+from cmk.utils.servicename import ServiceName
 
 # The actual uuid value that is used here is arbitrary. The most important thing is that this
 # remains constant. The purpose of this namespace to enable us to generate consistent uuids based on
@@ -34,13 +44,108 @@ def generate_identifier(value: str) -> Identifier:
 class AggregationNotFound(Exception): ...
 
 
+class StaleAggregation(AggregationNotFound):
+    """Stored in a format this version can't read, it has to be compiled again"""
+
+
+# Compiled aggregations are stored as
+#
+#   magic, format version, length of the header
+#   header: id, options, groups, strings, branch titles, branch offsets, branches by required host
+#   the branches, each pickled on its own
+#
+# The strings of the branches (keys, host and service names, ...) are stored once in the
+# header and referenced from the branches. The files are memory-mapped, and only the
+# branches that are accessed are unpickled.
+# Files without the magic are of the former format: a pickled schema of the whole aggregation.
+_MAGIC: Final = b"CBIA"
+_FORMAT_VERSION: Final = 2
+_FILE_HEADER: Final = struct.Struct(">4sHI")
+
+
+class _BranchPickler(pickle.Pickler):
+    def __init__(self, file: io.BytesIO, strings: dict[str, int]) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._strings = strings
+
+    def persistent_id(self, obj: object) -> int | None:
+        if type(obj) is not str:
+            return None
+        return self._strings.setdefault(obj, len(self._strings))
+
+
+class _BranchUnpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, strings: Sequence[str]) -> None:
+        super().__init__(file)
+        self._strings = strings
+
+    def persistent_load(self, pid: int) -> str:
+        return self._strings[pid]
+
+
+def _encode_aggregation(aggregation: BICompiledAggregation) -> bytes:
+    strings: dict[str, int] = {}
+    branches = []
+    branches_of_host: dict[HostName, list[int]] = {}
+    for index, branch in enumerate(aggregation.branches):
+        _BranchPickler(file := io.BytesIO(), strings).dump(branch.serialize())
+        branches.append(file.getvalue())
+        for host_name in sorted({element.host_name for element in branch.required_elements()}):
+            branches_of_host.setdefault(host_name, []).append(index)
+
+    header = pickle.dumps(
+        {
+            "id": aggregation.id,
+            "computation_options": aggregation.computation_options.serialize(),
+            "aggregation_visualization": aggregation.aggregation_visualization,
+            "groups": aggregation.groups.serialize(),
+            "strings": list(strings),
+            "titles": [branch.properties.title for branch in aggregation.branches],
+            "offsets": list(itertools.accumulate(map(len, branches), initial=0)),
+            "branches_of_host": branches_of_host,
+        },
+        protocol=pickle.HIGHEST_PROTOCOL,
+    )
+    return b"".join((_FILE_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(header)), header, *branches))
+
+
+def _decode_aggregation(data: mmap.mmap) -> BICompiledAggregation:
+    _magic, version, header_length = _FILE_HEADER.unpack_from(data)
+    if version != _FORMAT_VERSION:
+        raise StaleAggregation(f"Unknown format version {version}")
+    start = _FILE_HEADER.size + header_length
+    header = pickle.loads(data[_FILE_HEADER.size : start])
+    strings: Sequence[str] = header["strings"]
+    offsets: Sequence[int] = header["offsets"]
+
+    def load_branch(index: int) -> BICompiledRule:
+        branch = data[start + offsets[index] : start + offsets[index + 1]]
+        return BIRule.create_tree_from_schema(_BranchUnpickler(io.BytesIO(branch), strings).load())
+
+    return BICompiledAggregation(
+        header["id"],
+        [],
+        BIAggregationComputationOptions(header["computation_options"]),
+        header["aggregation_visualization"],
+        BIAggregationGroups(header["groups"]),
+        lazy_branches=LazyBranches(header["titles"], header["branches_of_host"], load_branch),
+    )
+
+
 class AggregationStore:
     def __init__(self, fs_cache: BIFileSystemCache) -> None:
         self.fs_cache = fs_cache
 
     def get_by_identifier(self, identifier: Identifier) -> BICompiledAggregation:
-        if not (path := self.fs_cache.compiled_aggregations / identifier).exists():
-            raise AggregationNotFound(path)
+        path = self.fs_cache.compiled_aggregations / identifier
+        try:
+            with path.open("rb") as file:
+                if file.read(len(_MAGIC)) == _MAGIC:
+                    # The mapping stays valid when the file is replaced, and is
+                    # released together with the branches of the aggregation.
+                    return _decode_aggregation(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except FileNotFoundError as e:
+            raise AggregationNotFound(path) from e
 
         schema = store.load_object_from_pickle_file(path, default={})
         return BIAggregation.create_trees_from_schema(schema)
@@ -56,7 +161,7 @@ class AggregationStore:
 
     def save(self, aggregation: BICompiledAggregation) -> None:
         path = self.fs_cache.compiled_aggregations / generate_identifier(aggregation.id)
-        store.save_bytes_to_file(path, pickle.dumps(aggregation.serialize()))
+        store.save_bytes_to_file(path, _encode_aggregation(aggregation))
 
     def delete_by_identifier(self, identifier: Identifier) -> None:
         (self.fs_cache.compiled_aggregations / identifier).unlink(missing_ok=True)
@@ -123,6 +228,158 @@ class MetadataStore:
         return last_change
 
 
+@dataclass(frozen=True)
+class CompilationDependencies:
+    host_fingerprints: Mapping[str, str]
+    aggregations: Mapping[str, SearchDependencies]
+
+
+class DependencyStore:
+    """The structure data the stored compiled aggregations depend on"""
+
+    def __init__(self, fs_cache: BIFileSystemCache) -> None:
+        self.fs_cache = fs_cache
+
+    def get(self) -> CompilationDependencies | None:
+        if not (
+            serialized := store.load_object_from_pickle_file(
+                self.fs_cache.compilation_dependencies, default={}
+            )
+        ):
+            return None
+        return CompilationDependencies(
+            serialized["host_fingerprints"],
+            {
+                aggr_id: SearchDependencies.deserialize(dependencies)
+                for aggr_id, dependencies in serialized["aggregations"].items()
+            },
+        )
+
+    def save(self, dependencies: CompilationDependencies) -> None:
+        serialized = {
+            "host_fingerprints": dict(dependencies.host_fingerprints),
+            "aggregations": {
+                aggr_id: aggregation_dependencies.serialize()
+                for aggr_id, aggregation_dependencies in dependencies.aggregations.items()
+            },
+        }
+        store.save_bytes_to_file(self.fs_cache.compilation_dependencies, pickle.dumps(serialized))
+
+
+class BranchReference(NamedTuple):
+    aggregation_id: str
+    title: str
+
+
+@dataclass(frozen=True)
+class AggregationIndex:
+    """The branches by the hosts and services they require, the aggregations by their groups"""
+
+    aggregation_ids: frozenset[str]
+    branches_of_host: Mapping[HostName, frozenset[BranchReference]]
+    branches_of_service: Mapping[tuple[HostName, ServiceName], frozenset[BranchReference]]
+    aggregations_of_group: Mapping[str, frozenset[str]]
+
+    @classmethod
+    def build(cls, compiled_aggregations: Mapping[str, BICompiledAggregation]) -> Self:
+        branches_of_host: dict[HostName, set[BranchReference]] = {}
+        branches_of_service: dict[tuple[HostName, ServiceName], set[BranchReference]] = {}
+        aggregations_of_group: dict[str, set[str]] = {}
+        for aggr_id, compiled_aggregation in compiled_aggregations.items():
+            for group in compiled_aggregation.groups.combined_groups():
+                aggregations_of_group.setdefault(group, set()).add(aggr_id)
+            for branch in compiled_aggregation.branches:
+                reference = BranchReference(aggr_id, branch.properties.title)
+                for _site_id, host_name, service_description in branch.required_elements():
+                    branches_of_host.setdefault(host_name, set()).add(reference)
+                    if service_description is not None:
+                        branches_of_service.setdefault((host_name, service_description), set()).add(
+                            reference
+                        )
+        return cls(
+            frozenset(compiled_aggregations),
+            {key: frozenset(value) for key, value in branches_of_host.items()},
+            {key: frozenset(value) for key, value in branches_of_service.items()},
+            {key: frozenset(value) for key, value in aggregations_of_group.items()},
+        )
+
+    def branches(
+        self,
+        *,
+        host_names: Collection[HostName],
+        services: Collection[tuple[HostName, ServiceName]],
+    ) -> set[BranchReference]:
+        """The branches requiring one of the hosts and one of the services
+
+        An empty collection does not restrict the branches, but at least one must be given.
+        """
+        found: list[set[BranchReference]] = []
+        if host_names:
+            found.append(
+                {
+                    reference
+                    for host_name in host_names
+                    for reference in self.branches_of_host.get(host_name, ())
+                }
+            )
+        if services:
+            found.append(
+                {
+                    reference
+                    for service in services
+                    for reference in self.branches_of_service.get(service, ())
+                }
+            )
+        return set.intersection(*found)
+
+    def aggregations_of_groups(self, group_names: Collection[str]) -> set[str]:
+        return {
+            aggr_id
+            for group_name in group_names
+            for aggr_id in self.aggregations_of_group.get(group_name, ())
+        }
+
+
+class AggregationIndexStore:
+    def __init__(self, fs_cache: BIFileSystemCache) -> None:
+        self.fs_cache = fs_cache
+
+    def get(self) -> AggregationIndex | None:
+        if not (
+            serialized := store.load_object_from_pickle_file(
+                self.fs_cache.aggregation_index, default={}
+            )
+        ):
+            return None
+        return AggregationIndex(
+            frozenset(serialized["aggregation_ids"]),
+            {
+                key: frozenset(map(BranchReference._make, value))
+                for key, value in serialized["branches_of_host"]
+            },
+            {
+                key: frozenset(map(BranchReference._make, value))
+                for key, value in serialized["branches_of_service"]
+            },
+            {key: frozenset(value) for key, value in serialized["aggregations_of_group"]},
+        )
+
+    def save(self, index: AggregationIndex) -> None:
+        serialized = {
+            "aggregation_ids": list(index.aggregation_ids),
+            "branches_of_host": [
+                (key, [tuple(r) for r in value]) for key, value in index.branches_of_host.items()
+            ],
+            "branches_of_service": [
+                (key, [tuple(r) for r in value]) for key, value in index.branches_of_service.items()
+            ],
+            "aggregations_of_group": [
+                (key, list(value)) for key, value in index.aggregations_of_group.items()
+            ],
+        }
+        store.save_bytes_to_file(self.fs_cache.aggregation_index, pickle.dumps(serialized))
+
+
 class LookupStore:
     def __init__(self, redis_client: Redis) -> None:
         self._redis_client = redis_client
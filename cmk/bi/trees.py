@@ -5,7 +5,7 @@
 
 from __future__ import annotations
 
-from collections.abc import Sequence
+from collections.abc import Callable, Collection, Mapping, Sequence
 from typing import Any, Literal, NamedTuple, NotRequired, TypedDict
 
 from marshmallow import pre_dump
@@ -47,7 +47,6 @@ from cmk.bi.type_defs import HostState
 from cmk.ccc.hostaddress import HostName
 from cmk.ccc.site import SiteId
 from cmk.checkengine.submitters import ServiceState  # pylint: disable=cmk-module-layer-violation
-from cmk.utils.caching import instance_method_lru_cache
 from cmk.utils.servicename import ServiceName
 from cmk.utils.statename import host_state_name, service_state_name
 
@@ -148,7 +147,6 @@ class BICompiledLeaf(ABCBICompiledNode):
     ) -> list[ABCBICompiledNode]:
         return [self]
 
-    @instance_method_lru_cache()
     def required_elements(self) -> set[RequiredBIElement]:
         return {RequiredBIElement(self.site_id, self.host_name, self.service_description)}
 
@@ -331,6 +329,11 @@ class BICompiledRule(ABCBICompiledNode):
         self.properties = properties
         self.aggregation_function = aggregation_function
         self.node_visualization = node_visualization
+        self._required_elements: set[RequiredBIElement] | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # The required elements are collected again when needed, they would only bloat the pickle
+        return {**self.__dict__, "_required_elements": None}
 
     def __str__(self) -> str:
         return "BICompiledRule[%s, %d rules, %d leaves %d remaining]" % (
@@ -369,13 +372,15 @@ class BICompiledRule(ABCBICompiledNode):
             for res in node.compile_postprocess(bi_branch_root, services_of_host, bi_searcher)
         ]
         # Clear required elements cache, since the number of nodes might have changed
-        # NOTE: We need this suppression because of the instance_method_lru_cache hack, which magically adds things to its wrapped method. :-/
-        self.required_elements.cache_clear()  # type: ignore[attr-defined]
+        self._required_elements = None
         return [self]
 
-    @instance_method_lru_cache()
     def required_elements(self) -> set[RequiredBIElement]:
-        return {result for node in self.nodes for result in node.required_elements()}
+        if self._required_elements is None:
+            self._required_elements = {
+                result for node in self.nodes for result in node.required_elements()
+            }
+        return self._required_elements
 
     def services_of_host(self, host_name: HostName) -> set[ServiceName]:
         return {result for node in self.nodes for result in node.services_of_host(host_name)}
@@ -538,7 +543,6 @@ class BIRemainingResult(ABCBICompiledNode):
         postprocessed_nodes.sort()
         return postprocessed_nodes
 
-    @instance_method_lru_cache()
     def required_elements(self) -> set[RequiredBIElement]:
         return set()
 
@@ -572,6 +576,40 @@ class FrozenBIInfo(NamedTuple):
     based_on_branch_title: str
 
 
+class LazyBranches:
+    """The branches of a stored aggregation, materialized on first access"""
+
+    def __init__(
+        self,
+        titles: Sequence[str],
+        branches_of_host: Mapping[HostName, Sequence[int]],
+        load: Callable[[int], BICompiledRule],
+    ) -> None:
+        self.titles = titles
+        self._branches_of_host = branches_of_host
+        self._load = load
+        self._loaded: dict[int, BICompiledRule] = {}
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def get(self, index: int) -> BICompiledRule:
+        if (branch := self._loaded.get(index)) is None:
+            branch = self._loaded[index] = self._load(index)
+        return branch
+
+    def all(self) -> list[BICompiledRule]:
+        return [self.get(index) for index in range(len(self))]
+
+    def indexes_of_hosts(self, host_names: Collection[HostName]) -> set[int]:
+        return {
+            index for host_name in host_names for index in self._branches_of_host.get(host_name, ())
+        }
+
+    def indexes_of_titles(self, titles: Collection[str]) -> set[int]:
+        return {index for index, title in enumerate(self.titles) if title in titles}
+
+
 class BICompiledAggregation:
     def __init__(
         self,
@@ -580,14 +618,68 @@ class BICompiledAggregation:
         computation_options: BIAggregationComputationOptions,
         aggregation_visualization: dict[str, Any],
         groups: BIAggregationGroups,
+        *,
+        lazy_branches: LazyBranches | None = None,
     ):
         self.id = aggregation_id
         self.frozen_info: FrozenBIInfo | None = None
-        self.branches = branches
+        self._branches: list[BICompiledRule] | None = branches if lazy_branches is None else None
+        self._lazy_branches = lazy_branches
         self.computation_options = computation_options
         self.aggregation_visualization = aggregation_visualization
         self.groups = groups
 
+    @property
+    def branches(self) -> list[BICompiledRule]:
+        if self._branches is None:
+            assert self._lazy_branches is not None
+            self._branches = self._lazy_branches.all()
+        return self._branches
+
+    @branches.setter
+    def branches(self, branches: list[BICompiledRule]) -> None:
+        self._branches = branches
+        self._lazy_branches = None
+
+    @property
+    def branch_titles(self) -> Sequence[str]:
+        if self._branches is None and self._lazy_branches is not None:
+            return self._lazy_branches.titles
+        return [branch.properties.title for branch in self.branches]
+
+    def branch_by_title(self, title: str) -> BICompiledRule | None:
+        if self._branches is None and self._lazy_branches is not None:
+            return next(
+                (
+                    self._lazy_branches.get(index)
+                    for index in sorted(self._lazy_branches.indexes_of_titles((title,)))
+                ),
+                None,
+            )
+        return next((branch for branch in self.branches if branch.properties.title == title), None)
+
+    def candidate_branches(
+        self, *, host_names: Collection[HostName] = (), titles: Collection[str] = ()
+    ) -> list[BICompiledRule]:
+        """The branches that may require one of the hosts and have one of the titles
+
+        Empty collections do not restrict the branches. If the branches are
+        loaded lazily, only the candidates are materialized. Otherwise the
+        branches are only restricted by their titles.
+        """
+        if self._branches is not None or self._lazy_branches is None:
+            return [
+                branch
+                for branch in self.branches
+                if not titles or branch.properties.title in titles
+            ]
+        indexes = set(range(len(self._lazy_branches)))
+        if host_names:
+            indexes &= self._lazy_branches.indexes_of_hosts(host_names)
+        if titles:
+            indexes &= self._lazy_branches.indexes_of_titles(titles)
+        return [self._lazy_branches.get(index) for index in sorted(indexes)]
+
     def compute_branches(
         self, branches: list[BICompiledRule], bi_status_fetcher: ABCBIStatusFetcher
     ) -> list[NodeResultBundle]:
@@ -20,9 +20,10 @@ def make_timing_results(
     *,
     perfdata_with_times: bool,
 ) -> ActiveCheckResult:
+    # The total times include the fetching: Sources may be fetched concurrently and their
+    # (process wide) times overlap, so they only make up the breakdown.
     summary: defaultdict[str, Snapshot] = defaultdict(Snapshot.null)
     for source, duration in fetched:
-        total_times += duration
         with suppress(KeyError):
             summary[
                 {
@@ -3,10 +3,14 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import hashlib
 import logging
-from collections.abc import Callable
+import pickle
+import shutil
+from collections.abc import Callable, Iterable, Iterator, Mapping, MutableMapping
 from pathlib import Path
 from typing import Final, Generic, TypeVar
+from urllib.parse import quote
 
 import cmk.ccc.store as _store
 from cmk.utils.sectionname import MutableSectionMap, SectionMap, SectionName
@@ -15,8 +19,98 @@ __all__ = ["SectionStore"]
 
 _T = TypeVar("_T")
 
+_MISSING: Final = object()
+
+# Creation time, end of validity and digest of the pickled content of a section
+type _IndexEntry = tuple[int, int, str]
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+class _PersistedSections(MutableMapping[SectionName, tuple[int, int, _T]]):
+    """The persisted sections, reading the content of a section on first access"""
+
+    def __init__(
+        self, index: SectionMap[_IndexEntry], load_content: Callable[[SectionName], _T]
+    ) -> None:
+        self.index: Final = dict(index)
+        self.loaded: Final[dict[SectionName, _T]] = {}
+        self.changed: Final[set[SectionName]] = set()
+        self._load_content: Final = load_content
+
+    def timestamps(self) -> SectionMap[tuple[int, int]]:
+        return {
+            name: (created_at, valid_until)
+            for name, (created_at, valid_until, _digest) in self.index.items()
+        }
+
+    def __getitem__(self, section_name: SectionName) -> tuple[int, int, _T]:
+        created_at, valid_until, _digest = self.index[section_name]
+        try:
+            content = self.loaded[section_name]
+        except KeyError:
+            content = self.loaded[section_name] = self._load_content(section_name)
+        return created_at, valid_until, content
+
+    def __setitem__(self, section_name: SectionName, value: tuple[int, int, _T]) -> None:
+        created_at, valid_until, content = value
+        self.index[section_name] = (created_at, valid_until, "")
+        self.loaded[section_name] = content
+        self.changed.add(section_name)
+
+    def __delitem__(self, section_name: SectionName) -> None:
+        del self.index[section_name]
+        self.loaded.pop(section_name, None)
+        self.changed.discard(section_name)
+
+    def __iter__(self) -> Iterator[SectionName]:
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+
+class _SectionsWithPersisted(Mapping[SectionName, _T]):
+    """The live sections and the persisted ones, reading the latter on first access"""
+
+    def __init__(
+        self,
+        sections: SectionMap[_T],
+        persisted_sections: SectionMap[tuple[int, int, _T]],
+        persisted_names: Iterable[SectionName],
+    ) -> None:
+        self._sections: Final = sections
+        self._persisted_sections: Final = persisted_sections
+        self._names: Final = {**dict.fromkeys(sections), **dict.fromkeys(persisted_names)}
+
+    def __getitem__(self, section_name: SectionName) -> _T:
+        if section_name in self._sections:
+            return self._sections[section_name]
+        if section_name not in self._names:
+            raise KeyError(section_name)
+        # Raises KeyError if removed by a concurrent write in the meantime
+        return self._persisted_sections[section_name][-1]
+
+    def __iter__(self) -> Iterator[SectionName]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
 
 class SectionStore(Generic[_T]):
+    """Store the persisted sections
+
+    The sections are kept in a directory: The content of every section is pickled
+    to a file of its own, and an index holds the creation time, the end of
+    validity and a digest of the content of all sections. This way unchanged
+    sections are not rewritten, and the content of a section is only read if it
+    is used. Earlier versions pickled all sections to one file at the same path,
+    which is still read and replaced with the next write.
+    """
+
     def __init__(
         self,
         path: str | Path,
@@ -30,22 +124,97 @@ class SectionStore(Generic[_T]):
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self.path!r}, logger={self._logger!r})"
 
+    @property
+    def _index_path(self) -> Path:
+        return self.path / "index"
+
+    def _section_path(self, section_name: SectionName) -> Path:
+        # The section names are sent by the monitored host. Quoting keeps them inside
+        # the directory, the suffix keeps them apart from the index.
+        return self.path / f"{quote(section_name, safe='')}.pkl"
+
+    def _load_legacy(self) -> MutableSectionMap[tuple[int, int, _T]]:
+        raw_sections_data = _store.load_object_from_pickle_file(self.path, default={})
+        return {SectionName(k): v for k, v in raw_sections_data.items()}
+
+    def _load_index(self) -> SectionMap[_IndexEntry]:
+        if not self.path.is_dir():
+            return {}
+        raw_index = _store.load_object_from_pickle_file(self._index_path, default={})
+        return {SectionName(k): v for k, v in raw_index.items()}
+
+    def _load_content(self, section_name: SectionName) -> _T:
+        content = _store.load_object_from_pickle_file(
+            self._section_path(section_name), default=_MISSING
+        )
+        if content is _MISSING:
+            # Removed by a concurrent write
+            raise KeyError(section_name)
+        return content  # type: ignore[no-any-return]
+
     def store(self, sections: MutableSectionMap[tuple[int, int, _T]]) -> None:
         if not sections:
             self._logger.debug("No persisted sections")
-            self.path.unlink(missing_ok=True)
+            if self.path.is_dir():
+                shutil.rmtree(self.path, ignore_errors=True)
+            else:
+                self.path.unlink(missing_ok=True)
             return
 
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        _store.save_object_to_pickle_file(
-            self.path,
-            {str(k): v for k, v in sections.items()},
+        if self.path.is_file():
+            self.path.unlink()
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        stored_index = self._load_index()
+        if isinstance(sections, _PersistedSections):
+            # Only the content of sections which have been set may have changed
+            changed = {n: sections.loaded[n] for n in sections.changed}
+            index = {n: e for n, e in sections.index.items() if n not in sections.changed}
+        else:
+            changed = {n: content for n, (_created_at, _valid_until, content) in sections.items()}
+            index = {}
+
+        written = []
+        for section_name, content in changed.items():
+            created_at, valid_until, _content = sections[section_name]
+            raw = pickle.dumps(content)
+            index[section_name] = (created_at, valid_until, digest := _digest(raw))
+            if (stored := stored_index.get(section_name)) is None or stored[2] != digest:
+                _store.save_bytes_to_file(self._section_path(section_name), raw)
+                written.append(section_name)
+
+        _store.save_object_to_pickle_file(self._index_path, {str(k): v for k, v in index.items()})
+        for section_name in stored_index.keys() - index.keys():
+            self._section_path(section_name).unlink(missing_ok=True)
+
+        self._logger.debug(
+            "Stored persisted sections: %s (written: %s)",
+            ", ".join(str(s) for s in sections),
+            ", ".join(str(s) for s in written) or "none",
         )
-        self._logger.debug("Stored persisted sections: %s", ", ".join(str(s) for s in sections))
 
     def load(self) -> MutableSectionMap[tuple[int, int, _T]]:
-        raw_sections_data = _store.load_object_from_pickle_file(self.path, default={})
-        return {SectionName(k): v for k, v in raw_sections_data.items()}
+        sections = _PersistedSections[_T](self._load_index(), self._load_content)
+        if self.path.is_file():
+            # All sections are written to the new layout with the next store()
+            for section_name, entry in self._load_legacy().items():
+                sections[section_name] = entry
+        return sections
+
+    def load_timestamps(self) -> SectionMap[tuple[int, int]]:
+        """Creation time and end of validity of the persisted sections, without their content"""
+        return self._timestamps(self.load())
+
+    @staticmethod
+    def _timestamps(
+        persisted_sections: SectionMap[tuple[int, int, _T]],
+    ) -> SectionMap[tuple[int, int]]:
+        if isinstance(persisted_sections, _PersistedSections):
+            return persisted_sections.timestamps()
+        return {
+            section_name: (created_at, valid_until)
+            for section_name, (created_at, valid_until, _content) in persisted_sections.items()
+        }
 
     def update(
         self,
@@ -92,8 +261,9 @@ class SectionStore(Generic[_T]):
         persisted_sections.update(new_sections)
 
         if not keep_outdated:
-            for section_name in tuple(persisted_sections):
-                (_created_at, valid_until, _section_content) = persisted_sections[section_name]
+            for section_name, (_created_at, valid_until) in self._timestamps(
+                persisted_sections
+            ).items():
                 if section_outdated(valid_until, now):
                     store_sections = True
                     del persisted_sections[section_name]
@@ -108,15 +278,8 @@ class SectionStore(Generic[_T]):
         cache_info: MutableSectionMap[tuple[int, int]],
         persisted_sections: MutableSectionMap[tuple[int, int, _T]],
     ) -> SectionMap[_T]:
-        cache_info.update(
-            {
-                section_name: (created_at, valid_until - created_at)
-                for section_name, (created_at, valid_until, *_rest) in persisted_sections.items()
-                if section_name not in sections
-            }
-        )
-        result: MutableSectionMap[_T] = dict(sections.items())
-        for section_name, entry in persisted_sections.items():
+        persisted_names = []
+        for section_name, (created_at, valid_until) in self._timestamps(persisted_sections).items():
             # Don't overwrite sections that have been received from the source with this call
             if section_name in sections:
                 self._logger.debug(
@@ -126,5 +289,7 @@ class SectionStore(Generic[_T]):
                 continue
 
             self._logger.debug("Using persisted section %r", section_name)
-            result[section_name] = entry[-1]
-        return result
+            persisted_names.append(section_name)
+            cache_info[section_name] = (created_at, valid_until - created_at)
+        # The content of the persisted sections is only read if a parser needs it.
+        return _SectionsWithPersisted(sections, persisted_sections, persisted_names)
@@ -6,21 +6,60 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from collections.abc import Callable, Iterable, Mapping
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 
 from cmk.ccc.hostaddress import HostName
 from cmk.checkengine.fetcher import HostKey
-from cmk.utils.sectionname import MutableSectionMap
+from cmk.utils.sectionname import MutableSectionMap, SectionMap, SectionName
 
 from ._parser import HostSections
 
 __all__ = ["group_by_host"]
 
 
+class _MergedSections(Mapping[SectionName, list]):
+    """The sections of several sources, each one concatenated on first access
+
+    This way the persisted sections are only read if they are used.
+    """
+
+    def __init__(self) -> None:
+        self._sources: list[SectionMap[Sequence]] = []
+        self._names: dict[SectionName, None] = {}
+        self._merged: dict[SectionName, list] = {}
+
+    def add(self, sections: SectionMap[Sequence]) -> None:
+        self._sources.append(sections)
+        self._names.update(dict.fromkeys(sections))
+
+    def __getitem__(self, section_name: SectionName) -> list:
+        try:
+            return self._merged[section_name]
+        except KeyError:
+            pass
+        merged: list = []
+        found = False
+        for sections in self._sources:
+            try:
+                merged.extend(sections[section_name])
+            except KeyError:
+                continue
+            found = True
+        if not found:
+            raise KeyError(section_name)
+        return self._merged.setdefault(section_name, merged)
+
+    def __iter__(self) -> Iterator[SectionName]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
 def group_by_host(
     host_sections: Iterable[tuple[HostKey, HostSections]], log: Callable[[str], None]
 ) -> Mapping[HostKey, HostSections]:
-    out_sections: dict[HostKey, MutableSectionMap[list]] = defaultdict(dict)
+    out_sections: dict[HostKey, _MergedSections] = defaultdict(_MergedSections)
     out_cache_info: dict[HostKey, MutableSectionMap[tuple[int, int]]] = defaultdict(dict)
     out_piggybacked_raw_data: dict[HostKey, dict[HostName, list[bytes]]] = defaultdict(dict)
     host_keys: list[HostKey] = []
@@ -29,8 +68,7 @@ def group_by_host(
         host_keys.append(host_key)
         section_names = sorted(str(s) for s in host_section.sections.keys())
         log(f"  {host_key!s}  -> Add sections: {section_names}")
-        for section_name, section_content in host_section.sections.items():
-            out_sections[host_key].setdefault(section_name, []).extend(section_content)
+        out_sections[host_key].add(host_section.sections)
         for hostname, raw_lines in host_section.piggybacked_raw_data.items():
             out_piggybacked_raw_data[host_key].setdefault(hostname, []).extend(raw_lines)
         # TODO: It should be supported that different sources produce equal sections.
@@ -29,10 +29,38 @@ type _ServiceID = tuple[object, _Item]
 type _SerializedValueStore = Mapping[str, str]
 
 
+# The file is compacted once it holds this many records per value store
+_COMPACTION_FACTOR: Final = 3
+
+
+class _LazyValueStores(Mapping[ValueStoreKey, _SerializedValueStore]):
+    """The value stores of a host, each one decoded on first access"""
+
+    def __init__(self, raw: Mapping[ValueStoreKey, str]) -> None:
+        self.raw: Final = raw
+        self._decoded: dict[ValueStoreKey, _SerializedValueStore] = {}
+
+    def __getitem__(self, key: ValueStoreKey) -> _SerializedValueStore:
+        try:
+            return self._decoded[key]
+        except KeyError:
+            pass
+        return self._decoded.setdefault(key, json.loads(self.raw[key]))
+
+    def __iter__(self) -> Iterator[ValueStoreKey]:
+        return iter(self.raw)
+
+    def __len__(self) -> int:
+        return len(self.raw)
+
+
 @dataclass(frozen=True)
 class _LastState:
     timestamp: float
-    data: Mapping[ValueStoreKey, _SerializedValueStore]
+    size: int
+    data: _LazyValueStores
+    records: int | None
+    """Number of records in the file, None if it has to be rewritten (legacy or damaged)"""
 
 
 class AllValueStoresStore:
@@ -40,6 +68,15 @@ class AllValueStoresStore:
 
     Make sure to only update the values we want to update,
     and not to overwrite the whole file.
+
+    The file holds one record per line: The JSON encoded key and the JSON encoded
+    value store, separated by a tab (JSON never contains raw tabs). Updates only
+    append the records of the value stores that changed, later records replace
+    earlier ones. Once there are too many outdated records, the file is rewritten.
+    The same happens if a crash left a torn record: Unparsable records are skipped,
+    and nothing is appended to such a file.
+    Files consisting of one JSON list of all value stores (the format of earlier
+    versions) are still read, and rewritten with the next update.
     """
 
     def __init__(
@@ -55,60 +92,108 @@ class AllValueStoresStore:
         self._last_known_state: None | _LastState = None
 
     @staticmethod
-    def _serialize(value: Mapping[ValueStoreKey, _SerializedValueStore]) -> str:
-        return json.dumps(list(value.items()))
+    def _serialize_key(key: ValueStoreKey) -> str:
+        return json.dumps(list(key))
 
     @staticmethod
-    def _deserialize(raw: str) -> Mapping[ValueStoreKey, _SerializedValueStore]:
-        return {
-            (HostName(hn), str(cn), None if i is None else str(i)): v
-            for (hn, cn, i), v in json.loads(raw)
-        }
+    def _make_key(hn: str, cn: str, i: str | None) -> ValueStoreKey:
+        return HostName(hn), str(cn), None if i is None else str(i)
+
+    @classmethod
+    def _serialize_records(cls, records: Mapping[ValueStoreKey, str]) -> str:
+        return "".join(f"{cls._serialize_key(k)}\t{v}\n" for k, v in records.items())
+
+    @classmethod
+    def _deserialize(cls, raw: str) -> tuple[dict[ValueStoreKey, str], int | None]:
+        if "\t" not in raw:
+            # Legacy format: A JSON list of all value stores
+            try:
+                return {cls._make_key(*k): json.dumps(v) for k, v in json.loads(raw)}, None
+            except (ValueError, TypeError):
+                return {}, None
+
+        # Every record is terminated by a newline. Anything after the last one is
+        # a record currently being appended, or one torn by a crash.
+        *lines, tail = raw.split("\n")
+        damaged = bool(tail)
+        data = {}
+        for line in lines:
+            try:
+                # A record appended to a torn one contains more than one tab
+                raw_key, raw_value = line.split("\t")
+                data[cls._make_key(*json.loads(raw_key))] = raw_value
+            except (ValueError, TypeError):
+                damaged = True
+        # Damaged files are rewritten with the next update rather than appended to
+        return data, None if damaged else len(lines)
 
     def load(self) -> Mapping[ValueStoreKey, _SerializedValueStore]:
         self._log_debug("loading from disk")
         try:
-            self._last_known_state = _LastState(
-                self.path.stat().st_mtime,
-                (
-                    data := (
-                        self._deserialize(content)
-                        if (content := store.load_text_from_file(self.path, lock=False).strip())
-                        else {}
-                    )
-                ),
+            stat = self.path.stat()
+            raw, records = (
+                self._deserialize(content)
+                if (content := store.load_text_from_file(self.path, lock=False)).strip()
+                else ({}, 0)
             )
         except FileNotFoundError:
             self._last_known_state = None
-            data = {}
+            return {}
 
+        data = _LazyValueStores(raw)
+        self._last_known_state = _LastState(stat.st_mtime, stat.st_size, data, records)
         return data
 
+    def _load_state(self) -> _LastState | None:
+        if self._last_known_state is not None and self.path.exists():
+            stat = self.path.stat()
+            if (stat.st_mtime, stat.st_size) == (
+                self._last_known_state.timestamp,
+                self._last_known_state.size,
+            ):
+                self._log_debug("already loaded")
+                return self._last_known_state
+
+        self.load()
+        return self._last_known_state
+
     def update(self, updated: Mapping[ValueStoreKey, _SerializedValueStore]) -> None:
         """Re-load and write the changes of the stored values
 
-        This method will reload the values from disk, apply the changes
-        as specified by the argument, and then write the result to disk.
+        This method will reload the values from disk if they have been changed
+        by someone else, and then write the changes as specified by the argument.
         """
         self._log_debug("updating")
 
         self.path.parent.mkdir(parents=True, exist_ok=True)
 
         with store.locked(self.path):
+            last_state = self._load_state()
+            data = last_state.data if last_state is not None else _LazyValueStores({})
+            changed = {
+                k: json.dumps(v) for k, v in updated.items() if k not in data or data[k] != v
+            }
+            new_data = _LazyValueStores({**data.raw, **changed})
+
             if (
-                self._last_known_state is not None
-                and self.path.stat().st_mtime == self._last_known_state.timestamp
+                last_state is None
+                or last_state.records is None
+                or last_state.records + len(changed) > _COMPACTION_FACTOR * len(new_data)
             ):
-                self._log_debug("already loaded")
-                data = self._last_known_state.data
+                self._log_debug("writing to disk")
+                store.save_text_to_file(self.path, self._serialize_records(new_data.raw))
+                records = len(new_data)
+            elif changed:
+                self._log_debug("appending changes to disk")
+                with self.path.open("a", encoding="utf-8") as f:
+                    f.write(self._serialize_records(changed))
+                records = last_state.records + len(changed)
             else:
-                self._log_debug("loading from disk")
-                data = self.load()
+                self._log_debug("nothing changed")
+                return
 
-            self._log_debug("writing to disk")
-            new_data = {**data, **updated}
-            store.save_text_to_file(self.path, self._serialize(new_data))
-            self._last_known_state = _LastState(timestamp=self.path.stat().st_mtime, data=new_data)
+            stat = self.path.stat()
+            self._last_known_state = _LastState(stat.st_mtime, stat.st_size, new_data, records)
 
 
 class _ValueStore(MutableMapping[str, object]):
@@ -204,7 +289,7 @@ class ValueStoreManager:
 
     def __init__(self, host_name: HostName, all_stores_store: AllValueStoresStore) -> None:
         self._store: Final = all_stores_store
-        self._all_stores = {**all_stores_store.load()}
+        self._all_stores = all_stores_store.load()
         self._accessed_stores: dict[ValueStoreKey, _ValueStore] = {}
         self.active_service_interface: _ValueStore | None = None
         self._host_name = host_name
@@ -319,6 +319,7 @@ class ConfigFromWATO(TypedDict):
     actions: Sequence[Action]
     archive_mode: Literal["file", "mongodb", "sqlite"]
     archive_orphans: bool
+    datagram_batch_size: int
     debug_rules: bool
     event_limit: EventLimits
     eventsocket_queue_len: int
@@ -337,6 +338,9 @@ class ConfigFromWATO(TypedDict):
     rules: Collection[Rule]
     sqlite_housekeeping_interval: int
     sqlite_freelist_size: int
+    sqlite_synchronous: Literal["OFF", "NORMAL", "FULL"]
+    sqlite_write_buffer_size: int
+    sqlite_write_buffer_age: int
     snmp_credentials: Collection[SNMPCredential]
     socket_queue_len: int
     statistics_interval: int
@@ -55,6 +55,9 @@ def default_config() -> ConfigFromWATO:
         housekeeping_interval=60,
         sqlite_housekeeping_interval=3600,  # seconds ValueSpec Age
         sqlite_freelist_size=50 * 1024 * 1024,  # bytes ValueSpec FIlesize
+        sqlite_synchronous="NORMAL",
+        sqlite_write_buffer_size=500,  # entries
+        sqlite_write_buffer_age=1,  # seconds ValueSpec Age
         statistics_interval=5,
         history_lifetime=365,  # days
         history_rotation="daily",
@@ -62,6 +65,7 @@ def default_config() -> ConfigFromWATO:
         remote_status=None,
         socket_queue_len=10,
         eventsocket_queue_len=10,
+        datagram_batch_size=100,
         hostname_translation=TranslationOptions(),
         archive_orphans=False,
         archive_mode="sqlite",
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# Copyright (C) 2019 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+"""Indexed storage of the currently open events"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+
+from cmk.ccc.hostaddress import HostName
+
+from .event import Event
+
+HostKey = tuple[HostName, HostName | None]
+
+
+class EventStore:
+    """
+    Keeps the open events in the order of their creation, indexed by event id,
+    by rule id and by (host, core_host).
+
+    The index keys of an event are remembered when the event is added, so
+    removing an event always cleans up the right index buckets, even if the
+    event has been modified in the meantime.  Call reindex() after changing
+    the host, core_host or rule_id of a stored event.
+
+    All methods returning several events return a snapshot, so callers are
+    free to add or remove events while iterating over them.
+    """
+
+    def __init__(self, events: Iterable[Event] = ()) -> None:
+        self._by_id: dict[int, Event] = {}
+        self._by_rule: dict[str | None, dict[int, Event]] = {}
+        self._by_host: dict[HostKey, dict[int, Event]] = {}
+        self._keys: dict[int, tuple[str | None, HostKey]] = {}
+        for event in events:
+            self.add(event)
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Event]:
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, event: object) -> bool:
+        return isinstance(event, dict) and self._by_id.get(event.get("id", -1)) is event
+
+    def to_list(self) -> list[Event]:
+        return list(self._by_id.values())
+
+    def add(self, event: Event) -> None:
+        eid = event["id"]
+        if eid in self._by_id:
+            raise ValueError(f"Event {eid} is already present")
+        rule_key = event["rule_id"]
+        host_key = (event["host"], event["core_host"])
+        self._by_id[eid] = event
+        self._by_rule.setdefault(rule_key, {})[eid] = event
+        self._by_host.setdefault(host_key, {})[eid] = event
+        self._keys[eid] = (rule_key, host_key)
+
+    def remove(self, event: Event) -> None:
+        """Remove an event, raises KeyError if the event is not present"""
+        eid = event["id"]
+        if self._by_id.get(eid) is not event:
+            raise KeyError(eid)
+        del self._by_id[eid]
+        rule_key, host_key = self._keys.pop(eid)
+        self._remove_from_bucket(self._by_rule, rule_key, eid)
+        self._remove_from_bucket(self._by_host, host_key, eid)
+
+    @staticmethod
+    def _remove_from_bucket[K](index: dict[K, dict[int, Event]], key: K, eid: int) -> None:
+        bucket = index[key]
+        del bucket[eid]
+        if not bucket:
+            del index[key]
+
+    def reindex(self, event: Event) -> None:
+        """Update the indices after the host, core_host or rule_id of an event changed
+
+        The event keeps its position among the open events.
+        """
+        eid = event["id"]
+        if self._by_id.get(eid) is not event:
+            raise KeyError(eid)
+        old_rule_key, old_host_key = self._keys[eid]
+        rule_key = event["rule_id"]
+        host_key = (event["host"], event["core_host"])
+        if rule_key != old_rule_key:
+            self._remove_from_bucket(self._by_rule, old_rule_key, eid)
+            self._add_to_bucket(self._by_rule, rule_key, event)
+        if host_key != old_host_key:
+            self._remove_from_bucket(self._by_host, old_host_key, eid)
+            self._add_to_bucket(self._by_host, host_key, event)
+        self._keys[eid] = (rule_key, host_key)
+
+    @staticmethod
+    def _add_to_bucket[K](index: dict[K, dict[int, Event]], key: K, event: Event) -> None:
+        """Add an event to a bucket, keeping the bucket in the order of the event ids"""
+        bucket = index.setdefault(key, {})
+        eid = event["id"]
+        in_order = not bucket or next(reversed(bucket)) < eid
+        bucket[eid] = event
+        if not in_order:
+            index[key] = dict(sorted(bucket.items()))
+
+    def get(self, eid: int) -> Event | None:
+        return self._by_id.get(eid)
+
+    def oldest(self) -> Event | None:
+        return next(iter(self._by_id.values()), None)
+
+    def by_rule(self, rule_id: str | None) -> Sequence[Event]:
+        return list(self._by_rule.get(rule_id, {}).values())
+
+    def by_host(self, host: HostName, core_host: HostName | None) -> Sequence[Event]:
+        return list(self._by_host.get((host, core_host), {}).values())
+
+    def by_host_name(self, host: HostName) -> Sequence[Event]:
+        """All events of a host, regardless of the core host they have been mapped to"""
+        return sorted(
+            (
+                event
+                for (host_name, _core_host), bucket in self._by_host.items()
+                if host_name == host
+                for event in bucket.values()
+            ),
+            key=lambda event: event["id"],
+        )
+
+    def count_by_rule(self, rule_id: str | None) -> int:
+        return len(self._by_rule.get(rule_id, {}))
+
+    def count_by_host(self, host: HostName, core_host: HostName | None) -> int:
+        return len(self._by_host.get((host, core_host), {}))
+
+    def counts_by_rule(self) -> Mapping[str | None, int]:
+        return {rule_id: len(bucket) for rule_id, bucket in self._by_rule.items()}
+
+    def counts_by_host(self) -> Mapping[HostKey, int]:
+        return {host_key: len(bucket) for host_key, bucket in self._by_host.items()}
@@ -51,6 +51,11 @@ class History(ABC):
     @abstractmethod
     def close(self) -> None: ...
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Group the entries added by the current thread, backends may write them at once."""
+        yield
+
 
 class TimedHistory(History):
     """Decorate History methods with timing information."""
@@ -89,6 +94,11 @@ class TimedHistory(History):
         with self._timing("close"):
             return self._history.close()
 
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        with self._history.batch():
+            yield
+
 
 def _log_event(
     config: Config, logger: Logger, event: Event, what: HistoryWhat, who: str, addinfo: str
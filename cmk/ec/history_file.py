@@ -8,10 +8,11 @@ import shlex
 import subprocess
 import threading
 import time
-from collections.abc import Callable, Iterable, Sequence
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
 from logging import Logger
 from pathlib import Path
-from typing import Any
+from typing import Any, Final
 
 from cmk.utils.log import VERBOSE
 from cmk.utils.render import date_and_time
@@ -39,6 +40,12 @@ class FileHistory(History):
         self._history_columns = history_columns
         self._lock = threading.Lock()
         self._active_history_period = ActiveHistoryPeriod()
+        self._batch = threading.local()
+        # Positions of the indexed columns within a logfile line (which lacks history_line)
+        column_names = [name for name, _default in history_columns]
+        self._index_positions = [column_names.index(name) - 1 for name in _INDEXED_COLUMNS]
+        # Size of the logfiles up to which their index is known to be complete
+        self._indexed_sizes: dict[Path, int] = {}
 
     def flush(self) -> None:
         _expire_logfiles(self._settings, self._config, self._logger, self._lock, True)
@@ -54,24 +61,97 @@ class FileHistory(History):
         4-oo: StatusTableEvents.columns
         """
         _log_event(self._config, self._logger, event, what, who, addinfo)
+        columns = [
+            quote_tab(str(time.time())),
+            quote_tab(scrub_string(what)),
+            quote_tab(scrub_string(who)),
+            quote_tab(scrub_string(addinfo)),
+        ]
+        columns += [
+            quote_tab(event.get(colname[6:], defval))  # drop "event_"
+            for colname, defval in self._event_columns
+        ]
+        line = b"\t".join(columns) + b"\n"
+        if (pending := getattr(self._batch, "lines", None)) is not None:
+            pending.append(line)
+            return
+        self._write([line])
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Write all entries added by the current thread with a single write."""
+        if getattr(self._batch, "lines", None) is not None:
+            yield  # nested batch, the outermost one writes
+            return
+        self._batch.lines = []
+        try:
+            yield
+        finally:
+            lines, self._batch.lines = self._batch.lines, None
+            if lines:
+                self._write(lines)
+
+    def _write(self, lines: Sequence[bytes]) -> None:
         with self._lock:
-            columns = [
-                quote_tab(str(time.time())),
-                quote_tab(scrub_string(what)),
-                quote_tab(scrub_string(who)),
-                quote_tab(scrub_string(addinfo)),
-            ]
-            columns += [
-                quote_tab(event.get(colname[6:], defval))  # drop "event_"
-                for colname, defval in self._event_columns
-            ]
-
-            with get_logfile(
+            path = get_logfile(
                 self._config,
                 self._settings.paths.history_dir.value,
                 self._active_history_period,
-            ).open(mode="ab") as f:
-                f.write(b"\t".join(columns) + b"\n")
+            )
+            with path.open(mode="ab") as f:
+                offset = f.tell()
+                f.write(b"".join(lines))
+            # Only extend an index which is complete up to now, queries catch up the others.
+            if offset == 0 or self._indexed_sizes.get(path) == offset:
+                with _index_path(path).open(mode="ab" if offset else "wb") as f:
+                    f.write(b"".join(_index_entries(lines, offset, self._index_positions)))
+                self._indexed_sizes[path] = offset + sum(len(line) for line in lines)
+
+    def _read_index(self, path: Path) -> list[bytes]:
+        """Returns the index entries of a logfile, bringing its index up to date first."""
+        index_path = _index_path(path)
+        with self._lock:
+            try:
+                index = index_path.read_bytes()
+            except FileNotFoundError:
+                index = b""
+            # Only b"\n" terminates an entry, just like a line of the logfile.
+            entries = index.split(b"\n")[:-1]
+            end = _index_end(index, entries)
+            size = path.stat().st_size
+            if end is None or end > size:
+                self._logger.debug("rebuilding index of history file %s", path)
+                entries, end = [], 0
+                index_path.unlink(missing_ok=True)
+            if end < size:
+                with path.open(mode="rb") as f:
+                    f.seek(end)
+                    # Iterating a binary file splits on b"\n" only.
+                    new_entries = list(_index_entries(f, end, self._index_positions))
+                with index_path.open(mode="ab") as f:
+                    f.write(b"".join(new_entries))
+                entries += (entry.rstrip(b"\n") for entry in new_entries)
+            self._indexed_sizes[path] = size
+        return entries
+
+    def _drop_index(self, path: Path) -> None:
+        with self._lock:
+            _index_path(path).unlink(missing_ok=True)
+            self._indexed_sizes.pop(path, None)
+
+    def _scan(
+        self,
+        path: Path,
+        query: QueryGET,
+        grep_pipeline: Sequence[str],
+        limit: int | None,
+    ) -> list[Any]:
+        tac = f"nl -b a {shlex.quote(str(path))} | tac"  # Process younger lines first
+        cmd = " | ".join([tac, *grep_pipeline])
+        self._logger.debug("preprocessing history file with command [%s]", cmd)
+        return parse_history_file(
+            self._history_columns, path, query.filter_row, cmd, limit, self._logger
+        )
 
     def get(self, query: QueryGET) -> Iterable[Sequence[object]]:
         if not self._settings.paths.history_dir.value.exists():
@@ -83,6 +163,7 @@ class FileHistory(History):
         self._logger.debug("Limit: %r", limit)
 
         grep_pipeline = _grep_pipeline(filters)
+        index_filters = [f for f in filters if f.column_name in _INDEXED_COLUMNS]
 
         time_filters = [
             (f.operator_name, f.argument) for f in filters if f.column_name.split("_")[-1] == "time"
@@ -114,12 +195,27 @@ class FileHistory(History):
             if not _intersects(time_range, _get_logfile_timespan(path)):
                 self._logger.debug("skipping history file %s because of time filters", path)
                 continue
-            tac = f"nl -b a {shlex.quote(str(path))} | tac"  # Process younger lines first
-            cmd = " | ".join([tac] + grep_pipeline)
-            self._logger.debug("preprocessing history file with command [%s]", cmd)
-            new_entries = parse_history_file(
-                self._history_columns, path, query.filter_row, cmd, limit, self._logger
-            )
+            if index_filters:
+                self._logger.debug("using index of history file %s", path)
+                try:
+                    new_entries = parse_indexed_history_file(
+                        self._history_columns,
+                        path,
+                        self._read_index(path),
+                        index_filters=index_filters,
+                        filter_row=query.filter_row,
+                        limit=limit,
+                        logger=self._logger,
+                    )
+                except DamagedIndexError as e:
+                    self._logger.warning(
+                        "Damaged index of history file %s, scanning the whole file: %s", path, e
+                    )
+                    # It is rebuilt with the next indexed query
+                    self._drop_index(path)
+                    new_entries = self._scan(path, query, grep_pipeline, limit)
+            else:
+                new_entries = self._scan(path, query, grep_pipeline, limit)
             history_entries += new_entries
             if limit is not None:
                 limit -= len(new_entries)
@@ -152,12 +248,68 @@ def _expire_logfiles(
                         "Deleting log file %s (age %s)", path, date_and_time(path.stat().st_mtime)
                     )
                     path.unlink()
+            for path in settings.paths.history_dir.value.glob("*.idx"):
+                if not path.with_suffix(".log").exists():
+                    path.unlink()
         except Exception as e:
             if settings.options.debug:
                 raise
             logger.warning("Error expiring log files: %s", e)
 
 
+# Each logfile has a sidecar index with one entry per line: The offset and length of the
+# line followed by the values of these columns, as they appear in the logfile.
+_INDEXED_COLUMNS: Final[Mapping[str, Callable[[bytes], object]]] = {
+    "history_time": float,
+    "event_host": bytes.decode,
+    "event_rule_id": bytes.decode,
+    "event_application": bytes.decode,
+    "event_state": int,
+}
+
+
+class DamagedIndexError(Exception):
+    """An entry of the index does not match a line of its logfile"""
+
+
+def _index_path(path: Path) -> Path:
+    return path.with_suffix(".idx")
+
+
+def _index_entries(
+    lines: Iterable[bytes], offset: int, positions: Sequence[int]
+) -> Iterator[bytes]:
+    for line in lines:
+        columns = line.rstrip(b"\n").split(b"\t")
+        values = [columns[pos] if pos < len(columns) else b"" for pos in positions]
+        yield b"\t".join([str(offset).encode(), str(len(line)).encode(), *values]) + b"\n"
+        offset += len(line)
+
+
+def _index_end(index: bytes, entries: Sequence[bytes]) -> int | None:
+    """The logfile size covered by an index, None if the index is damaged"""
+    if not entries:
+        return 0
+    fields = entries[-1].split(b"\t")
+    if not index.endswith(b"\n") or len(fields) != 2 + len(_INDEXED_COLUMNS):
+        return None  # e.g. partially written entry
+    try:
+        return int(fields[0]) + int(fields[1])
+    except ValueError:
+        return None
+
+
+def _index_entry_matches(fields: Sequence[bytes], index_filters: Sequence[QueryFilter]) -> bool:
+    values = dict(zip(_INDEXED_COLUMNS, fields[2:]))
+    try:
+        return all(
+            f.predicate(_INDEXED_COLUMNS[f.column_name](values[f.column_name]))
+            for f in index_filters
+        )
+    except Exception:
+        return True  # let the real filters decide
+
+
 # Please note: Keep this in sync with packages/neb/src/TableEventConsole.cc.
 _GREPABLE_COLUMNS = {
     "event_id",
@@ -292,6 +444,49 @@ def parse_history_file(
     return entries
 
 
+def parse_indexed_history_file(
+    history_columns: Sequence[tuple[str, Any]],
+    path: Path,
+    index: Sequence[bytes],
+    *,
+    index_filters: Sequence[QueryFilter],
+    filter_row: Callable[[Sequence[Any]], bool],
+    limit: int | None,
+    logger: Logger,
+) -> list[Any]:
+    """Like parse_history_file(), but only reads the lines whose index entry matches
+
+    Raises DamagedIndexError if an index entry is garbled or does not point to a line.
+    """
+    entries: list[Any] = []
+    with path.open(mode="rb") as f:
+        for line_number in range(len(index), 0, -1):  # Process younger lines first
+            if limit is not None and len(entries) > limit:
+                break
+            fields = index[line_number - 1].split(b"\t")
+            if len(fields) != 2 + len(_INDEXED_COLUMNS):
+                raise DamagedIndexError(f"invalid entry for line {line_number}")
+            if not _index_entry_matches(fields, index_filters):
+                continue
+            try:
+                offset, length = int(fields[0]), int(fields[1])
+            except ValueError:
+                raise DamagedIndexError(f"invalid position of line {line_number}")
+            f.seek(offset)
+            line = f.read(length)
+            if len(line) != length or not line.endswith(b"\n"):
+                raise DamagedIndexError(f"line {line_number} is not at the indexed position")
+            try:
+                parts: list[Any] = [line_number, *line.decode("utf-8").rstrip("\n").split("\t")]
+                convert_history_line(history_columns, parts)
+                if filter_row(parts):
+                    entries.append(parts)
+            except Exception:
+                logger.exception("Invalid line '%s' in history file %s", line, path)
+
+    return entries
+
+
 def parse_history_file_python(
     history_columns: Sequence[tuple[str, Any]],
     path: Path,
@@ -7,8 +7,10 @@
 import itertools
 import json
 import sqlite3
+import threading
 import time
-from collections.abc import Iterable, Sequence
+from collections.abc import Iterable, Iterator, Sequence
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import timedelta
 from logging import Logger
@@ -62,10 +64,11 @@ INDEXED_COLUMNS: Final = (
 
 SQLITE_PRAGMAS = {
     "PRAGMA journal_mode=WAL;": "WAL mode for concurrent reads and writes",
-    "PRAGMA synchronous = NORMAL;": "Writes should not blocked by reads",
     "PRAGMA busy_timeout = 2000;": "2 seconds timeout for busy handler. Avoids database is locked errors",
 }
 
+SQLITE_SYNCHRONOUS_LEVELS: Final = ("OFF", "NORMAL", "FULL")
+
 SQLITE_INDEXES = [
     f"CREATE INDEX IF NOT EXISTS idx_{column} ON history ({column});" for column in INDEXED_COLUMNS
 ]
@@ -159,6 +162,11 @@ class SQLiteHistory(History):
         self._history_columns = history_columns
         self._last_housekeeping = 0.0
         self._page_size = 4096
+        self._batch = threading.local()
+        # Write-behind buffer, see add()
+        self._lock_pending = threading.Lock()
+        self._pending: list[Sequence[object]] = []
+        self._pending_timer: threading.Timer | None = None
 
         if isinstance(self._settings.database, Path):
             self._settings.database.parent.mkdir(parents=True, exist_ok=True)
@@ -177,6 +185,9 @@ class SQLiteHistory(History):
         with self.conn as connection:
             for pragma_string in SQLITE_PRAGMAS:
                 connection.execute(pragma_string)
+            if (synchronous := self._config["sqlite_synchronous"]) not in SQLITE_SYNCHRONOUS_LEVELS:
+                raise ValueError(f"Invalid synchronous level {synchronous!r} for SQLite")
+            connection.execute(f"PRAGMA synchronous = {synchronous};")
             self._page_size = connection.execute("PRAGMA page_size").fetchone()[0]
 
         with self.conn as connection:
@@ -221,30 +232,93 @@ class SQLiteHistory(History):
                 connection.execute(index_statement)
 
     def flush(self) -> None:
-        """Delete all entries the history table."""
-        with self.conn as connection:
-            connection.execute("DELETE FROM history;")
+        """Delete all entries the history table, including the not yet written ones."""
+        with self._lock_pending:
+            self._cancel_pending_timer()
+            self._pending = []
+            with self.conn as connection:
+                connection.execute("DELETE FROM history;")
 
     def add(self, event: Event, what: HistoryWhat, who: str = "", addinfo: str = "") -> None:
         """Add a single entry to the history table.
 
         No need to include the line column, as it is autoincremented.
+
+        Entries are buffered and written in a single transaction once the buffer
+        holds sqlite_write_buffer_size entries or its oldest entry is
+        sqlite_write_buffer_age seconds old. Queries write the buffer before
+        reading, so they always see all entries.
         """
+        row = tuple(
+            itertools.chain(
+                (time.time(), what, who, addinfo),
+                [
+                    event.get(colname.removeprefix("event_"), defval)
+                    for colname, defval in self._event_columns
+                ],
+            )
+        )
+        if (pending := getattr(self._batch, "rows", None)) is not None:
+            pending.append(row)
+            return
+        self._buffer([row])
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """Insert all entries added by the current thread in a single transaction."""
+        if getattr(self._batch, "rows", None) is not None:
+            yield  # nested batch, the outermost one inserts
+            return
+        self._batch.rows = []
+        try:
+            yield
+        finally:
+            rows, self._batch.rows = self._batch.rows, None
+            if rows:
+                self._buffer(rows)
+
+    def _buffer(self, rows: Sequence[Sequence[object]]) -> None:
+        with self._lock_pending:
+            self._pending.extend(rows)
+            if len(self._pending) >= self._config["sqlite_write_buffer_size"]:
+                self._write_pending_locked()
+            elif self._pending_timer is None:
+                self._pending_timer = threading.Timer(
+                    self._config["sqlite_write_buffer_age"], self._write_pending_in_background
+                )
+                self._pending_timer.daemon = True
+                self._pending_timer.start()
+
+    def write_pending(self) -> None:
+        """Write all buffered entries to the history table."""
+        with self._lock_pending:
+            self._write_pending_locked()
+
+    def _write_pending_in_background(self) -> None:
+        try:
+            self.write_pending()
+        except Exception:
+            self._logger.exception("Cannot write the buffered history entries")
+
+    def _write_pending_locked(self) -> None:
+        self._cancel_pending_timer()
+        rows, self._pending = self._pending, []
+        if rows:
+            self._insert(rows)
+
+    def _cancel_pending_timer(self) -> None:
+        if self._pending_timer is not None:
+            self._pending_timer.cancel()
+            self._pending_timer = None
+
+    def _insert(self, rows: Sequence[Sequence[object]]) -> None:
         with self.conn as connection:
             cur = connection.cursor()
-            cur.execute(
+            cur.executemany(
                 f"""INSERT INTO
                     history ({", ".join(TABLE_COLUMNS[1:])})
                         VALUES ({", ".join(itertools.repeat("?", len(TABLE_COLUMNS[1:])))});""",  # nosec B608 # BNS:6b6392
-                tuple(
-                    itertools.chain(
-                        (time.time(), what, who, addinfo),
-                        [
-                            event.get(colname.removeprefix("event_"), defval)
-                            for colname, defval in self._event_columns
-                        ],
-                    )
-                ),
+                rows,
             )
 
     def add_entries(self, entries: Sequence[Sequence[object]]) -> None:
@@ -267,6 +341,7 @@ class SQLiteHistory(History):
 
         Always return all columns, since they are filtered elsewhere.
         """
+        self.write_pending()
         sqlite_query, sqlite_arguments = filters_to_sqlite_query(query.filters)
         if query.limit:
             sqlite_query += " LIMIT ?"
@@ -283,6 +358,7 @@ class SQLiteHistory(History):
         """
         now = time.time()
         if now - self._last_housekeeping > self._config["sqlite_housekeeping_interval"]:
+            self.write_pending()
             delta = now - timedelta(days=self._config["history_lifetime"]).total_seconds()
             with self.conn as connection:
                 cur = connection.cursor()
@@ -306,5 +382,6 @@ class SQLiteHistory(History):
         Used during a new object instantiation,
         to avoid sqlite3.OperationalError: database is locked.
         """
+        self.write_pending()
         self.conn.commit()
         self.conn.close()
@@ -28,6 +28,7 @@ import sys
 import threading
 import time
 import traceback
+from collections import Counter
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from logging import DEBUG, getLogger, Logger
 from pathlib import Path
@@ -63,6 +64,7 @@ from .config import (
 from .core_queries import HostInfo, query_hosts_scheduled_downtime_depth
 from .crash_reporting import CrashReportStore, ECCrashReport
 from .event import create_events_from_syslog_messages, Event, scrub_string
+from .event_store import EventStore
 from .helpers import ECLock, parse_bytes_into_syslog_messages
 from .history import ActiveHistoryPeriod, get_logfile, History, HistoryWhat, quote_tab, TimedHistory
 from .history_file import FileHistory
@@ -80,7 +82,14 @@ from .query import (
     QueryREPLICATE,
     StatusTable,
 )
-from .rule_matcher import compile_rule, match, MatchFailure, MatchResult, MatchSuccess, RuleMatcher
+from .rule_matcher import (
+    compile_rule,
+    match,
+    MatchFailure,
+    MatchSuccess,
+    PrefilteredRules,
+    RuleMatcher,
+)
 from .rule_packs import load_active_config
 from .settings import create_settings, FileDescriptor, PortNumber, Settings
 from .snmp import SNMPTrapParser
@@ -389,6 +398,8 @@ class EventServer(ECServerThread):
         self._rules: list[Rule] = []
         self._rule_by_id: dict[str | None, Rule] = {}
         self._rule_hash: dict[int, dict[int, Any]] = {}
+        # Lazily built for each (facility, priority) or for all rules (None)
+        self._prefiltered_rules: dict[tuple[int, int] | None, PrefilteredRules] = {}
         self._hash_stats: list[list[int]] = []  # facility/priority
         for _unused_facility in range(32):
             self._hash_stats.append([0] * 8)
@@ -739,16 +750,26 @@ class EventServer(ECServerThread):
 
             # Read events from builtin syslog server
             if self._syslog_udp is not None and self._syslog_udp in readable:
-                message, address = self._syslog_udp.recvfrom(4096)
-                self.process_syslog_messages(
-                    [message], parse_address("syslog socket (UDP)", address)
+                self.process_potential_event_instrumented(
+                    itertools.chain.from_iterable(
+                        create_events_from_syslog_messages(
+                            [message],
+                            parse_address("syslog socket (UDP)", address),
+                            self._logger if self._config["debug_rules"] else None,
+                        )
+                        for message, address in self._receive_datagrams(self._syslog_udp, 4096)
+                    )
                 )
 
             # Read events from builtin snmptrap server
             if self._snmp_trap_socket is not None and self._snmp_trap_socket in readable:
-                message, address = self._snmp_trap_socket.recvfrom(65535)
                 self.process_potential_event_instrumented(
-                    self.create_events_from_trap(message, parse_address("SNMP trap", address))
+                    itertools.chain.from_iterable(
+                        self.create_events_from_trap(message, parse_address("SNMP trap", address))
+                        for message, address in self._receive_datagrams(
+                            self._snmp_trap_socket, 65535
+                        )
+                    )
                 )
 
             if spool_files := sorted(
@@ -760,6 +781,21 @@ class EventServer(ECServerThread):
             else:
                 select_timeout = 1  # restore default select timeout
 
+    def _receive_datagrams(
+        self, sock: socket.socket, bufsize: int
+    ) -> Sequence[tuple[bytes, tuple[str, int]]]:
+        """
+        Receives the datagram which made the socket readable plus all datagrams
+        which are already queued, up to the configured batch size.
+        """
+        datagrams = [sock.recvfrom(bufsize)]
+        while len(datagrams) < self._config["datagram_batch_size"]:
+            try:
+                datagrams.append(sock.recvfrom(bufsize, socket.MSG_DONTWAIT))
+            except (BlockingIOError, InterruptedError):
+                break
+        return datagrams
+
     def create_events_from_trap(self, data: bytes, address: tuple[str, int]) -> Iterator[Event]:
         try:
             if varbinds_and_ipaddress := self._snmp_trap_parser(data, address):
@@ -774,17 +810,28 @@ class EventServer(ECServerThread):
         """
         Processes incoming data, just a wrapper between the real data and the
         handler function to record some statistics etc.
+
+        The events are processed in batches of at most the configured batch
+        size, whatever their source.
         """
-        for event in events:
-            self._perfcounters.count("messages")
+        pending = iter(events)
+        while True:
             before = time.time()
+            batch = list(itertools.islice(pending, self._config["datagram_batch_size"]))
+            if not batch:
+                return
+            now = time.time()
+            self._perfcounters.count_time("parsing", (now - before) / len(batch), len(batch))
+            self._perfcounters.count("messages", len(batch))
+            self._perfcounters.count_value("batch_size", len(batch))
+            before = now
             # In replication slave mode (when not took over), ignore all events
             if not is_replication_slave(self._config) or self._slave_status["mode"] != "sync":
-                self.process_potential_event(event)
+                self.process_potential_events(batch)
             elif self.settings.options.debug:
                 self._logger.info("Replication: we are in slave mode, ignoring event")
             elapsed = time.time() - before
-            self._perfcounters.count_time("processing", elapsed)
+            self._perfcounters.count_time("processing", elapsed / len(batch), len(batch))
 
     def process_syslog_messages(
         self, messages: Iterable[bytes], address: tuple[str, int] | None
@@ -998,9 +1045,8 @@ class EventServer(ECServerThread):
                 # First look for case 1: rule that already have at least one hit
                 # and this events in the state "counting" exist.
                 events_to_delete: list[tuple[Event, HistoryWhat]] = []
-                events = self._event_status.events()
-                for event in events:
-                    if event["rule_id"] == rule["id"] and event["phase"] == "counting":
+                for event in self._event_status.events_of_rule(rule["id"]):
+                    if event["phase"] == "counting":
                         # time has elapsed. Now lets see if we have reached
                         # the necessary count:
                         if event["count"] < expect["count"]:  # no -> trigger alarm
@@ -1051,10 +1097,8 @@ class EventServer(ECServerThread):
             merge, reset_ack = merge  # type: ignore[unreachable]
 
         if merge != "never":
-            for event in self._event_status.events():
-                if event["rule_id"] == rule["id"] and (
-                    event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked")
-                ):
+            for event in self._event_status.events_of_rule(rule["id"]):
+                if event["phase"] == "open" or (event["phase"] == "ack" and merge == "acked"):
                     merge_event = event
                     break
 
@@ -1135,6 +1179,7 @@ class EventServer(ECServerThread):
         self._rule_by_id = {}
         # Speedup-Hash for rule execution
         self._rule_hash = {}
+        self._prefiltered_rules = {}
         count_disabled = 0
         count_rules = 0
         count_unspecific = 0
@@ -1254,27 +1299,66 @@ class EventServer(ECServerThread):
             )
 
     def process_potential_event(self, event: Event) -> None:
-        self.do_translate_hostname(event)
+        self.process_potential_events([event])
 
-        # Log all incoming messages into a syslog-like text file if that is enabled
-        if self._config["log_messages"]:
-            self.log_message(event)
+    def process_potential_events(self, events: Sequence[Event]) -> None:
+        """
+        Processes a batch of events in two stages: First all events are matched
+        against the rules while holding the configuration lock only once, then
+        the outcome of the matching is handled event by event.
+        """
+        if not events:
+            return
+
+        for event in events:
+            self.do_translate_hostname(event)
+            # Log all incoming messages into a syslog-like text file if that is enabled
+            if self._config["log_messages"]:
+                self.log_message(event)
+
+        before = time.time()
+        with self._lock_configuration:
+            all_hits = [self._matching_rules(event) for event in events]
+        self._perfcounters.count_time("matching", (time.time() - before) / len(events), len(events))
 
-        # Rule optimizer
+        before = time.time()
+        self._event_status.count_rule_matches(
+            rule["id"] for hits in all_hits for rule, _result in hits
+        )
+        with self._history.batch():
+            for event, hits in zip(events, all_hits):
+                self._handle_rule_hits(event, hits)
+        self._perfcounters.count_time("handling", (time.time() - before) / len(events), len(events))
+
+    def _matching_rules(self, event: Event) -> Sequence[tuple[Rule, MatchSuccess]]:
+        """
+        Returns the rules hit by an event in the order they have been tried.
+        All hits but the last one are rules skipping the rest of their rule pack.
+        Must be called with the configuration lock held.
+        """
         if self._config["rule_optimizer"]:
             self._hash_stats[event["facility"]][event["priority"]] += 1
-            rule_candidates = self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
+            key: tuple[int, int] | None = (event["facility"], event["priority"])
         else:
-            rule_candidates = self._rules
+            key = None
+        if (prefiltered := self._prefiltered_rules.get(key)) is None:
+            prefiltered = self._prefiltered_rules[key] = PrefilteredRules(
+                self._rules
+                if key is None
+                else self._rule_hash.get(event["facility"], {}).get(event["priority"], [])
+            )
 
+        hits: list[tuple[Rule, MatchSuccess]] = []
+        tries = 0
         skip_pack = None
-        for rule in rule_candidates:
+        for rule in prefiltered.candidates(event["text"]):
             if skip_pack and rule["pack"] == skip_pack:
                 continue  # still in the rule pack that we want to skip
             skip_pack = None  # new pack, reset skipping
 
+            tries += 1
             try:
-                result = self.event_rule_matches(rule, event)
+                result = self._rule_matcher.event_rule_matches(rule, event)
             except Exception as e:
                 result = MatchFailure(
                     reason=f"Rule would match, but due to inverted matching does not. {e}"
@@ -1282,133 +1366,143 @@ class EventServer(ECServerThread):
                 self._logger.exception(result.reason)
 
             if isinstance(result, MatchSuccess):
-                self._perfcounters.count("rule_hits")
-                if self._config["debug_rules"]:
-                    self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
+                hits.append((rule, result))
+                if rule.get("drop") != "skip_pack":
+                    break
+                skip_pack = rule["pack"]
 
-                self._event_status.count_rule_match(rule["id"])
-                if self._config["log_rulehits"]:
-                    self._logger.info(
-                        "Rule '%s/%s' hit by message %s/%s - '%s'.",
-                        rule["pack"],
-                        rule["id"],
-                        SyslogFacility(event["facility"]),
-                        SyslogPriority(event["priority"]),
-                        event["text"],
-                    )
+        self._perfcounters.count("rule_tries", tries)
+        return hits
 
-                if rule.get("drop"):
-                    if rule["drop"] == "skip_pack":
-                        skip_pack = rule["pack"]
-                        if self._config["debug_rules"]:
-                            self._logger.info("  skipping this rule pack (%s)", skip_pack)
-                        continue
-                    self._perfcounters.count("drops")
-                    return
-
-                if result.cancelling:
-                    self._event_status.cancel_events(
-                        self, self._event_columns, event, result.match_groups, rule
-                    )
-                    return
+    def _handle_rule_hits(self, event: Event, hits: Sequence[tuple[Rule, MatchSuccess]]) -> None:
+        for rule, result in hits:
+            self._perfcounters.count("rule_hits")
+            if self._config["debug_rules"]:
+                self._logger.info("  matching groups:\n%s", pprint.pformat(result.match_groups))
 
-                # Remember the rule id that this event originated from
-                event["rule_id"] = rule["id"]
+            if self._config["log_rulehits"]:
+                self._logger.info(
+                    "Rule '%s/%s' hit by message %s/%s - '%s'.",
+                    rule["pack"],
+                    rule["id"],
+                    SyslogFacility(event["facility"]),
+                    SyslogPriority(event["priority"]),
+                    event["text"],
+                )
 
-                # Attach optional contact group information for visibility
-                # and eventually for notifications
-                self._add_rule_contact_groups_to_event(rule, event)
+            if rule.get("drop") == "skip_pack":
+                if self._config["debug_rules"]:
+                    self._logger.info("  skipping this rule pack (%s)", rule["pack"])
+                continue
 
-                # Store groups from matching this event. In order to make
-                # persistence easier, we do not save them as list but join
-                # them on ASCII-1.
-                match_groups_message = result.match_groups.get("match_groups_message", ())
-                assert match_groups_message is not False
-                event["match_groups"] = match_groups_message
+            if rule.get("drop"):
+                self._perfcounters.count("drops")
+                return
 
-                match_groups_syslog_application = result.match_groups.get(
-                    "match_groups_syslog_application", ()
-                )
-                assert match_groups_syslog_application is not False
-                event["match_groups_syslog_application"] = match_groups_syslog_application
+            self._handle_matched_event(rule, event, result)
+            return
 
-                self.rewrite_event(rule, event, result.match_groups)
+        # End of loop over rules.
+        if self._config["archive_orphans"]:
+            self._event_status.archive_event(event)
 
-                # Lookup the monitoring core hosts and add the core host
-                # name to the event when one can be matched.
-                #
-                # Needs to be done AFTER event rewriting, because the rewriting
-                # may change the "host" field.
-                #
-                # For the moment we have no rule/condition matching on this
-                # field. So we only add the core host info for matched events.
-                self._add_core_host_to_new_event(event)
-
-                if "count" in rule:
-                    count = rule["count"]
-                    # Check if a matching event already exists that we need to
-                    # count up. If the count reaches the limit, the event will
-                    # be opened and its rule actions performed.
-                    existing_event = self._event_status.count_event(self, event, count)
-                    if existing_event:
-                        if "delay" in rule:
-                            if self._config["debug_rules"]:
-                                self._logger.info(
-                                    "Event opening will be delayed for %d seconds", rule["delay"]
-                                )
-                            existing_event["delay_until"] = time.time() + rule["delay"]
-                            existing_event["phase"] = "delayed"
-                        else:
-                            event_has_opened(
-                                self._history,
-                                self.settings,
-                                self._config,
-                                self._logger,
-                                self.host_config,
-                                self._event_columns,
-                                rule,
-                                existing_event,
-                            )
+    def _handle_matched_event(self, rule: Rule, event: Event, result: MatchSuccess) -> None:
+        if result.cancelling:
+            self._event_status.cancel_events(
+                self, self._event_columns, event, result.match_groups, rule
+            )
+            return
 
-                        self._history.add(existing_event, "COUNTREACHED")
+        # Remember the rule id that this event originated from
+        event["rule_id"] = rule["id"]
 
-                        if "delay" not in rule and rule.get("autodelete"):
-                            existing_event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(existing_event, "AUTODELETE")
-                elif rule.get("expect"):
-                    self._event_status.count_expected_event(self, event)
-                else:
-                    if "delay" in rule:
-                        if self._config["debug_rules"]:
-                            self._logger.info(
-                                "Event opening will be delayed for %d seconds", rule["delay"]
-                            )
-                        event["delay_until"] = time.time() + rule["delay"]
-                        event["phase"] = "delayed"
-                    else:
-                        event["phase"] = "open"
+        # Attach optional contact group information for visibility
+        # and eventually for notifications
+        self._add_rule_contact_groups_to_event(rule, event)
 
-                    if self.new_event_respecting_limits(event) and event["phase"] == "open":
-                        event_has_opened(
-                            self._history,
-                            self.settings,
-                            self._config,
-                            self._logger,
-                            self.host_config,
-                            self._event_columns,
-                            rule,
-                            event,
+        # Store groups from matching this event. In order to make
+        # persistence easier, we do not save them as list but join
+        # them on ASCII-1.
+        match_groups_message = result.match_groups.get("match_groups_message", ())
+        assert match_groups_message is not False
+        event["match_groups"] = match_groups_message
+
+        match_groups_syslog_application = result.match_groups.get(
+            "match_groups_syslog_application", ()
+        )
+        assert match_groups_syslog_application is not False
+        event["match_groups_syslog_application"] = match_groups_syslog_application
+
+        self.rewrite_event(rule, event, result.match_groups)
+
+        # Lookup the monitoring core hosts and add the core host
+        # name to the event when one can be matched.
+        #
+        # Needs to be done AFTER event rewriting, because the rewriting
+        # may change the "host" field.
+        #
+        # For the moment we have no rule/condition matching on this
+        # field. So we only add the core host info for matched events.
+        self._add_core_host_to_new_event(event)
+
+        if "count" in rule:
+            count = rule["count"]
+            # Check if a matching event already exists that we need to
+            # count up. If the count reaches the limit, the event will
+            # be opened and its rule actions performed.
+            existing_event = self._event_status.count_event(self, event, count)
+            if existing_event:
+                if "delay" in rule:
+                    if self._config["debug_rules"]:
+                        self._logger.info(
+                            "Event opening will be delayed for %d seconds", rule["delay"]
                         )
-                        if rule.get("autodelete"):
-                            event["phase"] = "closed"
-                            with self._event_status.lock:
-                                self._event_status.remove_event(event, "AUTODELETE")
-                return
+                    existing_event["delay_until"] = time.time() + rule["delay"]
+                    existing_event["phase"] = "delayed"
+                else:
+                    event_has_opened(
+                        self._history,
+                        self.settings,
+                        self._config,
+                        self._logger,
+                        self.host_config,
+                        self._event_columns,
+                        rule,
+                        existing_event,
+                    )
 
-        # End of loop over rules.
-        if self._config["archive_orphans"]:
-            self._event_status.archive_event(event)
+                self._history.add(existing_event, "COUNTREACHED")
+
+                if "delay" not in rule and rule.get("autodelete"):
+                    existing_event["phase"] = "closed"
+                    with self._event_status.lock:
+                        self._event_status.remove_event(existing_event, "AUTODELETE")
+        elif rule.get("expect"):
+            self._event_status.count_expected_event(self, event)
+        else:
+            if "delay" in rule:
+                if self._config["debug_rules"]:
+                    self._logger.info("Event opening will be delayed for %d seconds", rule["delay"])
+                event["delay_until"] = time.time() + rule["delay"]
+                event["phase"] = "delayed"
+            else:
+                event["phase"] = "open"
+
+            if self.new_event_respecting_limits(event) and event["phase"] == "open":
+                event_has_opened(
+                    self._history,
+                    self.settings,
+                    self._config,
+                    self._logger,
+                    self.host_config,
+                    self._event_columns,
+                    rule,
+                    event,
+                )
+                if rule.get("autodelete"):
+                    event["phase"] = "closed"
+                    with self._event_status.lock:
+                        self._event_status.remove_event(event, "AUTODELETE")
 
     def _add_rule_contact_groups_to_event(self, rule: Rule, event: Event) -> None:
         if rule.get("contact_groups") is None:
@@ -1448,18 +1542,6 @@ class EventServer(ECServerThread):
             )
             return False
 
-    def event_rule_matches(self, rule: Rule, event: Event) -> MatchResult:
-        """
-        Checks if an event matches a rule. Returns either MatchFailure (no match)
-        or a MatchSuccess with a pair of matchtype, groups, where matchtype is False for a
-        normal match and True for a cancelling match and the groups is a tuple
-        if matched regex groups in either text (normal) or match_ok (cancelling)
-        match.
-        """
-        self._perfcounters.count("rule_tries")
-        with self._lock_configuration:
-            return self._rule_matcher.event_rule_matches(rule, event)
-
     def rewrite_event(
         self, rule: Rule, event: Event, match_groups: MatchGroups, set_first: bool = True
     ) -> None:
@@ -2531,6 +2613,8 @@ def run_eventd(
     # Now wait for termination of the server threads
     event_server.join()
     status_server.join()
+    # Write out the entries the history might still buffer
+    history.close()
 
 
 # .
@@ -2574,13 +2658,11 @@ class EventStatus:
         self._history = history
 
     def flush(self) -> None:
-        # TODO: Improve types!
-        self._events: list[Event] = []
+        self._events = EventStore()
         self._next_event_id = 1
         self._rule_stats: dict[str, int] = {}
         # needed for expecting rules
         self._interval_starts: dict[str, int] = {}
-        self._initialize_event_limit_status()
 
         # TODO: might introduce some performance counters, like:
         # - number of received messages
@@ -2588,14 +2670,13 @@ class EventStatus:
         # - number of rule misses
 
     def events(self) -> list[Event]:
-        # TODO: Improve type!
-        return self._events
+        return self._events.to_list()
 
     def event(self, eid: int) -> Event | None:
-        for event in self._events:
-            if event["id"] == eid:
-                return event
-        return None
+        return self._events.get(eid)
+
+    def events_of_rule(self, rule_id: str | None) -> Sequence[Event]:
+        return self._events.by_rule(rule_id)
 
     def interval_start(self, rule_id: str, interval: ExpectInterval) -> int:
         """
@@ -2640,14 +2721,14 @@ class EventStatus:
     def pack_status(self) -> PackedEventStatus:
         return PackedEventStatus(
             next_event_id=self._next_event_id,
-            events=self._events,
+            events=self._events.to_list(),
             rule_stats=self._rule_stats,
             interval_starts=self._interval_starts,
         )
 
     def unpack_status(self, status: PackedEventStatus) -> None:
         self._next_event_id = status["next_event_id"]
-        self._events = status["events"]
+        self._events = EventStore(status["events"])
         self._rule_stats = status["rule_stats"]
         self._interval_starts = status["interval_starts"]
 
@@ -2675,11 +2756,12 @@ class EventStatus:
 
     def load_status(self, event_server: EventServer) -> None:
         path = self.settings.paths.status_file.value
+        events: list[Event] = []
         if path.exists():
             try:
                 status = ast.literal_eval(path.read_text(encoding="utf-8"))
                 self._next_event_id = status["next_event_id"]
-                self._events = status["events"]
+                events = status["events"]
                 self._rule_stats = status["rule_stats"]
                 self._interval_starts = status.get("interval_starts", {})
                 self._logger.info("Loaded event state from %s.", path)
@@ -2688,7 +2770,7 @@ class EventStatus:
                 raise
 
         # Add new columns and fix broken events
-        for event in self._events:
+        for event in events:
             event.setdefault("ipaddress", "")
             event.setdefault("host", HostName(""))
             event.setdefault("application", "")
@@ -2698,48 +2780,26 @@ class EventStatus:
                 event_server.add_core_host_to_event(event)
                 event["host_in_downtime"] = False
 
-        # core_host is needed to initialize the status
-        self._initialize_event_limit_status()
-
-    def _initialize_event_limit_status(self) -> None:
-        """
-        Called on Event Console initialization from status file to initialize
-        the current event limit state -> Sets internal counters which are
-        updated during runtime.
-        """
-        self.num_existing_events = len(self._events)
-
-        self.num_existing_events_by_host: dict[tuple[str, HostName | None], int] = {}
-        self.num_existing_events_by_rule: dict[Any, int] = {}
-        for event in self._events:
-            self._count_event_add(event)
-
-    def _count_event_add(self, event: Event) -> None:
-        host_key = (event["host"], event["core_host"])
-        if host_key not in self.num_existing_events_by_host:
-            self.num_existing_events_by_host[host_key] = 1
-        else:
-            self.num_existing_events_by_host[host_key] += 1
+        # core_host is needed to build the indices
+        self._events = EventStore(events)
 
-        if event["rule_id"] not in self.num_existing_events_by_rule:
-            self.num_existing_events_by_rule[event["rule_id"]] = 1
-        else:
-            self.num_existing_events_by_rule[event["rule_id"]] += 1
+    @property
+    def num_existing_events(self) -> int:
+        return len(self._events)
 
-    def _count_event_remove(self, event: Event) -> None:
-        host_key = (event["host"], event["core_host"])
+    @property
+    def num_existing_events_by_host(self) -> Mapping[tuple[HostName, HostName | None], int]:
+        return self._events.counts_by_host()
 
-        self.num_existing_events -= 1
-        self.num_existing_events_by_host[host_key] -= 1
-        self.num_existing_events_by_rule[event["rule_id"]] -= 1
+    @property
+    def num_existing_events_by_rule(self) -> Mapping[str | None, int]:
+        return self._events.counts_by_rule()
 
     def new_event(self, event: Event) -> None:
         self._perfcounters.count("events")
         event["id"] = self._next_event_id
         self._next_event_id += 1
-        self._events.append(event)
-        self.num_existing_events += 1
-        self._count_event_add(event)
+        self._events.add(event)
         self._history.add(event, "NEW")
 
     def archive_event(self, event: Event) -> None:
@@ -2753,16 +2813,15 @@ class EventStatus:
         try:
             self._events.remove(event)
             self._history.add(event, delete_reason, user)
-            self._count_event_remove(event)
-        except ValueError:
+        except KeyError:
             self._logger.exception("Cannot remove event %d: not present", event["id"])
 
     # protected by self.lock
     def remove_oldest_event(self, ty: LimitKind, event: Event) -> None:
         if ty == "overall":
             self._logger.log(VERBOSE, "  Removing oldest event")
-            oldest_event = self._events[0]
-            self.remove_event(oldest_event, "AUTODELETE")
+            if (oldest_event := self._events.oldest()) is not None:
+                self.remove_event(oldest_event, "AUTODELETE")
         elif ty == "by_rule" and event["rule_id"] is not None:
             self._logger.log(VERBOSE, '  Removing oldest event of rule "%s"', event["rule_id"])
             self._remove_oldest_event_of_rule(event["rule_id"])
@@ -2772,27 +2831,25 @@ class EventStatus:
 
     # protected by self.lock
     def _remove_oldest_event_of_rule(self, rule_id: str) -> None:
-        for event in self._events:
-            if event["rule_id"] == rule_id:
-                self.remove_event(event, "AUTODELETE")
-                return
+        for event in self._events.by_rule(rule_id):
+            self.remove_event(event, "AUTODELETE")
+            return
 
     # protected by self.lock
-    def _remove_oldest_event_of_host(self, hostname: str) -> None:
-        for event in self._events:
-            if event["host"] == hostname:
-                self.remove_event(event, "AUTODELETE")
-                return
+    def _remove_oldest_event_of_host(self, hostname: HostName) -> None:
+        for event in self._events.by_host_name(hostname):
+            self.remove_event(event, "AUTODELETE")
+            return
 
     # protected by self.lock
     def get_num_existing_events_by(self, ty: LimitKind, event: Event) -> int:
         match ty:
             case "overall":
-                return self.num_existing_events
+                return len(self._events)
             case "by_rule":
-                return self.num_existing_events_by_rule.get(event["rule_id"], 0)
+                return self._events.count_by_rule(event["rule_id"])
             case "by_host":
-                return self.num_existing_events_by_host.get((event["host"], event["core_host"]), 0)
+                return self._events.count_by_host(event["host"], event["core_host"])
             case _ as unreachable:
                 assert_never(unreachable)
 
@@ -2810,10 +2867,8 @@ class EventStatus:
         """
         with self.lock:
             to_delete = []
-            for event in self._events:
-                if event["rule_id"] == rule["id"] and self.cancelling_match(
-                    match_groups, new_event, event, rule
-                ):
+            for event in self._events.by_rule(rule["id"]):
+                if self.cancelling_match(match_groups, new_event, event, rule):
                     # Fill a few fields of the cancelled event with data from
                     # the cancelling event so that action scripts have useful
                     # values and the logfile entry if more relevant.
@@ -2964,10 +3019,14 @@ class EventStatus:
 
         return True
 
-    def count_rule_match(self, rule_id: str) -> None:
+    def count_rule_matches(self, rule_ids: Iterable[str]) -> None:
+        """Count the hits of a whole batch of events at once"""
+        counts = Counter(rule_ids)
+        if not counts:
+            return
         with self.lock:
-            self._rule_stats.setdefault(rule_id, 0)
-            self._rule_stats[rule_id] += 1
+            for rule_id, count in counts.items():
+                self._rule_stats[rule_id] = self._rule_stats.get(rule_id, 0) + count
 
     def count_event_up(self, found: Event, event: Event) -> None:
         """
@@ -2985,10 +3044,13 @@ class EventStatus:
                 preserve["contact"] = found["contact"]
         found.update(event)
         found.update(preserve)
+        if found in self._events:
+            # The host may have changed if the rule does not count separately per host.
+            self._events.reindex(found)
 
     def count_expected_event(self, event_server: EventServer, event: Event) -> None:
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"] and ev["phase"] == "counting":
+        for ev in self._events.by_rule(event["rule_id"]):
+            if ev["phase"] == "counting":
                 self.count_event_up(ev, event)
                 return
 
@@ -3005,31 +3067,30 @@ class EventStatus:
         since the event has been created because the count was too
         low in the specified period of time.
         """
-        for ev in self._events:
-            if ev["rule_id"] == event["rule_id"]:
-                if ev["phase"] == "ack" and not count["count_ack"]:
-                    continue  # skip acknowledged events
+        for ev in self._events.by_rule(event["rule_id"]):
+            if ev["phase"] == "ack" and not count["count_ack"]:
+                continue  # skip acknowledged events
 
-                if count["separate_host"] and ev["host"] != event["host"]:
-                    continue  # treat events with separated hosts separately
+            if count["separate_host"] and ev["host"] != event["host"]:
+                continue  # treat events with separated hosts separately
 
-                if count["separate_application"] and ev["application"] != event["application"]:
-                    continue  # same for application
+            if count["separate_application"] and ev["application"] != event["application"]:
+                continue  # same for application
 
-                if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
-                    continue
+            if count["separate_match_groups"] and ev["match_groups"] != event["match_groups"]:
+                continue
 
-                count_duration = count.get("count_duration")
-                if count_duration is not None and ev["first"] + count_duration < event["time"]:
-                    # Counting has been discontinued on this event after a certain time
-                    continue
+            count_duration = count.get("count_duration")
+            if count_duration is not None and ev["first"] + count_duration < event["time"]:
+                # Counting has been discontinued on this event after a certain time
+                continue
 
-                if ev["host_in_downtime"] != event["host_in_downtime"]:
-                    continue  # treat events with different downtime states separately
+            if ev["host_in_downtime"] != event["host_in_downtime"]:
+                continue  # treat events with different downtime states separately
 
-                found = ev
-                self.count_event_up(found, event)
-                break
+            found = ev
+            self.count_event_up(found, event)
+            break
         else:
             event["count"] = 1
             event["phase"] = "counting"
@@ -3043,7 +3104,7 @@ class EventStatus:
         return None  # do not do event action
 
     def delete_events_by(self, predicate: Callable[[Event], bool], user: str) -> None:
-        for event in self._events[:]:
+        for event in self._events:
             if predicate(event):
                 event["phase"] = "closed"
                 if user:
@@ -35,6 +35,14 @@ class Perfcounters:
         "processing": 0.99,  # event processing
         "sync": 0.95,  # Replication sync
         "request": 0.95,  # Client requests
+        "parsing": 0.95,  # parsing of a batch of messages
+        "matching": 0.95,  # rule matching of a batch of events
+        "handling": 0.95,  # creating/cancelling/counting of a batch of events
+    }
+
+    # Other averaged values
+    _value_weights: Mapping[str, float] = {
+        "batch_size": 0.95,  # number of messages processed at once
     }
 
     # TODO: Why aren't self._times / self._rates / ... not initialized with their defaults?
@@ -47,21 +55,33 @@ class Perfcounters:
         self._rates: dict[str, float] = {}
         self._average_rates: dict[str, float] = {}
         self._times: dict[str, float] = {}
+        self._values: dict[str, float] = {}
         self._last_statistics: float | None = None
 
         self._logger = logger.getChild("Perfcounters")
 
-    def count(self, counter: str) -> None:
+    def count(self, counter: str, num: int = 1) -> None:
         with self._lock:
-            self._counters[counter] += 1
+            self._counters[counter] += num
 
-    def count_time(self, counter: str, ptime: float) -> None:
+    def count_time(self, counter: str, ptime: float, num: int = 1) -> None:
+        """Account for num occurrences which took ptime each"""
         with self._lock:
             if counter in self._times:
-                self._times[counter] = lerp(ptime, self._times[counter], self._weights[counter])
+                # Same as lerp()ing num times with the same ptime
+                self._times[counter] = lerp(
+                    ptime, self._times[counter], self._weights[counter] ** num
+                )
             else:
                 self._times[counter] = ptime
 
+    def count_value(self, name: str, value: float) -> None:
+        with self._lock:
+            if name in self._values:
+                self._values[name] = lerp(value, self._values[name], self._value_weights[name])
+            else:
+                self._values[name] = value
+
     def do_statistics(self) -> None:
         with self._lock:
             now = time.time()
@@ -96,6 +116,9 @@ class Perfcounters:
         for name in cls._weights:
             columns.append((f"status_average_{name}_time", 0.0))
 
+        for name in cls._value_weights:
+            columns.append((f"status_average_{name}", 0.0))
+
         return columns
 
     def get_status(self) -> Sequence[float]:
@@ -114,4 +137,7 @@ class Perfcounters:
             for name in self._weights:
                 row.append(self._times.get(name, 0.0))
 
+            for name in self._value_weights:
+                row.append(self._values.get(name, 0.0))
+
             return row
@@ -7,7 +7,7 @@ from __future__ import annotations
 
 import ipaddress
 import re
-from collections.abc import Callable
+from collections.abc import Callable, Sequence
 from dataclasses import dataclass
 from logging import Logger
 from typing import Literal, NamedTuple
@@ -132,6 +132,73 @@ def match(pattern: TextPattern | None, text: str, complete: bool) -> TextMatchRe
     return m.groups("") if m else False
 
 
+def _combine_regexes(patterns: Sequence[str], flags: int) -> re.Pattern[str] | None:
+    if not patterns:
+        return None
+    try:
+        return re.compile("|".join(f"(?:{pattern})" for pattern in patterns), flags)
+    except re.error:
+        # e.g. global inline flags in the middle of the combined pattern
+        return None
+
+
+class PrefilteredRules:
+    """Rules to be tried for an event, prefiltered by combined message patterns.
+
+    A rule without inverted matching can only match an event if its "match" or
+    "match_ok" pattern matches the text of the event. The message patterns of all
+    such rules are combined into one regex for the regex patterns and one for the
+    plain text patterns, unless their patterns contain groups. If neither of them
+    matches the text of an event, only the remaining rules need to be tried. The
+    order of the rules is always preserved.
+    """
+
+    def __init__(self, rules: Sequence[Rule]) -> None:
+        self.rules: Sequence[Rule] = rules
+        self._unfiltered: Sequence[Rule] = rules
+        self._regex: re.Pattern[str] | None = None
+        self._text: re.Pattern[str] | None = None
+
+        regexes: list[str] = []
+        texts: list[str] = []
+        unfiltered: list[Rule] = []
+        for rule in rules:
+            patterns = [p for p in (rule.get("match"), rule.get("match_ok")) if p is not None]
+            if (
+                rule.get("invert_matching")
+                or "match" not in rule
+                # Combining the patterns renumbers their groups, breaking (conditional)
+                # references to them. Duplicate group names don't even compile.
+                or any(not isinstance(pattern, str) and pattern.groups for pattern in patterns)
+            ):
+                unfiltered.append(rule)
+                continue
+            for pattern in patterns:
+                if isinstance(pattern, str):
+                    texts.append(re.escape(pattern))
+                else:
+                    regexes.append(pattern.pattern)
+
+        if len(unfiltered) == len(rules):
+            return
+        regex = _combine_regexes(regexes, re.IGNORECASE)
+        text = _combine_regexes(texts, 0)
+        if (regexes and regex is None) or (texts and text is None):
+            return
+        self._unfiltered = unfiltered
+        self._regex = regex
+        self._text = text
+
+    def candidates(self, text: str) -> Sequence[Rule]:
+        if self._unfiltered is self.rules:
+            return self.rules
+        if self._regex is not None and self._regex.search(text):
+            return self.rules
+        if self._text is not None and self._text.search(text.lower()):
+            return self.rules
+        return self._unfiltered
+
+
 def format_pattern(pattern: TextPattern | None) -> str:
     if pattern is None:
         return str(pattern)
@@ -29,6 +29,9 @@ from .snmp import make_backend, SNMPPluginStore
 
 __all__ = ["SNMPFetcher", "SNMPSectionMeta", "SNMPScanConfig"]
 
+# Default upper limit of the cached walks kept per host
+WALK_CACHE_MAX_ENTRIES: Final = 1000
+
 
 class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):
     """A cache on a per-fetchoid basis
@@ -38,21 +41,47 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):
 
     The fetched data is always saved to a file *if* the respective OID is marked as being cached
     by the plug-in using `OIDCached` (that is: if the save_to_cache attribute of the OID object
-    is true).
+    is true). Every OID is stored in its own pickle file, the modification time of which is
+    the time of the walk: Walks older than `max_age` seconds are not loaded, and only the
+    `max_entries` most recent walks are kept on disk.
     """
 
-    __slots__ = ("_store", "_path", "_logger")
+    __slots__ = (
+        "_store",
+        "_path",
+        "_logger",
+        "_max_age",
+        "_max_entries",
+        "_changed",
+        "hits",
+        "misses",
+    )
 
-    def __init__(self, walk_cache: Path, logger: logging.Logger) -> None:
+    def __init__(
+        self,
+        walk_cache: Path,
+        logger: logging.Logger,
+        *,
+        max_age: float | None = None,
+        max_entries: int | None = None,
+    ) -> None:
         self._store: dict[tuple[str, str, bool], SNMPRowInfo] = {}
         self._path = walk_cache
         self._logger = logger
+        self._max_age = max_age
+        self._max_entries = max_entries
+        self._changed: set[tuple[str, str, bool]] = set()
+        self.hits = 0
+        self.misses = 0
 
     def _read_row(self, path: Path) -> SNMPRowInfo:
-        return store.load_object_from_file(path, default=None)
+        return store.load_object_from_pickle_file(path, default=None)
 
     def _write_row(self, path: Path, rowinfo: SNMPRowInfo) -> None:
-        return store.save_object_to_file(path, rowinfo, pprint_value=False)
+        return store.save_object_to_pickle_file(path, rowinfo)
+
+    def _mtime(self, path: Path) -> float:
+        return path.stat().st_mtime
 
     @staticmethod
     def _oid2name(fetchoid: str, context_hash: str) -> str:
@@ -70,12 +99,23 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):
         return f"{type(self).__name__}({self._store!r})"
 
     def __getitem__(self, key: tuple[str, str, bool]) -> SNMPRowInfo:
-        return self._store.__getitem__(key)
+        try:
+            value = self._store.__getitem__(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self.hits += 1
+        return value
+
+    def __contains__(self, key: object) -> bool:
+        return self._store.__contains__(key)
 
     def __setitem__(self, key: tuple[str, str, bool], value: SNMPRowInfo) -> None:
+        self._changed.add(key)
         return self._store.__setitem__(key, value)
 
     def __delitem__(self, key: tuple[str, str, bool]) -> None:
+        self._changed.discard(key)
         return self._store.__delitem__(key)
 
     def __iter__(self) -> Iterator[tuple[str, str, bool]]:
@@ -90,9 +130,14 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):
 
     def load(self) -> None:
         """Try to read the OIDs data from cache files"""
+        now = time.time()
         for path in self._iterfiles():
             fetchoid, context_hash = self._name2oid(path.name)
 
+            if self._max_age is not None and now - self._mtime(path) > self._max_age:
+                self._logger.debug(f"  Walk cache {path} of {fetchoid} is outdated")
+                continue
+
             self._logger.debug(f"  Loading {fetchoid} from walk cache {path}")
             try:
                 read_walk = self._read_row(path)
@@ -108,13 +153,24 @@ class WalkCache(MutableMapping[tuple[str, str, bool], SNMPRowInfo]):
     def save(self) -> None:
         self._path.mkdir(parents=True, exist_ok=True)
 
-        for (fetchoid, context_hash, save_flag), rowinfo in self._store.items():
+        for fetchoid, context_hash, save_flag in self._changed:
             if not save_flag:
                 continue
 
             path = self._path / self._oid2name(fetchoid, context_hash)
             self._logger.debug(f"  Saving walk of {fetchoid} to walk cache {path}")
-            self._write_row(path, rowinfo)
+            self._write_row(path, self._store[(fetchoid, context_hash, save_flag)])
+
+        self._changed.clear()
+        self._evict()
+
+    def _evict(self) -> None:
+        if self._max_entries is None:
+            return
+        files = sorted(self._iterfiles(), key=self._mtime, reverse=True)
+        for path in files[self._max_entries :]:
+            self._logger.debug(f"  Removing walk cache {path}")
+            path.unlink(missing_ok=True)
 
 
 @dataclasses.dataclass(kw_only=True)
@@ -150,6 +206,8 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
         stored_walk_path: Path | str,
         walk_cache_path: Path | str,
         snmp_config: SNMPHostConfig,
+        walk_cache_max_age: float | None = None,
+        walk_cache_max_entries: int | None = WALK_CACHE_MAX_ENTRIES,
     ) -> None:
         super().__init__()
         self.sections: Final = sections
@@ -158,6 +216,8 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
         self.stored_walk_path: Final = Path(stored_walk_path)
         self.walk_cache_path: Final = Path(walk_cache_path)
         self.snmp_config: Final = snmp_config
+        self.walk_cache_max_age: Final = walk_cache_max_age
+        self.walk_cache_max_entries: Final = walk_cache_max_entries
         self._logger: Final = logging.getLogger("cmk.helper.snmp")
         self._section_store = SectionStore[SNMPRawDataElem](
             section_store_path,
@@ -175,6 +235,8 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
             and self.stored_walk_path == other.stored_walk_path
             and self.walk_cache_path == other.walk_cache_path
             and self.snmp_config == other.snmp_config
+            and self.walk_cache_max_age == other.walk_cache_max_age
+            and self.walk_cache_max_entries == other.walk_cache_max_entries
         )
 
     @property
@@ -205,6 +267,8 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
                     f"stored_walk_path={self.stored_walk_path!r}",
                     f"walk_cache_path={self.walk_cache_path!r}",
                     f"snmp_config={self.snmp_config!r}",
+                    f"walk_cache_max_age={self.walk_cache_max_age!r}",
+                    f"walk_cache_max_entries={self.walk_cache_max_entries!r}",
                 )
             )
             + ")"
@@ -286,7 +350,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
             raise TypeError("missing backend")
 
         now = int(time.time())
-        persisted_sections = self._section_store.load() if mode is Mode.CHECKING else {}
+        persisted_sections = self._section_store.load_timestamps() if mode is Mode.CHECKING else {}
         section_names = self._get_selection(mode)
         section_names |= self._detect(
             select_from=self._get_detected_sections(mode) - section_names, backend=self._backend
@@ -295,7 +359,12 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
             # Nothing to discover? That can't be right.
             raise MKFetcherError("Got no data")
 
-        walk_cache = WalkCache(self.walk_cache_path / str(self._backend.hostname), self._logger)
+        walk_cache = WalkCache(
+            self.walk_cache_path / str(self._backend.hostname),
+            self._logger,
+            max_age=self.walk_cache_max_age,
+            max_entries=self.walk_cache_max_entries,
+        )
         if mode is Mode.CHECKING:
             walk_cache_msg = "SNMP walk cache is enabled: Use any locally cached information"
             walk_cache.load()
@@ -306,7 +375,7 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
         fetched_data: dict[SectionName, SNMPRawDataElem] = {}
         for section_name in self._sort_section_names(section_names):
             try:
-                _from, until, _section = persisted_sections[section_name]
+                _from, until = persisted_sections[section_name]
                 if now > until:
                     raise LookupError(section_name)
             except LookupError:
@@ -324,6 +393,9 @@ class SNMPFetcher(Fetcher[SNMPRawData]):
                 ]
 
         walk_cache.save()
+        self._logger.debug(
+            "SNMP walk cache: %d hits, %d misses", walk_cache.hits, walk_cache.misses
+        )
 
         return fetched_data
 
@@ -3,13 +3,27 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import contextlib
+import io
+import logging
+import os
+import selectors
 import subprocess
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
 from typing import assert_never, Literal, TypeAlias
 
 from cmk.ccc import tty
 from cmk.ccc.exceptions import MKGeneralException, MKSNMPError, MKTimeout
-from cmk.snmplib import OID, SNMPBackend, SNMPContext, SNMPRawValue, SNMPRowInfo, SNMPVersion
+from cmk.snmplib import (
+    OID,
+    SNMPBackend,
+    SNMPContext,
+    SNMPHostConfig,
+    SNMPRawValue,
+    SNMPRowInfo,
+    SNMPVersion,
+)
 from cmk.utils.sectionname import SectionName
 
 from ._utils import strip_snmp_value
@@ -18,6 +32,10 @@ __all__ = ["ClassicSNMPBackend"]
 
 CommandType: TypeAlias = Literal["snmpget", "snmpgetnext", "snmpwalk"]
 
+# Upper limit of snmp(bulk)walk processes running at the same time for one host.
+# Keep this low: many devices answer concurrent walks rather slowly.
+MAX_CONCURRENT_WALKS = 4
+
 
 def _sanitize_tuple(tuple_: object) -> str:
     """For the snmp credentials, we don't want to print secrets...
@@ -34,7 +52,27 @@ def _sanitize_tuple(tuple_: object) -> str:
     )
 
 
+@dataclass(frozen=True)
+class _WalkOutput:
+    returncode: int
+    stdout: bytes
+    stderr: bytes
+
+
+@dataclass
+class _RunningWalk:
+    key: tuple[OID, SNMPContext]
+    process: subprocess.Popen[bytes]
+    stdout: list[bytes] = field(default_factory=list)
+    stderr: list[bytes] = field(default_factory=list)
+    open_pipes: int = 2
+
+
 class ClassicSNMPBackend(SNMPBackend):
+    def __init__(self, snmp_config: SNMPHostConfig, logger: logging.Logger) -> None:
+        super().__init__(snmp_config, logger)
+        self._prefetched: dict[tuple[OID, SNMPContext], _WalkOutput] = {}
+
     def get(self, /, oid: OID, *, context: SNMPContext) -> SNMPRawValue | None:
         if oid.endswith(".*"):
             oid_prefix = oid[:-2]
@@ -108,18 +146,17 @@ class ClassicSNMPBackend(SNMPBackend):
         section_name: SectionName | None = None,
         table_base_oid: str | None = None,
     ) -> SNMPRowInfo:
-        protospec = self._snmp_proto_spec()
-
-        ipaddress = self.config.ipaddress or "0.0.0.0"
-        if self.config.is_ipv6_primary:
-            ipaddress = "[" + ipaddress + "]"
+        if (prefetched := self._prefetched.pop((oid, context), None)) is not None:
+            rowinfo = self._get_rowinfo_from_walk_output(
+                io.TextIOWrapper(io.BytesIO(prefetched.stdout), encoding="utf-8")
+            )
+            self._raise_on_walk_error(prefetched.returncode, prefetched.stderr.decode("utf-8"))
+            return rowinfo
 
-        portspec = self._snmp_port_spec()
-        command = self._snmp_base_command("snmpwalk", context) + ["-Cc"]
-        command += ["-OQ", "-OU", "-On", "-Ot", f"{protospec}{ipaddress}{portspec}", oid]
+        command = self._walk_command(oid, context)
         self._logger.debug(f"Running '{subprocess.list2cmdline(command)}'")
 
-        rowinfo: SNMPRowInfo = []
+        rowinfo = []
         with subprocess.Popen(
             command,
             close_fds=True,
@@ -137,13 +174,120 @@ class ClassicSNMPBackend(SNMPBackend):
                 snmp_process.kill()
                 raise
 
-        if snmp_process.returncode:
-            self._logger.debug(f"{tty.red}{tty.bold}ERROR: {tty.normal}SNMP error: {error.strip()}")
-            raise MKSNMPError(
-                f"SNMP Error on {ipaddress}: {error.strip()} (Exit-Code: {snmp_process.returncode})"
-            )
+        self._raise_on_walk_error(snmp_process.returncode, error)
         return rowinfo
 
+    @contextlib.contextmanager
+    def prefetching_walks(
+        self, oids: Sequence[OID], *, contexts: Sequence[SNMPContext]
+    ) -> Iterator[None]:
+        """Run the walks of all given OIDs concurrently
+
+        The net-snmp tools only walk one OID per invocation, so the columns
+        of a table are walked by up to MAX_CONCURRENT_WALKS processes at the
+        same time. The output is kept until walk() is called for the OID, so
+        parsing and error handling stay exactly the same.
+
+        The first failing walk fails the table anyway: The remaining walks are
+        terminated and report the same error.
+        """
+        walks = [(oid, context) for context in contexts for oid in oids]
+        try:
+            if len(walks) > 1:
+                self._prefetched = self._run_walks(walks)
+            yield
+        finally:
+            self._prefetched = {}
+
+    def _run_walks(
+        self, walks: Sequence[tuple[OID, SNMPContext]]
+    ) -> dict[tuple[OID, SNMPContext], _WalkOutput]:
+        outputs: dict[tuple[OID, SNMPContext], _WalkOutput] = {}
+        pending = iter(walks)
+        running: list[_RunningWalk] = []
+        with selectors.DefaultSelector() as selector:
+            try:
+                while True:
+                    while len(running) < MAX_CONCURRENT_WALKS and (key := next(pending, None)):
+                        walk = self._start_walk(key)
+                        assert walk.process.stdout and walk.process.stderr
+                        selector.register(
+                            walk.process.stdout, selectors.EVENT_READ, (walk, walk.stdout)
+                        )
+                        selector.register(
+                            walk.process.stderr, selectors.EVENT_READ, (walk, walk.stderr)
+                        )
+                        running.append(walk)
+
+                    if not running:
+                        return outputs
+
+                    for selector_key, _events in selector.select():
+                        walk, chunks = selector_key.data
+                        if chunk := os.read(selector_key.fd, 65536):
+                            chunks.append(chunk)
+                            continue
+                        selector.unregister(selector_key.fileobj)
+                        walk.open_pipes -= 1
+                        if not walk.open_pipes:
+                            running.remove(walk)
+                            outputs[walk.key] = output = self._finish_walk(walk)
+                            if output.returncode:
+                                # Most likely the device is not reachable. Don't wait
+                                # for the other walks to time out as well.
+                                outputs.update(
+                                    dict.fromkeys((*(w.key for w in running), *pending), output)
+                                )
+                                return outputs
+            finally:
+                for walk in running:
+                    walk.process.kill()
+                    self._finish_walk(walk)
+
+    def _start_walk(self, key: tuple[OID, SNMPContext]) -> _RunningWalk:
+        command = self._walk_command(*key)
+        self._logger.debug(f"Running '{subprocess.list2cmdline(command)}'")
+        return _RunningWalk(
+            key,
+            subprocess.Popen(
+                command,
+                close_fds=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            ),
+        )
+
+    @staticmethod
+    def _finish_walk(walk: _RunningWalk) -> _WalkOutput:
+        assert walk.process.stdout and walk.process.stderr
+        walk.process.stdout.close()
+        walk.process.stderr.close()
+        return _WalkOutput(
+            walk.process.wait(), stdout=b"".join(walk.stdout), stderr=b"".join(walk.stderr)
+        )
+
+    def _walk_command(self, oid: OID, context: SNMPContext) -> list[str]:
+        protospec = self._snmp_proto_spec()
+
+        ipaddress = self.config.ipaddress or "0.0.0.0"
+        if self.config.is_ipv6_primary:
+            ipaddress = "[" + ipaddress + "]"
+
+        portspec = self._snmp_port_spec()
+        command = self._snmp_base_command("snmpwalk", context) + ["-Cc"]
+        command += ["-OQ", "-OU", "-On", "-Ot", f"{protospec}{ipaddress}{portspec}", oid]
+        return command
+
+    def _raise_on_walk_error(self, returncode: int, error: str) -> None:
+        if not returncode:
+            return
+        self._logger.debug(f"{tty.red}{tty.bold}ERROR: {tty.normal}SNMP error: {error.strip()}")
+        ipaddress = self.config.ipaddress or "0.0.0.0"
+        if self.config.is_ipv6_primary:
+            ipaddress = "[" + ipaddress + "]"
+        raise MKSNMPError(f"SNMP Error on {ipaddress}: {error.strip()} (Exit-Code: {returncode})")
+
     def _get_rowinfo_from_walk_output(self, lines: Iterable[str]) -> SNMPRowInfo:
         # Ugly(1): in some cases snmpwalk inserts line feed within one
         # dataset. This happens for example on hexdump outputs longer
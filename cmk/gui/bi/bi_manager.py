@@ -28,7 +28,11 @@ class BIManager:
         self.compiler = BICompiler(self.bi_configuration_file(), sites_callback)
         self.compiler.load_compiled_aggregations()
         self.status_fetcher = BIStatusFetcher(sites_callback)
-        self.computer = BIComputer(self.compiler.compiled_aggregations, self.status_fetcher)
+        self.computer = BIComputer(
+            self.compiler.compiled_aggregations,
+            self.status_fetcher,
+            self.compiler.aggregation_index,
+        )
 
     @classmethod
     def bi_configuration_file(cls) -> Path:
@@ -58,10 +62,10 @@ def bi_livestatus_query(
 
 @request_memoize(maxsize=10000)
 def load_compiled_branch(aggr_id: str, branch_title: str) -> BICompiledRule:
-    if compiled_aggregation := _load_compiled_aggregation(aggr_id):
-        for branch in compiled_aggregation.branches:
-            if branch.properties.title == branch_title:
-                return branch
+    if (compiled_aggregation := _load_compiled_aggregation(aggr_id)) and (
+        branch := compiled_aggregation.branch_by_title(branch_title)
+    ):
+        return branch
     raise MKGeneralException(f"Branch {branch_title} not found in aggregation {aggr_id}")
 
 
@@ -10,13 +10,14 @@ from pathlib import Path
 
 from cmk.ccc.hostaddress import HostName
 from cmk.gui.config import Config
-from cmk.utils.structured_data import InventoryPaths
+from cmk.utils.structured_data import DeltaArchive, InventoryPaths
 
 
 class InventoryHousekeeping:
     def __init__(self, omd_root: Path) -> None:
         super().__init__()
         self.inv_paths = InventoryPaths(omd_root)
+        self.delta_archive = DeltaArchive(omd_root)
 
     def __call__(self, config: Config) -> None:
         if not (self.inv_paths.delta_cache_dir.exists() and self.inv_paths.archive_dir.exists()):
@@ -66,4 +67,5 @@ class InventoryHousekeeping:
             x for x in self.inv_paths.archive_host(host_name).iterdir() if not x.is_dir()
         ]:
             timestamps.add(filename.with_suffix("").name)
+        timestamps.update(str(t) for t in self.delta_archive.timestamps(host_name=host_name))
         return timestamps
@@ -250,6 +250,7 @@ def register(
     config_var_registry.register(ConfigVariableEventConsoleHistoryLifetime)
     config_var_registry.register(ConfigVariableEventConsoleSocketQueueLength)
     config_var_registry.register(ConfigVariableEventConsoleEventSocketQueueLength)
+    config_var_registry.register(ConfigVariableEventConsoleDatagramBatchSize)
     config_var_registry.register(ConfigVariableEventConsoleTranslateSNMPTraps)
     config_var_registry.register(ConfigVariableEventConsoleSNMPCredentials)
     config_var_registry.register(ConfigVariableEventConsoleDebugRules)
@@ -263,6 +264,9 @@ def register(
     config_var_registry.register(ConfigVariableEventConsoleServiceLevels)
     config_var_registry.register(ConfigVariableEventConsoleSqliteHousekeepingInterval)
     config_var_registry.register(ConfigVariableEventConsoleSqliteFreelistSize)
+    config_var_registry.register(ConfigVariableEventConsoleSqliteSynchronous)
+    config_var_registry.register(ConfigVariableEventConsoleSqliteWriteBufferSize)
+    config_var_registry.register(ConfigVariableEventConsoleSqliteWriteBufferAge)
 
     rulespec_group_registry.register(RulespecGroupEventConsole)
     rulespec_registry.register(ECEventLimitRulespec)
@@ -4118,6 +4122,61 @@ ConfigVariableEventConsoleSqliteFreelistSize = ConfigVariable(
     ),
 )
 
+ConfigVariableEventConsoleSqliteSynchronous = ConfigVariable(
+    group=ConfigVariableGroupEventConsoleGeneric,
+    domain=ConfigDomainEventConsole,
+    ident="sqlite_synchronous",
+    valuespec=lambda: DropdownChoice(
+        title=_("Event Console history write safety"),
+        help=_(
+            "Controls how carefully the Event Console history waits for its writes "
+            "to reach the disk. <i>Normal</i> is safe against crashes of the "
+            "Event Console. <i>Full</i> is also safe against power loss or crashes of the "
+            "operating system, but slower. <i>Off</i> is the fastest, but the history may "
+            "get corrupted in such cases."
+        ),
+        choices=[
+            ("OFF", _("Off")),
+            ("NORMAL", _("Normal")),
+            ("FULL", _("Full")),
+        ],
+    ),
+)
+
+ConfigVariableEventConsoleSqliteWriteBufferSize = ConfigVariable(
+    group=ConfigVariableGroupEventConsoleGeneric,
+    domain=ConfigDomainEventConsole,
+    ident="sqlite_write_buffer_size",
+    valuespec=lambda: Integer(
+        title=_("Event Console history write buffer size"),
+        help=_(
+            "New entries of the Event Console history are collected and written "
+            "at once when this number of entries is reached or when the oldest "
+            "entry has been waiting for the configured maximum age. A value of 1 "
+            "writes every entry immediately."
+        ),
+        minvalue=1,
+        label="max.",
+        unit=_("entries"),
+    ),
+)
+
+ConfigVariableEventConsoleSqliteWriteBufferAge = ConfigVariable(
+    group=ConfigVariableGroupEventConsoleGeneric,
+    domain=ConfigDomainEventConsole,
+    ident="sqlite_write_buffer_age",
+    valuespec=lambda: Age(
+        title=_("Event Console history write buffer age"),
+        help=_(
+            "The maximum time new entries of the Event Console history are kept in "
+            "the write buffer before they are written to the history. Entries still "
+            "in the buffer are lost if the Event Console crashes."
+        ),
+        maxvalue=60,
+        display=["seconds"],
+    ),
+)
+
 ConfigVariableEventConsoleStatisticsInterval = ConfigVariable(
     group=ConfigVariableGroupEventConsoleGeneric,
     domain=ConfigDomainEventConsole,
@@ -4508,6 +4567,26 @@ ConfigVariableEventConsoleEventSocketQueueLength = ConfigVariable(
     ),
 )
 
+ConfigVariableEventConsoleDatagramBatchSize = ConfigVariable(
+    group=ConfigVariableGroupEventConsoleGeneric,
+    domain=ConfigDomainEventConsole,
+    ident="datagram_batch_size",
+    valuespec=lambda: Integer(
+        title=_("Max. number of datagrams processed at once"),
+        help=_(
+            "When syslog messages via UDP or SNMP traps arrive faster than they "
+            "can be processed, the event daemon reads all already queued datagrams "
+            "up to this number and matches them against the rules in one go. "
+            "Larger batches reduce the overhead per message during message bursts. "
+            "Messages from the spool directory, TCP connections and the event pipe "
+            "are processed in batches of the same size."
+        ),
+        minvalue=1,
+        label="max.",
+        unit=_("datagrams"),
+    ),
+)
+
 ConfigVariableEventConsoleTranslateSNMPTraps = ConfigVariable(
     group=ConfigVariableGroupEventConsoleSNMP,
     domain=ConfigDomainEventConsole,
@@ -283,6 +283,7 @@ def register(
     rulespec_registry.register(SnmpPorts)
     rulespec_registry.register(AgentPorts)
     rulespec_registry.register(TcpConnectTimeouts)
+    rulespec_registry.register(MaxConcurrentFetchers)
     rulespec_registry.register(EncryptionHandling)
     rulespec_registry.register(AgentEncryption)
     rulespec_registry.register(CheckMkExitStatus)
@@ -5252,6 +5253,32 @@ TcpConnectTimeouts = HostRulespec(
 )
 
 
+def _valuespec_max_concurrent_fetchers():
+    return Integer(
+        minvalue=1,
+        maxvalue=32,
+        default_value=1,
+        title=_("Maximum number of concurrently fetched data sources"),
+        label=_("Fetch at most"),
+        unit=_("data sources at once"),
+        help=_(
+            "A host may be monitored by several data sources, for example the Checkmk "
+            "agent, SNMP, special agents and a management board. By default these are "
+            "fetched one after another, so the runtime of the Checkmk service is the sum "
+            "of the runtimes of all data sources. With this rule you can allow Checkmk to "
+            "fetch several data sources of the same host at once. The runtime is then "
+            "dominated by the slowest data source."
+        ),
+    )
+
+
+MaxConcurrentFetchers = HostRulespec(
+    group=RulespecGroupAgentGeneralSettings,
+    name="max_concurrent_fetchers",
+    valuespec=_valuespec_max_concurrent_fetchers,
+)
+
+
 def _valuespec_encryption_handling() -> Dictionary:
     return Dictionary(
         title=_("Enforce agent data encryption"),
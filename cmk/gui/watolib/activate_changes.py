@@ -172,6 +172,11 @@ var_dir = cmk.utils.paths.var_dir / "wato"
 
 GENERAL_DIR_EXCLUDE = "__pycache__"
 
+# Number of replication paths scanned in parallel for the config sync
+_SCAN_THREADS = 8
+# Files modified more recently than this are rehashed on every scan
+_HASH_CACHE_SETTLE_TIME_NS = 2 * 10**9
+
 ConfigWarnings = dict[ConfigDomainName, list[str]]
 ActivationId = str
 SiteActivationState = dict[str, Any]
@@ -2153,24 +2158,39 @@ def _initialize_site_activation_state(
 def _get_config_sync_file_infos_per_inode(
     replication_paths: Sequence[ReplicationPath],
 ) -> Mapping[int, ConfigSyncFileInfo]:
-    inode_sync_states = {}
+    hash_cache = ConfigSyncHashCache.load()
+    inode_sync_states: dict[int, ConfigSyncFileInfo] = {}
+    for path_sync_states in _scan_replication_paths(
+        lambda replication_path: _get_replication_path_config_sync_file_infos_per_inode(
+            replication_path, hash_cache
+        ),
+        replication_paths,
+    ):
+        inode_sync_states.update(path_sync_states)
+    hash_cache.save()
+    return inode_sync_states
 
-    for replication_path in replication_paths:
-        replication_path_full = os.path.join(cmk.utils.paths.omd_root, replication_path.site_path)
 
-        if not os.path.exists(replication_path_full):
-            continue
+def _get_replication_path_config_sync_file_infos_per_inode(
+    replication_path: ReplicationPath,
+    hash_cache: ConfigSyncHashCache,
+) -> Mapping[int, ConfigSyncFileInfo]:
+    inode_sync_states: dict[int, ConfigSyncFileInfo] = {}
+    replication_path_full = os.path.join(cmk.utils.paths.omd_root, replication_path.site_path)
 
-        if replication_path.ty == ReplicationPathType.FILE:
-            inode_sync_states[os.stat(replication_path_full).st_ino] = _get_config_sync_file_info(
-                replication_path_full
-            )
-        elif replication_path.ty == ReplicationPathType.DIR:
-            _get_replication_dir_config_sync_file_infos_per_inode(
-                inode_sync_states, replication_path_full, replication_path.is_excluded
-            )
-        else:
-            raise NotImplementedError()
+    if not os.path.exists(replication_path_full):
+        return inode_sync_states
+
+    if replication_path.ty == ReplicationPathType.FILE:
+        inode_sync_states[os.stat(replication_path_full).st_ino] = _get_config_sync_file_info(
+            replication_path_full, hash_cache
+        )
+    elif replication_path.ty == ReplicationPathType.DIR:
+        _get_replication_dir_config_sync_file_infos_per_inode(
+            inode_sync_states, replication_path_full, replication_path.is_excluded, hash_cache
+        )
+    else:
+        raise NotImplementedError()
 
     return inode_sync_states
 
@@ -2179,6 +2199,7 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
     inode_sync_states: MutableMapping[int, ConfigSyncFileInfo],
     replication_path: str,
     replication_path_excluder: Callable[[str], bool],
+    hash_cache: ConfigSyncHashCache,
 ) -> None:
     # Use os functionality instead of pathlib since it is faster
     for root, dir_names, file_names in os.walk(replication_path):
@@ -2191,7 +2212,7 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
             try:
                 if os.path.islink(dir_path) and not dir_name == GENERAL_DIR_EXCLUDE:
                     inode_sync_states[os.stat(dir_path).st_ino] = _get_config_sync_file_info(
-                        dir_path
+                        dir_path, hash_cache
                     )
             except FileNotFoundError:
                 pass  # Ignore directories vanishing during processing
@@ -2199,7 +2220,9 @@ def _get_replication_dir_config_sync_file_infos_per_inode(
         for file_name in file_names:
             file_path = os.path.join(root, file_name)
             try:
-                inode_sync_states[os.stat(file_path).st_ino] = _get_config_sync_file_info(file_path)
+                inode_sync_states[os.stat(file_path).st_ino] = _get_config_sync_file_info(
+                    file_path, hash_cache
+                )
             except FileNotFoundError:
                 pass  # Ignore files vanishing during processing
 
@@ -3214,7 +3237,11 @@ class AutomationGetConfigSyncState(AutomationCommand[list[ReplicationPath]]):
 
     def execute(self, api_request: list[ReplicationPath]) -> GetConfigSyncStateResponse:
         with store.lock_checkmk_configuration(configuration_lockfile):
-            file_infos = _get_config_sync_file_infos(api_request, base_dir=cmk.utils.paths.omd_root)
+            hash_cache = ConfigSyncHashCache.load()
+            file_infos = _get_config_sync_file_infos(
+                api_request, base_dir=cmk.utils.paths.omd_root, hash_cache=hash_cache
+            )
+            hash_cache.save()
             transport_file_infos = {
                 k: (v.st_mode, v.st_size, v.link_target, v.file_hash) for k, v in file_infos.items()
             }
@@ -3254,6 +3281,7 @@ def _get_config_sync_file_infos(
     replication_paths: list[ReplicationPath],
     base_dir: Path,
     config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo] | None = None,
+    hash_cache: ConfigSyncHashCache | None = None,
 ) -> ConfigSyncFileInfos:
     """Scans the given replication paths for the information needed for the config sync
 
@@ -3265,38 +3293,69 @@ def _get_config_sync_file_infos(
     if config_sync_file_infos_per_inode is None:
         config_sync_file_infos_per_inode = {}
 
-    infos = {}
-    for replication_path in replication_paths:
-        replication_path_full = str(base_dir.joinpath(replication_path.site_path))
+    infos: ConfigSyncFileInfos = {}
+    for path_infos in _scan_replication_paths(
+        lambda replication_path: _get_replication_path_config_sync_file_infos(
+            replication_path, config_sync_file_infos_per_inode, base_dir, hash_cache
+        ),
+        replication_paths,
+    ):
+        infos.update(path_infos)
+    return infos
 
-        if not os.path.exists(replication_path_full):
-            continue  # Only report back existing things
 
-        match replication_path.ty:
-            case ReplicationPathType.FILE:
-                infos[replication_path.site_path] = _get_config_sync_file_info(
-                    replication_path_full
-                )
+def _get_replication_path_config_sync_file_infos(
+    replication_path: ReplicationPath,
+    config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo],
+    base_dir: Path,
+    hash_cache: ConfigSyncHashCache | None,
+) -> ConfigSyncFileInfos:
+    infos: ConfigSyncFileInfos = {}
+    replication_path_full = str(base_dir.joinpath(replication_path.site_path))
 
-            case ReplicationPathType.DIR:
-                _get_replication_dir_config_sync_file_infos(
-                    infos,
-                    config_sync_file_infos_per_inode,
-                    base_dir,
-                    replication_path_full,
-                    replication_path.is_excluded,
-                )
-            case _:
-                assert_never(replication_path.ty)
+    if not os.path.exists(replication_path_full):
+        return infos  # Only report back existing things
+
+    match replication_path.ty:
+        case ReplicationPathType.FILE:
+            infos[replication_path.site_path] = _get_config_sync_file_info(
+                replication_path_full, hash_cache
+            )
+
+        case ReplicationPathType.DIR:
+            _get_replication_dir_config_sync_file_infos(
+                infos,
+                config_sync_file_infos_per_inode,
+                base_dir,
+                replication_path_full,
+                replication_path.is_excluded,
+                hash_cache,
+            )
+        case _:
+            assert_never(replication_path.ty)
     return infos
 
 
+def _scan_replication_paths[T](
+    scan: Callable[[ReplicationPath], T], replication_paths: Sequence[ReplicationPath]
+) -> Sequence[T]:
+    """Scan the replication paths in parallel, the results are in the order of the paths
+
+    The scans are dominated by file system access and hashing, which both release the GIL.
+    """
+    if len(replication_paths) < 2:
+        return [scan(replication_path) for replication_path in replication_paths]
+    with ThreadPool(processes=min(_SCAN_THREADS, len(replication_paths))) as pool:
+        return pool.map(scan, replication_paths)
+
+
 def _get_replication_dir_config_sync_file_infos(
     infos: MutableMapping[str, ConfigSyncFileInfo],
     config_sync_file_infos_per_inode: Mapping[int, ConfigSyncFileInfo],
     base_dir: Path,
     replication_path: str,
     replication_path_excluder: Callable[[str], bool],
+    hash_cache: ConfigSyncHashCache | None,
 ) -> None:
     # Use os functionality instead of pathlib since it is faster
     for root, dir_names, file_names in os.walk(replication_path):
@@ -3316,19 +3375,29 @@ def _get_replication_dir_config_sync_file_infos(
                 ):
                     infos[valid_site_path] = sync_file_info
                 else:
-                    infos[valid_site_path] = _get_config_sync_file_info(config_sync_path)
+                    infos[valid_site_path] = _get_config_sync_file_info(
+                        config_sync_path, hash_cache
+                    )
             except FileNotFoundError:  # e.g. broken symlinks
-                infos[valid_site_path] = _get_config_sync_file_info(config_sync_path)
+                infos[valid_site_path] = _get_config_sync_file_info(config_sync_path, hash_cache)
 
 
-def _get_config_sync_file_info(file_path: str) -> ConfigSyncFileInfo:
+def _get_config_sync_file_info(
+    file_path: str, hash_cache: ConfigSyncHashCache | None = None
+) -> ConfigSyncFileInfo:
     stat = os.lstat(file_path)
     is_symlink = os.path.islink(file_path)
+    if is_symlink:
+        file_hash = None
+    elif hash_cache is None:
+        file_hash = _create_config_sync_file_hash(file_path)
+    else:
+        file_hash = hash_cache.file_hash(file_path, stat)
     return ConfigSyncFileInfo(
         stat.st_mode,
         stat.st_size,
         os.readlink(str(file_path)) if is_symlink else None,
-        _create_config_sync_file_hash(file_path) if not is_symlink else None,
+        file_hash,
     )
 
 
@@ -3343,6 +3412,46 @@ def _create_config_sync_file_hash(file_path: str) -> str:
     return sha256.hexdigest()
 
 
+class ConfigSyncHashCache:
+    """The persisted hashes of the replicated files, keyed by their inode
+
+    A hash is reused as long as the modification time and the size of the file are unchanged, so
+    only modified files are read again. Files modified just before the scan are not cached, a
+    further modification within the resolution of the modification time would go unnoticed.
+    Entries of files that have not been seen during the scan are dropped on save.
+    """
+
+    def __init__(self, entries: Mapping[int, tuple[int, int, str]]) -> None:
+        self._entries = entries
+        self._seen: dict[int, tuple[int, int, str]] = {}
+        self._unsettled_since = time.time_ns() - _HASH_CACHE_SETTLE_TIME_NS
+
+    @staticmethod
+    def path() -> Path:
+        return wato_var_dir() / "config-sync-hashes.pickle"
+
+    @classmethod
+    def load(cls) -> ConfigSyncHashCache:
+        return cls(store.load_object_from_pickle_file(cls.path(), default={}))
+
+    def save(self) -> None:
+        if self._seen != self._entries:
+            store.save_object_to_pickle_file(self.path(), self._seen)
+
+    def file_hash(self, file_path: str, stat: os.stat_result) -> str:
+        # The stat has to be taken before hashing: A modification while hashing changes the mtime
+        if (entry := self._entries.get(stat.st_ino)) is not None and entry[:2] == (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            file_hash = entry[2]
+        else:
+            file_hash = _create_config_sync_file_hash(file_path)
+        if stat.st_mtime_ns < self._unsettled_since:
+            self._seen[stat.st_ino] = (stat.st_mtime_ns, stat.st_size, file_hash)
+        return file_hash
+
+
 def update_config_generation() -> None:
     """Increase the config generation ID
 
@@ -5,6 +5,7 @@
 
 from __future__ import annotations
 
+import copy
 import json
 import operator
 import os
@@ -678,6 +679,7 @@ def _get_fully_loaded_wato_folders(
 ) -> Mapping[PathWithoutSlash, Folder]:
     wato_folders: dict[PathWithoutSlash, Folder] = {}
     Folder.load(tree=tree, name="", parent_folder=None).add_to_dictionary(wato_folders)
+    tree.index().save()
     return wato_folders
 
 
@@ -956,6 +958,7 @@ class FolderTree:
     def __init__(self, root_dir: str | None = None) -> None:
         self._root_dir = _ensure_trailing_slash(root_dir if root_dir else str(wato_root_dir()))
         self._all_host_attributes: dict[str, ABCHostAttribute] | None = None
+        self._index: FolderTreeIndex | None = None
 
     def all_folders(self) -> Mapping[PathWithoutSlash, Folder]:
         if "wato_folders" not in g:
@@ -1065,6 +1068,12 @@ class FolderTree:
     # Dangerous operation! Only use this if you have a good knowledge of the internas
     def set_root_dir(self, root_dir: str) -> None:
         self._root_dir = _ensure_trailing_slash(root_dir)
+        self._index = None
+
+    def index(self) -> FolderTreeIndex:
+        if self._index is None:
+            self._index = FolderTreeIndex(self._root_dir)
+        return self._index
 
 
 # Hope that we can cleanup these request global objects one day
@@ -1192,9 +1201,7 @@ class Folder(FolderProtocol):
         parent_folder: Folder | None,
     ) -> Folder:
         folder_path = os.path.join(parent_folder.path(), name) if parent_folder else name
-        serialized = cls.wato_info_storage_manager().read(
-            Path(_folder_wato_info_path(_folder_filesystem_path(tree.get_root_dir(), folder_path)))
-        )
+        serialized = tree.index().folder_info(folder_path)
 
         return cls(
             tree=tree,
@@ -1316,13 +1323,7 @@ class Folder(FolderProtocol):
         return Host(self, host_name, wato_hosts["host_attributes"][host_name], cluster_nodes)
 
     def _load_hosts_file(self) -> HostsData | None:
-        variables = get_hosts_file_variables()
-        apply_hosts_file_to_object(
-            Path(self.hosts_file_path_without_extension()),
-            get_host_storage_loaders(active_config.config_storage_format),
-            variables,
-        )
-        return variables
+        return _load_hosts_file(self.hosts_file_path_without_extension())
 
     def _load_wato_hosts(self) -> WATOHosts | None:
         if (variables := self._load_hosts_file()) is None:
@@ -1515,19 +1516,12 @@ class Folder(FolderProtocol):
     def _load_subfolders(self) -> dict[PathWithoutSlash, Folder]:
         loaded_subfolders: dict[str, Folder] = {}
 
-        root_dir = self.tree.get_root_dir()
-        dir_path = root_dir + self.path()
-        if not os.path.exists(dir_path):
-            return loaded_subfolders
-
-        for entry in os.listdir(dir_path):
-            subfolder_dir = os.path.join(dir_path, entry)
-            if os.path.isdir(subfolder_dir):
-                loaded_subfolders[entry] = Folder.load(
-                    tree=self.tree,
-                    name=entry,
-                    parent_folder=self,
-                )
+        for entry in self.tree.index().subfolder_names(self.path()):
+            loaded_subfolders[entry] = Folder.load(
+                tree=self.tree,
+                name=entry,
+                parent_folder=self,
+            )
 
         return loaded_subfolders
 
@@ -2812,6 +2806,16 @@ def _folder_filesystem_path(root_dir: str, folder_path: str) -> PathWithoutSlash
     return (root_dir + folder_path).rstrip("/")
 
 
+def _load_hosts_file(hosts_file_path_without_extension: str) -> HostsData:
+    variables = get_hosts_file_variables()
+    apply_hosts_file_to_object(
+        Path(hosts_file_path_without_extension),
+        get_host_storage_loaders(active_config.config_storage_format),
+        variables,
+    )
+    return variables
+
+
 class FolderLookupCache:
     """Helps to find hosts faster in the folder hierarchy"""
 
@@ -2837,8 +2841,11 @@ class FolderLookupCache:
                     return host_instance
 
             # The hostname was not found in the lookup cache
-            # Use find_host_recursively to search this host in the configuration
-            host_instance = self._folder_tree.root_folder().find_host_recursively(host_name)
+            # Use the folder tree index to search this host in the configuration
+            folder_path = self._folder_tree.index().host_folders().get(host_name)
+            if folder_path is None or folder_path not in self._folder_tree.all_folders():
+                return None
+            host_instance = self._folder_tree.folder(folder_path).host(host_name)
             if not host_instance:
                 return None
 
@@ -2883,10 +2890,7 @@ class FolderLookupCache:
 
     def build(self) -> None:
         store.acquire_lock(self._path())
-        folder_lookup = {}
-        for host_name, host in self._folder_tree.root_folder().all_hosts_recursively().items():
-            folder_lookup[host_name] = host.folder().path()
-        self._save(folder_lookup)
+        self._save(self._folder_tree.index().host_folders())
 
     def _save(self, folder_lookup: Mapping[HostName, str]) -> None:
         store.save_bytes_to_file(self._path(), pickle.dumps(folder_lookup))
@@ -2910,6 +2914,157 @@ class FolderLookupCache:
         self._save(cache)
 
 
+# inode, mtime and size of a file or directory
+_FileStamp = tuple[int, int, int]
+_MISSING_FILE: Final[_FileStamp] = (0, 0, 0)
+# Files modified more recently than this are read again on every access
+_INDEX_SETTLE_TIME_NS: Final = 2 * 10**9
+
+
+def _file_stamp(path: str) -> _FileStamp | None:
+    """The stamp of a file, None if a modification might still go unnoticed"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return _MISSING_FILE
+    # A further modification within the resolution of the mtime would not change the stamp
+    if stat.st_mtime_ns >= time.time_ns() - _INDEX_SETTLE_TIME_NS:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class FolderTreeIndex:
+    """Persisted index of the folder tree: folder attributes, subfolders and host names
+
+    Reading the .wato file and executing the hosts.mk of every folder is expensive on large
+    setups. The index keeps the content together with the stamp of the file (or directory) it was
+    read from. Only the files of folders that have been modified since are read again.
+    """
+
+    def __init__(self, root_dir: PathWithSlash) -> None:
+        self._root_dir = root_dir
+        self._folder_infos: dict[PathWithoutSlash, tuple[_FileStamp, WATOFolderInfo]] = {}
+        self._subfolder_names: dict[PathWithoutSlash, tuple[_FileStamp, tuple[str, ...]]] = {}
+        self._host_names: dict[PathWithoutSlash, tuple[_FileStamp, tuple[HostName, ...]]] = {}
+        self._modified = False
+        self._load()
+
+    @staticmethod
+    def path() -> Path:
+        return cmk.utils.paths.tmp_dir / "wato/folder_tree_index.cache"
+
+    def _load(self) -> None:
+        try:
+            root_dir, folder_infos, subfolder_names, host_names = (
+                store.load_object_from_pickle_file(self.path(), default=(None, {}, {}, {}))
+            )
+        except (TypeError, ValueError, pickle.UnpicklingError) as e:
+            logger.warning("Unable to read folder tree index from disk: %s", str(e))
+            return
+        if root_dir == self._root_dir:
+            self._folder_infos = folder_infos
+            self._subfolder_names = subfolder_names
+            self._host_names = host_names
+
+    def save(self) -> None:
+        if not self._modified:
+            return
+        self.path().parent.mkdir(parents=True, exist_ok=True)
+        store.save_object_to_pickle_file(
+            self.path(),
+            (self._root_dir, self._folder_infos, self._subfolder_names, self._host_names),
+        )
+        self._modified = False
+
+    def _lookup[T](
+        self,
+        entries: dict[PathWithoutSlash, tuple[_FileStamp, T]],
+        folder_path: PathWithoutSlash,
+        file_path: str,
+        read: Callable[[], T],
+    ) -> T:
+        # The stamp has to be taken before reading: A modification while reading changes it
+        stamp = _file_stamp(file_path)
+        if stamp is not None and (entry := entries.get(folder_path)) and entry[0] == stamp:
+            return entry[1]
+        value = read()
+        if stamp is not None:
+            entries[folder_path] = (stamp, value)
+            self._modified = True
+        return value
+
+    def folder_info(self, folder_path: PathWithoutSlash) -> WATOFolderInfo:
+        wato_info_path = _folder_wato_info_path(
+            _folder_filesystem_path(self._root_dir, folder_path)
+        )
+        # The caller owns the returned attributes, they must not modify the index
+        return copy.deepcopy(
+            self._lookup(
+                self._folder_infos,
+                folder_path,
+                wato_info_path,
+                lambda: Folder.wato_info_storage_manager().read(Path(wato_info_path)),
+            )
+        )
+
+    def subfolder_names(self, folder_path: PathWithoutSlash) -> tuple[str, ...]:
+        dir_path = _folder_filesystem_path(self._root_dir, folder_path)
+        return self._lookup(
+            self._subfolder_names,
+            folder_path,
+            dir_path,
+            lambda: _read_subfolder_names(dir_path),
+        )
+
+    def host_names(self, folder_path: PathWithoutSlash) -> tuple[HostName, ...]:
+        hosts_file_path = _folder_filesystem_path(self._root_dir, folder_path) + "/hosts"
+        return self._lookup(
+            self._host_names,
+            folder_path,
+            hosts_file_path + ".mk",
+            lambda: tuple(
+                HostName(host_name)
+                for host_name in _load_hosts_file(hosts_file_path)["host_attributes"]
+            ),
+        )
+
+    def host_folders(self) -> dict[HostName, PathWithoutSlash]:
+        """The folder of every host, only the hosts files of modified folders are read"""
+        folder_paths = []
+        pending: list[PathWithoutSlash] = [""]
+        while pending:
+            folder_paths.append(folder_path := pending.pop())
+            pending.extend(
+                os.path.join(folder_path, name) for name in self.subfolder_names(folder_path)
+            )
+
+        host_folders = {
+            host_name: folder_path
+            for folder_path in reversed(folder_paths)
+            for host_name in self.host_names(folder_path)
+        }
+
+        # Forget about vanished folders
+        for entries in (self._folder_infos, self._subfolder_names, self._host_names):
+            for folder_path in set(entries).difference(folder_paths):
+                del entries[folder_path]
+                self._modified = True
+
+        self.save()
+        return host_folders
+
+
+def _read_subfolder_names(dir_path: str) -> tuple[str, ...]:
+    try:
+        return tuple(
+            entry
+            for entry in sorted(os.listdir(dir_path))
+            if os.path.isdir(os.path.join(dir_path, entry))
+        )
+    except FileNotFoundError:
+        return ()
+
+
 class WATOFoldersOnDemand(Mapping[PathWithoutSlash, Folder]):
     def __init__(self, tree: FolderTree, values: dict[PathWithoutSlash, Folder | None]) -> None:
         self.tree = tree
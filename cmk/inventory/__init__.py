@@ -3,8 +3,10 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+from .migration import migrate_inventory_archive
 from .transformation import transform_inventory_trees
 
 __all__ = [
+    "migrate_inventory_archive",
     "transform_inventory_trees",
 ]
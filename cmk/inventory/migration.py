@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import sys
+from collections.abc import Sequence
+from pathlib import Path
+
+from cmk.ccc.hostaddress import HostName
+from cmk.utils.structured_data import DeltaArchive, InventoryPaths
+
+
+def _collect_archive_host_names(inv_paths: InventoryPaths) -> Sequence[str]:
+    try:
+        return sorted(d.name for d in inv_paths.archive_dir.iterdir() if d.is_dir())
+    except FileNotFoundError:
+        return []
+
+
+def migrate_inventory_archive(*, omd_root: Path, filter_host_names: Sequence[str]) -> int:
+    raw_host_names = _collect_archive_host_names(InventoryPaths(omd_root))
+    if filter_host_names:
+        raw_host_names = [h for h in raw_host_names if h in filter_host_names]
+
+    delta_archive = DeltaArchive(omd_root)
+    migrated = 0
+    failed = []
+    for raw_host_name in raw_host_names:
+        try:
+            migrated += delta_archive.migrate_archive_trees(host_name=HostName(raw_host_name))
+        except Exception as e:
+            sys.stderr.write(f"Failed to migrate inventory archive of {raw_host_name}: {e}\n")
+            failed.append(raw_host_name)
+
+    sys.stdout.write(
+        f"Migrated {migrated} archived inventory trees of {len(raw_host_names) - len(failed)} hosts\n"
+    )
+    return 1 if failed else 0
@@ -98,6 +98,9 @@ def _iter_host_tree_paths_or_unknown_file_paths(
 
         raw_host_name = host_dir.name
         for file_path in file_paths:
+            if file_path.is_dir():
+                # eg. the delta archive of the host
+                continue
             tree_path = TreePath.from_archive_or_delta_cache_file_path(file_path)
             if stat := _compute_file_path_stat(tree_path.legacy):
                 yield _HostTreePath(raw_host_name, tree_path, stat)
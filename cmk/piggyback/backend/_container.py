@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Piggyback payloads stored in one container per source host
+
+The file based layout stores one file per piggybacked host and source, and
+encodes the time of the update in the files mtime. Every lookup has to list
+and stat directories.
+
+Here, every source host has a single append-only container
+
+    tmp/check_mk/piggyback_containers/SOURCE
+
+consisting of records: a header (time of the update, length of the name of
+the piggybacked host, length of the payload), the name and the payload.
+A later record for a piggybacked host supersedes the earlier ones.
+Containers are rewritten ("compacted") if most of their records are superseded.
+
+The `ContainerIndex` maps piggybacked hosts to the location of their most
+recent payload. It is updated incrementally: Only records appended since the
+last refresh are read. If a container has been replaced, it is read again.
+Every write touches the container directory, so the index of the process is
+only refreshed if the mtime of the directory has changed.
+
+New payloads are stored in containers if enabled in
+
+    etc/check_mk/piggyback_storage.json: {"containers": true}
+
+Readers always consider both layouts, so the setting can be changed at any time.
+"""
+
+import fcntl
+import json
+import os
+import struct
+import time
+from collections.abc import Callable, Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO
+
+from cmk.ccc.hostaddress import HostName
+
+from ._paths import container_dir, storage_config_path
+
+# time of the update, length of the piggybacked hosts name, length of the payload
+_HEADER = struct.Struct(">qHI")
+
+# data in front of the indexed size compared to tell an appended container from a replaced one
+_TAIL_SIZE = 64
+
+# compact a container if it is larger than this factor times its live records
+_COMPACTION_FACTOR = 2
+
+# Modifications more recent than this might not have changed the mtime yet
+_SETTLE_TIME_NS = 2 * 10**9
+
+# inode and mtime of a file or directory
+_Stamp = tuple[int, int]
+
+
+@dataclass(frozen=True)
+class ContainerRecord:
+    last_update: int
+    offset: int
+    length: int
+
+    @property
+    def size(self) -> int:
+        """The size of the complete record (without the name)"""
+        return _HEADER.size + self.length
+
+
+class _SourceIndex:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.inode: int | None = None
+        self.size = 0
+        self.tail = b""
+        self.records: dict[HostName, ContainerRecord] = {}
+
+    @property
+    def live_size(self) -> int:
+        return sum(
+            record.size + len(piggybacked.encode()) for piggybacked, record in self.records.items()
+        )
+
+    def refresh(self) -> tuple[Sequence[HostName], Sequence[HostName]]:
+        """Read the records appended since the last refresh
+
+        Returns the piggybacked hosts that have been updated and removed.
+        """
+        try:
+            with self.path.open("rb") as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_ino == self.inode and stat.st_size == self.size:
+                    return (), ()
+                # A compacted container may get the inode of the one it replaced
+                replaced = stat.st_ino != self.inode or _read_tail(file, self.size) != self.tail
+                if replaced:
+                    previous, self.records = self.records, {}
+                    self.inode, self.size = stat.st_ino, 0
+                else:
+                    previous = dict(self.records)
+                self.size = _read_records(file, self.size, stat.st_size, self.records)
+                self.tail = _read_tail(file, self.size)
+        except FileNotFoundError:
+            previous, self.records = self.records, {}
+            self.inode, self.size, self.tail = None, 0, b""
+            replaced = True
+
+        return (
+            [p for p, r in self.records.items() if _is_update(previous.get(p), r, replaced)],
+            [p for p in previous if p not in self.records],
+        )
+
+    def read(self, record: ContainerRecord) -> bytes | None:
+        try:
+            with self.path.open("rb") as file:
+                if os.fstat(file.fileno()).st_ino != self.inode:
+                    return None
+                return os.pread(file.fileno(), record.length, record.offset)
+        except FileNotFoundError:
+            return None
+
+
+def _is_update(previous: ContainerRecord | None, record: ContainerRecord, replaced: bool) -> bool:
+    if previous is None:
+        return True
+    if replaced:
+        # A compaction moves the records, but keeps their content
+        return (previous.last_update, previous.length) != (record.last_update, record.length)
+    return previous != record
+
+
+def _read_tail(file: BinaryIO, size: int) -> bytes:
+    """Read the data in front of size, which is never changed by appending"""
+    return os.pread(file.fileno(), min(size, _TAIL_SIZE), max(size - _TAIL_SIZE, 0))
+
+
+def _read_records(
+    file: BinaryIO, offset: int, size: int, records: dict[HostName, ContainerRecord]
+) -> int:
+    """Read the records from offset on, return the offset after the last complete one
+
+    Reading stops at a damaged record: Its length can not be trusted, so there is no way to
+    find the next one. Writers drop such remains of an interrupted write before appending.
+    """
+    file.seek(offset)
+    while offset + _HEADER.size <= size:
+        last_update, name_length, length = _HEADER.unpack(file.read(_HEADER.size))
+        end = offset + _HEADER.size + name_length + length
+        if end > size:
+            break  # still being written
+        if not name_length:
+            break
+        try:
+            piggybacked = HostName(file.read(name_length).decode())
+        except ValueError:  # including UnicodeDecodeError
+            break
+        records[piggybacked] = ContainerRecord(
+            last_update, offset + _HEADER.size + name_length, length
+        )
+        file.seek(length, os.SEEK_CUR)
+        offset = end
+    return offset
+
+
+def _encode_record(piggybacked: HostName, payload: bytes, last_update: int) -> bytes:
+    name = piggybacked.encode()
+    return _HEADER.pack(last_update, len(name), len(payload)) + name + payload
+
+
+class ContainerIndex:
+    """Index of the piggybacked hosts and their sources over all containers"""
+
+    def __init__(self, omd_root: Path) -> None:
+        self._dir = container_dir(omd_root)
+        self._sources: dict[HostName, _SourceIndex] = {}
+        self._piggybacked: dict[HostName, dict[HostName, ContainerRecord]] = {}
+
+    def refresh(self) -> Sequence[tuple[HostName, HostName]]:
+        """Update the index, return the updated (source, piggybacked host) pairs"""
+        try:
+            sources = {HostName(n) for n in os.listdir(self._dir) if not n.startswith(".")}
+        except FileNotFoundError:
+            sources = set()
+        return [
+            (source, piggybacked)
+            for source in sources | set(self._sources)
+            for piggybacked in self.refresh_source(source)
+        ]
+
+    def refresh_source(self, source: HostName) -> Sequence[HostName]:
+        """Update the index of one source, return the updated piggybacked hosts"""
+        if (source_index := self._sources.get(source)) is None:
+            source_index = self._sources[source] = _SourceIndex(self._dir / source)
+
+        updated, removed = source_index.refresh()
+        for piggybacked in removed:
+            by_source = self._piggybacked[piggybacked]
+            del by_source[source]
+            if not by_source:
+                del self._piggybacked[piggybacked]
+        for piggybacked in updated:
+            self._piggybacked.setdefault(piggybacked, {})[source] = source_index.records[
+                piggybacked
+            ]
+        if source_index.inode is None:
+            del self._sources[source]
+        return updated
+
+    def piggybacked_hosts(self) -> Sequence[HostName]:
+        return list(self._piggybacked)
+
+    def piggybacked_hosts_of(self, source: HostName) -> Sequence[HostName]:
+        return list(source_index.records) if (source_index := self._sources.get(source)) else []
+
+    def records_for(self, piggybacked: HostName) -> Mapping[HostName, ContainerRecord]:
+        return self._piggybacked.get(piggybacked, {})
+
+    def read(self, source: HostName, piggybacked: HostName) -> tuple[int, bytes] | None:
+        """Read the most recent payload of a source for a piggybacked host"""
+        for _attempt in range(2):
+            if (source_index := self._sources.get(source)) is None or (
+                record := source_index.records.get(piggybacked)
+            ) is None:
+                return None
+            if (payload := source_index.read(record)) is not None:
+                return record.last_update, payload
+            # the container has been replaced in the meantime
+            self.refresh_source(source)
+        return None
+
+
+_INDEXES: dict[Path, tuple[_Stamp | None, ContainerIndex]] = {}
+
+
+def container_index(omd_root: Path) -> ContainerIndex:
+    """The refreshed index of all containers of the site
+
+    The index is kept for the lifetime of the process. It is only refreshed
+    if the container directory has been modified, and then only reads what
+    has been appended in the meantime.
+    """
+    # The stamp has to be taken before refreshing: A write while refreshing changes it
+    stamp = _settled_stamp(container_dir(omd_root))
+    if (cached := _INDEXES.get(omd_root)) is None:
+        index = ContainerIndex(omd_root)
+    else:
+        index = cached[1]
+    if cached is None or stamp is None or stamp != cached[0]:
+        index.refresh()
+    _INDEXES[omd_root] = (stamp, index)
+    return index
+
+
+def _settled_stamp(path: Path) -> _Stamp | None:
+    """The stamp of a path, None if a modification might still go unnoticed"""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return 0, 0
+    if stat.st_mtime_ns >= time.time_ns() - _SETTLE_TIME_NS:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+_SETTINGS: dict[Path, tuple[_Stamp | None, bool]] = {}
+
+
+def containers_enabled(omd_root: Path) -> bool:
+    """Whether new payloads are stored in containers"""
+    path = storage_config_path(omd_root)
+    stamp = _settled_stamp(path)
+    if stamp is not None and (cached := _SETTINGS.get(omd_root)) and cached[0] == stamp:
+        return cached[1]
+    try:
+        enabled = json.loads(path.read_text()).get("containers") is True
+    except FileNotFoundError:
+        enabled = False
+    _SETTINGS[omd_root] = (stamp, enabled)
+    return enabled
+
+
+@contextmanager
+def _locked_container(path: Path) -> Iterator[int]:
+    """Open the container for appending, retry if it is replaced while we wait for the lock"""
+    while True:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o660)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                current = os.stat(path).st_ino
+            except FileNotFoundError:
+                current = None
+            if current == os.fstat(fd).st_ino:
+                yield fd
+                return
+        finally:
+            os.close(fd)
+
+
+def store_in_container(
+    source: HostName,
+    piggybacked_raw_data: Mapping[HostName, Sequence[bytes]],
+    message_timestamp: float,
+    omd_root: Path,
+) -> None:
+    path = container_dir(omd_root) / source
+    path.parent.mkdir(mode=0o770, exist_ok=True, parents=True)
+    data = b"".join(
+        # Raw data is always stored as bytes. Later the content is
+        # converted to unicode in abstact.py:_parse_info which respects
+        # 'encoding' in section options.
+        _encode_record(piggybacked, b"%s\n" % b"\n".join(lines), int(message_timestamp))
+        for piggybacked, lines in piggybacked_raw_data.items()
+    )
+    with _locked_container(path) as fd:
+        source_index = _SourceIndex(path)
+        source_index.refresh()
+        # No one else is writing: Anything after the last complete record is left over from an
+        # interrupted write. Appending to it would misalign all following records.
+        if os.fstat(fd).st_size > source_index.size:
+            os.ftruncate(fd, source_index.size)
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+        source_index.refresh()
+    # Appending does not change the directory, but the indexes rely on its mtime
+    os.utime(path.parent)
+
+    if source_index.size > _COMPACTION_FACTOR * source_index.live_size:
+        rewrite_container(omd_root, source, lambda piggybacked, record: piggybacked)
+
+
+def rewrite_container(
+    omd_root: Path,
+    source: HostName,
+    keep: Callable[[HostName, ContainerRecord], HostName | None],
+) -> None:
+    """Rewrite the live records of a container
+
+    `keep` decides under which name a record is kept (None to drop it).
+    Empty containers are removed.
+    """
+    path = container_dir(omd_root) / source
+    with _locked_container(path):
+        source_index = _SourceIndex(path)
+        source_index.refresh()
+        kept = b"".join(
+            _encode_record(name, payload, record.last_update)
+            for piggybacked, record in source_index.records.items()
+            if (name := keep(piggybacked, record)) is not None
+            and (payload := source_index.read(record)) is not None
+        )
+        if not kept:
+            path.unlink()
+            return
+
+        tmp_path = path.with_name(f".{source}.new")
+        tmp_path.write_bytes(kept)
+        os.rename(tmp_path, path)
@@ -7,6 +7,8 @@ from pathlib import Path
 
 _RELATIVE_PAYLOAD_DIR = "tmp/check_mk/piggyback"
 _RELATIVE_SOURCE_STATUS_DIR = "tmp/check_mk/piggyback_sources"
+_RELATIVE_CONTAINER_DIR = "tmp/check_mk/piggyback_containers"
+_RELATIVE_STORAGE_CONFIG = "etc/check_mk/piggyback_storage.json"
 
 
 def payload_dir(omd_root: Path) -> Path:
@@ -15,3 +17,11 @@ def payload_dir(omd_root: Path) -> Path:
 
 def source_status_dir(omd_root: Path) -> Path:
     return omd_root / _RELATIVE_SOURCE_STATUS_DIR
+
+
+def container_dir(omd_root: Path) -> Path:
+    return omd_root / _RELATIVE_CONTAINER_DIR
+
+
+def storage_config_path(omd_root: Path) -> Path:
+    return omd_root / _RELATIVE_STORAGE_CONFIG
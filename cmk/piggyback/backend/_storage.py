@@ -11,15 +11,22 @@ import os
 import shutil
 import tempfile
 import time
-from collections.abc import Iterable, Iterator, Mapping, Sequence
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from dataclasses import asdict, dataclass
 from pathlib import Path
 from typing import Self
 
 from cmk.ccc.hostaddress import HostAddress, HostName
 
+from ._container import (
+    container_index,
+    ContainerIndex,
+    containers_enabled,
+    rewrite_container,
+    store_in_container,
+)
 from ._inotify import Event, INotify, Masks
-from ._paths import payload_dir, source_status_dir
+from ._paths import container_dir, payload_dir, source_status_dir
 
 logger = logging.getLogger(__name__)
 
@@ -67,18 +74,49 @@ class PiggybackMessage:
 # "source_hostname":
 # - Path(tmp/check_mk/piggyback/HOST/SOURCE).name
 # - Path(tmp/check_mk/piggyback_sources/SOURCE).name
+# - Path(tmp/check_mk/piggyback_containers/SOURCE).name
+#
+# "container":
+# - tmp/check_mk/piggyback_containers/SOURCE
+#   All payloads of a source in one file, see _container.py. Writers use it if
+#   enabled in etc/check_mk/piggyback_storage.json. Readers consider both
+#   layouts; if a source has data in both, the more recent one is used.
+
 
+def watch_new_messages(
+    omd_root: Path, timeout: int | None = None
+) -> Iterator[PiggybackMessage | None]:
+    """Yields piggyback messages as they come in.
 
-def watch_new_messages(omd_root: Path) -> Iterator[PiggybackMessage]:
-    """Yields piggyback messages as they come in."""
+    If timeout is set, None is yielded whenever there have not been
+    any events for `timeout` seconds.
+    """
 
     inotify = INotify()
     watch_for_new_piggybacked_hosts = inotify.add_watch(payload_dir(omd_root), Masks.CREATE)
     watch_for_deleted_status_files = inotify.add_watch(source_status_dir(omd_root), Masks.DELETE)
+    container_dir(omd_root).mkdir(mode=0o770, exist_ok=True, parents=True)
+    watch_for_containers = inotify.add_watch(container_dir(omd_root), Masks.MODIFY | Masks.MOVED_TO)
     for folder in _get_piggybacked_host_folders(omd_root):
         inotify.add_watch(folder, Masks.MOVED_TO)
 
-    for event in inotify.read_forever():
+    # A separate index: we must only consume the updates we have been notified of.
+    containers = ContainerIndex(omd_root)
+    containers.refresh()
+
+    for event in _read_events(inotify, timeout):
+        if event is None:
+            yield None
+            continue
+        if event.watchee == watch_for_containers:
+            if not event.name.startswith("."):
+                yield from _get_container_messages(
+                    containers,
+                    HostName(event.name),
+                    containers.refresh_source(HostName(event.name)),
+                    omd_root,
+                )
+            continue
         # check if a new piggybacked host folder was created
         if event.watchee == watch_for_new_piggybacked_hosts:
             if event.type & Masks.CREATE:
@@ -89,7 +127,10 @@ def watch_new_messages(omd_root: Path) -> Iterator[PiggybackMessage]:
         if event.watchee == watch_for_deleted_status_files:
             if event.type & Masks.DELETE:
                 source = HostName(event.name)
-                for piggybacked_host in _get_piggybacked_hosts_for_source(omd_root, source):
+                for piggybacked_host in {
+                    *_get_piggybacked_hosts_for_source(omd_root, source),
+                    *containers.piggybacked_hosts_of(source),
+                }:
                     yield PiggybackMessage(
                         PiggybackMetaData(
                             source=source,
@@ -105,6 +146,16 @@ def watch_new_messages(omd_root: Path) -> Iterator[PiggybackMessage]:
             yield message
 
 
+def _read_events(inotify: INotify, timeout: int | None) -> Iterator[Event | None]:
+    if timeout is None:
+        yield from inotify.read_forever()
+        return
+    while True:
+        if not (events := inotify.read(timeout)):
+            yield None
+        yield from events
+
+
 def _make_message_from_event(event: Event, omd_root: Path) -> PiggybackMessage | None:
     source = HostAddress(event.name)
     piggybacked = HostName(event.watchee.path.name)
@@ -125,11 +176,64 @@ def _make_message_from_event(event: Event, omd_root: Path) -> PiggybackMessage |
     )
 
 
+def _get_container_messages(
+    containers: ContainerIndex,
+    source: HostName,
+    piggybacked_hosts: Iterable[HostName],
+    omd_root: Path,
+) -> Iterator[PiggybackMessage]:
+    last_contact = _get_mtime(_get_source_status_file_path(source, omd_root))
+    for piggybacked in piggybacked_hosts:
+        if (update := containers.read(source, piggybacked)) is None:
+            continue  # removed in the meantime
+        last_update, raw_data = update
+        yield PiggybackMessage(
+            PiggybackMetaData(
+                source=source,
+                piggybacked=piggybacked,
+                last_update=last_update,
+                last_contact=last_contact,
+            ),
+            raw_data,
+        )
+
+
 def get_messages_for(
     piggybacked_hostname: HostAddress, omd_root: Path
 ) -> Sequence[PiggybackMessage]:
     """Returns piggyback messages for the given host"""
-    piggyback_meta_data = _get_payload_meta_data(piggybacked_hostname, omd_root)
+    containers = container_index(omd_root)
+    return _newest_per_source(
+        [
+            *_get_file_messages_for(piggybacked_hostname, omd_root),
+            *(
+                message
+                for source in containers.records_for(piggybacked_hostname)
+                for message in _get_container_messages(
+                    containers, source, (piggybacked_hostname,), omd_root
+                )
+            ),
+        ],
+        lambda message: message.meta,
+    )
+
+
+def _newest_per_source[T](items: Iterable[T], meta: Callable[[T], PiggybackMetaData]) -> list[T]:
+    """Keep the most recent item of every source, sorted by source"""
+    newest: dict[HostName, T] = {}
+    for item in items:
+        item_meta = meta(item)
+        if (other := newest.get(item_meta.source)) is None or (
+            meta(other).last_update <= item_meta.last_update
+        ):
+            newest[item_meta.source] = item
+    return [newest[source] for source in sorted(newest)]
+
+
+def _get_file_messages_for(
+    piggybacked_hostname: HostAddress, omd_root: Path
+) -> Sequence[PiggybackMessage]:
+    piggyback_meta_data = _get_file_meta_data(piggybacked_hostname, omd_root)
     logger.debug("%s piggyback files for '%s'.", len(piggyback_meta_data), piggybacked_hostname)
 
     piggyback_data = []
@@ -155,14 +259,23 @@ def get_piggybacked_host_with_sources(
     omd_root: Path, piggybacked_hostname: HostName | None = None
 ) -> Mapping[HostAddress, Sequence[PiggybackMetaData]]:
     """Generates all piggyback pig/piggybacked host pairs"""
-    return {
-        piggybacked_host: _get_payload_meta_data(piggybacked_host, omd_root)
-        for piggybacked_host_folder in (
-            [d for d in [payload_dir(omd_root) / piggybacked_hostname] if d.exists()]
-            if piggybacked_hostname
-            else _get_piggybacked_host_folders(omd_root)
+    containers = container_index(omd_root)
+    if piggybacked_hostname:
+        piggybacked_hosts = (
+            [HostAddress(piggybacked_hostname)]
+            if (payload_dir(omd_root) / piggybacked_hostname).exists()
+            or containers.records_for(piggybacked_hostname)
+            else []
+        )
+    else:
+        piggybacked_hosts = sorted(
+            {HostAddress(folder.name) for folder in _get_piggybacked_host_folders(omd_root)}
+            | {HostAddress(host) for host in containers.piggybacked_hosts()}
         )
-        if (piggybacked_host := HostAddress(piggybacked_host_folder.name))
+    return {
+        piggybacked_host: _get_payload_meta_data(piggybacked_host, omd_root, containers)
+        for piggybacked_host in piggybacked_hosts
+        if piggybacked_host
     }
 
 
@@ -196,6 +309,12 @@ def store_piggyback_raw_data(
     contact_timestamp: float | None,
     omd_root: Path,
 ) -> None:
+    """Store the piggyback data of a source
+
+    If containers are enabled for the site, the payloads are stored in the
+    container of the source rather than in one file per piggybacked host.
+    This pays off for sources with many piggybacked hosts.
+    """
     if contact_timestamp is None:
         # Cleanup the status file when no piggyback data was sent this turn.
         logger.debug("Received no piggyback data")
@@ -211,6 +330,10 @@ def store_piggyback_raw_data(
     # work as if on the source system
     _write_file_with_mtime(file_path=status_file_path, content=b"", mtime=contact_timestamp)
 
+    if containers_enabled(omd_root):
+        store_in_container(source_hostname, piggybacked_raw_data, message_timestamp, omd_root)
+        return
+
     for piggybacked_hostname, lines in piggybacked_raw_data.items():
         logger.debug("Storing piggyback data for: %r", piggybacked_hostname)
         # Raw data is always stored as bytes. Later the content is
@@ -253,6 +376,29 @@ def _write_file_with_mtime(
 
 
 def _get_payload_meta_data(
+    piggybacked_hostname: HostName, omd_root: Path, containers: ContainerIndex
+) -> Sequence[PiggybackMetaData]:
+    last_contacts: dict[HostName, int | None] = {}
+    return _newest_per_source(
+        [
+            *_get_file_meta_data(piggybacked_hostname, omd_root),
+            *(
+                PiggybackMetaData(
+                    source=source,
+                    piggybacked=piggybacked_hostname,
+                    last_update=record.last_update,
+                    last_contact=last_contacts.setdefault(
+                        source, _get_mtime(_get_source_status_file_path(source, omd_root))
+                    ),
+                )
+                for source, record in containers.records_for(piggybacked_hostname).items()
+            ),
+        ],
+        lambda meta_data: meta_data,
+    )
+
+
+def _get_file_meta_data(
     piggybacked_hostname: HostName, omd_root: Path
 ) -> Sequence[PiggybackMetaData]:
     """Gather a list of piggyback files to read for further processing.
@@ -344,6 +490,7 @@ def cleanup_piggyback_files(cut_off_timestamp: float, omd_root: Path) -> None:
 
     _cleanup_old_source_status_files(_get_source_state_files(omd_root), cut_off_timestamp)
     _cleanup_old_piggybacked_files(piggybacked_hosts_settings, cut_off_timestamp)
+    _cleanup_old_container_records(omd_root, cut_off_timestamp)
 
 
 def _cleanup_old_source_status_files(
@@ -395,6 +542,25 @@ def _cleanup_old_piggybacked_files(
         )
 
 
+def _cleanup_old_container_records(omd_root: Path, cut_off_timestamp: float) -> None:
+    """Remove container records which exceed provided maximum age."""
+    containers = container_index(omd_root)
+    for source in {
+        source
+        for piggybacked in containers.piggybacked_hosts()
+        for source, record in containers.records_for(piggybacked).items()
+        if record.last_update < cut_off_timestamp
+    }:
+        logger.debug("Piggyback container of '%s' has outdated data. Remove it.", source)
+        rewrite_container(
+            omd_root,
+            source,
+            lambda piggybacked, record: (
+                piggybacked if record.last_update >= cut_off_timestamp else None
+            ),
+        )
+
+
 def _get_mtime(path: Path) -> int | None:
     try:
         # Beware:
@@ -437,7 +603,30 @@ def move_for_host_rename(omd_root: Path, old_host: str, new_host: str) -> tuple[
         old_path.rename(new_path)
         yield "piggyback-pig"
 
-    return tuple(
+    def _rename_in_containers(old_name: str, new_name: str) -> Iterable[str]:
+        containers = container_index(omd_root)
+        if not (sources := set(containers.records_for(HostName(old_name)))):
+            return
+
+        def _renamed(piggybacked: HostName, _record: object) -> HostName | None:
+            if piggybacked == new_name:
+                return None
+            return HostName(new_name) if piggybacked == old_name else piggybacked
+
+        for source in sources | set(containers.records_for(HostName(new_name))):
+            rewrite_container(omd_root, source, _renamed)
+        yield "piggyback-load"
+
+    def _rename_container(old_name: str, new_name: str) -> Iterable[str]:
+        if not (old_path := container_dir(omd_root) / old_name).exists():
+            return
+
+        old_path.rename(container_dir(omd_root) / new_name)
+        yield "piggyback-pig"
+
+    return (
         *_rename_piggybacked_dir(old_host, new_host),
         *_rename_payload_file(piggyback_dir, old_host, new_host),
+        *_rename_in_containers(old_host, new_host),
+        *_rename_container(old_host, new_host),
     )
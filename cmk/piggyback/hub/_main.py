@@ -17,11 +17,18 @@ from multiprocessing.synchronize import Event
 from pathlib import Path
 
 from cmk.ccc.daemon import daemonize, pid_file_lock
-from cmk.messaging import Channel, DeliveryTag, QueueName, set_logging_level
+from cmk.messaging import Channel, DeliveryTag, set_logging_level
 
 from ._config import CONFIG_QUEUE, ConfigType, PiggybackHubConfig, save_config
 from ._payload import (
+    BATCH_SUPPORT_QUEUE,
+    BatchSupport,
+    handle_batch_support,
+    PAYLOAD_BATCH_QUEUE,
+    PAYLOAD_QUEUE,
     PiggybackPayload,
+    PiggybackPayloadBatch,
+    save_payload_batch_on_message,
     save_payload_on_message,
     send_messages_oneshot,
     SendingPayloadProcess,
@@ -115,7 +122,8 @@ def run_piggyback_hub(
     logger: logging.Logger, omd_root: Path, omd_site: str, crash_report_callback: Callable[[], str]
 ) -> int:
     reload_config = make_event()
-    processes = (
+    processes: tuple[ReceivingProcess | SendingPayloadProcess, ...] = (
+        # Sites that have not been updated yet still publish single payloads
         ReceivingProcess(
             logger,
             omd_root,
@@ -123,9 +131,29 @@ def run_piggyback_hub(
             PiggybackPayload,
             save_payload_on_message(logger, omd_root),
             crash_report_callback,
-            QueueName("payload"),
+            PAYLOAD_QUEUE,
             message_ttl=600,
         ),
+        ReceivingProcess(
+            logger,
+            omd_root,
+            omd_site,
+            PiggybackPayloadBatch,
+            save_payload_batch_on_message(logger, omd_root),
+            crash_report_callback,
+            PAYLOAD_BATCH_QUEUE,
+            message_ttl=600,
+        ),
+        ReceivingProcess(
+            logger,
+            omd_root,
+            omd_site,
+            BatchSupport,
+            handle_batch_support(logger, omd_root, omd_site, reload_config),
+            crash_report_callback,
+            BATCH_SUPPORT_QUEUE,
+            message_ttl=None,
+        ),
         SendingPayloadProcess(logger, omd_root, reload_config, crash_report_callback),
         ReceivingProcess(
             logger,
@@ -4,3 +4,6 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 RELATIVE_CONFIG_PATH = "etc/check_mk/piggyback_hub.conf"
+
+# The sites known to accept payload batches
+RELATIVE_BATCH_SITES_PATH = "var/check_mk/piggyback_hub/batch_sites.json"
@@ -3,18 +3,24 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import base64
+import json
 import logging
 import multiprocessing
+import os
 import signal
-from collections.abc import Callable, Mapping, Sequence
+import time
+import zlib
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass, field
 from multiprocessing.synchronize import Event
 from pathlib import Path
-from typing import Self
+from typing import Literal, Self
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 from cmk.ccc.hostaddress import HostName
-from cmk.messaging import Channel, CMKConnectionError, DeliveryTag, RoutingKey
+from cmk.messaging import Channel, CMKConnectionError, DeliveryTag, QueueName, RoutingKey
 from cmk.piggyback.backend import (
     get_messages_for,
     PiggybackMessage,
@@ -22,9 +28,23 @@ from cmk.piggyback.backend import (
     watch_new_messages,
 )
 
-from ._config import AnnotatedHostName, load_config, PiggybackHubConfig
+from ._config import AnnotatedHostName, HostLocations, load_config, PiggybackHubConfig
+from ._paths import RELATIVE_BATCH_SITES_PATH
 from ._utils import make_connection, make_log_and_exit
 
+PAYLOAD_QUEUE = QueueName("payload")
+PAYLOAD_BATCH_QUEUE = QueueName("payload-batch")
+BATCH_SUPPORT_QUEUE = QueueName("batch-support")
+
+# The payloads for a site are published together once their raw data adds
+# up to this many bytes, or once the oldest one has waited this many seconds.
+BATCH_MAX_BYTES = 1024 * 1024
+BATCH_MAX_DELAY = 1
+# Smaller batches are not worth compressing
+_COMPRESSION_MIN_BYTES = 1024
+# Log the counters of the batches at most this often (seconds)
+_STATISTICS_INTERVAL = 300
+
 
 class PiggybackPayload(BaseModel):
     source_host: AnnotatedHostName
@@ -42,6 +62,250 @@ class PiggybackPayload(BaseModel):
         )
 
 
+_PAYLOADS = TypeAdapter(list[PiggybackPayload])
+
+
+class PiggybackPayloadBatch(BaseModel):
+    """Several payloads for one site, JSON encoded and optionally compressed"""
+
+    compression: Literal["none", "zlib"]
+    data: str  # base64 encoded
+
+    @classmethod
+    def pack(cls, payloads: Sequence[PiggybackPayload]) -> Self:
+        raw = _PAYLOADS.dump_json(list(payloads))
+        if len(raw) < _COMPRESSION_MIN_BYTES:
+            return cls(compression="none", data=base64.b64encode(raw).decode("ascii"))
+        return cls(compression="zlib", data=base64.b64encode(zlib.compress(raw)).decode("ascii"))
+
+    def unpack(self) -> Sequence[PiggybackPayload]:
+        raw = base64.b64decode(self.data)
+        match self.compression:
+            case "none":
+                return _PAYLOADS.validate_json(raw)
+            case "zlib":
+                return _PAYLOADS.validate_json(zlib.decompress(raw))
+
+
+class BatchSupport(BaseModel):
+    """Announces that a site accepts payload batches
+
+    Sites that have not been updated yet neither announce this nor consume
+    batches. They are sent single payloads.
+    """
+
+    site_id: str
+    is_reply: bool = False
+
+
+def load_batch_sites(omd_root: Path) -> frozenset[str]:
+    try:
+        return frozenset(json.loads((omd_root / RELATIVE_BATCH_SITES_PATH).read_text()))
+    except FileNotFoundError:
+        return frozenset()
+
+
+def _save_batch_sites(omd_root: Path, site_ids: frozenset[str]) -> None:
+    path = omd_root / RELATIVE_BATCH_SITES_PATH
+    path.parent.mkdir(mode=0o770, exist_ok=True, parents=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(f"{json.dumps(sorted(site_ids))}\n")
+    tmp_path.rename(path)
+
+
+def _announce_batch_support(
+    channel: Channel[BatchSupport],
+    omd_site: str,
+    locations: HostLocations,
+    batch_sites: frozenset[str],
+) -> None:
+    """Tell the destination sites not yet known to accept batches that we do"""
+    for site_id in sorted(set(locations.values()) - batch_sites - {omd_site}):
+        channel.publish_for_site(
+            site_id, BatchSupport(site_id=omd_site), routing=RoutingKey(BATCH_SUPPORT_QUEUE.value)
+        )
+
+
+def handle_batch_support(
+    logger: logging.Logger, omd_root: Path, omd_site: str, reload_config: Event
+) -> Callable[[Channel[BatchSupport], DeliveryTag, BatchSupport], None]:
+    def _on_message(
+        channel: Channel[BatchSupport], delivery_tag: DeliveryTag, received: BatchSupport
+    ) -> None:
+        if received.site_id not in (batch_sites := load_batch_sites(omd_root)):
+            logger.info("Site '%s' accepts payload batches", received.site_id)
+            _save_batch_sites(omd_root, batch_sites | {received.site_id})
+            reload_config.set()
+        if not received.is_reply:
+            channel.publish_for_site(
+                received.site_id,
+                BatchSupport(site_id=omd_site, is_reply=True),
+                routing=RoutingKey(BATCH_SUPPORT_QUEUE.value),
+            )
+        channel.acknowledge(delivery_tag)
+
+    return _on_message
+
+
+@dataclass(frozen=True)
+class _Channels:
+    payload: Channel[PiggybackPayload]
+    batch: Channel[PiggybackPayloadBatch]
+
+
+def _raw_size(payload: PiggybackPayload) -> int:
+    return sum(len(line) for lines in payload.raw_data.values() for line in lines)
+
+
+@dataclass
+class _BatchStatistics:
+    """Counters of the published or received batches, logged every now and then"""
+
+    description: str
+    batches: int = 0
+    payloads: int = 0
+    raw_bytes: int = 0
+    encoded_bytes: int = 0
+    max_payloads: int = 0
+    single_payloads: int = 0
+    total_lag: float = 0.0
+    max_lag: float = 0.0
+    logged: float = field(default_factory=time.time)
+
+    def add(
+        self, payloads: Sequence[PiggybackPayload], batch: PiggybackPayloadBatch, now: float
+    ) -> None:
+        self.batches += 1
+        self.payloads += len(payloads)
+        self.raw_bytes += sum(_raw_size(p) for p in payloads)
+        self.encoded_bytes += len(batch.data)
+        self.max_payloads = max(self.max_payloads, len(payloads))
+        lags = [now - p.message_timestamp for p in payloads]
+        self.total_lag += sum(lags)
+        self.max_lag = max(self.max_lag, *lags)
+
+    def add_singles(self, payloads: Sequence[PiggybackPayload], now: float) -> None:
+        """Count the payloads sent one by one (to sites without batch support)"""
+        self.single_payloads += len(payloads)
+        lags = [now - p.message_timestamp for p in payloads]
+        self.total_lag += sum(lags)
+        self.max_lag = max(self.max_lag, *lags)
+
+    def log_if_due(self, logger: logging.Logger, now: float) -> None:
+        if now - self.logged < _STATISTICS_INTERVAL or not (self.batches or self.single_payloads):
+            return
+        logger.info(
+            "%s: %d batches, %d payloads (max. %d per batch), %d bytes (%d encoded), "
+            "%d single payloads, lag avg. %.1fs, max. %.1fs",
+            self.description.capitalize(),
+            self.batches,
+            self.payloads,
+            self.max_payloads,
+            self.raw_bytes,
+            self.encoded_bytes,
+            self.single_payloads,
+            self.total_lag / (self.payloads + self.single_payloads),
+            self.max_lag,
+        )
+        self.batches = self.payloads = self.raw_bytes = self.encoded_bytes = 0
+        self.max_payloads = self.single_payloads = 0
+        self.total_lag = self.max_lag = 0.0
+        self.logged = now
+
+
+class _Batches:
+    """The pending payloads per destination site"""
+
+    def __init__(self) -> None:
+        self._payloads: dict[str, list[PiggybackPayload]] = {}
+        self._sizes: dict[str, int] = {}
+        self._since: dict[str, float] = {}
+
+    def add(self, site_id: str, payload: PiggybackPayload, now: float) -> None:
+        self._payloads.setdefault(site_id, []).append(payload)
+        self._sizes[site_id] = self._sizes.get(site_id, 0) + _raw_size(payload)
+        self._since.setdefault(site_id, now)
+
+    def due(self, now: float) -> Sequence[str]:
+        return [
+            site_id
+            for site_id, since in self._since.items()
+            if now - since >= BATCH_MAX_DELAY or self._sizes[site_id] >= BATCH_MAX_BYTES
+        ]
+
+    def all(self) -> Sequence[str]:
+        return list(self._payloads)
+
+    def get(self, site_id: str) -> Sequence[PiggybackPayload]:
+        return self._payloads[site_id]
+
+    def remove(self, site_id: str) -> None:
+        del self._payloads[site_id], self._sizes[site_id], self._since[site_id]
+
+
+def _publish_batches(
+    logger: logging.Logger,
+    task_name: str,
+    channels: _Channels,
+    batches: _Batches,
+    site_ids: Iterable[str],
+    *,
+    batch_sites: frozenset[str],
+    statistics: _BatchStatistics,
+) -> None:
+    """Publish the given batches, and forget about them once that succeeded
+
+    Sites not known to accept batches are sent the payloads one by one.
+    """
+    for site_id in site_ids:
+        payloads = batches.get(site_id)
+        if site_id not in batch_sites:
+            logger.debug(
+                "%s: %d single payloads for site '%s'", task_name.title(), len(payloads), site_id
+            )
+            for payload in payloads:
+                channels.payload.publish_for_site(
+                    site_id, payload, routing=RoutingKey(PAYLOAD_QUEUE.value)
+                )
+            batches.remove(site_id)
+            statistics.add_singles(payloads, time.time())
+            continue
+
+        batch = PiggybackPayloadBatch.pack(payloads)
+        logger.debug(
+            "%s: %d payloads for site '%s' (%s, %d bytes)",
+            task_name.title(),
+            len(payloads),
+            site_id,
+            batch.compression,
+            len(batch.data),
+        )
+        channels.batch.publish_for_site(
+            site_id, batch, routing=RoutingKey(PAYLOAD_BATCH_QUEUE.value)
+        )
+        batches.remove(site_id)
+        statistics.add(payloads, batch, time.time())
+    statistics.log_if_due(logger, time.time())
+
+
+def _store_payloads(omd_root: Path, payloads: Iterable[PiggybackPayload]) -> None:
+    """Store the payloads, one call per source and timestamps"""
+    merged: dict[tuple[HostName, int, int | None], dict[HostName, Sequence[bytes]]] = {}
+    for payload in payloads:
+        merged.setdefault(
+            (payload.source_host, payload.message_timestamp, payload.contact_timestamp), {}
+        ).update(payload.raw_data)
+
+    for (source_host, message_timestamp, contact_timestamp), raw_data in merged.items():
+        store_piggyback_raw_data(
+            source_hostname=source_host,
+            piggybacked_raw_data=raw_data,
+            message_timestamp=message_timestamp,
+            contact_timestamp=contact_timestamp,
+            omd_root=omd_root,
+        )
+
+
 def save_payload_on_message(
     logger: logging.Logger,
     omd_root: Path,
@@ -64,6 +328,27 @@ def save_payload_on_message(
     return _on_message
 
 
+def save_payload_batch_on_message(
+    logger: logging.Logger,
+    omd_root: Path,
+) -> Callable[[Channel[PiggybackPayloadBatch], DeliveryTag, PiggybackPayloadBatch], None]:
+    statistics = _BatchStatistics("received")
+
+    def _on_message(
+        channel: Channel[PiggybackPayloadBatch],
+        delivery_tag: DeliveryTag,
+        received: PiggybackPayloadBatch,
+    ) -> None:
+        payloads = received.unpack()
+        logger.debug("Received batch of %d payloads", len(payloads))
+        _store_payloads(omd_root, payloads)
+        channel.acknowledge(delivery_tag)
+        statistics.add(payloads, received, now := time.time())
+        statistics.log_if_due(logger, now)
+
+    return _on_message
+
+
 class SendingPayloadProcess(multiprocessing.Process):
     def __init__(
         self,
@@ -78,7 +363,7 @@ class SendingPayloadProcess(multiprocessing.Process):
         self.site = omd_root.name
         self.reload_config = reload_config
         self.crash_report_callback = crash_report_callback
-        self.task_name = "publishing on queue 'payload'"
+        self.task_name = f"publishing on queue '{PAYLOAD_BATCH_QUEUE.value}'"
 
     def run(self):
         self.logger.info("Starting: %s", self.task_name)
@@ -88,23 +373,44 @@ class SendingPayloadProcess(multiprocessing.Process):
         )
 
         config = load_config(self.omd_root)
+        batch_sites = load_batch_sites(self.omd_root)
         self.logger.debug("Loaded configuration: %r", config)
 
-        failed_message = None
+        # Pending batches survive a reconnect, they are only dropped once published.
+        batches = _Batches()
+        statistics = _BatchStatistics("published")
         try:
             while True:
                 with make_connection(self.omd_root, self.site, self.logger, self.task_name) as conn:
                     try:
-                        channel = conn.channel(PiggybackPayload)
-                        if failed_message is not None:
-                            # Retry in case the first time the channel was not available after make_connection
-                            self._handle_message(channel, config, failed_message)
-                            failed_message = None
-                        for piggyback_message in watch_new_messages(self.omd_root):
-                            config = self._check_for_config_reload(config)
-                            self._handle_message(channel, config, piggyback_message)
+                        channels = _Channels(
+                            payload=conn.channel(PiggybackPayload),
+                            batch=conn.channel(PiggybackPayloadBatch),
+                        )
+                        announce_channel = conn.channel(BatchSupport)
+                        _announce_batch_support(
+                            announce_channel, self.site, config.locations, batch_sites
+                        )
+                        for piggyback_message in watch_new_messages(
+                            self.omd_root, timeout=BATCH_MAX_DELAY
+                        ):
+                            if self.reload_config.is_set():
+                                config, batch_sites = self._reload_config()
+                                _announce_batch_support(
+                                    announce_channel, self.site, config.locations, batch_sites
+                                )
+                            if piggyback_message is not None:
+                                self._handle_message(batches, config, piggyback_message)
+                            _publish_batches(
+                                self.logger,
+                                self.task_name,
+                                channels,
+                                batches,
+                                batches.due(time.time()),
+                                batch_sites=batch_sites,
+                                statistics=statistics,
+                            )
                     except CMKConnectionError as exc:
-                        failed_message = piggyback_message
                         self.logger.info("Reconnecting: %s: %s", self.task_name, exc)
         except CMKConnectionError as exc:
             self.logger.error("Connection error: %s: %s", self.task_name, exc)
@@ -116,7 +422,7 @@ class SendingPayloadProcess(multiprocessing.Process):
 
     def _handle_message(
         self,
-        channel: Channel[PiggybackPayload],
+        batches: _Batches,
         config: PiggybackHubConfig,
         message: PiggybackMessage,
     ) -> None:
@@ -130,17 +436,12 @@ class SendingPayloadProcess(multiprocessing.Process):
             message.meta.piggybacked,
             site_id,
         )
-        channel.publish_for_site(
-            site_id, PiggybackPayload.from_message(message), routing=RoutingKey("payload")
-        )
+        batches.add(site_id, PiggybackPayload.from_message(message), time.time())
 
-    def _check_for_config_reload(self, current_config: PiggybackHubConfig) -> PiggybackHubConfig:
-        if not self.reload_config.is_set():
-            return current_config
+    def _reload_config(self) -> tuple[PiggybackHubConfig, frozenset[str]]:
         self.logger.info("Reloading configuration")
-        config = load_config(self.omd_root)
         self.reload_config.clear()
-        return config
+        return load_config(self.omd_root), load_batch_sites(self.omd_root)
 
 
 def send_messages_oneshot(
@@ -152,23 +453,26 @@ def send_messages_oneshot(
     task_name = "sending oneshot messages"
     logger.info("Starting: %s", task_name)
 
-    hub_payloads = [
-        (site_id, PiggybackPayload.from_message(message))
-        for host, site_id in targets.items()
-        for message in get_messages_for(host, omd_root)
-    ]
+    batches = _Batches()
+    now = time.time()
+    for host, site_id in targets.items():
+        for message in get_messages_for(host, omd_root):
+            batches.add(site_id, PiggybackPayload.from_message(message), now)
 
     try:
         with make_connection(omd_root, omd_site, logger, task_name) as conn:
-            channel = conn.channel(PiggybackPayload)
-            for site, payload in hub_payloads:
-                logger.debug(
-                    "%s: to site '%s' for host '%s'",
-                    task_name.title(),
-                    site,
-                    ",".join(payload.raw_data),  # it's only one.
-                )
-                channel.publish_for_site(site, payload, routing=RoutingKey("payload"))
+            _publish_batches(
+                logger,
+                task_name,
+                _Channels(
+                    payload=conn.channel(PiggybackPayload),
+                    batch=conn.channel(PiggybackPayloadBatch),
+                ),
+                batches,
+                batches.all(),
+                batch_sites=load_batch_sites(omd_root),
+                statistics=_BatchStatistics(task_name),
+            )
 
     except CMKConnectionError as exc:
         logger.error("Connection error: %s: %s", task_name, exc)
@@ -57,40 +57,44 @@ def get_snmp_table(
     max_len = 0
     max_len_col = -1
 
-    for oid in tree.oids:
-        fetchoid: OID = f"{tree.base}.{oid.column}"
-        # column may be integer or string like "1.5.4.2.3"
-        # if column is 0, we do not fetch any data from snmp, but use
-        # a running counter as index. If the index column is the first one,
-        # we do not know the number of entries right now. We need to fill
-        # in later. If the column is OID_STRING or OID_BIN we do something
-        # similar: we fill in the complete OID of the entry, either as
-        # string or as binary UTF-8 encoded number string
-        if isinstance(oid.column, SpecialColumn):
-            if index_column >= 0 and index_column != len(columns):
-                raise MKGeneralException(
-                    "Invalid SNMP OID specification in implementation of check. "
-                    "You can only use one of OID_END, OID_STRING, OID_BIN, OID_END_BIN "
-                    "and OID_END_OCTET_STRING."
+    with backend.prefetching_walks(
+        _uncached_oids(section_name, tree, walk_cache, backend),
+        contexts=backend.config.snmpv3_contexts_of(section_name).contexts,
+    ):
+        for oid in tree.oids:
+            fetchoid: OID = f"{tree.base}.{oid.column}"
+            # column may be integer or string like "1.5.4.2.3"
+            # if column is 0, we do not fetch any data from snmp, but use
+            # a running counter as index. If the index column is the first one,
+            # we do not know the number of entries right now. We need to fill
+            # in later. If the column is OID_STRING or OID_BIN we do something
+            # similar: we fill in the complete OID of the entry, either as
+            # string or as binary UTF-8 encoded number string
+            if isinstance(oid.column, SpecialColumn):
+                if index_column >= 0 and index_column != len(columns):
+                    raise MKGeneralException(
+                        "Invalid SNMP OID specification in implementation of check. "
+                        "You can only use one of OID_END, OID_STRING, OID_BIN, OID_END_BIN "
+                        "and OID_END_OCTET_STRING."
+                    )
+                rowinfo = []
+                index_column = len(columns)
+                index_format = oid.column
+            else:
+                rowinfo = get_snmpwalk(
+                    section_name,
+                    tree.base,
+                    fetchoid,
+                    walk_cache=walk_cache,
+                    save_walk_cache=oid.save_to_cache,
+                    backend=backend,
+                    log=log,
                 )
-            rowinfo = []
-            index_column = len(columns)
-            index_format = oid.column
-        else:
-            rowinfo = get_snmpwalk(
-                section_name,
-                tree.base,
-                fetchoid,
-                walk_cache=walk_cache,
-                save_walk_cache=oid.save_to_cache,
-                backend=backend,
-                log=log,
-            )
-            if len(rowinfo) > max_len:
-                max_len_col = len(columns)
+                if len(rowinfo) > max_len:
+                    max_len_col = len(columns)
 
-        max_len = max(max_len, len(rowinfo))
-        columns.append((fetchoid, rowinfo, oid.encoding))
+            max_len = max(max_len, len(rowinfo))
+            columns.append((fetchoid, rowinfo, oid.encoding))
 
     if index_format is not None:
         # Take end-oids of non-index columns as indices
@@ -127,6 +131,29 @@ def get_snmp_table(
     return new_info
 
 
+def _uncached_oids(
+    section_name: SectionName | None,
+    tree: BackendSNMPTree,
+    walk_cache: MutableMapping[tuple[str, str, bool], SNMPRowInfo],
+    backend: SNMPBackend,
+) -> Sequence[OID]:
+    context_hash = _context_hash(backend.config.snmpv3_contexts_of(section_name).contexts)
+    return list(
+        dict.fromkeys(
+            f"{tree.base}.{oid.column}"
+            for oid in tree.oids
+            if not isinstance(oid.column, SpecialColumn)
+            and (f"{tree.base}.{oid.column}", context_hash, oid.save_to_cache) not in walk_cache
+        )
+    )
+
+
+def _context_hash(contexts: Sequence[SNMPContext]) -> str:
+    context_string = "-".join(["no_context" if not c else c for c in contexts])
+    # contexts are hashed in order not to exceed max pathname length
+    return hashlib.shake_256(context_string.encode("utf-8")).hexdigest(15)
+
+
 def _make_index_rows(
     max_column: SNMPRowInfo,
     index_format: SpecialColumn,
@@ -185,11 +212,7 @@ def get_snmpwalk(
     backend: SNMPBackend,
     log: Callable[[str], None],
 ) -> SNMPRowInfo:
-    contexts = backend.config.snmpv3_contexts_of(section_name).contexts
-    context_string = "-".join(["no_context" if not c else c for c in contexts])
-
-    # contexts are hashed in order not to exceed max pathname length
-    context_hash = hashlib.shake_256(context_string.encode("utf-8")).hexdigest(15)
+    context_hash = _context_hash(backend.config.snmpv3_contexts_of(section_name).contexts)
 
     with contextlib.suppress(KeyError):
         cache_info = walk_cache[(fetchoid, context_hash, save_walk_cache)]
@@ -5,11 +5,12 @@
 
 
 import abc
+import contextlib
 import copy
 import dataclasses
 import enum
 import logging
-from collections.abc import Iterable, Mapping, Sequence
+from collections.abc import Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass
 from typing import Any, Literal, NamedTuple, Protocol, Self
 
@@ -217,6 +218,17 @@ class SNMPBackend(abc.ABC):
     ) -> SNMPRowInfo:
         return []
 
+    @contextlib.contextmanager
+    def prefetching_walks(
+        self, oids: Sequence[OID], *, contexts: Sequence[SNMPContext]
+    ) -> Iterator[None]:
+        """Announce that the given OIDs are about to be walked in the given contexts
+
+        Backends may use this to run the walks concurrently. The results are
+        still obtained by calling walk() for every OID and context.
+        """
+        yield
+
 
 class SpecialColumn(enum.IntEnum):
     # Until we remove all but the first, its worth having an enum
@@ -7,40 +7,18 @@
 from __future__ import annotations
 
 import collections
-from collections.abc import Callable
-from functools import lru_cache, wraps
-from typing import ParamSpec, TypeVar
+import time
+from collections.abc import Hashable, Iterator, Mapping
+from dataclasses import dataclass
+from typing import cast
 
 import cmk.utils.misc
 
-P = ParamSpec("P")
-R = TypeVar("R")
-
-
-# Used as decorator wrapper for functools.lru_cache in order to bind the cache to an instance method
-# rather than the class method.
-# FIXME: Nuke this cruel hack below, it is just an ugly workaround for a missing object which should actually hold the cache!
-def instance_method_lru_cache(
-    maxsize: int | None = 128, typed: bool = False
-) -> Callable[[Callable[P, R]], Callable[P, R]]:
-    def wrap(f: Callable[P, R]) -> Callable[P, R]:
-        @wraps(f)
-        def wrapped_f(*args: P.args, **kwargs: P.kwargs) -> R:
-            self, *rest = args
-            cache_orig = lru_cache(maxsize, typed)(f)
-            instance_cache = cache_orig.__get__(self, self.__class__)  # type: ignore[attr-defined]
-            setattr(self, f.__name__, instance_cache)
-            value: R = instance_cache(*rest, **kwargs)
-            return value
-
-        return wrapped_f
-
-    return wrap
-
 
 class CacheManager:
     def __init__(self) -> None:
         self._caches: dict[str, DictCache] = collections.defaultdict(DictCache)
+        self._lru_caches: dict[str, LRUCache] = {}
 
     def __contains__(self, name: str) -> bool:
         return name in self._caches
@@ -49,15 +27,36 @@ class CacheManager:
         """get or create cache with provided name"""
         return self._caches[name]
 
+    def make_lru_cache[K: Hashable, V](
+        self, name: str, *, maxsize: int | None = None, ttl: float | None = None
+    ) -> LRUCache[K, V]:
+        """create a cache and register it with the provided name
+
+        A cache previously registered with this name is replaced: The caches of an object are
+        created with the object, the statistics refer to the most recent one.
+        """
+        cache: LRUCache[K, V] = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._lru_caches[name] = cache
+        return cache
+
     def clear(self) -> None:
         self._caches.clear()
+        self._lru_caches.clear()
 
     def clear_all(self) -> None:
         for cache in self._caches.values():
             cache.clear()
+        for lru_cache in self._lru_caches.values():
+            lru_cache.clear()
 
     def dump_sizes(self) -> dict[str, int]:
-        return {name: cmk.utils.misc.total_size(cache) for name, cache in self._caches.items()}
+        return {
+            **{name: cmk.utils.misc.total_size(cache) for name, cache in self._caches.items()},
+            **{name: cache.total_size() for name, cache in self._lru_caches.items()},
+        }
+
+    def dump_statistics(self) -> Mapping[str, CacheStatistics]:
+        return {name: cache.statistics() for name, cache in sorted(self._lru_caches.items())}
 
 
 class DictCache(dict):
@@ -84,6 +83,109 @@ class DictCache(dict):
         self.set_not_populated()
 
 
+@dataclass(frozen=True)
+class CacheStatistics:
+    entries: int
+    maxsize: int | None
+    ttl: float | None
+    hits: int
+    misses: int
+    evictions: int
+    total_size: int
+
+
+class LRUCache[K: Hashable, V]:
+    """A dict like cache with an optional limit of entries and time to live
+
+    If the limit is reached, the least recently used entry is evicted.
+    Entries older than the time to live are treated as missing.
+    """
+
+    def __init__(self, *, maxsize: int | None = None, ttl: float | None = None) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: collections.OrderedDict[K, V] = collections.OrderedDict()
+        self._expiry: dict[K, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(self._entries)
+
+    def __contains__(self, key: object) -> bool:
+        if key not in self._entries:
+            return False
+        return self.ttl is None or not self._expired(cast(K, key))
+
+    def __getitem__(self, key: K) -> V:
+        try:
+            value = self._entries[key]
+        except KeyError:
+            self.misses += 1
+            raise
+        if self.ttl is not None and self._expired(key):
+            self.misses += 1
+            raise KeyError(key)
+        if self.maxsize is not None:
+            self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._entries[key] = value
+        if self.ttl is not None:
+            self._expiry[key] = time.monotonic() + self.ttl
+        if self.maxsize is not None:
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                evicted, _value = self._entries.popitem(last=False)
+                self._expiry.pop(evicted, None)
+                self.evictions += 1
+
+    def _expired(self, key: K) -> bool:
+        if self._expiry[key] > time.monotonic():
+            return False
+        del self._entries[key]
+        del self._expiry[key]
+        return True
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def setdefault(self, key: K, default: V) -> V:
+        """Same as dict.setdefault, but does not count as a lookup"""
+        if key in self:
+            return self._entries[key]
+        self[key] = default
+        return default
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._expiry.clear()
+
+    def total_size(self) -> int:
+        """The approximate memory footprint of the cached keys and values"""
+        return cmk.utils.misc.total_size(self._entries)
+
+    def statistics(self) -> CacheStatistics:
+        return CacheStatistics(
+            entries=len(self._entries),
+            maxsize=self.maxsize,
+            ttl=self.ttl,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            total_size=self.total_size(),
+        )
+
+
 # This cache manager holds all caches that rely on the configuration
 # and have to be flushed once the configuration is reloaded in the
 # keepalive mode
@@ -7,7 +7,11 @@ from __future__ import annotations
 
 import enum
 import ipaddress
+import math
+import queue
 import socket
+import threading
+import time
 from collections.abc import (
     Callable,
     Container,
@@ -18,8 +22,8 @@ from collections.abc import (
     Sequence,
 )
 from contextlib import contextmanager
-from dataclasses import dataclass
-from typing import Any, assert_never, Final, Generic, Literal, Protocol, TypeVar
+from dataclasses import dataclass, field
+from typing import Any, assert_never, ClassVar, Final, Generic, Literal, Protocol, Self, TypeVar
 
 import cmk.ccc.debug
 import cmk.utils.paths
@@ -30,6 +34,7 @@ from cmk.utils.caching import cache_manager
 from cmk.utils.log import console
 
 IPLookupCacheId = tuple[HostName | HostAddress, socket.AddressFamily]
+_HostFamily = tuple[HostName, Literal[socket.AddressFamily.AF_INET, socket.AddressFamily.AF_INET6]]
 
 
 _FALLBACK_V4 = HostAddress("0.0.0.0")
@@ -381,19 +386,39 @@ class IPLookupCacheSerializer:
 class IPLookupCache:
     PATH = cmk.utils.paths.var_dir / "ipaddresses.cache"
 
+    # The instances are only views on the cache of the process (see _get_ip_lookup_cache),
+    # so persisting is disabled for all of them.
+    _persist_on_update: ClassVar[bool] = True
+
+    # Updates of the threads that defer them, see updates_deferred()
+    _deferred: ClassVar[threading.local] = threading.local()
+
     def __init__(self, cache: MutableMapping[IPLookupCacheId, HostAddress]) -> None:
         self._cache = cache
-        self._persist_on_update = True
         self._store = store.ObjectStore(self.PATH, serializer=IPLookupCacheSerializer())
 
     @contextmanager
     def persisting_disabled(self) -> Iterator[None]:
-        old_persist_flag = self._persist_on_update
-        self._persist_on_update = False
+        old_persist_flag = IPLookupCache._persist_on_update
+        IPLookupCache._persist_on_update = False
         try:
             yield
         finally:
-            self._persist_on_update = old_persist_flag
+            IPLookupCache._persist_on_update = old_persist_flag
+
+    @classmethod
+    @contextmanager
+    def updates_deferred(cls) -> Iterator[dict[IPLookupCacheId, HostAddress]]:
+        """Collect the updates of the current thread instead of applying them
+
+        The caller is responsible for applying the collected updates (or not).
+        """
+        updates: dict[IPLookupCacheId, HostAddress] = {}
+        cls._deferred.updates = updates
+        try:
+            yield updates
+        finally:
+            del cls._deferred.updates
 
     def __repr__(self) -> str:
         return f"{type(self).__name__}({self._cache!r})"
@@ -442,6 +467,10 @@ class IPLookupCache:
         The cache can only be cleaned up with the "Update DNS cache" option in WATO
         or the "cmk --update-dns-cache" call that both call update_dns_cache().
         """
+        if (deferred := getattr(self._deferred, "updates", None)) is not None:
+            deferred[cache_id] = ipa
+            return
+
         if not self._persist_on_update:
             self._cache[cache_id] = ipa
             return
@@ -459,6 +488,85 @@ class IPLookupCache:
         self._cache.clear()
         self.save_persisted()
 
+    def retain(self, keep: Container[IPLookupCacheId]) -> None:
+        """Remove all other entries from the in memory cache"""
+        for cache_id in [cache_id for cache_id in self._cache if cache_id not in keep]:
+            del self._cache[cache_id]
+
+
+# Lookups of a refresh of the DNS cache
+_REFRESH_WORKERS = 32
+_REFRESH_TIMEOUT = 10.0  # seconds per lookup
+# Failed lookups are retried after a backoff that doubles with every consecutive failure
+_REFRESH_MIN_BACKOFF = 60.0
+_REFRESH_MAX_BACKOFF = 86400.0
+
+
+@dataclass(kw_only=True)
+class IPLookupRefreshState:
+    """When the entries of the DNS cache have been looked up
+
+    Successful lookups are recorded with their time, failed ones with the number of
+    consecutive failures and the time before which they are not retried.
+    """
+
+    PATH: ClassVar = cmk.utils.paths.var_dir / "ipaddresses.cache.state"
+
+    resolved: dict[IPLookupCacheId, float] = field(default_factory=dict)
+    failed: dict[IPLookupCacheId, tuple[int, float]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls) -> Self:
+        try:
+            raw = store.load_object_from_file(cls.PATH, default={})
+            return cls(
+                resolved={_cache_id(k): v for k, v in raw.get("resolved", {}).items()},
+                failed={_cache_id(k): v for k, v in raw.get("failed", {}).items()},
+            )
+        except (MKTerminate, MKTimeout):
+            raise
+        except Exception:
+            if cmk.ccc.debug.enabled():
+                raise
+            return cls()  # refresh everything
+
+    def save(self) -> None:
+        store.save_object_to_file(
+            self.PATH,
+            {
+                "resolved": {_raw_cache_id(k): v for k, v in self.resolved.items()},
+                "failed": {_raw_cache_id(k): v for k, v in self.failed.items()},
+            },
+        )
+
+    def is_fresh(self, cache_id: IPLookupCacheId, now: float, max_age: float) -> bool:
+        return now - self.resolved.get(cache_id, -math.inf) < max_age
+
+    def is_backing_off(self, cache_id: IPLookupCacheId, now: float) -> bool:
+        return cache_id in self.failed and now < self.failed[cache_id][1]
+
+    def record_success(self, cache_id: IPLookupCacheId, now: float) -> None:
+        self.resolved[cache_id] = now
+        self.failed.pop(cache_id, None)
+
+    def record_failure(self, cache_id: IPLookupCacheId, now: float) -> None:
+        failures = self.failed[cache_id][0] + 1 if cache_id in self.failed else 1
+        backoff = min(_REFRESH_MIN_BACKOFF * 2 ** (failures - 1), _REFRESH_MAX_BACKOFF)
+        self.failed[cache_id] = failures, now + backoff
+        self.resolved.pop(cache_id, None)
+
+    def retain(self, keep: Container[IPLookupCacheId]) -> None:
+        self.resolved = {k: v for k, v in self.resolved.items() if k in keep}
+        self.failed = {k: v for k, v in self.failed.items() if k in keep}
+
+
+def _raw_cache_id(cache_id: IPLookupCacheId) -> tuple[str, int]:
+    return str(cache_id[0]), {socket.AF_INET: 4, socket.AF_INET6: 6}[cache_id[1]]
+
+
+def _cache_id(raw: tuple[str, int]) -> IPLookupCacheId:
+    return HostName(raw[0]), {4: socket.AF_INET, 6: socket.AF_INET6}[raw[1]]
+
 
 def _get_ip_lookup_cache() -> IPLookupCache:
     """A file based fall-back DNS cache in case resolution fails"""
@@ -476,52 +584,138 @@ def update_dns_cache(
     hosts: Iterable[HostName],
     get_ip_stack_config: Callable[[HostName], IPStackConfig],
     lookup_ip_address: IPLookup,
+    max_age: float = 0,
+    workers: int = _REFRESH_WORKERS,
+    timeout: float = _REFRESH_TIMEOUT,
 ) -> tuple[int, Sequence[HostName]]:
-    failed = []
+    """Refresh the DNS cache for the given hosts
 
+    Entries that have been looked up less than `max_age` seconds ago are kept, the
+    others are looked up again, concurrently. Entries of other hosts are removed.
+
+    A lookup that takes longer than `timeout` seconds is considered to have failed.
+    Lookups can't be interrupted, it is abandoned.
+
+    Failed lookups are not retried by a partial refresh (`max_age` > 0) before a
+    backoff has passed. They are reported as failed again.
+    """
     ip_lookup_cache = _get_ip_lookup_cache()
+    state = IPLookupRefreshState.load()
+    now = time.time()
+
+    # `_annotate_family()` handles DUAL_STACK and NO_IP
+    cache_ids = list(_annotate_family(hosts, get_ip_stack_config))
+    fresh = {
+        cache_id
+        for cache_id in cache_ids
+        if ip_lookup_cache.get(cache_id) and state.is_fresh(cache_id, now, max_age)
+    }
+    backing_off = {
+        cache_id
+        for cache_id in cache_ids
+        if max_age and cache_id not in fresh and state.is_backing_off(cache_id, now)
+    }
 
     with ip_lookup_cache.persisting_disabled():
         console.verbose("Cleaning up existing DNS cache...")
-        ip_lookup_cache.clear()
+        ip_lookup_cache.retain(fresh)
 
         console.verbose("Updating DNS cache...")
-        # `_annotate_family()` handles DUAL_STACK and NO_IP
-        for host_name, family in _annotate_family(hosts, get_ip_stack_config):
-            console.verbose_no_lf(f"{host_name} ({family})...")
-            try:
-                ip = lookup_ip_address(host_name, family)
-                console.verbose(f"{ip}")
+        results = _lookup_concurrently(
+            lookup_ip_address,
+            ip_lookup_cache,
+            [cache_id for cache_id in cache_ids if cache_id not in fresh | backing_off],
+            workers=workers,
+            timeout=timeout,
+        )
 
-            except (MKTerminate, MKTimeout):
-                # We should be more specific with the exception handler below, then we
-                # could drop this special handling here
-                raise
-            except MKIPAddressLookupError as e:
-                failed.append(host_name)
-                console.verbose(f"lookup failed: {e}")
-                continue
-            except Exception as e:
-                failed.append(host_name)
-                console.verbose(f"lookup failed: {e}")
-                if cmk.ccc.debug.enabled():
-                    raise
-                continue
+    failed = []
+    for cache_id in cache_ids:
+        if cache_id in backing_off:
+            failed.append(cache_id[0])
+            continue
+        if (result := results.get(cache_id)) is None:
+            continue
+        if isinstance(result, Exception):
+            failed.append(cache_id[0])
+            state.record_failure(cache_id, now)
+            console.verbose(f"{cache_id[0]} ({cache_id[1]})...lookup failed: {result}")
+            if cmk.ccc.debug.enabled() and not isinstance(result, MKIPAddressLookupError):
+                raise result
+            continue
+        state.record_success(cache_id, now)
+        console.verbose(f"{cache_id[0]} ({cache_id[1]})...{result}")
 
     ip_lookup_cache.save_persisted()
+    state.retain(set(cache_ids))
+    state.save()
 
     return len(ip_lookup_cache), failed
 
 
+def _lookup_concurrently(
+    lookup_ip_address: IPLookup,
+    ip_lookup_cache: IPLookupCache,
+    cache_ids: Iterable[_HostFamily],
+    *,
+    workers: int,
+    timeout: float,
+) -> Mapping[_HostFamily, HostAddress | Exception]:
+    """Look up the addresses in up to `workers` threads at a time
+
+    The threads of abandoned lookups are left running (they are daemon threads),
+    their results are ignored.
+
+    The lookups don't update the DNS cache themselves: Only the updates of the
+    lookups that finish in time are applied, by the calling thread.
+    """
+    results: dict[_HostFamily, HostAddress | Exception] = {}
+    finished: queue.SimpleQueue[
+        tuple[_HostFamily, HostAddress | Exception, Mapping[IPLookupCacheId, HostAddress]]
+    ] = queue.SimpleQueue()
+
+    def lookup(cache_id: _HostFamily) -> None:
+        with IPLookupCache.updates_deferred() as updates:
+            try:
+                result: HostAddress | Exception = lookup_ip_address(*cache_id)
+            except Exception as e:
+                result = e
+        finished.put((cache_id, result, updates))
+
+    pending = iter(cache_ids)
+    deadlines: dict[_HostFamily, float] = {}
+    while True:
+        while len(deadlines) < workers and (cache_id := next(pending, None)) is not None:
+            deadlines[cache_id] = time.monotonic() + timeout
+            threading.Thread(
+                target=lookup, args=(cache_id,), name="dns-lookup", daemon=True
+            ).start()
+        if not deadlines:
+            return results
+
+        try:
+            cache_id, result, updates = finished.get(
+                timeout=max(0.0, min(deadlines.values()) - time.monotonic())
+            )
+        except queue.Empty:
+            now = time.monotonic()
+            for cache_id in [c for c, deadline in deadlines.items() if deadline <= now]:
+                del deadlines[cache_id]
+                results[cache_id] = MKIPAddressLookupError(
+                    f"Lookup of {cache_id[0]} timed out after {timeout} seconds"
+                )
+            continue
+
+        if deadlines.pop(cache_id, None) is not None:
+            results[cache_id] = result
+            for updated_id, ipa in updates.items():
+                ip_lookup_cache[updated_id] = ipa
+
+
 def _annotate_family(
     hosts: Iterable[HostName],
     get_ip_stack_config: Callable[[HostName], IPStackConfig],
-) -> Iterable[
-    tuple[
-        HostName,
-        Literal[socket.AddressFamily.AF_INET, socket.AddressFamily.AF_INET6],
-    ]
-]:
+) -> Iterable[_HostFamily]:
     for host_name in hosts:
         ip_stack_config = get_ip_stack_config(host_name)
         if IPStackConfig.IPv4 in ip_stack_config:
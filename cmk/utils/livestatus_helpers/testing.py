@@ -112,6 +112,11 @@ class FakeSocket:
     def recv(self, length: int) -> bytes:
         return self.mock_live.socket_recv(length)
 
+    def recv_into(self, buffer: memoryview, nbytes: int = 0) -> int:
+        data = self.mock_live.socket_recv(nbytes or len(buffer))
+        buffer[: len(data)] = data
+        return len(data)
+
     def send(self, data: bytes) -> None:
         return self.mock_live.socket_send(data)
 
@@ -7,6 +7,7 @@
 import contextlib
 from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass
+from itertools import compress
 from re import Pattern
 from typing import (
     Any,
@@ -21,6 +22,7 @@ from typing import (
 
 from cmk import trace
 from cmk.ccc.hostaddress import HostAddress, HostName
+from cmk.utils.caching import cache_manager, LRUCache
 from cmk.utils.global_ident_type import GlobalIdent
 from cmk.utils.labels import (
     AndOrNotLiteral,
@@ -36,6 +38,9 @@ from .conditions import HostOrServiceConditions, HostOrServiceConditionsSimple
 
 tracer = trace.get_tracer()
 
+# The key is independent of the host: Many hosts share the same entries
+_SERVICE_MATCH_CACHE_SIZE = 1_000_000
+
 RulesetName = str  # Could move to a less cluttered module as it is often used on its own.
 TRuleValue = TypeVar("TRuleValue")
 TDefaultValue = TypeVar("TDefaultValue")
@@ -174,12 +179,14 @@ class RulesetMatcher:
             nodes_of,
         )
 
-        self._service_match_cache: dict[
+        self._service_match_cache: LRUCache[
             tuple[
                 tuple[ServiceName | None, int], PreprocessedPattern, tuple[tuple[str, object], ...]
             ],
-            object,
-        ] = {}
+            bool,
+        ] = cache_manager.make_lru_cache(
+            "ruleset_matcher_service_match", maxsize=_SERVICE_MATCH_CACHE_SIZE
+        )
 
     def clear_caches(self) -> None:
         # clear caches that don't work properly (the ruleset optimizer ignores host labels).
@@ -349,9 +356,9 @@ class RulesetMatcher:
                 service_label_groups_cache_id,
             )
 
-            if service_cache_id in self._service_match_cache:
+            try:
                 match = self._service_match_cache[service_cache_id]
-            else:
+            except KeyError:
                 match = _matches_service_conditions(
                     service_description_condition,
                     service_label_groups,
@@ -373,6 +380,194 @@ _ConditionCacheID: TypeAlias = tuple[
 ]
 
 
+_BIT_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_BIT_FLAGS = bytes.maketrans(b"01", b"\x00\x01")
+
+# Below this number of hosts, bitsets are converted bit by bit
+_SPARSE = 64
+
+
+class _HostBitsets:
+    """Sets of hosts as bitsets (ints) over all configured hosts
+
+    The bitsets of all host tags and folders are computed upfront, evaluating the
+    conditions of a rule for all hosts boils down to a few bitwise operations on them.
+    Host labels may be expensive to compute: They are indexed lazily, only for hosts that
+    are not ruled out by the other conditions of a rule.
+    """
+
+    def __init__(
+        self,
+        hosts: Iterable[HostName],
+        host_tags: Mapping[HostName, Iterable[tuple[TagGroupID, TagID]]],
+        host_paths: Mapping[HostName, str],
+    ) -> None:
+        self._hosts = list(hosts)
+        self._index: dict[str, int] = {host_name: idx for idx, host_name in enumerate(self._hosts)}
+        self.all = (1 << len(self._hosts)) - 1
+
+        hosts_by_tag: dict[tuple[TagGroupID, TagID], list[int]] = {}
+        hosts_by_path: dict[str, list[int]] = {}
+        for idx, host_name in enumerate(self._hosts):
+            for tag in host_tags[host_name]:
+                hosts_by_tag.setdefault(tag, []).append(idx)
+            hosts_by_path.setdefault(host_paths.get(host_name, "/"), []).append(idx)
+        self._tags = {tag: self._bits(indexes) for tag, indexes in hosts_by_tag.items()}
+        self._paths = {path: self._bits(indexes) for path, indexes in hosts_by_path.items()}
+        self._folders: dict[str, int] = {}
+
+        self._labelled = 0
+        self._hosts_by_label: dict[tuple[str, str], list[int]] = {}
+        # Only the labels used in conditions: There may be a label for every single host
+        self._labels: dict[tuple[str, str], int] = {}
+
+    def _bits(self, indexes: Sequence[int]) -> int:
+        if len(indexes) < _SPARSE:
+            bits = 0
+            for idx in indexes:
+                bits |= 1 << idx
+            return bits
+        flags = bytearray(len(self._hosts))
+        for idx in indexes:
+            flags[idx] = 1
+        return int(flags[::-1].translate(_BIT_DIGITS), 2)
+
+    def of_hosts(self, host_names: Iterable[str]) -> int:
+        return self._bits(
+            [idx for host_name in host_names if (idx := self._index.get(host_name)) is not None]
+        )
+
+    def hosts(self, bits: int) -> set[HostName]:
+        if bits.bit_count() < _SPARSE:
+            hosts = set()
+            while bits:
+                hosts.add(self._hosts[(idx := bits.bit_length() - 1)])
+                bits ^= 1 << idx
+            return hosts
+        return set(compress(self._hosts, format(bits, "b")[::-1].encode().translate(_BIT_FLAGS)))
+
+    def in_folder(self, folder_path: str) -> int:
+        try:
+            return self._folders[folder_path]
+        except KeyError:
+            pass
+        bits = 0
+        for path, hosts in self._paths.items():
+            if path.startswith(folder_path):
+                bits |= hosts
+        return self._folders.setdefault(folder_path, bits)
+
+    def matching_tags(
+        self, tag_conditions: Mapping[TagGroupID, TagCondition], candidates: int
+    ) -> int:
+        for taggroup_id, tag_condition in tag_conditions.items():
+            candidates &= self._matching_tag(taggroup_id, tag_condition)
+        return candidates
+
+    def _matching_tag(self, taggroup_id: TagGroupID, tag_condition: TagCondition) -> int:
+        if isinstance(tag_condition, dict):
+            if "$ne" in tag_condition:
+                return self.all & ~self._with_tag(
+                    taggroup_id, cast(TagConditionNE, tag_condition)["$ne"]
+                )
+
+            if "$or" in tag_condition:
+                return self._with_any_tag(taggroup_id, cast(TagConditionOR, tag_condition)["$or"])
+
+            if "$nor" in tag_condition:
+                return self.all & ~self._with_any_tag(taggroup_id, tag_condition["$nor"])
+
+            raise NotImplementedError()
+
+        return self._with_tag(taggroup_id, tag_condition)
+
+    def _with_tag(self, taggroup_id: TagGroupID, tag_id: TagID | None) -> int:
+        return 0 if tag_id is None else self._tags.get((taggroup_id, tag_id), 0)
+
+    def _with_any_tag(self, taggroup_id: TagGroupID, tag_ids: Iterable[TagID | None]) -> int:
+        bits = 0
+        for tag_id in tag_ids:
+            bits |= self._with_tag(taggroup_id, tag_id)
+        return bits
+
+    def matching_host_name(self, host_conditions: HostOrServiceConditions, candidates: int) -> int:
+        """Same as `matches_host_name` for all candidates"""
+        negate, host_entries = parse_negated_condition_list(host_conditions)
+        matching = candidates & self.of_hosts(
+            entry for entry in host_entries if not isinstance(entry, dict)
+        )
+        if patterns := [
+            regex(entry["$regex"]) for entry in host_entries if isinstance(entry, dict)
+        ]:
+            matching |= self.of_hosts(
+                host_name
+                for host_name in self.hosts(candidates & ~matching)
+                if any(pattern.match(host_name) is not None for pattern in patterns)
+            )
+        if (generic_agent := self._index.get("")) is not None:
+            matching &= ~(1 << generic_agent)
+        return candidates & ~matching if negate else matching
+
+    def matching_labels(
+        self,
+        label_groups: LabelGroups,
+        candidates: int,
+        labels_of_host: Callable[[HostName], Labels],
+    ) -> int:
+        """Same as `matches_labels` for all candidates"""
+        self._index_labels(candidates, labels_of_host)
+        matching = candidates
+        for group_operator, label_group in label_groups:
+            group_matching = candidates
+            for label_operator, label in label_group:
+                if not label:
+                    continue
+                try:
+                    key, value = label.split(":")
+                except ValueError:
+                    raise NotImplementedError(f"Invalid label condition: {label}")
+                group_matching = _and_or_not_bits(
+                    group_matching, candidates & self._with_label((key, value)), label_operator
+                )
+            matching = _and_or_not_bits(matching, group_matching, group_operator)
+        return matching
+
+    def _index_labels(self, candidates: int, labels_of_host: Callable[[HostName], Labels]) -> None:
+        if not (unlabelled := candidates & ~self._labelled):
+            return
+        added: dict[tuple[str, str], list[int]] = {}
+        for host_name in self.hosts(unlabelled):
+            idx = self._index[host_name]
+            for label in labels_of_host(host_name).items():
+                self._hosts_by_label.setdefault(label, []).append(idx)
+                if label in self._labels:
+                    added.setdefault(label, []).append(idx)
+        for label, indexes in added.items():
+            self._labels[label] |= self._bits(indexes)
+        self._labelled |= unlabelled
+
+    def _with_label(self, label: tuple[str, str]) -> int:
+        try:
+            return self._labels[label]
+        except KeyError:
+            return self._labels.setdefault(label, self._bits(self._hosts_by_label.get(label, [])))
+
+    def clear_labels(self) -> None:
+        self._labelled = 0
+        self._hosts_by_label.clear()
+        self._labels.clear()
+
+
+def _and_or_not_bits(given_bits: int, new_bits: int, operator: AndOrNotLiteral) -> int:
+    match operator:
+        case "and":
+            return given_bits & new_bits
+        case "or":
+            return given_bits | new_bits
+        case "not":
+            return given_bits & ~new_bits
+
+
 class RulesetOptimizer:
     """Performs some precalculations on the configured rulesets to improve the
     processing performance"""
@@ -388,41 +583,31 @@ class RulesetOptimizer:
     ) -> None:
         super().__init__()
         self._ruleset_matcher = ruleset_matcher
-        self._host_tags = {hn: set(tags_of_host.items()) for hn, tags_of_host in host_tags.items()}
-        self._host_paths = host_paths
         self._clusters_of = clusters_of
         self._nodes_of = nodes_of
 
         self._all_configured_hosts = all_configured_hosts
+        self._host_bitsets = _HostBitsets(
+            all_configured_hosts,
+            {hn: tags_of_host.items() for hn, tags_of_host in host_tags.items()},
+            host_paths,
+        )
 
         # Contains all hostnames which are currently relevant for this cache.
         # Every active host or a subset of the active hosts when multiprocessing
         # is enabled.
         self._all_processed_hosts = self._all_configured_hosts
+        self._all_processed_hosts_bits = self._host_bitsets.all
 
-        # A factor which indicates how much hosts share the same host tag configuration (excluding folders).
-        # len(all_processed_hosts) / len(different tag combinations)
-        # It is used to determine the best rule evualation method
-        self._all_processed_hosts_similarity = 1.0
-
-        self.__service_ruleset_cache: dict[
+        self.__service_ruleset_cache: LRUCache[
             tuple[int, bool], Sequence[_PreprocessedServiceRule[Any]]
-        ] = {}
-        self.__host_ruleset_cache: dict[tuple[int, bool], Mapping[HostAddress, Sequence[Any]]] = {}
-        self._all_matching_hosts_match_cache: dict[
+        ] = cache_manager.make_lru_cache("ruleset_optimizer_service_rulesets")
+        self.__host_ruleset_cache: LRUCache[
+            tuple[int, bool], Mapping[HostAddress, Sequence[Any]]
+        ] = cache_manager.make_lru_cache("ruleset_optimizer_host_rulesets")
+        self._all_matching_hosts_match_cache: LRUCache[
             tuple[_ConditionCacheID, bool], set[HostName]
-        ] = {}
-
-        # Reference dirname -> hosts in this dir including subfolders
-        self._folder_host_lookup: dict[tuple[bool, str], set[HostName]] = {}
-
-        # Provides a list of hosts with the same hosttags, excluding the folder
-        self._hosts_grouped_by_tags: dict[tuple[tuple[TagGroupID, TagID], ...], set[HostName]] = {}
-        # Reference hostname -> tag group reference
-        self._host_grouped_ref: dict[HostName, tuple[tuple[TagGroupID, TagID], ...]] = {}
-
-        # TODO: Clean this one up?
-        self._initialize_host_lookup()
+        ] = cache_manager.make_lru_cache("ruleset_optimizer_matching_hosts")
 
     def clear_ruleset_caches(self) -> None:
         self.__host_ruleset_cache.clear()
@@ -431,6 +616,7 @@ class RulesetOptimizer:
     def clear_caches(self) -> None:
         self.__host_ruleset_cache.clear()
         self._all_matching_hosts_match_cache.clear()
+        self._host_bitsets.clear_labels()
 
     def set_all_processed_hosts(self, all_processed_hosts: set[HostName]) -> None:
         involved_clusters: set[HostName] = set()
@@ -448,24 +634,7 @@ class RulesetOptimizer:
         # Only add references to configured hosts
         nodes_and_clusters.intersection_update(self._all_configured_hosts)
         self._all_processed_hosts = frozenset(nodes_and_clusters)
-
-        # The folder host lookup includes a list of all -processed- hosts within a given
-        # folder. Any update with set_all_processed hosts invalidates this cache, because
-        # the scope of relevant hosts has changed. This is -good-, since the values in this
-        # lookup are iterated one by one later on in all_matching_hosts
-        self._folder_host_lookup = {}
-
-        used_groups = {
-            self._host_grouped_ref.get(hostname, ()) for hostname in self._all_processed_hosts
-        }
-
-        if not used_groups:
-            self._all_processed_hosts_similarity = 1.0
-            return
-
-        self._all_processed_hosts_similarity = (
-            1.0 * len(self._all_processed_hosts) / len(used_groups)
-        )
+        self._all_processed_hosts_bits = self._host_bitsets.of_hosts(self._all_processed_hosts)
 
     def get_host_ruleset(
         self,
@@ -606,7 +775,10 @@ class RulesetOptimizer:
             self._all_matching_hosts_computation(
                 # Determine match candidates.
                 # If the rule is located in a folder we only need the hosts in that folder.
-                self._get_hosts_within_folder(rule_path, with_foreign_hosts),
+                self._host_bitsets.in_folder(rule_path)
+                & (
+                    self._host_bitsets.all if with_foreign_hosts else self._all_processed_hosts_bits
+                ),
                 host_conditions,
                 tag_conditions,
                 label_conditions,
@@ -616,67 +788,25 @@ class RulesetOptimizer:
 
     def _all_matching_hosts_computation(
         self,
-        hosts_in_rule_scope: set[HostName],
+        hosts_in_rule_scope: int,
         host_conditions: HostOrServiceConditions | None,
         tag_conditions: Mapping[TagGroupID, TagCondition],
         label_conditions: LabelGroups,
         labels_of_host: Callable[[HostName], Labels],
     ) -> set[HostName]:
-        if tag_conditions and host_conditions is None and not label_conditions:
-            # TODO: Labels could also be optimized like the tags
-            matched_by_tags = self._match_hosts_by_tags(hosts_in_rule_scope, tag_conditions)
-            if matched_by_tags is not None:
-                return matched_by_tags
-
-        only_specific_hosts = (
-            host_conditions is not None
-            and not isinstance(host_conditions, dict)
-            and all(not isinstance(x, dict) for x in host_conditions)
-        )
-
         if host_conditions == []:
             return set()  # Empty host list -> Nothing matches
 
-        if not tag_conditions and not label_conditions and not host_conditions:
-            # If no tags are specified and the hostlist only include @all (all hosts)
-            return hosts_in_rule_scope
-
-        if (
-            not tag_conditions
-            and not label_conditions
-            and only_specific_hosts
-            and host_conditions is not None
-        ):
-            # If no tags are specified and there are only specific hosts we already have the matches
-            return hosts_in_rule_scope.intersection(host_conditions)
-
-        # If the rule has only exact host restrictions, we can thin out the list of hosts to check
-        if only_specific_hosts and host_conditions is not None:
-            hosts_to_check = hosts_in_rule_scope.intersection(host_conditions)
-        else:
-            hosts_to_check = hosts_in_rule_scope
-
-        matching: set[HostName] = set()
-        for hostname in hosts_to_check:
-            # When no tag matching is requested, do not filter by tags. Accept all hosts
-            # and filter only by hostlist
-            if tag_conditions and not matches_host_tags(
-                self._host_tags[hostname],
-                tag_conditions,
-            ):
-                continue
-
-            if label_conditions:
-                host_labels = labels_of_host(hostname)
-                if not matches_labels(host_labels, label_conditions):
-                    continue
-
-            if not matches_host_name(host_conditions, hostname):
-                continue
-
-            matching.add(hostname)
+        # The cheap conditions first: The labels are only computed for the remaining hosts
+        matching = self._host_bitsets.matching_tags(tag_conditions, hosts_in_rule_scope)
+        if host_conditions:
+            matching = self._host_bitsets.matching_host_name(host_conditions, matching)
+        if label_conditions and matching:
+            matching = self._host_bitsets.matching_labels(
+                label_conditions, matching, labels_of_host
+            )
 
-        return matching
+        return self._host_bitsets.hosts(matching)
 
     @staticmethod
     def _condition_cache_id(
@@ -712,96 +842,6 @@ class RulesetOptimizer:
             rule_path,
         )
 
-    # TODO: Generalize this optimization: Build some kind of key out of the tag conditions
-    # (positive, negative, ...). Make it work with the new tag group based "$or" handling.
-    def _match_hosts_by_tags(
-        self,
-        valid_hosts: set[HostName],
-        tag_conditions: Mapping[TagGroupID, TagCondition],
-    ) -> set[HostName] | None:
-        matching = set()
-        negative_match_tags = set()
-        positive_match_tags = set()
-        for taggroup_id, tag_condition in tag_conditions.items():
-            if isinstance(tag_condition, dict):
-                if "$ne" in tag_condition:
-                    negative_match_tags.add(
-                        (
-                            taggroup_id,
-                            cast(TagConditionNE, tag_condition)["$ne"],
-                        )
-                    )
-                    continue
-
-                if "$or" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
-
-                if "$nor" in tag_condition:
-                    return None  # Can not be optimized, makes _all_matching_hosts proceed
-
-                raise NotImplementedError()
-
-            positive_match_tags.add((taggroup_id, tag_condition))
-
-        # TODO:
-        # if has_specific_folder_tag or self._all_processed_hosts_similarity < 3.0:
-        if self._all_processed_hosts_similarity < 3.0:
-            # Without shared folders
-            for hostname in valid_hosts:
-                if positive_match_tags <= self._host_tags[
-                    hostname
-                ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                    matching.add(hostname)
-
-            return matching
-
-        # With shared folders
-        checked_hosts: set[str] = set()
-        for hostname in valid_hosts:
-            if hostname in checked_hosts:
-                continue
-
-            hosts_with_same_tag = self._filter_hosts_with_same_tags_as_host(hostname, valid_hosts)
-            checked_hosts.update(hosts_with_same_tag)
-
-            if positive_match_tags <= self._host_tags[
-                hostname
-            ] and not negative_match_tags.intersection(self._host_tags[hostname]):
-                matching.update(hosts_with_same_tag)
-
-        return matching
-
-    def _filter_hosts_with_same_tags_as_host(
-        self,
-        hostname: HostName,
-        hosts: set[HostName],
-    ) -> set[HostName]:
-        return self._hosts_grouped_by_tags[self._host_grouped_ref[hostname]].intersection(hosts)
-
-    def _get_hosts_within_folder(self, folder_path: str, with_foreign_hosts: bool) -> set[HostName]:
-        cache_id = with_foreign_hosts, folder_path
-        if cache_id not in self._folder_host_lookup:
-            hosts_in_folder = set()
-            relevant_hosts = (
-                self._all_configured_hosts if with_foreign_hosts else self._all_processed_hosts
-            )
-
-            for hostname in relevant_hosts:
-                host_path = self._host_paths.get(hostname, "/")
-                if host_path.startswith(folder_path):
-                    hosts_in_folder.add(hostname)
-
-            self._folder_host_lookup[cache_id] = hosts_in_folder
-            return hosts_in_folder
-
-        return self._folder_host_lookup[cache_id]
-
-    def _initialize_host_lookup(self) -> None:
-        for hostname in self._all_configured_hosts:
-            group_ref = tuple(sorted(self._host_tags[hostname]))
-            self._hosts_grouped_by_tags.setdefault(group_ref, set()).add(hostname)
-            self._host_grouped_ref[hostname] = group_ref
-
 
 def _tags_cache_id(tag_or_label_spec: object) -> object:
     if isinstance(tag_or_label_spec, dict):
@@ -15,11 +15,12 @@ import io
 import json
 import os
 import pprint
+import sys
 from collections import Counter
-from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from collections.abc import Callable, Container, Iterable, Iterator, Mapping, Sequence
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Generic, Literal, NewType, Self, TypedDict, TypeVar
+from typing import Generic, Literal, NewType, NotRequired, Self, TypedDict, TypeVar
 
 from cmk.ccc import store
 from cmk.ccc.exceptions import MKGeneralException
@@ -43,6 +44,7 @@ from cmk.ccc.resulttype import Error, OK, Result
 # TODO Centralize different stores and loaders of tree files:
 #   - inventory/HOSTNAME, inventory/HOSTNAME.gz, inventory/.last
 #   - inventory_archive/HOSTNAME/TIMESTAMP,
+#   - inventory_archive/HOSTNAME/delta/{index.json,records.GENERATION}
 #   - inventory_delta_cache/HOSTNAME/TIMESTAMP_{TIMESTAMP,None}
 #   - status_data/HOSTNAME, status_data/HOSTNAME.gz
 
@@ -134,7 +136,7 @@ class RawIntervalFromConfig(_RawIntervalFromConfigMandatory, total=False):
     columns: Literal["all"] | tuple[str, list[str]]
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class RetentionInterval:
     cached_at: int
     cache_interval: int
@@ -307,7 +309,9 @@ _VT_co = TypeVar("_VT_co", covariant=True)
 def _get_filtered_dict(
     mapping: Mapping[SDKey, _VT_co], filter_func: Callable[[SDKey], bool]
 ) -> Mapping[SDKey, _VT_co]:
-    return {k: v for k, v in mapping.items() if filter_func(k)}
+    filtered = {k: v for k, v in mapping.items() if filter_func(k)}
+    # Share unchanged mappings instead of copies
+    return mapping if len(filtered) == len(mapping) else filtered
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -532,9 +536,29 @@ def _deserialize_retention_interval(
     )
 
 
-def _deserialize_attributes(raw_attributes: SDRawAttributes) -> ImmutableAttributes:
+class _Interner:
+    """Share equal strings of deserialized trees instead of holding copies
+
+    Keys and node names are interned globally, there are only a few of them. Interned
+    strings are never freed, so string values are only shared within one tree.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[str, str] = {}
+
+    def mapping(self, mapping: Mapping[SDKey, SDValue]) -> dict[SDKey, SDValue]:
+        values = self._values
+        return {
+            SDKey(sys.intern(k)): values.setdefault(v, v) if type(v) is str else v
+            for k, v in mapping.items()
+        }
+
+
+def _deserialize_attributes(
+    raw_attributes: SDRawAttributes, interner: _Interner
+) -> ImmutableAttributes:
     return ImmutableAttributes(
-        pairs=raw_attributes.get("Pairs", {}),
+        pairs=interner.mapping(raw_attributes.get("Pairs", {})),
         retentions={
             key: _deserialize_retention_interval(raw_retention_interval)
             for key, raw_retention_interval in raw_attributes.get("Retentions", {}).items()
@@ -542,16 +566,21 @@ def _deserialize_attributes(raw_attributes: SDRawAttributes) -> ImmutableAttribu
     )
 
 
-def _deserialize_table(raw_table: SDRawTable) -> ImmutableTable:
+def _deserialize_table(raw_table: SDRawTable, interner: _Interner) -> ImmutableTable:
     rows = raw_table.get("Rows", [])
     key_columns = raw_table.get("KeyColumns", [])
 
     rows_by_ident: dict[SDRowIdent, dict[SDKey, SDValue]] = {}
-    for row in rows:
-        rows_by_ident.setdefault(_make_row_ident(key_columns, row), {}).update(row)
+    for raw_row in rows:
+        # The row identifiers refer to the shared values of the row
+        row = interner.mapping(raw_row)
+        if (ident := _make_row_ident(key_columns, row)) in rows_by_ident:
+            rows_by_ident[ident].update(row)
+        else:
+            rows_by_ident[ident] = row
 
     return ImmutableTable(
-        key_columns=key_columns,
+        key_columns=[SDKey(sys.intern(k)) for k in key_columns],
         rows_by_ident=rows_by_ident,
         retentions={
             ident: {
@@ -569,19 +598,21 @@ def _deserialize_tree(
     raw_attributes: SDRawAttributes,
     raw_table: SDRawTable,
     raw_nodes: Mapping[SDNodeName, SDRawTree],
+    interner: _Interner,
 ) -> ImmutableTree:
     return ImmutableTree(
         path=path,
-        attributes=_deserialize_attributes(raw_attributes),
-        table=_deserialize_table(raw_table),
+        attributes=_deserialize_attributes(raw_attributes, interner),
+        table=_deserialize_table(raw_table, interner),
         nodes_by_name={
-            name: _deserialize_tree(
+            (name := SDNodeName(sys.intern(raw_name))): _deserialize_tree(
                 path=path + (name,),
                 raw_attributes=raw_node["Attributes"],
                 raw_table=raw_node["Table"],
                 raw_nodes=raw_node["Nodes"],
+                interner=interner,
             )
-            for name, raw_node in raw_nodes.items()
+            for raw_name, raw_node in raw_nodes.items()
         },
     )
 
@@ -600,6 +631,7 @@ def deserialize_tree(raw_tree: object) -> ImmutableTree:
         raw_attributes=raw_attributes,
         raw_table=raw_table,
         raw_nodes=raw_nodes,
+        interner=_Interner(),
     )
 
 
@@ -776,20 +808,8 @@ class _MutableTable:
         if not isinstance(other, _MutableTable | ImmutableTable):
             return NotImplemented
 
-        compared_row_idents = _DictKeys.compare(
-            left=set(self.rows_by_ident),
-            right=set(other.rows_by_ident),
-        )
-
-        if compared_row_idents.only_left:
-            return False
-
-        if compared_row_idents.only_right:
-            return False
-
-        return all(
-            self.rows_by_ident[i] == other.rows_by_ident[i] for i in compared_row_idents.both
-        )
+        # Same row identifiers with equal rows
+        return self.rows_by_ident == other.rows_by_ident
 
     def _add_key_columns(self, key_columns: Iterable[SDKey]) -> None:
         self.key_columns = sorted(set(self.key_columns).union(key_columns))
@@ -924,6 +944,9 @@ class MutableTree:
         if not isinstance(other, MutableTree | ImmutableTree):
             return NotImplemented
 
+        if self is other:
+            return True
+
         if self.attributes != other.attributes or self.table != other.table:
             return False
 
@@ -1040,46 +1063,68 @@ class MutableTree:
 #   '----------------------------------------------------------------------'
 
 
+# The filter functions return the unchanged parts of the tree itself, not copies: Filtered
+# trees share these with the original one.
+
+
 def _filter_attributes(
     attributes: ImmutableAttributes, filter_tree: _FilterTree
 ) -> ImmutableAttributes:
-    return ImmutableAttributes(
-        pairs=filter_tree.filter_pairs(attributes.pairs),
-        retentions=attributes.retentions,
-    )
+    if (pairs := filter_tree.filter_pairs(attributes.pairs)) is attributes.pairs:
+        return attributes
+    return ImmutableAttributes(pairs=pairs, retentions=attributes.retentions)
 
 
 def _filter_table(table: ImmutableTable, filter_tree: _FilterTree) -> ImmutableTable:
+    rows_by_ident = {
+        ident: filtered_row
+        for ident, row in table.rows_by_ident.items()
+        if (filtered_row := filter_tree.filter_row(row))
+    }
+    if len(rows_by_ident) == len(table.rows_by_ident) and all(
+        rows_by_ident[i] is r for i, r in table.rows_by_ident.items()
+    ):
+        return table
     return ImmutableTable(
         key_columns=table.key_columns,
-        rows_by_ident={
-            ident: filtered_row
-            for ident, row in table.rows_by_ident.items()
-            if (filtered_row := filter_tree.filter_row(row))
-        },
+        rows_by_ident=rows_by_ident,
         retentions=table.retentions,
     )
 
 
 def _filter_tree(tree: ImmutableTree, filter_tree: _FilterTree) -> ImmutableTree:
+    attributes = _filter_attributes(tree.attributes, filter_tree)
+    table = _filter_table(tree.table, filter_tree)
+    nodes_by_name = {
+        name: filtered_node
+        for name in filter_tree.filter_node_names(set(tree.nodes_by_name))
+        if (
+            filtered_node := _filter_tree(
+                tree.nodes_by_name.get(name, ImmutableTree(path=tree.path + (name,))),
+                filter_tree.filters_by_name.get(name, _FilterTree()),
+            )
+        )
+    }
+    if (
+        attributes is tree.attributes
+        and table is tree.table
+        and len(nodes_by_name) == len(tree.nodes_by_name)
+        and all(tree.nodes_by_name.get(n) is node for n, node in nodes_by_name.items())
+    ):
+        return tree
     return ImmutableTree(
         path=tree.path,
-        attributes=_filter_attributes(tree.attributes, filter_tree),
-        table=_filter_table(tree.table, filter_tree),
-        nodes_by_name={
-            name: filtered_node
-            for name in filter_tree.filter_node_names(set(tree.nodes_by_name))
-            if (
-                filtered_node := _filter_tree(
-                    tree.nodes_by_name.get(name, ImmutableTree(path=tree.path + (name,))),
-                    filter_tree.filters_by_name.get(name, _FilterTree()),
-                )
-            )
-        },
+        attributes=attributes,
+        table=table,
+        nodes_by_name=nodes_by_name,
     )
 
 
 def _merge_attributes(left: ImmutableAttributes, right: ImmutableAttributes) -> ImmutableAttributes:
+    if not (right.pairs or right.retentions):
+        return left
+    if not (left.pairs or left.retentions):
+        return right
     return ImmutableAttributes(
         pairs={**left.pairs, **right.pairs},
         retentions={**left.retentions, **right.retentions},
@@ -1117,7 +1162,19 @@ def _merge_tables_by_same_or_empty_key_columns(
     )
 
 
+def _is_empty_table(table: ImmutableTable, key_columns: Sequence[SDKey]) -> bool:
+    return not (table.rows_by_ident or table.retentions) and (
+        not table.key_columns or table.key_columns == key_columns
+    )
+
+
 def _merge_tables(left: ImmutableTable, right: ImmutableTable) -> ImmutableTable:
+    if _is_empty_table(right, left.key_columns):
+        return left
+
+    if _is_empty_table(left, right.key_columns):
+        return right
+
     if left.key_columns and not right.key_columns:
         return _merge_tables_by_same_or_empty_key_columns(left.key_columns, left, right)
 
@@ -1141,6 +1198,11 @@ def _merge_tables(left: ImmutableTable, right: ImmutableTable) -> ImmutableTable
 
 
 def _merge_nodes(left: ImmutableTree, right: ImmutableTree) -> ImmutableTree:
+    if not (
+        right.nodes_by_name or right.attributes.pairs or right.attributes.retentions
+    ) and _is_empty_table(right.table, left.table.key_columns):
+        return left
+
     compared_node_names = _DictKeys.compare(
         left=set(left.nodes_by_name),
         right=set(right.nodes_by_name),
@@ -1166,7 +1228,7 @@ def _merge_nodes(left: ImmutableTree, right: ImmutableTree) -> ImmutableTree:
     )
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class SDDeltaValue:
     old: SDValue
     new: SDValue
@@ -1299,7 +1361,7 @@ def _compare_trees(left: ImmutableTree, right: ImmutableTree) -> ImmutableDeltaT
     )
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ImmutableAttributes:
     pairs: Mapping[SDKey, SDValue] = field(default_factory=dict)
     retentions: Mapping[SDKey, RetentionInterval] = field(default_factory=dict)
@@ -1323,7 +1385,7 @@ class ImmutableAttributes:
         }
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ImmutableTable:
     key_columns: Sequence[SDKey] = field(default_factory=list)
     rows_by_ident: Mapping[SDRowIdent, Mapping[SDKey, SDValue]] = field(default_factory=dict)
@@ -1338,20 +1400,8 @@ class ImmutableTable:
         if not isinstance(other, _MutableTable | ImmutableTable):
             return NotImplemented
 
-        compared_row_idents = _DictKeys.compare(
-            left=set(self.rows_by_ident),
-            right=set(other.rows_by_ident),
-        )
-
-        if compared_row_idents.only_left:
-            return False
-
-        if compared_row_idents.only_right:
-            return False
-
-        return all(
-            self.rows_by_ident[i] == other.rows_by_ident[i] for i in compared_row_idents.both
-        )
+        # Same row identifiers with equal rows
+        return self.rows_by_ident == other.rows_by_ident
 
     @property
     def rows(self) -> Sequence[Mapping[SDKey, SDValue]]:
@@ -1379,7 +1429,7 @@ class ImmutableTable:
         }
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ImmutableTree:
     path: SDPath = ()
     attributes: ImmutableAttributes = ImmutableAttributes()
@@ -1396,6 +1446,9 @@ class ImmutableTree:
         if not isinstance(other, MutableTree | ImmutableTree):
             return NotImplemented
 
+        if self is other:
+            return True
+
         if self.attributes != other.attributes or self.table != other.table:
             return False
 
@@ -1519,7 +1572,7 @@ def _compute_delta_stats(dict_: Mapping[SDKey, SDDeltaValue]) -> SDDeltaCounter:
     return counter
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ImmutableDeltaAttributes:
     pairs: Mapping[SDKey, SDDeltaValue] = field(default_factory=dict)
 
@@ -1541,7 +1594,7 @@ class ImmutableDeltaAttributes:
         return {"Pairs": {k: _serialize_delta_value(v) for k, v in self.pairs.items()}}
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ImmutableDeltaTable:
     key_columns: Sequence[SDKey] = field(default_factory=list)
     rows: Sequence[Mapping[SDKey, SDDeltaValue]] = field(default_factory=list)
@@ -1571,7 +1624,7 @@ class ImmutableDeltaTable:
         }
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class ImmutableDeltaTree:
     path: SDPath = ()
     attributes: ImmutableDeltaAttributes = ImmutableDeltaAttributes()
@@ -1778,6 +1831,15 @@ class InventoryPaths:
             legacy=self.archive_host(host_name) / str(timestamp),
         )
 
+    def delta_archive_host(self, host_name: HostName) -> Path:
+        return self.archive_host(host_name) / "delta"
+
+    def delta_archive_index(self, host_name: HostName) -> Path:
+        return self.delta_archive_host(host_name) / "index.json"
+
+    def delta_archive_records(self, host_name: HostName, generation: int) -> Path:
+        return self.delta_archive_host(host_name) / f"records.{generation}"
+
     def delta_cache_host(self, host_name: HostName) -> Path:
         return self.delta_cache_dir / str(host_name)
 
@@ -1817,12 +1879,12 @@ def _save_raw_tree_gz(tree_path_gz: TreePathGz, meta_and_raw_tree: SDMetaAndRawT
     store.save_bytes_to_file(tree_path_gz.path, buf.getvalue())
 
 
-def _archive_inventory_tree(inv_paths: InventoryPaths, host_name: HostName) -> None:
+def _archive_inventory_tree(
+    inv_paths: InventoryPaths, delta_archive: DeltaArchive, host_name: HostName
+) -> None:
     tree_path = inv_paths.inventory_tree(host_name)
-    is_json = False
     try:
         mtime = tree_path.stat().st_mtime
-        is_json = True
     except FileNotFoundError:
         # TODO CMK-23408
         try:
@@ -1830,22 +1892,15 @@ def _archive_inventory_tree(inv_paths: InventoryPaths, host_name: HostName) -> N
         except FileNotFoundError:
             return
 
-    tree_path_gz = inv_paths.inventory_tree_gz(host_name)
-    archive_tree_path = inv_paths.archive_tree(host_name, int(mtime))
-
-    if is_json:
-        archive_tree_path.parent.mkdir(parents=True, exist_ok=True)
-        tree_path.rename(archive_tree_path)
-        tree_path_gz.unlink(missing_ok=True)
-        tree_path.legacy.unlink(missing_ok=True)
-        tree_path_gz.legacy.unlink(missing_ok=True)
-        return
+    delta_archive.append(
+        host_name=host_name, timestamp=int(mtime), tree=_load_tree_from_tree_path(tree_path)
+    )
 
-    if raw_tree := store.load_object_from_file(tree_path.legacy, default=None):
-        archive_tree_path.parent.mkdir(parents=True, exist_ok=True)
-        store.save_text_to_file(archive_tree_path.path, json.dumps(raw_tree))
-        tree_path.legacy.unlink(missing_ok=True)
-        tree_path_gz.legacy.unlink(missing_ok=True)
+    tree_path_gz = inv_paths.inventory_tree_gz(host_name)
+    tree_path.unlink(missing_ok=True)
+    tree_path.legacy.unlink(missing_ok=True)
+    tree_path_gz.unlink(missing_ok=True)
+    tree_path_gz.legacy.unlink(missing_ok=True)
 
 
 def make_meta(*, do_archive: bool) -> SDMeta:
@@ -1925,6 +1980,7 @@ def parse_from_raw_status_data_tree(dump: bytes) -> ImmutableTree:
 class RawInventoryStore:
     def __init__(self, omd_root: Path) -> None:
         self.inv_paths = InventoryPaths(omd_root)
+        self.delta_archive = DeltaArchive(omd_root)
 
     def save_meta_and_raw_inventory_tree(
         self, *, host_name: HostName, meta_and_raw_tree: SDMetaAndRawTree, timestamp: int
@@ -1940,7 +1996,7 @@ class RawInventoryStore:
         os.utime(tree_path_gz.path, (timestamp, timestamp))
 
     def archive_inventory_tree(self, *, host_name: HostName) -> None:
-        _archive_inventory_tree(self.inv_paths, host_name)
+        _archive_inventory_tree(self.inv_paths, self.delta_archive, host_name)
 
 
 @dataclass(frozen=True)
@@ -1954,6 +2010,7 @@ class HistoryDeltaPath:
 class HistoryPath:
     tree_path: TreePath
     timestamp: int
+    in_delta_archive: bool = False
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -2012,9 +2069,486 @@ class HistoryEntry:
         )
 
 
+# The complete content of a node is stored again after this many deltas
+_DELTA_ARCHIVE_SNAPSHOT_INTERVAL = 16
+
+_DELTA_ARCHIVE_VERSION: Literal["1"] = "1"
+
+_DeltaArchiveRecordKind = Literal["node", "delta", "removed"]
+
+_SDRawArchiveRetentions = Mapping[SDKey, tuple[int, int, int, Literal["previous", "current"]]]
+_SDRawArchiveRow = tuple[Sequence[SDValue], Mapping[SDKey, SDValue], _SDRawArchiveRetentions]
+
+
+class _SDRawArchiveNode(TypedDict):
+    Attributes: SDRawAttributes
+    KeyColumns: Sequence[SDKey]
+    Rows: Sequence[_SDRawArchiveRow]
+
+
+class _SDRawArchiveDelta(TypedDict):
+    Pairs: Mapping[SDKey, SDValue]
+    RemovedKeys: Sequence[SDKey]
+    Retentions: NotRequired[_SDRawArchiveRetentions]
+    Rows: Sequence[_SDRawArchiveRow]
+    RemovedRows: Sequence[Sequence[SDValue]]
+
+
+@dataclass(frozen=True)
+class _DeltaArchiveRecord:
+    step: int
+    kind: _DeltaArchiveRecordKind
+    offset: int
+    length: int
+
+
+@dataclass(frozen=True, kw_only=True)
+class _DeltaArchiveIndex:
+    generation: int = 0
+    size: int = 0
+    timestamps: Sequence[int] = ()
+    records_by_path: Mapping[SDPath, Sequence[_DeltaArchiveRecord]] = field(default_factory=dict)
+
+
+def _serialize_delta_archive_index(index: _DeltaArchiveIndex) -> Mapping[str, object]:
+    return {
+        "Version": _DELTA_ARCHIVE_VERSION,
+        "Generation": index.generation,
+        "Size": index.size,
+        "Timestamps": list(index.timestamps),
+        "Nodes": [
+            [list(path), [[r.step, r.kind, r.offset, r.length] for r in records]]
+            for path, records in index.records_by_path.items()
+        ],
+    }
+
+
+def _deserialize_delta_archive_index(raw_index: Mapping) -> _DeltaArchiveIndex:
+    if raw_index.get("Version") != _DELTA_ARCHIVE_VERSION:
+        raise MKGeneralException(f"Unknown version of delta archive: {raw_index.get('Version')}")
+    return _DeltaArchiveIndex(
+        generation=raw_index["Generation"],
+        size=raw_index["Size"],
+        timestamps=raw_index["Timestamps"],
+        records_by_path={
+            tuple(SDNodeName(n) for n in raw_path): [_DeltaArchiveRecord(*r) for r in raw_records]
+            for raw_path, raw_records in raw_index["Nodes"]
+        },
+    )
+
+
+def _iter_archive_nodes(tree: ImmutableTree, path: SDPath = ()) -> Iterator[ImmutableTree]:
+    # Only nodes with attributes or table are archived, the others result from the paths.
+    if tree.attributes or tree.table:
+        yield ImmutableTree(path=path, attributes=tree.attributes, table=tree.table)
+    for name, node in tree.nodes_by_name.items():
+        yield from _iter_archive_nodes(node, path + (name,))
+
+
+def _build_archive_tree(
+    path: SDPath,
+    nodes: Mapping[SDPath, ImmutableTree],
+    names_by_path: Mapping[SDPath, Sequence[SDNodeName]],
+) -> ImmutableTree:
+    node = nodes.get(path, ImmutableTree(path=path))
+    return ImmutableTree(
+        path=path,
+        attributes=node.attributes,
+        table=node.table,
+        nodes_by_name={
+            name: _build_archive_tree(path + (name,), nodes, names_by_path)
+            for name in names_by_path.get(path, [])
+        },
+    )
+
+
+def _make_archive_tree(nodes: Mapping[SDPath, ImmutableTree]) -> ImmutableTree:
+    names_by_path: dict[SDPath, set[SDNodeName]] = {}
+    for path in nodes:
+        for depth, name in enumerate(path):
+            names_by_path.setdefault(path[:depth], set()).add(name)
+    return _build_archive_tree(
+        (), nodes, {path: sorted(names) for path, names in names_by_path.items()}
+    )
+
+
+def _encode_archive_rows(
+    table: ImmutableTable, idents: Iterable[SDRowIdent]
+) -> Sequence[_SDRawArchiveRow]:
+    return [
+        (
+            list(ident),
+            table.rows_by_ident[ident],
+            {
+                k: _serialize_retention_interval(v)
+                for k, v in table.retentions.get(ident, {}).items()
+            },
+        )
+        for ident in idents
+    ]
+
+
+def _encode_archive_node(node: ImmutableTree) -> _SDRawArchiveNode:
+    return {
+        "Attributes": _serialize_attributes(node.attributes),
+        "KeyColumns": list(node.table.key_columns),
+        "Rows": _encode_archive_rows(node.table, node.table.rows_by_ident),
+    }
+
+
+def _encode_archive_delta(
+    previous: ImmutableTree, current: ImmutableTree
+) -> _SDRawArchiveDelta | None:
+    # Rows are identified by the key columns, a change of these needs the complete node.
+    if list(previous.table.key_columns) != list(current.table.key_columns):
+        return None
+
+    previous_pairs = previous.attributes.pairs
+    current_pairs = current.attributes.pairs
+    previous_rows = previous.table.rows_by_ident
+    current_rows = current.table.rows_by_ident
+    delta = _SDRawArchiveDelta(
+        Pairs={
+            k: v
+            for k, v in current_pairs.items()
+            if k not in previous_pairs or previous_pairs[k] != v
+        },
+        RemovedKeys=[k for k in previous_pairs if k not in current_pairs],
+        Rows=_encode_archive_rows(
+            current.table,
+            [
+                ident
+                for ident, row in current_rows.items()
+                if ident not in previous_rows
+                or previous_rows[ident] != row
+                or previous.table.retentions.get(ident, {})
+                != current.table.retentions.get(ident, {})
+            ],
+        ),
+        RemovedRows=[list(ident) for ident in previous_rows if ident not in current_rows],
+    )
+    if previous.attributes.retentions != current.attributes.retentions:
+        delta["Retentions"] = {
+            k: _serialize_retention_interval(v) for k, v in current.attributes.retentions.items()
+        }
+    return delta
+
+
+def _decode_archive_rows(
+    raw_rows: Sequence[_SDRawArchiveRow],
+) -> Iterator[tuple[SDRowIdent, Mapping[SDKey, SDValue], Mapping[SDKey, RetentionInterval]]]:
+    for raw_ident, row, raw_retentions in raw_rows:
+        yield (
+            tuple(raw_ident),
+            row,
+            {k: _deserialize_retention_interval(v) for k, v in raw_retentions.items()},
+        )
+
+
+def _decode_archive_node(path: SDPath, raw_node: _SDRawArchiveNode) -> ImmutableTree:
+    rows_by_ident: dict[SDRowIdent, Mapping[SDKey, SDValue]] = {}
+    retentions: dict[SDRowIdent, Mapping[SDKey, RetentionInterval]] = {}
+    for ident, row, row_retentions in _decode_archive_rows(raw_node["Rows"]):
+        rows_by_ident[ident] = row
+        if row_retentions:
+            retentions[ident] = row_retentions
+    return ImmutableTree(
+        path=path,
+        attributes=_deserialize_attributes(raw_node["Attributes"], _Interner()),
+        table=ImmutableTable(
+            key_columns=raw_node["KeyColumns"],
+            rows_by_ident=rows_by_ident,
+            retentions=retentions,
+        ),
+    )
+
+
+def _apply_archive_delta(node: ImmutableTree, raw_delta: _SDRawArchiveDelta) -> ImmutableTree:
+    removed_keys = set(raw_delta["RemovedKeys"])
+    removed_rows = {tuple(raw_ident) for raw_ident in raw_delta["RemovedRows"]}
+    rows_by_ident = {i: r for i, r in node.table.rows_by_ident.items() if i not in removed_rows}
+    retentions = {i: r for i, r in node.table.retentions.items() if i not in removed_rows}
+    for ident, row, row_retentions in _decode_archive_rows(raw_delta["Rows"]):
+        rows_by_ident[ident] = row
+        if row_retentions:
+            retentions[ident] = row_retentions
+        else:
+            retentions.pop(ident, None)
+    return ImmutableTree(
+        path=node.path,
+        attributes=ImmutableAttributes(
+            pairs={
+                **{k: v for k, v in node.attributes.pairs.items() if k not in removed_keys},
+                **raw_delta["Pairs"],
+            },
+            retentions=(
+                {k: _deserialize_retention_interval(v) for k, v in raw_retentions.items()}
+                if (raw_retentions := raw_delta.get("Retentions")) is not None
+                else node.attributes.retentions
+            ),
+        ),
+        table=ImmutableTable(
+            key_columns=node.table.key_columns,
+            rows_by_ident=rows_by_ident,
+            retentions=retentions,
+        ),
+    )
+
+
+def _read_archive_record(
+    fd: int, path: SDPath, record: _DeltaArchiveRecord, node: ImmutableTree | None
+) -> ImmutableTree | None:
+    match record.kind:
+        case "removed":
+            return None
+        case "node":
+            return _decode_archive_node(
+                path, json.loads(os.pread(fd, record.length, record.offset))
+            )
+        case "delta":
+            if node is None:
+                raise MKGeneralException(f"Missing node of delta in archive: {path!r}")
+            return _apply_archive_delta(
+                node, json.loads(os.pread(fd, record.length, record.offset))
+            )
+
+
+def _restore_archive_node(
+    fd: int, path: SDPath, records: Sequence[_DeltaArchiveRecord], step: int
+) -> ImmutableTree | None:
+    records = [r for r in records if r.step <= step]
+    # Start from the latest complete node, ie. read at most the deltas up to the next snapshot.
+    start = max((i for i, r in enumerate(records) if r.kind != "delta"), default=0)
+    node: ImmutableTree | None = None
+    for record in records[start:]:
+        node = _read_archive_record(fd, path, record, node)
+    return node
+
+
+class _DeltaArchiveWriter:
+    def __init__(self, index: _DeltaArchiveIndex, latest: Iterable[ImmutableTree]) -> None:
+        self.generation = index.generation
+        self.size = index.size
+        self.timestamps = list(index.timestamps)
+        self.records_by_path = {
+            path: list(records) for path, records in index.records_by_path.items()
+        }
+        self.data = io.BytesIO()
+        self._latest = {node.path: node for node in latest}
+
+    @property
+    def index(self) -> _DeltaArchiveIndex:
+        return _DeltaArchiveIndex(
+            generation=self.generation,
+            size=self.size,
+            timestamps=self.timestamps,
+            records_by_path=self.records_by_path,
+        )
+
+    def add(self, timestamp: int, tree: ImmutableTree) -> None:
+        step = len(self.timestamps)
+        self.timestamps.append(timestamp)
+        nodes = {node.path: node for node in _iter_archive_nodes(tree)}
+
+        for path in [p for p in self._latest if p not in nodes]:
+            del self._latest[path]
+            self._write(path, step, "removed", None)
+
+        for path, current in nodes.items():
+            previous = self._latest.get(path)
+            delta = None if previous is None else _encode_archive_delta(previous, current)
+            if delta is not None and not any(delta.values()):
+                continue
+            if delta is None or (
+                self._deltas_since_snapshot(path) >= _DELTA_ARCHIVE_SNAPSHOT_INTERVAL
+            ):
+                self._write(path, step, "node", _encode_archive_node(current))
+            else:
+                self._write(path, step, "delta", delta)
+            self._latest[path] = current
+
+    def _deltas_since_snapshot(self, path: SDPath) -> int:
+        count = 0
+        for record in reversed(self.records_by_path.get(path, [])):
+            if record.kind != "delta":
+                break
+            count += 1
+        return count
+
+    def _write(
+        self,
+        path: SDPath,
+        step: int,
+        kind: _DeltaArchiveRecordKind,
+        raw: _SDRawArchiveNode | _SDRawArchiveDelta | None,
+    ) -> None:
+        data = b"" if raw is None else (json.dumps(raw) + "\n").encode("utf-8")
+        self.records_by_path.setdefault(path, []).append(
+            _DeltaArchiveRecord(step, kind, self.size, len(data))
+        )
+        self.data.write(data)
+        self.size += len(data)
+
+
+class DeltaArchive:
+    """The archived inventory trees of hosts, stored column wise per node
+
+    Every node with attributes or a table has a column of records in an append-only
+    file: its complete content when it shows up (and after every few changes), then
+    the changes only. An index maps the nodes to their records. Restoring a tree
+    needs the records since the last complete content of every node.
+    """
+
+    def __init__(self, omd_root: Path) -> None:
+        self.inv_paths = InventoryPaths(omd_root)
+
+    def _load_index(self, host_name: HostName) -> _DeltaArchiveIndex:
+        if raw_index := store.load_text_from_file(self.inv_paths.delta_archive_index(host_name)):
+            return _deserialize_delta_archive_index(json.loads(raw_index))
+        return _DeltaArchiveIndex()
+
+    def _save_index(self, host_name: HostName, index: _DeltaArchiveIndex) -> None:
+        store.save_text_to_file(
+            self.inv_paths.delta_archive_index(host_name),
+            json.dumps(_serialize_delta_archive_index(index)) + "\n",
+        )
+
+    def _restore_nodes(
+        self, host_name: HostName, index: _DeltaArchiveIndex, step: int
+    ) -> Sequence[ImmutableTree]:
+        if not index.timestamps:
+            return []
+        with self.inv_paths.delta_archive_records(host_name, index.generation).open("rb") as f:
+            return [
+                node
+                for path, records in index.records_by_path.items()
+                if (node := _restore_archive_node(f.fileno(), path, records, step)) is not None
+            ]
+
+    def timestamps(self, *, host_name: HostName) -> Sequence[int]:
+        return self._load_index(host_name).timestamps
+
+    def load_tree(self, *, host_name: HostName, timestamp: int) -> ImmutableTree:
+        return self.load_trees(host_name=host_name, timestamps={timestamp}).get(
+            timestamp, ImmutableTree()
+        )
+
+    def load_trees(
+        self, *, host_name: HostName, timestamps: Container[int]
+    ) -> Mapping[int, ImmutableTree]:
+        """The archived trees of the given timestamps, unknown ones are left out"""
+        return self._load_trees(host_name, self._load_index(host_name), timestamps)
+
+    def _load_trees(
+        self, host_name: HostName, index: _DeltaArchiveIndex, timestamps: Container[int]
+    ) -> Mapping[int, ImmutableTree]:
+        steps = {step: t for step, t in enumerate(index.timestamps) if t in timestamps}
+        if not steps:
+            return {}
+        # Every column is read once: From the latest complete node before the first
+        # requested step on, up to the last requested step.
+        first = min(steps)
+        nodes_by_step: dict[int, dict[SDPath, ImmutableTree]] = {step: {} for step in steps}
+        with self.inv_paths.delta_archive_records(host_name, index.generation).open("rb") as f:
+            for path, records in index.records_by_path.items():
+                start = max(
+                    (i for i, r in enumerate(records) if r.kind != "delta" and r.step <= first),
+                    default=0,
+                )
+                pending = iter(records[start:])
+                record = next(pending, None)
+                node: ImmutableTree | None = None
+                for step in sorted(steps):
+                    while record is not None and record.step <= step:
+                        node = _read_archive_record(f.fileno(), path, record, node)
+                        record = next(pending, None)
+                    if node is not None:
+                        nodes_by_step[step][path] = node
+        return {steps[step]: _make_archive_tree(nodes) for step, nodes in nodes_by_step.items()}
+
+    def append(self, *, host_name: HostName, timestamp: int, tree: ImmutableTree) -> None:
+        index_path = self.inv_paths.delta_archive_index(host_name)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with store.locked(index_path):
+            index = self._load_index(host_name)
+            if index.timestamps and timestamp <= index.timestamps[-1]:
+                trees = dict(self._load_trees(host_name, index, set(index.timestamps)))
+                trees[timestamp] = tree
+                self._replace(host_name, index, trees.items())
+                return
+
+            writer = _DeltaArchiveWriter(
+                index, self._restore_nodes(host_name, index, len(index.timestamps) - 1)
+            )
+            writer.add(timestamp, tree)
+            fd = os.open(
+                self.inv_paths.delta_archive_records(host_name, index.generation),
+                os.O_WRONLY | os.O_CREAT,
+                0o660,
+            )
+            try:
+                # Drop the remains of an interrupted append which are not in the index.
+                os.ftruncate(fd, index.size)
+                os.pwrite(fd, writer.data.getvalue(), index.size)
+            finally:
+                os.close(fd)
+            self._save_index(host_name, writer.index)
+
+    def migrate_archive_trees(self, *, host_name: HostName) -> int:
+        """Move the archived trees of the former layout (one file per tree) into the archive"""
+        try:
+            file_paths = [
+                fp for fp in self.inv_paths.archive_host(host_name).iterdir() if not fp.is_dir()
+            ]
+        except FileNotFoundError:
+            return 0
+
+        tree_paths: dict[int, TreePath] = {}
+        for file_path in file_paths:
+            try:
+                tree_paths[int(file_path.with_suffix("").name)] = (
+                    TreePath.from_archive_or_delta_cache_file_path(file_path)
+                )
+            except ValueError:
+                continue
+        if not tree_paths:
+            return 0
+
+        index_path = self.inv_paths.delta_archive_index(host_name)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with store.locked(index_path):
+            index = self._load_index(host_name)
+            trees = dict(self._load_trees(host_name, index, set(index.timestamps)))
+            trees.update((t, _load_tree_from_tree_path(tp)) for t, tp in tree_paths.items())
+            self._replace(host_name, index, trees.items())
+
+        for tree_path in tree_paths.values():
+            tree_path.unlink(missing_ok=True)
+            tree_path.legacy.unlink(missing_ok=True)
+        return len(tree_paths)
+
+    def _replace(
+        self,
+        host_name: HostName,
+        index: _DeltaArchiveIndex,
+        trees: Iterable[tuple[int, ImmutableTree]],
+    ) -> None:
+        # The records are written to a new file, readers of the current index are not disturbed.
+        writer = _DeltaArchiveWriter(_DeltaArchiveIndex(generation=index.generation + 1), [])
+        for timestamp, tree in sorted(dict(trees).items()):
+            writer.add(timestamp, tree)
+        store.save_bytes_to_file(
+            self.inv_paths.delta_archive_records(host_name, writer.generation),
+            writer.data.getvalue(),
+        )
+        self._save_index(host_name, writer.index)
+        self.inv_paths.delta_archive_records(host_name, index.generation).unlink(missing_ok=True)
+
+
 class InventoryStore:
     def __init__(self, omd_root: Path) -> None:
         self.inv_paths = InventoryPaths(omd_root)
+        self.delta_archive = DeltaArchive(omd_root)
 
     def load_inventory_tree(self, *, host_name: HostName) -> ImmutableTree:
         return _load_tree_from_tree_path(self.inv_paths.inventory_tree(host_name))
@@ -2066,12 +2600,22 @@ class InventoryStore:
         if tree := _load_tree_from_tree_path(self.inv_paths.inventory_tree(host_name)):
             return tree
 
+        latest_archive_file_path: Path | None
         try:
             latest_archive_file_path = max(
-                self.inv_paths.archive_host(host_name).iterdir(),
+                (fp for fp in self.inv_paths.archive_host(host_name).iterdir() if not fp.is_dir()),
                 key=lambda fp: int(fp.with_suffix("").name),
             )
+            latest_archive_timestamp = int(latest_archive_file_path.with_suffix("").name)
         except (FileNotFoundError, ValueError):
+            latest_archive_file_path, latest_archive_timestamp = None, -1
+
+        if (timestamps := self.delta_archive.timestamps(host_name=host_name)) and timestamps[
+            -1
+        ] >= latest_archive_timestamp:
+            return self.delta_archive.load_tree(host_name=host_name, timestamp=timestamps[-1])
+
+        if latest_archive_file_path is None:
             return ImmutableTree()
 
         return _load_tree_from_tree_path(
@@ -2079,13 +2623,15 @@ class InventoryStore:
         )
 
     def archive_inventory_tree(self, *, host_name: HostName) -> None:
-        _archive_inventory_tree(self.inv_paths, host_name)
+        _archive_inventory_tree(self.inv_paths, self.delta_archive, host_name)
 
 
 class HistoryStore:
     def __init__(self, omd_root: Path) -> None:
         self.inv_paths = InventoryPaths(omd_root)
+        self.delta_archive = DeltaArchive(omd_root)
         self._lookup: dict[tuple[Path, Path], ImmutableTree] = {}
+        self._delta_archive_lookup: dict[tuple[HostName, int], ImmutableTree] = {}
 
     def _collect_paths_from_delta_cache(
         self, host_name: HostName
@@ -2116,21 +2662,34 @@ class HistoryStore:
         self, host_name: HostName
     ) -> Iterator[Result[HistoryPath, Path]]:
         try:
-            file_paths = list(self.inv_paths.archive_host(host_name).iterdir())
+            file_paths = [
+                fp for fp in self.inv_paths.archive_host(host_name).iterdir() if not fp.is_dir()
+            ]
         except FileNotFoundError:
             return
 
         yield OK(HistoryPath(TreePath(path=Path(), legacy=Path()), -1))
+        archived_timestamps = set(self.delta_archive.timestamps(host_name=host_name))
+        for timestamp in sorted(archived_timestamps):
+            yield OK(
+                HistoryPath(
+                    tree_path=TreePath(path=Path(), legacy=Path()),
+                    timestamp=timestamp,
+                    in_delta_archive=True,
+                )
+            )
         for file_path in file_paths:
             try:
-                yield OK(
-                    HistoryPath(
-                        tree_path=TreePath.from_archive_or_delta_cache_file_path(file_path),
-                        timestamp=int(file_path.with_suffix("").name),
-                    )
+                history_path = HistoryPath(
+                    tree_path=TreePath.from_archive_or_delta_cache_file_path(file_path),
+                    timestamp=int(file_path.with_suffix("").name),
                 )
             except ValueError:
                 yield Error(file_path)
+                continue
+            # Not yet removed after the migration to the delta archive
+            if history_path.timestamp not in archived_timestamps:
+                yield OK(history_path)
 
         tree_path = self.inv_paths.inventory_tree(host_name)
         try:
@@ -2183,7 +2742,17 @@ class HistoryStore:
             if result_from_archive.is_error():
                 yield Error(result_from_archive.error)
 
-    def _lookup_tree(self, tree_path: TreePath) -> ImmutableTree:
+    def _lookup_tree(self, host_name: HostName, history_path: HistoryPath) -> ImmutableTree:
+        if history_path.in_delta_archive:
+            archive_key = (host_name, history_path.timestamp)
+            if archive_key in self._delta_archive_lookup:
+                return self._delta_archive_lookup[archive_key]
+            return self._delta_archive_lookup.setdefault(
+                archive_key,
+                self.delta_archive.load_tree(host_name=host_name, timestamp=history_path.timestamp),
+            )
+
+        tree_path = history_path.tree_path
         if tree_path.path == Path() or tree_path.legacy == Path():
             return ImmutableTree()
 
@@ -2193,6 +2762,25 @@ class HistoryStore:
 
         return self._lookup.setdefault(key, _load_tree_from_tree_path(tree_path))
 
+    def load_archived_trees(
+        self, *, host_name: HostName, paths: Iterable[HistoryDeltaPath | HistoryArchivePath]
+    ) -> None:
+        """Restore the trees of the delta archive needed for the given paths at once"""
+        timestamps = {
+            history_path.timestamp
+            for path in paths
+            if isinstance(path, HistoryArchivePath)
+            for history_path in (path.previous, path.current)
+            if history_path.in_delta_archive
+            and (host_name, history_path.timestamp) not in self._delta_archive_lookup
+        }
+        if not timestamps:
+            return
+        for timestamp, tree in self.delta_archive.load_trees(
+            host_name=host_name, timestamps=timestamps
+        ).items():
+            self._delta_archive_lookup[(host_name, timestamp)] = tree
+
     def load_history_entry(
         self, *, host_name: HostName, path: HistoryDeltaPath | HistoryArchivePath
     ) -> Result[HistoryEntry, Sequence[Path]]:
@@ -2222,8 +2810,8 @@ class HistoryStore:
                 entry = HistoryEntry.from_delta_tree(
                     previous_timestamp=path.previous.timestamp,
                     current_timestamp=path.current.timestamp,
-                    delta_tree=self._lookup_tree(path.current.tree_path).difference(
-                        self._lookup_tree(path.previous.tree_path)
+                    delta_tree=self._lookup_tree(host_name, path.current).difference(
+                        self._lookup_tree(host_name, path.previous)
                     ),
                 )
 
@@ -2232,6 +2820,10 @@ class HistoryStore:
                         self.save_history_entry(host_name=host_name, history_entry=entry)
                     return OK(entry)
 
+                if path.current.in_delta_archive:
+                    # Unchanged in contrast to the previous tree, nothing is corrupted
+                    return Error([])
+
                 return Error(
                     [
                         path.current.tree_path.path,
@@ -2287,7 +2879,9 @@ def load_history(
             corrupted.add(path_result.error)
 
     entries = []
-    for path in filter_history_paths(paths):
+    filtered_paths = filter_history_paths(paths)
+    history_store.load_archived_trees(host_name=host_name, paths=filtered_paths)
+    for path in filtered_paths:
         if (
             entry_result := history_store.load_history_entry(host_name=host_name, path=path)
         ).is_ok():
@@ -4,13 +4,19 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 from enum import Enum
-from zlib import decompress
+from typing import BinaryIO
+from zlib import decompress, decompressobj
 from zlib import error as zlibError
 
+CHUNK_SIZE = 64 * 1024
+
 
 class DecompressionError(Exception): ...
 
 
+class DecompressedSizeExceeded(DecompressionError): ...
+
+
 class Decompressor(Enum):
     ZLIB = "zlib"
 
@@ -22,6 +28,19 @@ class Decompressor(Enum):
         """
         return {Decompressor.ZLIB: Decompressor._zlib_decompress}[self](data)
 
+    def stream(self, source: BinaryIO, target: BinaryIO, *, max_size: int) -> int:
+        """Decompress source into target chunk by chunk, return the decompressed size
+
+        >>> import io
+        >>> from zlib import compress
+        >>> target = io.BytesIO()
+        >>> Decompressor("zlib").stream(io.BytesIO(compress(b"blablub")), target, max_size=10)
+        7
+        >>> target.getvalue()
+        b'blablub'
+        """
+        return {Decompressor.ZLIB: Decompressor._zlib_stream}[self](source, target, max_size)
+
     @staticmethod
     def _zlib_decompress(data: bytes) -> bytes:
         """
@@ -37,3 +56,36 @@ class Decompressor(Enum):
             return decompress(data)
         except zlibError as e:
             raise DecompressionError(f"Decompression with zlib failed: {e}") from e
+
+    @staticmethod
+    def _zlib_stream(source: BinaryIO, target: BinaryIO, max_size: int) -> int:
+        """
+        >>> import io
+        >>> from zlib import compress
+        >>> Decompressor._zlib_stream(io.BytesIO(compress(b"blablub")), io.BytesIO(), 6)
+        Traceback (most recent call last):
+            ...
+        packages.cmk-agent-receiver.cmk.agent_receiver.decompression.DecompressedSizeExceeded: ...
+        >>> Decompressor._zlib_stream(io.BytesIO(compress(b"blablub")[:-2]), io.BytesIO(), 10)
+        Traceback (most recent call last):
+            ...
+        packages.cmk-agent-receiver.cmk.agent_receiver.decompression.DecompressionError: ...
+        """
+        decompressor = decompressobj()
+        size = 0
+        try:
+            while chunk := source.read(CHUNK_SIZE):
+                # Bound the output per step, a small chunk may expand enormously.
+                while chunk and not decompressor.eof:
+                    data = decompressor.decompress(chunk, CHUNK_SIZE)
+                    if (size := size + len(data)) > max_size:
+                        raise DecompressedSizeExceeded(
+                            f"Decompressed data exceeds {max_size} bytes"
+                        )
+                    target.write(data)
+                    chunk = decompressor.unconsumed_tail
+        except zlibError as e:
+            raise DecompressionError(f"Decompression with zlib failed: {e}") from e
+        if not decompressor.eof:
+            raise DecompressionError("Decompression with zlib failed: incomplete data")
+        return size
@@ -7,7 +7,7 @@ import os
 import tempfile
 from functools import cache
 from pathlib import Path
-from typing import assert_never
+from typing import assert_never, BinaryIO
 
 from cryptography.x509 import Certificate
 from fastapi import Depends, File, Header, HTTPException, Response, UploadFile
@@ -41,7 +41,7 @@ from .checkmk_rest_api import (
     post_csr,
     register,
 )
-from .decompression import DecompressionError, Decompressor
+from .decompression import DecompressedSizeExceeded, DecompressionError, Decompressor
 from .log import logger
 from .models import (
     CertificateRenewalBody,
@@ -345,17 +345,27 @@ def _validate_is_allowed(credentials: HTTPBasicCredentials, uuid: UUID4) -> None
         )
 
 
+# Upper limit for the decompressed agent output of a push host
+MAX_AGENT_DATA_SIZE = 256 * 1024 * 1024
+
+
 def _store_agent_data(
     target_dir: Path,
-    decompressed_data: bytes,
+    decompressor: Decompressor,
+    compressed_data: BinaryIO,
 ) -> None:
+    """Decompress the agent data straight into the agent output of the host
+
+    The data is never held in memory as a whole. If it is invalid or too large,
+    the agent output is left untouched.
+    """
     target_dir.resolve().mkdir(parents=True, exist_ok=True)
     with tempfile.NamedTemporaryFile(
         dir=target_dir,
         delete=False,
     ) as temp_file:
         try:
-            temp_file.write(decompressed_data)
+            decompressor.stream(compressed_data, temp_file, max_size=MAX_AGENT_DATA_SIZE)
             os.rename(temp_file.name, target_dir / "agent_output")
         finally:
             Path(temp_file.name).unlink(missing_ok=True)
@@ -406,7 +416,21 @@ async def agent_data(
         ) from e
 
     try:
-        decompressed_agent_data = decompressor(monitoring_data.file.read())
+        _store_agent_data(
+            host.source_path,
+            decompressor,
+            monitoring_data.file,
+        )
+    except DecompressedSizeExceeded as e:
+        logger.error(
+            "uuid=%s Agent data too large: %s",
+            uuid,
+            e,
+        )
+        raise HTTPException(
+            status_code=413,
+            detail=f"Decompressed agent data exceeds {MAX_AGENT_DATA_SIZE} bytes",
+        ) from e
     except DecompressionError as e:
         logger.error(
             "uuid=%s Decompression of agent data failed: %s",
@@ -418,11 +442,6 @@ async def agent_data(
             detail="Decompression of agent data failed",
         ) from e
 
-    _store_agent_data(
-        host.source_path,
-        decompressed_agent_data,
-    )
-
     logger.info(
         "uuid=%s Agent data saved",
         uuid,
@@ -660,6 +660,27 @@ def test_agent_data_invalid_data(
     assert response.json() == {"detail": "Decompression of agent data failed"}
 
 
+@pytest.mark.usefixtures("symlink_push_host")
+def test_agent_data_too_large(
+    tmp_path: Path,
+    mocker: MockerFixture,
+    client: TestClient,
+    uuid: UUID4,
+    agent_data_headers: MutableMapping[str, str],
+) -> None:
+    mocker.patch("cmk.agent_receiver.endpoints.MAX_AGENT_DATA_SIZE", 1024)
+
+    response = client.post(
+        f"/agent_data/{uuid}",
+        headers=agent_data_headers,
+        files={"monitoring_data": ("filename", io.BytesIO(compress(b"x" * 1025)))},
+    )
+
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Decompressed agent data exceeds 1024 bytes"}
+    assert not list((tmp_path / "push-agent" / "hostname").iterdir())
+
+
 @pytest.mark.usefixtures("symlink_push_host")
 def test_agent_data_success(
     tmp_path: Path,
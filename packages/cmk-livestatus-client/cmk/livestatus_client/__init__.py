@@ -171,6 +171,9 @@ tracer = trace.get_tracer()
 # Keep a global array of persistent connections
 persistent_connections: dict[str, socket.socket] = {}
 
+# Size of the buffer responses are streamed through
+RECEIVE_BUFFER_SIZE = 65536
+
 # Regular expression for removing Cache: headers if caching is not allowed
 remove_cache_regex = re.compile("\nCache:[^\n]*")
 
@@ -551,6 +554,119 @@ def parse_socket_url(url: str) -> tuple[socket.AddressFamily, str | tuple[str, i
     )
 
 
+# Livestatus escapes quotes and backslashes within strings and blobs of the python3 output
+# format, so a quote always starts or ends a literal.
+_python_token_regex = re.compile(rb'b?"[^"]*"|None')
+_python_astral_escape_regex = re.compile(rb"\\U([0-9a-fA-F]{8})")
+
+
+def _python_token_to_json(match: re.Match[bytes]) -> bytes:
+    token = match[0]
+    if token == b"None":
+        return b"null"
+    if token.startswith(b"b"):
+        raise ValueError("Blobs can not be represented in JSON")
+    return token
+
+
+def _astral_escape_to_json(match: re.Match[bytes]) -> bytes:
+    code_point = int(match[1], 16) - 0x10000
+    return b"\\u%04x\\u%04x" % (0xD800 + (code_point >> 10), 0xDC00 + (code_point & 0x3FF))
+
+
+def _parse_python_row(data: bytes) -> LivestatusColumn:
+    """Parse a row of the python3 output format
+
+    Apart from None, blobs and \\U escapes the python3 output format is JSON, which is parsed
+    a lot faster than by ast.literal_eval(). Only rows containing blobs are left to it.
+
+    >>> _parse_python_row(b'["None", None, 1.5, {"a":[2]}, "\\\\U0001f600"]')
+    ['None', None, 1.5, {'a': [2]}, '😀']
+    >>> _parse_python_row(b'["ab", b"\\\\x00c"]')
+    ['ab', b'\\x00c']
+    """
+    try:
+        if b"None" in data or b'b"' in data:
+            data = _python_token_regex.sub(_python_token_to_json, data)
+        if b"\\U" in data:
+            data = _python_astral_escape_regex.sub(_astral_escape_to_json, data)
+        return json.loads(data)
+    except ValueError:
+        return ast.literal_eval(data.decode("utf-8"))
+
+
+class _RowParser:
+    """Parses the rows of a successful response while it is being received
+
+    Both output formats render every row on a line of its own: "[row,\\nrow,\\nrow]\\n".
+    Responses not following this layout are parsed as a whole once they are complete.
+    """
+
+    def __init__(self, json_format: bool) -> None:
+        self._parse_row: Callable[[bytes], LivestatusColumn] = (
+            json.loads if json_format else _parse_python_row
+        )
+        self._json_format = json_format
+        self._pending = bytearray()
+        self._first_line = True
+        # Lines of a response not following the row per line layout
+        self._unparsed: list[bytes] | None = None
+
+    def feed(self, data: bytes | bytearray | memoryview) -> list[LivestatusRow]:
+        self._pending += data
+        end = self._pending.rfind(b"\n")
+        if end < 0:
+            return []
+        lines = bytes(self._pending[:end]).split(b"\n")
+        del self._pending[: end + 1]
+        rows: list[LivestatusRow] = []
+        for line in lines:
+            rows.extend(self._parse_line(line))
+        return rows
+
+    def close(self) -> list[LivestatusRow]:
+        """Parse the rest after the complete response has been fed"""
+        rows = self._parse_line(bytes(self._pending)) if self._pending else []
+        self._pending.clear()
+        if self._unparsed is None:
+            return rows
+        return rows + self._parse_document(b"\n".join(self._unparsed))
+
+    def _parse_line(self, line: bytes) -> list[LivestatusRow]:
+        if self._unparsed is not None:
+            self._unparsed.append(line)
+            return []
+
+        first_line, self._first_line = self._first_line, False
+        parsed = None
+        # All lines but the last one end with the row separator, the last one with the end of
+        # the response. The first line additionally starts with the beginning of the response.
+        if (not first_line or line.startswith(b"[")) and line.endswith((b",", b"]")):
+            row = line[1:-1] if first_line else line[:-1]
+            if not row:
+                return []
+            try:
+                parsed = self._parse_row(row)
+            except (ValueError, SyntaxError):
+                pass
+
+        if not isinstance(parsed, list):
+            self._unparsed = [line if first_line else b"[" + line]
+            return []
+        return [LivestatusRow(parsed)]
+
+    def _parse_document(self, data: bytes) -> list[LivestatusRow]:
+        try:
+            response = (
+                json.loads(data) if self._json_format else ast.literal_eval(data.decode("utf-8"))
+            )
+        except (ValueError, SyntaxError):
+            raise MKLivestatusQueryError("Malformed raw response output")
+        if not isinstance(response, list):
+            raise MKLivestatusQueryError("Malformed raw response output")
+        return response
+
+
 class SingleSiteConnection(Helpers):
     # So we only collect in a specific thread, and not in all of them. We also use
     # a class-variable for this case, so we activate this across all sites at once.
@@ -582,6 +698,8 @@ class SingleSiteConnection(Helpers):
         self.timeout: int | None = None
         self.successful_persistence = False
         self._output_format = LivestatusOutputFormat.PYTHON
+        # Reused by all streamed responses, allocated on first use
+        self._receive_buffer: memoryview | None = None
 
         # Whether to establish an encrypted connection
         self.tls = tls
@@ -729,6 +847,22 @@ class SingleSiteConnection(Helpers):
 
         return data.getvalue()
 
+    def receive_chunk(self, size: int) -> memoryview:
+        """Receive up to size bytes into the receive buffer of this connection
+
+        The returned view is only valid until the next call."""
+        if self.socket is None:
+            raise MKLivestatusSocketError("Socket to '%s' is not connected" % self.socketurl)
+
+        if self._receive_buffer is None:
+            self._receive_buffer = memoryview(bytearray(RECEIVE_BUFFER_SIZE))
+        received = self.socket.recv_into(self._receive_buffer, min(size, RECEIVE_BUFFER_SIZE))
+        if not received:
+            raise MKLivestatusSocketClosed(
+                "Read zero data from socket, remote peer closed connection."
+            )
+        return self._receive_buffer[:received]
+
     def do_query(self, query: Query, add_headers: str = "") -> LivestatusResponse:
         with (
             tracer.span(
@@ -794,15 +928,38 @@ class SingleSiteConnection(Helpers):
 
             raise MKLivestatusSocketError("RC1:" + str(e))
 
-    # Reads a response from the livestatus socket. If the socket is closed
-    # by the livestatus server, we automatically make a reconnect and send
-    # the query again (once). This is due to timeouts during keepalive.
     def receive_raw_response(
         self,
         query: str,
         suppress_exceptions: tuple[type[Exception], ...],
         timeout_at: float | None = None,
     ) -> bytes:
+        # Apply a lower timeout for the content because the data is already available
+        # in the socket. The liveproxyd (same system) has the complete data available
+        # while the data from a standard connection can still take some time.
+        # 30 seconds should be more than enough for the maximum telegram size of 100MB
+        return self._receive_response(
+            query, suppress_exceptions, timeout_at, lambda length: self.receive_data(length, 30)
+        )
+
+    def receive_response_size(
+        self, query: str, suppress_exceptions: tuple[type[Exception], ...]
+    ) -> int:
+        """Receive the response header, leaving the payload of a successful response in the socket
+
+        Error responses are raised just like by receive_raw_response()."""
+        return self._receive_response(query, suppress_exceptions, None, lambda length: length)
+
+    # Reads a response from the livestatus socket. If the socket is closed
+    # by the livestatus server, we automatically make a reconnect and send
+    # the query again (once). This is due to timeouts during keepalive.
+    def _receive_response[T](
+        self,
+        query: str,
+        suppress_exceptions: tuple[type[Exception], ...],
+        timeout_at: float | None,
+        receive_payload: Callable[[int], T],
+    ) -> T:
         try:
             # Headers are always ASCII encoded
             resp = self.receive_data(16)
@@ -816,16 +973,10 @@ class SingleSiteConnection(Helpers):
                     "unreachable or wrong encryption settings are used."
                 )
 
-            # Apply a lower timeout for the content because the data is already available
-            # in the socket. The liveproxyd (same system) has the complete data available
-            # while the data from a standard connection can still take some time.
-            # 30 seconds should be more than enough for the maximum telegram size of 100MB
-            data = self.receive_data(length, 30)
-
             if code == "200":
-                return data
+                return receive_payload(length)
 
-            error_info = data.decode("utf-8")
+            error_info = self.receive_data(length, 30).decode("utf-8")
             if code == "404":
                 raise MKLivestatusTableNotFoundError(f"Not Found ({code}): {error_info!r}")
 
@@ -865,7 +1016,9 @@ class SingleSiteConnection(Helpers):
                 self.connect()
                 self.send_query(query)
                 # do not send query again -> danger of infinite loop
-                return self.receive_raw_response(query, suppress_exceptions, timeout_at)
+                return self._receive_response(
+                    query, suppress_exceptions, timeout_at, receive_payload
+                )
             raise MKLivestatusSocketError(str(e))
 
         except suppress_exceptions:
@@ -886,15 +1039,44 @@ class SingleSiteConnection(Helpers):
             raise MKLivestatusSocketError("Unhandled exception: %s" % e)
 
     def parse_raw_response(self, raw_response: bytes, query: Query) -> LivestatusResponse:
-        data = raw_response.decode("utf-8")
+        if not query.supports_json_format():
+            parser = _RowParser(json_format=False)
+            return LivestatusResponse(parser.feed(raw_response) + parser.close())
         try:
-            response: LivestatusResponse = (
-                json.loads(data) if query.supports_json_format() else ast.literal_eval(data)
-            )
+            response: LivestatusResponse = json.loads(raw_response.decode("utf-8"))
             return response
-        except (ValueError, SyntaxError):
+        except ValueError:
             raise MKLivestatusQueryError("Malformed raw response output")
 
+    def receive_rows(self, size: int, query: Query, timeout: float = 30) -> Iterator[LivestatusRow]:
+        """Receive the payload of a successful response, yielding the rows as they arrive
+
+        The timeout applies to the time waiting for further data. If the iteration is not
+        completed, the connection is closed to drop the rest of the response."""
+        if self.socket is None:
+            raise MKLivestatusSocketError("Socket to '%s' is not connected" % self.socketurl)
+
+        parser = _RowParser(query.supports_json_format())
+        self.socket.settimeout(timeout)
+        last_receive = time.time()
+        try:
+            while size > 0:
+                if is_socket_readable(self.socket, 0.1):
+                    chunk = self.receive_chunk(size)
+                    size -= len(chunk)
+                    last_receive = time.time()
+                    yield from parser.feed(chunk)
+                elif (time.time() - last_receive) > timeout:
+                    raise MKLivestatusSocketError(
+                        f"{timeout}s while reading data from socket. Missing data: {size} bytes"
+                    )
+            yield from parser.close()
+        except OSError as e:
+            raise MKLivestatusSocketError(str(e))
+        finally:
+            if size > 0:
+                self.disconnect()
+
     def set_prepend_site(self, p: bool) -> None:
         self.prepend_site = p
 
@@ -928,6 +1110,28 @@ class SingleSiteConnection(Helpers):
                 row.insert(0, b"")
         return response
 
+    def query_rows(self, query: QueryTypes, add_headers: str = "") -> Iterator[LivestatusRow]:
+        """Like query(), but yields the rows while the response is being received"""
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+        if self.limit is not None:
+            normalized_query = Query(
+                "%sLimit: %d\n" % (normalized_query, self.limit),
+                normalized_query.suppress_exceptions,
+            )
+
+        with _livestatus_output_format_switcher(normalized_query, self):
+            str_query = self.build_query(normalized_query, add_headers)
+        self.send_query(str_query)
+        size = self.receive_response_size(str_query, normalized_query.suppress_exceptions)
+        try:
+            for row in self.receive_rows(size, normalized_query):
+                if self.prepend_site:
+                    row.insert(0, b"")
+                yield row
+        except MKLivestatusQueryError:
+            self.disconnect()
+            raise
+
     def command(
         self,
         command: str,
@@ -1017,6 +1221,49 @@ class ConnectedSite(NamedTuple):
 ConnectedSites = list[ConnectedSite]
 
 
+class _SiteRowStream:
+    """The response of a site, read piece by piece by MultiSiteConnection.query_rows()"""
+
+    def __init__(self, str_query: str, connected_site: ConnectedSite, query: Query) -> None:
+        self.str_query = str_query
+        self.connected_site = connected_site
+        self._query = query
+        self._parser = _RowParser(query.supports_json_format())
+        # Payload bytes still to be received, unknown until the header has been received
+        self._size: int | None = None
+        self._last_receive = time.time()
+
+    @property
+    def socket(self) -> socket.socket | None:
+        return self.connected_site.connection.socket
+
+    @property
+    def done(self) -> bool:
+        return self._size == 0
+
+    def receive(self) -> list[LivestatusRow]:
+        """Receive the next piece of the response, to be called once the socket is readable"""
+        connection = self.connected_site.connection
+        self._last_receive = time.time()
+        if self._size is None:
+            self._size = connection.receive_response_size(
+                self.str_query, self._query.suppress_exceptions
+            )
+            return []
+
+        chunk = connection.receive_chunk(self._size)
+        self._size -= len(chunk)
+        rows = self._parser.feed(chunk)
+        return rows + self._parser.close() if self._size == 0 else rows
+
+    def check_timeout(self, timeout: float) -> None:
+        # Same as with receive_raw_response(): Only the payload is subject to a timeout
+        if self._size is not None and (time.time() - self._last_receive) > timeout:
+            raise MKLivestatusSocketError(
+                f"{timeout}s while reading data from socket. Missing data: {self._size} bytes"
+            )
+
+
 class MultiSiteConnection(Helpers):
     def __init__(
         self,
@@ -1314,6 +1561,73 @@ class MultiSiteConnection(Helpers):
         self.connections = stillalive
         return LivestatusResponse(result)
 
+    def query_rows(self, query: QueryTypes, add_headers: str = "") -> Iterator[LivestatusRow]:
+        """Like query(), but yields the rows while the responses are being received
+
+        All sites are queried in parallel, just like with query_parallel(). Their responses
+        are read as soon as data arrives, so the rows of the sites are yielded interleaved
+        instead of waiting for the slowest site. Failing sites are recorded as dead sites.
+        """
+        normalized_query = Query(query) if not isinstance(query, Query) else query
+        stillalive: ConnectedSites = []
+        if self.only_sites is not None:
+            connect_to_sites = [c for c in self.connections if c[0] in self.only_sites]
+            # Unused sites are assumed to be alive
+            stillalive.extend([c for c in self.connections if c[0] not in self.only_sites])
+        else:
+            connect_to_sites = self.connections
+
+        with _livestatus_output_format_switcher(normalized_query, self):
+            streams = [
+                _SiteRowStream(str_query, connected_site, normalized_query)
+                for str_query, _span, connected_site in self._send_queries(
+                    normalized_query,
+                    add_headers,
+                    connect_to_sites,
+                    limit_header="Limit: %d\n" % self.limit if self.limit is not None else "",
+                )
+            ]
+
+        try:
+            while streams:
+                readable = _readable_sockets([s.socket for s in streams if s.socket is not None])
+                for stream in list(streams):
+                    connected_site = stream.connected_site
+                    try:
+                        if stream.socket in readable:
+                            rows = stream.receive()
+                        else:
+                            stream.check_timeout(30)
+                            continue
+                    except normalized_query.suppress_exceptions:
+                        streams.remove(stream)
+                        stillalive.append(connected_site)
+                        continue
+                    except LivestatusTestingError:
+                        raise
+                    except Exception as e:
+                        streams.remove(stream)
+                        connected_site.connection.disconnect()
+                        self.deadsites[connected_site.id] = {
+                            "exception": e,
+                            "site": connected_site.config,
+                        }
+                        continue
+
+                    if stream.done:
+                        streams.remove(stream)
+                        stillalive.append(connected_site)
+                    for row in rows:
+                        if self.prepend_site:
+                            row.insert(0, connected_site.id)
+                        yield row
+        finally:
+            # Drop the responses not read completely, e.g. when the iteration is not completed
+            for stream in streams:
+                stream.connected_site.connection.disconnect()
+                stillalive.append(stream.connected_site)
+            self.connections = stillalive
+
     def _send_queries(
         self, query: Query, add_headers: str, connect_to_sites: ConnectedSites, limit_header: str
     ) -> list[tuple[str, trace.Span, ConnectedSite]]:
@@ -1555,6 +1869,15 @@ def is_socket_readable(sock: socket.socket, select_timeout: float = 1.0) -> bool
     return sock in fd_sets[0]
 
 
+def _readable_sockets(
+    sockets: Sequence[socket.socket], select_timeout: float = 0.1
+) -> list[socket.socket]:
+    """Like is_socket_readable(), but for several sockets at once"""
+    if pending := [s for s in sockets if isinstance(s, ssl.SSLSocket) and s.pending()]:
+        return pending
+    return select.select(sockets, [], [], select_timeout)[0] if sockets else []
+
+
 @dataclass(frozen=True)
 class RRDResponse:
     window: range
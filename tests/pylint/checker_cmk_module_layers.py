@@ -803,6 +803,7 @@ _EXPLICIT_FILE_TO_COMPONENT = {
     ModulePath("bin/cmk-validate-config"): Component("cmk.validate_config"),
     ModulePath("bin/cmk-validate-plugins"): Component("cmk.validate_plugins"),
     ModulePath("bin/cmk-transform-inventory-trees"): Component("cmk.inventory"),
+    ModulePath("bin/cmk-migrate-inventory-archive"): Component("cmk.inventory"),
     ModulePath("bin/post-rename-site"): Component("cmk.post_rename_site"),
     ModulePath("bin/mkeventd"): Component("cmk.ec"),
     ModulePath("bin/cmk-convert-rrds"): Component("cmk.rrd"),
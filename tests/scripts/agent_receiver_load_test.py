@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Simulate concurrent push agents against a local agent receiver.
+
+A throwaway site directory is populated with registered push hosts, the agent
+receiver is started on it via uvicorn, and the simulated agents upload their
+compressed agent output to the 'agent_data' endpoint concurrently.
+Reported are the latencies of the uploads and the peak memory (RSS) of the
+receiver process.
+
+The agent receiver and its requirements must be importable, e.g.:
+
+$ PYTHONPATH=packages/cmk-agent-receiver tests/scripts/agent_receiver_load_test.py --agents 500
+"""
+
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from argparse import ArgumentParser, Namespace
+from collections.abc import Iterator, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from uuid import uuid4
+
+import httpx
+
+SITE = "loadtest"
+
+
+def parse_arguments(argv: Sequence[str]) -> Namespace:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agents", type=int, default=100, help="number of push agents")
+    parser.add_argument("--uploads", type=int, default=5, help="uploads per agent")
+    parser.add_argument(
+        "--size", type=int, default=1024 * 1024, help="size of the agent output in bytes"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=1, help="number of worker processes of the receiver"
+    )
+    return parser.parse_args(argv)
+
+
+def _agent_output(size: int) -> bytes:
+    """Somewhat realistic agent output: repetitive, but not trivially compressible"""
+    lines = []
+    length = 0
+    while length < size:
+        lines.append(
+            b"<<<local>>>" if random.random() < 0.01 else b"0 Service_%d - OK" % len(lines)
+        )
+        length += len(lines[-1]) + 1
+    return b"\n".join(lines)[:size]
+
+
+def _register_push_hosts(omd_root: Path, count: int) -> Sequence[str]:
+    received_outputs = omd_root / "var/agent-receiver/received-outputs"
+    received_outputs.mkdir(parents=True)
+    (omd_root / "var/log/agent-receiver").mkdir(parents=True)
+    uuids = [str(uuid4()) for _ in range(count)]
+    for n, uuid in enumerate(uuids):
+        (target := omd_root / "push-agent" / f"host-{n}").mkdir(parents=True)
+        (received_outputs / uuid).symlink_to(target)
+    return uuids
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+@contextmanager
+def _receiver(omd_root: Path, port: int, workers: int) -> Iterator[subprocess.Popen]:
+    with subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "--factory",
+            "cmk.agent_receiver.main:main_app",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env={**os.environ, "OMD_ROOT": str(omd_root), "OMD_SITE": SITE},
+    ) as process:
+        try:
+            _wait_until_listening(port)
+            yield process
+        finally:
+            process.terminate()
+
+
+def _wait_until_listening(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Agent receiver not listening on port {port}")
+
+
+def _peak_rss_kib(pid: int) -> int:
+    """The peak RSS of a process and its children (the uvicorn workers)"""
+    pids = [pid, *_children(pid)]
+    return sum(_vm_hwm_kib(p) for p in pids)
+
+
+def _children(pid: int) -> Sequence[int]:
+    try:
+        return [
+            int(child)
+            for task in Path(f"/proc/{pid}/task").iterdir()
+            for child in (task / "children").read_text().split()
+        ]
+    except FileNotFoundError:
+        return []
+
+
+def _vm_hwm_kib(pid: int) -> int:
+    for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1])
+    return 0
+
+
+def _upload(client: httpx.Client, port: int, uuid: str, payload: bytes) -> tuple[float, int]:
+    start = time.perf_counter()
+    response = client.post(
+        f"http://127.0.0.1:{port}/{SITE}/agent-receiver/agent_data/{uuid}",
+        headers={"compression": "zlib", "verified-uuid": uuid},
+        files={"monitoring_data": ("agent_output", payload)},
+    )
+    return time.perf_counter() - start, response.status_code
+
+
+def _percentile(values: Sequence[float], percent: int) -> float:
+    return sorted(values)[min(len(values) - 1, len(values) * percent // 100)]
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_arguments(argv)
+    payload = zlib.compress(_agent_output(args.size))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        omd_root = Path(tmp)
+        uuids = _register_push_hosts(omd_root, args.agents)
+        port = _free_port()
+        with (
+            _receiver(omd_root, port, args.workers) as receiver,
+            httpx.Client(timeout=300, limits=httpx.Limits(max_connections=args.agents)) as client,
+            ThreadPoolExecutor(max_workers=args.agents) as executor,
+        ):
+            start = time.perf_counter()
+            results = list(
+                executor.map(
+                    lambda uuid: _upload(client, port, uuid, payload),
+                    [uuid for _ in range(args.uploads) for uuid in uuids],
+                )
+            )
+            duration = time.perf_counter() - start
+            peak_rss = _peak_rss_kib(receiver.pid)
+
+    latencies = [latency for latency, _status in results]
+    failed = sum(1 for _latency, status in results if status != 204)
+    print(f"agents:          {args.agents}")
+    print(f"uploads:         {len(results)} ({failed} failed)")
+    print(f"agent output:    {args.size} bytes ({len(payload)} compressed)")
+    print(f"duration:        {duration:.2f}s ({len(results) / duration:.1f} uploads/s)")
+    print(
+        "latency:         "
+        f"mean {statistics.mean(latencies):.3f}s, "
+        f"p50 {_percentile(latencies, 50):.3f}s, "
+        f"p95 {_percentile(latencies, 95):.3f}s, "
+        f"p99 {_percentile(latencies, 99):.3f}s, "
+        f"max {max(latencies):.3f}s"
+    )
+    print(f"receiver peak RSS: {peak_rss / 1024:.1f} MiB")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
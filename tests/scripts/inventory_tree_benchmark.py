@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure time and memory of the inventory tree operations of the GUI.
+
+The corpus consists of the real-world trees of the unit tests. Every simulated host
+gets its own copy of one of these trees (loaded from its JSON file like the GUI does),
+with some host specific values. On these trees the operations of inventory views are
+run: merging with the status data, filtering by the permitted paths and comparing
+with the previous tree.
+Reported are the durations and the memory allocated by each operation (tracemalloc).
+
+$ tests/scripts/inventory_tree_benchmark.py --hosts 500
+"""
+
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from argparse import ArgumentParser, Namespace
+from collections.abc import Callable, Sequence
+from pathlib import Path
+
+from cmk.ccc import store
+from cmk.utils.structured_data import (
+    deserialize_tree,
+    ImmutableTree,
+    SDFilterChoice,
+    SDKey,
+    SDNodeName,
+    serialize_tree,
+)
+
+TREE_TEST_DATA = (
+    Path(__file__).resolve().parent.parent
+    / "unit/cmk/utils/structured_data/tree_test_data/var/check_mk/inventory"
+)
+
+FILTERS = [
+    SDFilterChoice(path=(SDNodeName("hardware"),), pairs="all", columns="all", nodes="all"),
+    SDFilterChoice(
+        path=(SDNodeName("software"), SDNodeName("applications")),
+        pairs="all",
+        columns="all",
+        nodes="all",
+    ),
+    SDFilterChoice(path=(SDNodeName("networking"),), pairs="all", columns="all", nodes="nothing"),
+]
+
+
+def parse_arguments(argv: Sequence[str]) -> Namespace:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=200, help="number of simulated hosts")
+    return parser.parse_args(argv)
+
+
+def _load_corpus() -> Sequence[ImmutableTree]:
+    return [
+        deserialize_tree(store.load_object_from_file(file_path, default={}))
+        for file_path in sorted(TREE_TEST_DATA.iterdir())
+        if file_path.name != "tree_status"
+    ]
+
+
+def _host_dump(tree: ImmutableTree, host_idx: int, uptime: int) -> str:
+    raw_tree = serialize_tree(tree)
+    raw_tree["Attributes"] = {"Pairs": {SDKey("host"): f"host-{host_idx}", SDKey("uptime"): uptime}}
+    return json.dumps(raw_tree)
+
+
+def _measure(title: str, func: Callable[[], object]) -> object:
+    # Timed without tracemalloc, its overhead would dominate. Collect garbage of earlier
+    # measurements, it would otherwise be collected in the middle of this one.
+    gc.collect()
+    start = time.perf_counter()
+    result = func()
+    duration = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{title:<12} {duration:8.3f}s  retained {current / 1024**2:8.1f} MiB"
+        f"  peak {peak / 1024**2:8.1f} MiB"
+    )
+    return result
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_arguments(argv)
+    corpus = _load_corpus()
+    status_data_tree = deserialize_tree(
+        store.load_object_from_file(TREE_TEST_DATA / "tree_status", default={})
+    )
+    dumps = [_host_dump(corpus[idx % len(corpus)], idx, 2) for idx in range(args.hosts)]
+    previous_trees = [
+        deserialize_tree(json.loads(_host_dump(corpus[idx % len(corpus)], idx, 1)))
+        for idx in range(args.hosts)
+    ]
+
+    print(f"hosts: {args.hosts}, corpus: {len(corpus)} trees")
+    trees: Sequence[ImmutableTree] = _measure(  # type: ignore[assignment]
+        "load", lambda: [deserialize_tree(json.loads(d)) for d in dumps]
+    )
+    merged: Sequence[ImmutableTree] = _measure(  # type: ignore[assignment]
+        "merge", lambda: [t.merge(status_data_tree) for t in trees]
+    )
+    _measure("filter", lambda: [t.filter(FILTERS) for t in merged])
+    _measure("difference", lambda: [t.difference(p) for t, p in zip(trees, previous_trees)])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
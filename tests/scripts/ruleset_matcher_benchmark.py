@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+"""Measure the evaluation of host rulesets for all hosts of a large setup.
+
+A synthetic setup is generated: hosts in a folder hierarchy with random host
+tags and labels, and rulesets with rules conditioned on folders, tags, labels
+and host names. Every ruleset is evaluated for every host, like the config
+generation does.
+Reported are the time to match the rules (the first lookup of a ruleset) and
+the total time including the lookups of all hosts.
+
+$ PYTHONPATH=. tests/scripts/ruleset_matcher_benchmark.py --hosts 100000 --rules 3000
+"""
+
+import gc
+import random
+import sys
+import time
+from argparse import ArgumentParser, Namespace
+from collections.abc import Mapping, Sequence
+
+from cmk.ccc.hostaddress import HostName
+from cmk.utils.labels import Labels
+from cmk.utils.rulesets.ruleset_matcher import (
+    RuleConditionsSpec,
+    RulesetMatcher,
+    RuleSpec,
+    TagCondition,
+)
+from cmk.utils.tags import TagGroupID, TagID
+
+TAG_GROUPS = 10
+TAGS_PER_GROUP = 5
+LABEL_KEYS = 5
+LABELS_PER_KEY = 10
+
+
+def parse_arguments(argv: Sequence[str]) -> Namespace:
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=20000, help="number of hosts")
+    parser.add_argument("--rules", type=int, default=3000, help="number of rules")
+    parser.add_argument(
+        "--rules-per-ruleset", type=int, default=30, help="number of rules per ruleset"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated setup")
+    return parser.parse_args(argv)
+
+
+def _folders() -> Sequence[str]:
+    return [
+        f"/wato/{path}"
+        for a in range(10)
+        for path in (f"a{a}/", *(f"a{a}/b{b}/" for b in range(10)))
+    ]
+
+
+def _tag(group: int, tag: int) -> tuple[TagGroupID, TagID]:
+    return TagGroupID(f"group{group}"), TagID(f"group{group}_tag{tag}")
+
+
+def _label(key: int, value: int) -> str:
+    return f"key{key}:value{value}"
+
+
+def _tag_condition(rng: random.Random) -> tuple[TagGroupID, TagCondition]:
+    group = rng.randrange(TAG_GROUPS)
+    tags = [_tag(group, tag)[1] for tag in rng.sample(range(TAGS_PER_GROUP), 2)]
+    match rng.randrange(4):
+        case 0:
+            return _tag(group, 0)[0], {"$ne": tags[0]}
+        case 1:
+            return _tag(group, 0)[0], {"$or": tags}
+        case 2:
+            return _tag(group, 0)[0], {"$nor": tags}
+    return _tag(group, 0)[0], tags[0]
+
+
+def _condition(
+    rng: random.Random, folders: Sequence[str], host_names: Sequence[HostName]
+) -> RuleConditionsSpec:
+    condition: RuleConditionsSpec = {}
+    if rng.random() < 0.5:
+        condition["host_folder"] = rng.choice(folders)
+    if rng.random() < 0.5:
+        condition["host_tags"] = dict(_tag_condition(rng) for _ in range(rng.randrange(1, 3)))
+    if rng.random() < 0.2:
+        condition["host_label_groups"] = [
+            (
+                "and",
+                [
+                    ("and", _label(rng.randrange(LABEL_KEYS), rng.randrange(LABELS_PER_KEY))),
+                    ("or", _label(rng.randrange(LABEL_KEYS), rng.randrange(LABELS_PER_KEY))),
+                ],
+            )
+        ]
+    match rng.randrange(10):
+        case 0:
+            condition["host_name"] = list(rng.sample(host_names, 3))
+        case 1:
+            condition["host_name"] = {"$nor": list(rng.sample(host_names, 3))}
+        case 2:
+            condition["host_name"] = [{"$regex": f"host-{rng.randrange(10)}"}]
+    return condition
+
+
+def main(argv: Sequence[str]) -> int:
+    args = parse_arguments(argv)
+    rng = random.Random(args.seed)
+    folders = _folders()
+    host_names = [HostName(f"host-{n}") for n in range(args.hosts)]
+    host_tags = {
+        host_name: dict(_tag(group, rng.randrange(TAGS_PER_GROUP)) for group in range(TAG_GROUPS))
+        for host_name in host_names
+    }
+    host_paths = {host_name: f"{rng.choice(folders)}hosts.mk" for host_name in host_names}
+    host_labels: Mapping[HostName, Labels] = {
+        host_name: dict(
+            _label(key, rng.randrange(LABELS_PER_KEY)).split(":") for key in range(LABEL_KEYS)
+        )
+        for host_name in host_names
+    }
+    rulesets: Sequence[Sequence[RuleSpec[int]]] = [
+        [
+            {"id": f"{n}", "value": n, "condition": _condition(rng, folders, host_names)}
+            for n in range(start, min(start + args.rules_per_ruleset, args.rules))
+        ]
+        for start in range(0, args.rules, args.rules_per_ruleset)
+    ]
+
+    gc.collect()
+    start = time.perf_counter()
+    matcher = RulesetMatcher(
+        host_tags=host_tags,
+        host_paths=host_paths,
+        all_configured_hosts=frozenset(host_names),
+        clusters_of={},
+        nodes_of={},
+    )
+    setup = time.perf_counter() - start
+
+    matching = 0.0
+    matches = 0
+    start = time.perf_counter()
+    for ruleset in rulesets:
+        first = time.perf_counter()
+        matches += len(matcher.get_host_values_all(host_names[0], ruleset, host_labels.__getitem__))
+        matching += time.perf_counter() - first
+        for host_name in host_names[1:]:
+            matches += len(matcher.get_host_values_all(host_name, ruleset, host_labels.__getitem__))
+    total = time.perf_counter() - start
+
+    print(f"hosts:    {args.hosts}")
+    print(f"rules:    {args.rules} in {len(rulesets)} rulesets ({matches} matches)")
+    print(f"setup:    {setup:.3f}s")
+    print(f"matching: {matching:.3f}s")
+    print(f"total:    {total:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
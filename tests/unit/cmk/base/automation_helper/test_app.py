@@ -21,6 +21,7 @@ from cmk.base.automation_helper._app import (
     _reloader_task,
     _State,
     AutomationEngine,
+    CacheStatisticsResponse,
     HealthCheckResponse,
     make_application,
 )
@@ -248,6 +249,22 @@ def test_health_check(cache: Cache) -> None:
     assert HealthCheckResponse.model_validate(resp.json()).last_reload_at < time.time()
 
 
+def test_cache_statistics(cache: Cache) -> None:
+    loaded_config = EMPTY_CONFIG
+    with _make_test_client(
+        _DummyAutomationEngineSuccess(),
+        cache,
+        lambda plugins: LoadingResult(
+            loaded_config=loaded_config, config_cache=ConfigCache(loaded_config)
+        ),
+        lambda ruleset_matcher: None,
+    ) as client:
+        resp = client.get("/caches")
+
+    assert resp.status_code == 200
+    assert "config_cache_hostgroups" in CacheStatisticsResponse.model_validate(resp.json()).caches
+
+
 @pytest.mark.asyncio
 async def test_reloader_single_change(mocker: MockerFixture, cache: Cache) -> None:
     mock_reload_callback = mocker.MagicMock()
@@ -6,7 +6,7 @@
 
 import time
 from collections.abc import Iterable, Mapping
-from typing import Literal
+from typing import Final, Literal
 
 import pytest
 
@@ -18,11 +18,18 @@ from cmk.agent_based.prediction_backend import (
 from cmk.agent_based.v1 import Metric, Result, State
 from cmk.agent_based.v2 import CheckResult
 from cmk.base import checkers
+from cmk.base.sources import Source
+from cmk.ccc.cpu_tracking import CPUTracker
+from cmk.ccc.exceptions import MKTimeout
 from cmk.ccc.hostaddress import HostName
+from cmk.checkengine.checking import make_timing_results
 from cmk.checkengine.checkresults import ServiceCheckResult, SubmittableServiceCheckResult
-from cmk.checkengine.fetcher import HostKey, SourceType
+from cmk.checkengine.fetcher import FetcherType, HostKey, SourceInfo, SourceType
 from cmk.checkengine.parameters import TimespecificParameters, TimespecificParameterSet
 from cmk.checkengine.plugins import CheckPluginName, ConfiguredService
+from cmk.fetchers import Fetcher, Mode, PlainFetcherTrigger
+from cmk.fetchers.filecache import FileCache, FileCacheOptions, NoCache
+from cmk.utils.agentdatatype import AgentRawData
 from cmk.utils.servicename import ServiceName
 
 
@@ -240,3 +247,135 @@ def test_prediction_injection() -> None:
             ("my_reference_metric", *prediction),
         )
     }
+
+
+class _SleepingFetcher(Fetcher[AgentRawData]):
+    def __init__(self, delay: float, payload: bytes) -> None:
+        super().__init__()
+        self.delay: Final = delay
+        self.payload: Final = payload
+        self.done = False
+
+    def open(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def _fetch_from_io(self, mode: Mode) -> AgentRawData:
+        time.sleep(self.delay)
+        if self.payload == b"timeout":
+            raise MKTimeout()
+        self.done = True
+        return AgentRawData(self.payload)
+
+
+class _SleepingSource(Source[AgentRawData]):
+    def __init__(self, ident: str, delay: float) -> None:
+        self.ident: Final = ident
+        self.delay: Final = delay
+        self.fetchers: list[_SleepingFetcher] = []
+
+    def source_info(self) -> SourceInfo:
+        return SourceInfo(
+            HostName("testhost"), None, self.ident, FetcherType.PROGRAM, SourceType.HOST
+        )
+
+    def fetcher(self) -> Fetcher[AgentRawData]:
+        self.fetchers.append(fetcher := _SleepingFetcher(self.delay, self.ident.encode()))
+        return fetcher
+
+    def file_cache(
+        self, *, simulation: bool, file_cache_options: FileCacheOptions
+    ) -> FileCache[AgentRawData]:
+        return NoCache()
+
+
+@pytest.mark.parametrize("max_concurrent_fetchers", [1, 2, 8])
+def test_fetch_all_keeps_source_order(max_concurrent_fetchers: int) -> None:
+    sources = [_SleepingSource(f"source{n}", delay) for n, delay in enumerate((0.03, 0.0, 0.01))]
+
+    fetched = checkers._fetch_all(
+        PlainFetcherTrigger(),
+        sources,
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+        max_concurrent_fetchers=max_concurrent_fetchers,
+    )
+
+    assert [source_info.ident for source_info, _raw_data, _duration in fetched] == [
+        "source0",
+        "source1",
+        "source2",
+    ]
+    assert [raw_data.ok for _source_info, raw_data, _duration in fetched] == [
+        b"source0",
+        b"source1",
+        b"source2",
+    ]
+
+
+def test_fetch_all_concurrently_is_bound_by_slowest_source() -> None:
+    delay = 0.2
+    sources = [_SleepingSource(f"source{n}", delay) for n in range(4)]
+
+    start = time.monotonic()
+    fetched = checkers._fetch_all(
+        PlainFetcherTrigger(),
+        sources,
+        simulation=False,
+        file_cache_options=FileCacheOptions(),
+        mode=Mode.CHECKING,
+        max_concurrent_fetchers=4,
+    )
+    elapsed = time.monotonic() - start
+
+    assert len(fetched) == len(sources)
+    assert elapsed < len(sources) * delay
+    assert all(duration.process.elapsed >= delay * 0.9 for _si, _rd, duration in fetched)
+
+
+def test_fetch_all_waits_for_running_fetchers_when_interrupted() -> None:
+    timeout, slow = _SleepingSource("timeout", 0.0), _SleepingSource("slow", 0.2)
+
+    with pytest.raises(MKTimeout):
+        checkers._fetch_all(
+            PlainFetcherTrigger(),
+            [timeout, slow],
+            simulation=False,
+            file_cache_options=FileCacheOptions(),
+            mode=Mode.CHECKING,
+            max_concurrent_fetchers=2,
+        )
+
+    assert [f.done for f in slow.fetchers] == [True]
+
+
+def test_timing_results_count_overlapping_fetchers_once() -> None:
+    delay = 0.2
+    sources = [_SleepingSource(f"source{n}", delay) for n in range(2)]
+
+    with CPUTracker(lambda _msg: None) as tracker:
+        fetched = checkers._fetch_all(
+            PlainFetcherTrigger(),
+            sources,
+            simulation=False,
+            file_cache_options=FileCacheOptions(),
+            mode=Mode.CHECKING,
+            max_concurrent_fetchers=2,
+        )
+
+    timing = make_timing_results(
+        tracker.duration,
+        tuple((source_info, duration) for source_info, _raw_data, duration in fetched),
+        perfdata_with_times=True,
+    )
+
+    metrics = dict(m.split("=") for m in timing.metrics)
+    assert float(metrics["execution_time"]) == pytest.approx(
+        tracker.duration.process.elapsed, abs=1e-3
+    )
+    assert float(metrics["execution_time"]) < len(sources) * delay
+    # the breakdown still covers all sources
+    assert float(metrics["cmk_time_ds"]) >= len(sources) * delay * 0.9
@@ -695,6 +695,32 @@ def test_is_all_special_agents_host(
     assert ts.apply(monkeypatch).computed_datasources(hostname).is_all_special_agents_host is result
 
 
+@pytest.mark.parametrize(
+    "hostname, result",
+    [
+        (HostName("testhost1"), 1),
+        (HostName("testhost2"), 4),
+    ],
+)
+def test_config_cache_max_concurrent_fetchers(
+    monkeypatch: MonkeyPatch, hostname: HostName, result: int
+) -> None:
+    ts = Scenario()
+    ts.add_host(hostname)
+    ts.set_ruleset(
+        "max_concurrent_fetchers",
+        [
+            {
+                "id": "01",
+                "condition": {"host_name": [HostName("testhost2")]},
+                "value": 4,
+                "options": {},
+            }
+        ],
+    )
+    assert ts.apply(monkeypatch).max_concurrent_fetchers(hostname) == result
+
+
 @pytest.mark.parametrize(
     "hostname, result",
     [
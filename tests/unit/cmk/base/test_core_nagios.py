@@ -22,6 +22,7 @@ import cmk.ccc.version as cmk_version
 from cmk.base import config
 from cmk.base.core_nagios._create_config import (
     _format_nagios_object,
+    create_config,
     create_nagios_config_commands,
     create_nagios_host_spec,
     create_nagios_servicedefs,
@@ -30,6 +31,7 @@ from cmk.base.core_nagios._create_config import (
 from cmk.base.core_nagios._precompile_host_checks import (
     dump_precompiled_hostcheck,
     HostCheckStore,
+    precompile_hostchecks,
     PrecompileMode,
 )
 from cmk.ccc.hostaddress import HostAddress, HostName
@@ -43,6 +45,7 @@ from cmk.utils.labels import ABCLabelConfig, LabelManager, Labels
 from cmk.utils.servicename import ServiceName
 from tests.testlib.unit.base_configuration_scenario import Scenario
 from tests.unit.cmk.base.empty_config import EMPTY_CONFIG
+from tests.unit.mocks_and_helpers import DummyLicensingHandler
 
 
 def ip_address_of_never_called(
@@ -442,7 +445,7 @@ def _make_plugins_for_test() -> AgentBasedPlugins:
     )
 
 
-def test_dump_precompiled_hostcheck(monkeypatch: MonkeyPatch, config_path: Path) -> None:
+def test_dump_precompiled_hostcheck(monkeypatch: MonkeyPatch) -> None:
     hostname = HostName("localhost")
     ts = Scenario()
     ts.add_host(hostname)
@@ -455,7 +458,6 @@ def test_dump_precompiled_hostcheck(monkeypatch: MonkeyPatch, config_path: Path)
     host_check = dump_precompiled_hostcheck(
         config_cache,
         config_cache.make_passive_service_name_config(),
-        config_path,
         hostname,
         get_ip_stack_config=lambda *a: ip_lookup.IPStackConfig.IPv4,
         plugins=_make_plugins_for_test(),
@@ -471,6 +473,47 @@ def test_dump_precompiled_hostcheck(monkeypatch: MonkeyPatch, config_path: Path)
         assert False, f"Execution failed with error: {e}"
 
 
+def test_precompile_hostchecks_reuses_unchanged_hosts(monkeypatch: MonkeyPatch) -> None:
+    ts = Scenario()
+    for hostname in (HostName("unchanged"), HostName("changed")):
+        ts.add_host(hostname)
+        ts.set_autochecks(hostname, [AutocheckEntry(CheckPluginName("uptime"), None, {}, {})])
+    config_cache = ts.apply(monkeypatch)
+
+    def precompile(config_path: VersionedConfigPath, address: str) -> None:
+        with config_path.create(is_cmc=False):
+            precompile_hostchecks(
+                Path(config_path),
+                config_cache,
+                config_cache.make_passive_service_name_config(),
+                _make_plugins_for_test(),
+                {},
+                get_ip_stack_config=lambda *a: ip_lookup.IPStackConfig.IPv4,
+                ip_address_of=lambda host_name, *a: HostAddress(
+                    address if host_name == "changed" else "1.2.3.4"
+                ),
+                precompile_mode=PrecompileMode.INSTANT,
+                workers=2,
+            )
+
+    precompile(VersionedConfigPath(1), "1.2.3.5")
+    precompile(VersionedConfigPath(2), "1.2.3.6")
+
+    def inode(config_path: VersionedConfigPath, hostname: str) -> int:
+        return (
+            HostCheckStore.host_check_file_path(Path(config_path), HostName(hostname)).stat().st_ino
+        )
+
+    assert inode(VersionedConfigPath(2), "unchanged") == inode(VersionedConfigPath(1), "unchanged")
+    assert inode(VersionedConfigPath(2), "changed") != inode(VersionedConfigPath(1), "changed")
+    assert (
+        "1.2.3.6"
+        in HostCheckStore.host_check_source_file_path(
+            Path(VersionedConfigPath(2)), HostName("changed")
+        ).read_text()
+    )
+
+
 MOCK_PLUGIN = ActiveCheckConfig(
     name="my_active_check",
     parameter_parser=lambda x: x,
@@ -1029,3 +1072,51 @@ def test_create_nagios_config_commands(
 
     assert license_counter["services"] == 1
     assert outfile.getvalue() == expected_result
+
+
+def test_create_config_in_parallel_is_identical(
+    monkeypatch: MonkeyPatch, config_path: Path
+) -> None:
+    ts = Scenario()
+    hostnames = [HostName(f"host{n:02}") for n in range(20)]
+    for hostname in hostnames:
+        ts.add_host(hostname)
+    ts.set_option(
+        "host_check_commands",
+        [
+            {"id": "01", "condition": {"host_name": ["host03", "host11"]}, "value": "agent"},
+            {
+                "id": "02",
+                "condition": {"host_name": ["host07", "host19"]},
+                "value": ("service", "Uptime"),
+            },
+        ],
+    )
+    config_cache = ts.apply(monkeypatch)
+
+    def create(workers: int) -> tuple[str, list[tuple[str, str]]]:
+        outfile = io.StringIO()
+        create_config(
+            outfile,
+            config_path / str(workers),
+            config_cache,
+            config_cache.make_passive_service_name_config(),
+            {},
+            hostnames=hostnames,
+            licensing_handler=DummyLicensingHandler(),
+            passwords={},
+            get_ip_stack_config=lambda *a: ip_lookup.IPStackConfig.IPv4,
+            default_address_family=lambda *a: socket.AddressFamily.AF_INET,
+            ip_address_of=ip_address_of_return_local,
+            service_depends_on=lambda *a: (),
+            workers=workers,
+        )
+        notify_host_files = sorted(
+            (p.name, p.read_text())
+            for p in (config_path / str(workers) / "notify" / "host_config").iterdir()
+        )
+        return outfile.getvalue(), notify_host_files
+
+    sequential = create(1)
+    assert "check-mk-host-custom-4" in sequential[0]
+    assert create(3) == sequential
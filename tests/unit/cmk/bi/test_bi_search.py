@@ -6,7 +6,7 @@
 import pytest
 
 from cmk.bi.search import BIEmptySearch, BIFixedArgumentsSearch, BIHostSearch, BIServiceSearch
-from cmk.bi.searcher import BISearcher
+from cmk.bi.searcher import BISearcher, host_fingerprints, SearchDependencies
 
 
 def test_empty_search(bi_searcher: BISearcher) -> None:
@@ -189,3 +189,71 @@ def test_service_search(
     search = BIServiceSearch(schema_config)
     results = search.execute({}, bi_searcher_with_sample_config)
     assert len(results) == expected_matches
+
+
+def _clone_tag_conditions() -> dict:
+    return BIHostSearch.schema()().dump({"conditions": {"host_tags": {"clone-tag": "clone-tag"}}})[
+        "conditions"
+    ]
+
+
+def test_record_dependencies(bi_searcher_with_sample_config: BISearcher) -> None:
+    bi_searcher = bi_searcher_with_sample_config
+    conditions = _clone_tag_conditions()
+
+    with bi_searcher.record_dependencies() as dependencies:
+        bi_searcher.search_hosts(conditions)
+        bi_searcher.search_host_names("nothing.*")
+        assert "missing" not in bi_searcher.hosts
+
+    assert dependencies == SearchDependencies(
+        host_names={"heute_clone", "missing"},
+        host_conditions=[conditions],
+        host_name_patterns=["nothing.*"],
+        all_hosts=False,
+    )
+    assert SearchDependencies.deserialize(dependencies.serialize()) == dependencies
+
+
+def test_record_dependencies_iterating_all_hosts(
+    bi_searcher_with_sample_config: BISearcher,
+) -> None:
+    with bi_searcher_with_sample_config.record_dependencies() as dependencies:
+        list(bi_searcher_with_sample_config.hosts.values())
+
+    assert dependencies.all_hosts
+
+
+def test_dependencies_affected_by(bi_searcher_with_sample_config: BISearcher) -> None:
+    bi_searcher = bi_searcher_with_sample_config
+    with bi_searcher.record_dependencies() as dependencies:
+        bi_searcher.search_hosts(_clone_tag_conditions())
+
+    clone = bi_searcher.hosts["heute_clone"]
+    hosts = {
+        "new_clone": clone._replace(name="new_clone"),
+        "new_host": clone._replace(name="new_host", tags=set()),
+    }
+
+    assert not dependencies.affected_by([], hosts)
+    assert not dependencies.affected_by(["new_host"], hosts)
+    assert not dependencies.affected_by(["vanished_host"], hosts)
+    assert dependencies.affected_by(["new_clone"], hosts)
+    # matched before, it does not matter if it is still there
+    assert dependencies.affected_by(["heute_clone"], hosts)
+
+
+def test_host_fingerprints(bi_searcher_with_sample_config: BISearcher) -> None:
+    hosts = bi_searcher_with_sample_config.hosts
+    fingerprints = host_fingerprints(hosts)
+    changed = {
+        **hosts,
+        "heute": hosts["heute"]._replace(labels={**hosts["heute"].labels, "new": "label"}),
+    }
+
+    assert host_fingerprints(dict(reversed(hosts.items()))) == fingerprints
+    assert {
+        host_name
+        for host_name, fingerprint in host_fingerprints(changed).items()
+        if fingerprints[host_name] != fingerprint
+    } == {"heute"}
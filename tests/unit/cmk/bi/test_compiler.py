@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import time
+from pathlib import Path
+
+import pytest
+from fakeredis import FakeRedis
+
+from livestatus import LivestatusResponse
+
+from cmk.bi.compiler import BICompiler
+from cmk.bi.data_fetcher import BIStructureFetcher
+from cmk.bi.filesystem import BIFileSystem
+from cmk.bi.lib import SitesCallback
+from cmk.ccc.hostaddress import HostName
+from cmk.ccc.site import SiteId
+from tests.unit.cmk.bi.bi_mocks import MockBIAggregationPack
+
+from .bi_test_data import sample_config
+
+_SITES_CALLBACK = SitesCallback(lambda: [], lambda *args, **kwargs: LivestatusResponse([]), str)
+
+
+@pytest.fixture
+def compiler(fs: BIFileSystem) -> BICompiler:
+    compiler = BICompiler(Path("unused"), _SITES_CALLBACK, fs, FakeRedis())
+    compiler._bi_packs = MockBIAggregationPack(sample_config.bi_packs_config)
+    _set_hosts(compiler, sample_config.bi_structure_states)
+    return compiler
+
+
+def _set_hosts(compiler: BICompiler, structure_states: dict) -> None:
+    structure_fetcher = BIStructureFetcher(_SITES_CALLBACK, compiler._fs)
+    structure_fetcher.add_site_data(SiteId("heute"), structure_states)
+    compiler.bi_searcher.set_hosts(structure_fetcher.hosts)
+
+
+def _compile(compiler: BICompiler, *, config_changed: bool) -> list[str]:
+    compiled_ids, dependencies = compiler._compile_aggregations(config_changed=config_changed)
+    for aggr_id in compiled_ids:
+        compiler._aggregation_store.save(compiler.compiled_aggregations[aggr_id])
+    compiler._dependency_store.save(dependencies)
+    return compiled_ids
+
+
+def test_compile_aggregations_without_changes(compiler: BICompiler) -> None:
+    assert _compile(compiler, config_changed=True) == ["default_aggregation"]
+    branches = compiler.compiled_aggregations["default_aggregation"].branches
+
+    assert not _compile(compiler, config_changed=False)
+    assert [
+        b.properties.title for b in compiler.compiled_aggregations["default_aggregation"].branches
+    ] == [b.properties.title for b in branches]
+
+
+def test_compile_aggregations_with_changed_host(compiler: BICompiler) -> None:
+    _compile(compiler, config_changed=True)
+
+    _set_hosts(
+        compiler,
+        {
+            **sample_config.bi_structure_states,
+            HostName("new_host"): (
+                *sample_config.bi_structure_states[HostName("heute")][:-1],
+                HostName("new_host"),
+            ),
+        },
+    )
+
+    assert _compile(compiler, config_changed=False) == ["default_aggregation"]
+    assert len(compiler.compiled_aggregations["default_aggregation"].branches) == 3
+
+
+def test_compile_aggregations_with_changed_config(compiler: BICompiler) -> None:
+    _compile(compiler, config_changed=True)
+
+    assert _compile(compiler, config_changed=True) == ["default_aggregation"]
+
+
+def test_load_compiled_aggregations_recompiles_stale_ones(
+    compiler: BICompiler, fs: BIFileSystem
+) -> None:
+    _compile(compiler, config_changed=True)
+    compiler._metadata_store.update_last_compilation(time.time())
+    (path,) = fs.cache.compiled_aggregations.iterdir()
+    data = bytearray(path.read_bytes())
+    data[4:6] = (1).to_bytes(2, "big")  # An unknown format version
+    path.write_bytes(data)
+
+    fresh_compiler = BICompiler(Path("unused"), _SITES_CALLBACK, fs, FakeRedis())
+    fresh_compiler._bi_packs = compiler._bi_packs
+    fresh_compiler.load_compiled_aggregations()
+
+    assert list(fresh_compiler.compiled_aggregations) == ["default_aggregation"]
+    assert fresh_compiler._aggregation_store.get("default_aggregation").id == "default_aggregation"
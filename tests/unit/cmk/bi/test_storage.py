@@ -3,16 +3,22 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import pickle
+
 import pytest
 from fakeredis import FakeRedis
 
 from cmk.bi.aggregation_functions import BIAggregationFunctionWorst
 from cmk.bi.filesystem import BIFileSystem
 from cmk.bi.lib import BIAggregationComputationOptions, BIAggregationGroups
+from cmk.bi.rule import BIRule
 from cmk.bi.rule_interface import BIRuleProperties
 from cmk.bi.storage import (
+    AggregationIndex,
+    AggregationIndexStore,
     AggregationNotFound,
     AggregationStore,
+    BranchReference,
     FrozenAggregationStore,
     generate_identifier,
     LookupStore,
@@ -39,6 +45,56 @@ class TestAggregationStore:
         with pytest.raises(AggregationNotFound):
             aggregation_store.get_by_identifier(generate_identifier("does-not-exist-in-store"))
 
+    def test_save_and_get_branches(self, aggregation_store: AggregationStore) -> None:
+        aggregation_store.save(
+            _build_aggregation(
+                "myaggregation",
+                branches=[_build_branch("Host heute"), _build_branch("Host gestern", "gestern")],
+            )
+        )
+
+        aggregation = aggregation_store.get("myaggregation")
+        assert aggregation.groups.names == ["groupA", "groupB"]
+        assert aggregation.branch_titles == ["Host heute", "Host gestern"]
+        assert [b.properties.title for b in aggregation.branches] == ["Host heute", "Host gestern"]
+        assert aggregation.branches[1].required_hosts == [("gestern", "gestern")]
+
+    def test_get_materializes_branches_on_demand(
+        self, aggregation_store: AggregationStore, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        aggregation_store.save(
+            _build_aggregation(
+                "myaggregation",
+                branches=[_build_branch("Host heute"), _build_branch("Host gestern", "gestern")],
+            )
+        )
+        materialized = []
+        create_tree_from_schema = BIRule.create_tree_from_schema
+        monkeypatch.setattr(
+            BIRule,
+            "create_tree_from_schema",
+            lambda schema: (
+                materialized.append(schema["properties"]["title"])
+                or create_tree_from_schema(schema)
+            ),
+        )
+
+        aggregation = aggregation_store.get("myaggregation")
+        assert not materialized
+
+        branches = aggregation.candidate_branches(host_names=[HostName("gestern")])
+        assert [b.properties.title for b in branches] == ["Host gestern"]
+        assert aggregation.branch_by_title("Host gestern") is branches[0]
+        assert materialized == ["Host gestern"]
+
+    def test_get_former_format(self, aggregation_store: AggregationStore) -> None:
+        aggregation = _build_aggregation("myaggregation", branches=[_build_branch("Host heute")])
+        (
+            aggregation_store.fs_cache.compiled_aggregations / generate_identifier("myaggregation")
+        ).write_bytes(pickle.dumps(aggregation.serialize()))
+
+        assert aggregation_store.get("myaggregation").branch_titles == ["Host heute"]
+
     def test_yield_stored_identifiers(self, aggregation_store: AggregationStore) -> None:
         aggregation_store.save(heute_aggregation := _build_aggregation("heute"))
         aggregation_store.save(gestern_aggregation := _build_aggregation("gestern"))
@@ -125,6 +181,48 @@ class TestMetadataStore:
         assert metadata_store.get_last_config_change() > 0.0
 
 
+class TestAggregationIndex:
+    @pytest.fixture
+    def index(self) -> AggregationIndex:
+        return AggregationIndex.build(
+            {
+                "heute": _build_aggregation(
+                    "heute",
+                    branches=[
+                        _build_branch("Host heute"),
+                        _build_branch("Host gestern", "gestern"),
+                    ],
+                ),
+                "morgen": _build_aggregation(
+                    "morgen", branches=[_build_branch("Host morgen", "morgen")]
+                ),
+            }
+        )
+
+    def test_branches_of_hosts(self, index: AggregationIndex) -> None:
+        assert index.branches(
+            host_names=[HostName("gestern"), HostName("morgen")], services=[]
+        ) == {
+            BranchReference("heute", "Host gestern"),
+            BranchReference("morgen", "Host morgen"),
+        }
+
+    def test_branches_of_unknown_host(self, index: AggregationIndex) -> None:
+        assert not index.branches(host_names=[HostName("unknown")], services=[])
+
+    def test_aggregations_of_groups(self, index: AggregationIndex) -> None:
+        assert index.aggregations_of_groups(["groupA", "path/group/b"]) == {"heute", "morgen"}
+        assert not index.aggregations_of_groups(["groupC"])
+
+    def test_save_and_get(self, index: AggregationIndex, fs: BIFileSystem) -> None:
+        index_store = AggregationIndexStore(fs.cache)
+        assert index_store.get() is None
+
+        index_store.save(index)
+
+        assert index_store.get() == index
+
+
 class TestLookupStore:
     @pytest.fixture
     def lookup_store(self) -> LookupStore:
@@ -167,12 +265,12 @@ def test_identifier_creates_consistent_ids_based_on_input() -> None:
     assert generate_identifier("heute") == generate_identifier("heute")
 
 
-def _build_branch(title: str) -> BICompiledRule:
+def _build_branch(title: str, host_name: str = "heute") -> BICompiledRule:
     return BICompiledRule(
         rule_id="hostcheck",
         pack_id="default",
-        nodes=[BICompiledLeaf(host_name=HostName("heute"), site_id="heute")],
-        required_hosts=[(SiteId("heute"), HostName("heute"))],
+        nodes=[BICompiledLeaf(host_name=HostName(host_name), site_id=host_name)],
+        required_hosts=[(SiteId(host_name), HostName(host_name))],
         properties=BIRuleProperties(
             {"title": title, "comment": "", "docu_url": "", "icon": "", "state_messages": {}}
         ),
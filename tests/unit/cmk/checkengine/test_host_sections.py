@@ -63,6 +63,28 @@ class TestGroupByHost:
         assert host_sections_1 == HS(parse(RAW_1))
         assert host_sections_2 == HS(parse(RAW_2))
 
+    def test_sections_are_merged_on_access(self) -> None:
+        class _Sections(dict[SectionName, list[list[str]]]):
+            accessed: list[SectionName] = []
+
+            def __getitem__(self, key: SectionName) -> list[list[str]]:
+                self.accessed.append(key)
+                return super().__getitem__(key)
+
+        host_key = HostKey(HostName("testhost"), SourceType.HOST)
+        grouped = group_by_host(
+            [
+                (host_key, HS(_Sections(parse([("section0", "first"), ("section1", "second")])))),
+                (host_key, HS(_Sections(parse([("section0", "third")])))),
+            ],
+            _log,
+        )[host_key].sections
+
+        assert list(grouped) == [SectionName("section0"), SectionName("section1")]
+        assert not _Sections.accessed
+        assert grouped[SectionName("section0")] == [["first"], ["third"]]
+        assert _Sections.accessed == [SectionName("section0"), SectionName("section0")]
+
     def test_piggybacked_raw_noop(self):
         RAW: TRAW = []
         PB = {HostName("piggybacked"): [b"aaa", b"bbb", b"ccc"]}
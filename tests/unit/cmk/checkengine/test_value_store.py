@@ -70,6 +70,76 @@ class TestAllValueStoresStore:
             (HostName("host1"), "service2", None): {"key": "new_value2"},
         }
 
+    def test_update_appends_changes(self, tmp_path: Path) -> None:
+        file = tmp_path / "file"
+        avss = self._get_avss(file)
+        avss.update({})  # rewrites the legacy format
+        lines = file.read_text().splitlines()
+
+        avss.update(
+            {
+                (HostName("host1"), "service1", "item"): {"key": "new_value1"},
+                (HostName("host1"), "service2", None): {"key": "value2"},
+            }
+        )
+
+        assert file.read_text().splitlines() == [
+            *lines,
+            '["host1", "service1", "item"]\t{"key": "new_value1"}',
+        ]
+        assert value_store.AllValueStoresStore(file, log_debug=lambda x: None).load() == {
+            (HostName("host1"), "service1", "item"): {"key": "new_value1"},
+            (HostName("host1"), "service2", None): {"key": "value2"},
+        }
+
+    def test_update_compacts(self, tmp_path: Path) -> None:
+        file = tmp_path / "file"
+        avss = self._get_avss(file)
+        for n in range(10):
+            avss.update({(HostName("host1"), "service1", "item"): {"key": str(n)}})
+
+        assert len(file.read_text().splitlines()) <= 6
+        assert value_store.AllValueStoresStore(file, log_debug=lambda x: None).load() == {
+            (HostName("host1"), "service1", "item"): {"key": "9"},
+            (HostName("host1"), "service2", None): {"key": "value2"},
+        }
+
+    def test_load_ignores_incomplete_record(self, tmp_path: Path) -> None:
+        file = tmp_path / "file"
+        file.write_text(
+            '["host1", "service1", "item"]\t{"key": "value1"}\n'
+            '["host1", "service1", "item"]\t{"key": "val'
+        )
+        assert value_store.AllValueStoresStore(file, log_debug=lambda x: None).load() == {
+            (HostName("host1"), "service1", "item"): {"key": "value1"},
+        }
+
+    def test_load_skips_damaged_records(self, tmp_path: Path) -> None:
+        file = tmp_path / "file"
+        file.write_text(
+            '["host1", "service1", "item"]\t{"key": "val'
+            '["host1", "service2", null]\t{"key": "value2"}\n'
+            '["host1", "service1", "item"]\t{"key": "value1"}\n'
+        )
+        assert value_store.AllValueStoresStore(file, log_debug=lambda x: None).load() == {
+            (HostName("host1"), "service1", "item"): {"key": "value1"},
+        }
+
+    def test_update_does_not_append_to_incomplete_record(self, tmp_path: Path) -> None:
+        file = tmp_path / "file"
+        file.write_text(
+            '["host1", "service1", "item"]\t{"key": "value1"}\n'
+            '["host1", "service1", "item"]\t{"key": "val'
+        )
+        value_store.AllValueStoresStore(file, log_debug=lambda x: None).update(
+            {(HostName("host1"), "service2", None): {"key": "value2"}}
+        )
+
+        assert file.read_text().splitlines() == [
+            '["host1", "service1", "item"]\t{"key": "value1"}',
+            '["host1", "service2", null]\t{"key": "value2"}',
+        ]
+
 
 class _BrokenRepr(str):
     def __repr__(self) -> str:
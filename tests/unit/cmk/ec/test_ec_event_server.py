@@ -4,6 +4,9 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import logging
+from collections.abc import Sequence
+
+import pytest
 
 import cmk.ec.export as ec
 from cmk.ccc.hostaddress import HostName
@@ -59,3 +62,21 @@ def test_event_rewrite(
 
     assert event["text"] == "SUPERWARN"
     assert event["state"] == 2
+
+
+def test_process_events_in_batches(
+    event_server: EventServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    batches: list[Sequence[ec.Event]] = []
+    monkeypatch.setattr(event_server, "process_potential_events", batches.append)
+    monkeypatch.setitem(event_server._config, "datagram_batch_size", 2)
+
+    event_server.process_potential_event_instrumented(
+        iter([new_event(ec.Event(text=f"message {n}")) for n in range(5)])
+    )
+
+    assert [[event["text"] for event in batch] for batch in batches] == [
+        ["message 0", "message 1"],
+        ["message 2", "message 3"],
+        ["message 4"],
+    ]
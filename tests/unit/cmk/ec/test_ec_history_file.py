@@ -7,6 +7,7 @@
 import datetime
 import logging
 import shlex
+from collections.abc import Iterable
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
@@ -22,7 +23,7 @@ from cmk.ec.history_file import (
     FileHistory,
     parse_history_file,
 )
-from cmk.ec.main import StatusTableHistory
+from cmk.ec.main import StatusTableEvents, StatusTableHistory
 from cmk.ec.query import QueryFilter, QueryGET, StatusTable
 
 
@@ -55,6 +56,93 @@ def test_file_add_get(history: FileHistory) -> None:
     assert row[column_index("event_host")] == "ABC1"
 
 
+def test_file_batch_writes_on_exit(history: FileHistory) -> None:
+    """Entries added within a batch are only visible once the batch is left."""
+    logger = logging.getLogger("cmk.mkeventd")
+
+    def get_table(name: str) -> StatusTable:
+        assert name == "history"
+        return StatusTableHistory(logger, history)
+
+    def num_entries() -> int:
+        return len(list(history.get(QueryGET(get_table, ["GET history"], logger))))
+
+    with history.batch():
+        history.add(event=ec.Event(host=HostName("ABC1"), text="Event1 text"), what="NEW")
+        with history.batch():
+            history.add(event=ec.Event(host=HostName("ABC2"), text="Event2 text"), what="NEW")
+        assert num_entries() == 0
+    assert num_entries() == 2
+
+
+def _get_lines(history: FileHistory, *headers: str) -> list[tuple[int, int]]:
+    logger = logging.getLogger("cmk.mkeventd")
+
+    def get_table(name: str) -> StatusTable:
+        assert name == "history"
+        return StatusTableHistory(logger, history)
+
+    column_index = get_table("history").column_names.index
+    return [
+        (row[column_index("history_line")], row[column_index("event_id")])  # type: ignore[misc]
+        for row in history.get(QueryGET(get_table, ["GET history", *headers], logger))
+    ]
+
+
+def _add_events(history: FileHistory, ids: Iterable[int]) -> None:
+    for eid in ids:
+        history.add(
+            event=ec.Event(id=eid, host=HostName(f"host{eid % 3}"), rule_id=f"rule{eid % 2}"),
+            what="NEW",
+        )
+
+
+def test_file_indexed_get_matches_grep_get(history: FileHistory) -> None:
+    _add_events(history, range(12))
+
+    indexed = _get_lines(history, "Filter: event_host = host1")
+    assert indexed == [(11, 10), (8, 7), (5, 4), (2, 1)]
+    assert indexed == _get_lines(history, "Filter: event_host ~ host1")
+    assert _get_lines(history, "Filter: event_host = host1", "Filter: event_rule_id = rule0") == [
+        (11, 10),
+        (5, 4),
+    ]
+
+
+def test_file_index_is_caught_up(
+    history: FileHistory, settings: ec.Settings, config: Config
+) -> None:
+    _add_events(history, range(6))
+    # Simulate a crash after writing the logfile, but before writing the index
+    (index_path,) = settings.paths.history_dir.value.glob("*.idx")
+    index_path.write_bytes(b"".join(index_path.read_bytes().splitlines(True)[:2]))
+    history = FileHistory(
+        settings,
+        config,
+        logging.getLogger("cmk.mkeventd"),
+        StatusTableEvents.columns,
+        StatusTableHistory.columns,
+    )
+    _add_events(history, range(6, 9))
+
+    assert _get_lines(history, "Filter: event_host = host1") == [(8, 7), (5, 4), (2, 1)]
+    _add_events(history, range(9, 11))
+    assert _get_lines(history, "Filter: event_host = host1") == [(11, 10), (8, 7), (5, 4), (2, 1)]
+
+
+def test_file_damaged_index_falls_back_to_scan(history: FileHistory, settings: ec.Settings) -> None:
+    _add_events(history, range(6))
+    (index_path,) = settings.paths.history_dir.value.glob("*.idx")
+    entries = index_path.read_bytes().split(b"\n")
+    entries[4] = b"garbled"
+    index_path.write_bytes(b"\n".join(entries))
+
+    assert _get_lines(history, "Filter: event_host = host1") == [(5, 4), (2, 1)]
+    # The index is rebuilt with the next query
+    assert _get_lines(history, "Filter: event_host = host1") == [(5, 4), (2, 1)]
+    assert b"garbled" not in index_path.read_bytes()
+
+
 def test_current_history_period(config: Config) -> None:
     """timestamp of the beginning of the current history period correctly returned."""
     with time_machine.travel(datetime.datetime.fromtimestamp(1550000000.0, tz=ZoneInfo("CET"))):
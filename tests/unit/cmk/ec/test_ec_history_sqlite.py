@@ -207,6 +207,7 @@ def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
     event2 = ec.Event(host=HostName("ABC2"), text="Event2 text", core_host=HostName("ABC"))
     history_sqlite.add(event=event1, what="NEW")
     history_sqlite.add(event=event2, what="NEW")
+    history_sqlite.write_pending()
 
     with history_sqlite.conn as connection:
         cur = connection.cursor()
@@ -217,3 +218,65 @@ def test_housekeeping(history_sqlite: SQLiteHistory) -> None:
         history_sqlite.housekeeping()
         cur.execute("SELECT count(*) FROM history;")
         assert cur.fetchone()["count(*)"] == 1
+
+
+def _count_rows(history_sqlite: SQLiteHistory) -> int:
+    with history_sqlite.conn as connection:
+        return connection.execute("SELECT count(*) FROM history;").fetchone()[0]
+
+
+def test_add_is_buffered_until_buffer_is_full(history_sqlite: SQLiteHistory) -> None:
+    history_sqlite._config = history_sqlite._config | {
+        "sqlite_write_buffer_size": 3,
+        "sqlite_write_buffer_age": 3600,
+    }
+    event = ec.Event(host=HostName("ABC1"), text="Event1 text", core_host=HostName("ABC"))
+
+    history_sqlite.add(event=event, what="NEW")
+    history_sqlite.add(event=event, what="NEW")
+    assert _count_rows(history_sqlite) == 0
+
+    history_sqlite.add(event=event, what="NEW")
+    assert _count_rows(history_sqlite) == 3
+
+
+def test_get_sees_buffered_entries(history_sqlite: SQLiteHistory) -> None:
+    history_sqlite._config = history_sqlite._config | {"sqlite_write_buffer_age": 3600}
+    history_sqlite.add(
+        event=ec.Event(host=HostName("ABC1"), text="Event1 text", core_host=HostName("ABC")),
+        what="NEW",
+    )
+    logger = logging.getLogger("cmk.mkeventd")
+
+    def get_table(name: str) -> StatusTable:
+        assert name == "history"
+        return StatusTableHistory(logger, history_sqlite)
+
+    (row,) = history_sqlite.get(QueryGET(get_table, ["GET history"], logger))
+    assert row["host"] == "ABC1"  # type: ignore[call-overload]
+
+
+def test_flush_drops_buffered_entries(history_sqlite: SQLiteHistory) -> None:
+    history_sqlite._config = history_sqlite._config | {"sqlite_write_buffer_age": 3600}
+    event = ec.Event(host=HostName("ABC1"), text="Event1 text", core_host=HostName("ABC"))
+    history_sqlite.add(event=event, what="NEW")
+    history_sqlite.write_pending()
+    history_sqlite.add(event=event, what="NEW")
+
+    history_sqlite.flush()
+    history_sqlite.write_pending()
+
+    assert _count_rows(history_sqlite) == 0
+
+
+def test_buffered_entries_are_written_after_max_age(history_sqlite: SQLiteHistory) -> None:
+    history_sqlite._config = history_sqlite._config | {"sqlite_write_buffer_age": 0}
+    history_sqlite.add(
+        event=ec.Event(host=HostName("ABC1"), text="Event1 text", core_host=HostName("ABC")),
+        what="NEW",
+    )
+    timer = history_sqlite._pending_timer
+    assert timer is not None
+    timer.join()
+
+    assert _count_rows(history_sqlite) == 1
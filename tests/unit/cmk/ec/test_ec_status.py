@@ -3,13 +3,14 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import logging
 import time
 
 import pytest
 
 import cmk.ec.export as ec
 from cmk.ccc.hostaddress import HostName
-from cmk.ec.main import EventStatus, StatusServer
+from cmk.ec.main import EventServer, EventStatus, StatusServer, StatusTableEvents
 from tests.unit.cmk.ec.helpers import FakeStatusSocket, new_event
 
 
@@ -59,6 +60,94 @@ def test_mkevent_check_query_perf(
     assert duration < 0.2
 
 
+@pytest.mark.parametrize("num_open_events", [1000, 10000, 50000])
+def test_cancel_and_count_perf(
+    event_status: EventStatus, event_server: EventServer, num_open_events: int
+) -> None:
+    """Cancelling and counting must not depend on the number of unrelated open events"""
+    counting_event = new_event(
+        {
+            "id": num_open_events,
+            "rule_id": "count",
+            "phase": "counting",
+            "host": HostName("abc"),
+            "core_host": None,
+            "host_in_downtime": False,
+        }
+    )
+    event_status.unpack_status(
+        {
+            "next_event_id": num_open_events + 1,
+            "events": [
+                *(
+                    new_event(
+                        {
+                            "id": num,
+                            "rule_id": f"rule-{num % 100}",
+                            "host": HostName(f"heute-{num}"),
+                            "core_host": HostName(f"heute-{num}"),
+                        }
+                    )
+                    for num in range(1, num_open_events)
+                ),
+                counting_event,
+            ],
+            "rule_stats": {},
+            "interval_starts": {},
+        }
+    )
+    count = ec.Count(
+        count=1000000,
+        period=3600,
+        algorithm="interval",
+        count_duration=None,
+        count_ack=False,
+        separate_host=True,
+        separate_application=True,
+        separate_match_groups=True,
+    )
+    cancel_rule = ec.Rule(id="cancel")
+    iterations = 200
+
+    before = time.time()
+
+    for _num in range(iterations):
+        event_status.new_event(
+            new_event({"rule_id": "cancel", "host": HostName("abc"), "core_host": None})
+        )
+        event_status.cancel_events(
+            event_server,
+            StatusTableEvents.columns,
+            new_event({"rule_id": "cancel", "host": HostName("abc"), "core_host": None}),
+            {"match_groups_message_ok": ()},
+            cancel_rule,
+        )
+        event_status.count_event(
+            event_server,
+            new_event(
+                {
+                    "rule_id": "count",
+                    "host": HostName("abc"),
+                    "core_host": None,
+                    "host_in_downtime": False,
+                }
+            ),
+            count,
+        )
+
+    duration = time.time() - before
+
+    assert event_status.num_existing_events == num_open_events
+    assert counting_event["count"] == iterations + 1
+    assert not event_status.events_of_rule("cancel")
+    logging.getLogger(__name__).info(
+        "%d open events: %.0f cancel/count operations per second",
+        num_open_events,
+        iterations / duration,
+    )
+    assert duration < 1.0
+
+
 @pytest.mark.parametrize(
     "event, status_socket, is_match",
     [
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# Copyright (C) 2019 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import pytest
+
+import cmk.ec.export as ec
+from cmk.ccc.hostaddress import HostName
+from cmk.ec.event_store import EventStore
+from tests.unit.cmk.ec.helpers import new_event
+
+
+def _event(eid: int, rule_id: str, host: str, core_host: str | None = None) -> ec.Event:
+    return new_event(
+        ec.Event(
+            id=eid,
+            rule_id=rule_id,
+            host=HostName(host),
+            core_host=None if core_host is None else HostName(core_host),
+        )
+    )
+
+
+def test_lookups() -> None:
+    events = [
+        _event(1, "r1", "h1", "h1"),
+        _event(2, "r2", "h1", "h1"),
+        _event(3, "r1", "h2"),
+        _event(4, "r1", "h1", "other"),
+    ]
+    store = EventStore(events)
+
+    assert len(store) == 4
+    assert store.to_list() == events
+    assert store.get(3) is events[2]
+    assert store.get(42) is None
+    assert store.oldest() is events[0]
+    assert store.by_rule("r1") == [events[0], events[2], events[3]]
+    assert store.by_rule("unknown") == []
+    assert store.by_host(HostName("h1"), HostName("h1")) == [events[0], events[1]]
+    assert store.by_host_name(HostName("h1")) == [events[0], events[1], events[3]]
+    assert store.count_by_rule("r1") == 3
+    assert store.count_by_host(HostName("h2"), None) == 1
+    assert store.counts_by_rule() == {"r1": 3, "r2": 1}
+
+
+def test_add_duplicate_id() -> None:
+    store = EventStore([_event(1, "r1", "h1")])
+    with pytest.raises(ValueError):
+        store.add(_event(1, "r2", "h2"))
+
+
+def test_remove_cleans_up_indices() -> None:
+    event = _event(1, "r1", "h1")
+    store = EventStore([event, _event(2, "r1", "h2")])
+
+    store.remove(event)
+
+    assert event not in store
+    assert store.get(1) is None
+    assert store.count_by_rule("r1") == 1
+    assert store.counts_by_host() == {(HostName("h2"), None): 1}
+    with pytest.raises(KeyError):
+        store.remove(event)
+
+
+def test_remove_uses_keys_from_insertion() -> None:
+    event = _event(1, "r1", "h1")
+    store = EventStore([event])
+
+    event["host"] = HostName("renamed")
+    store.remove(event)
+
+    assert not store.counts_by_host()
+    assert not store.counts_by_rule()
+
+
+def test_reindex() -> None:
+    event = _event(1, "r1", "h1")
+    store = EventStore([event])
+
+    event["host"] = HostName("renamed")
+    store.reindex(event)
+
+    assert store.counts_by_host() == {(HostName("renamed"), None): 1}
+    assert store.by_host_name(HostName("renamed")) == [event]
+
+
+def test_reindex_keeps_the_order() -> None:
+    events = [_event(1, "r1", "h1"), _event(2, "r2", "h2"), _event(3, "r1", "h1")]
+    store = EventStore(events)
+
+    events[0]["host"] = HostName("h2")
+    events[0]["rule_id"] = "r2"
+    store.reindex(events[0])
+
+    assert store.oldest() is events[0]
+    assert store.to_list() == events
+    assert store.by_rule("r2") == [events[0], events[1]]
+    assert store.by_host(HostName("h2"), None) == [events[0], events[1]]
+    assert store.by_rule("r1") == [events[2]]
+
+
+def test_iteration_is_a_snapshot() -> None:
+    store = EventStore([_event(n, "r1", "h1") for n in range(1, 4)])
+
+    for event in store:
+        store.remove(event)
+
+    assert len(store) == 0
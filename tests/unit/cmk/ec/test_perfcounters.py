@@ -33,6 +33,37 @@ def test_perfcounters_count_time() -> None:
     assert c._times["processing"] == 1.04
 
 
+def test_perfcounters_count_num() -> None:
+    c = Perfcounters(logger)
+    c.count("messages", 5)
+    c.count("messages")
+    assert c._counters["messages"] == 6
+
+
+def test_perfcounters_count_time_num_equals_repeated_count_time() -> None:
+    batched = Perfcounters(logger)
+    repeated = Perfcounters(logger)
+    batched.count_time("processing", 1.0)
+    repeated.count_time("processing", 1.0)
+
+    batched.count_time("processing", 5.0, 3)
+    for _x in range(3):
+        repeated.count_time("processing", 5.0)
+
+    assert batched._times["processing"] == pytest.approx(repeated._times["processing"])
+
+
+def test_perfcounters_count_value() -> None:
+    c = Perfcounters(logger)
+    assert "batch_size" not in c._values
+    c.count_value("batch_size", 10)
+    assert c._values["batch_size"] == 10.0
+    c.count_value("batch_size", 30)
+    assert c._values["batch_size"] == pytest.approx(11.0)
+    status = dict(zip([n for n, _d in c.status_columns()], c.get_status()))
+    assert status["status_average_batch_size"] == pytest.approx(11.0)
+
+
 def test_perfcounters_do_statistics(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr("time.time", lambda: 1.0)
 
@@ -79,9 +110,6 @@ def test_perfcounters_column_default_values() -> None:
     for column_name, default_value in c.status_columns():
         if (
             column_name.startswith("status_average_")
-            and column_name.endswith("_time")
-            or column_name.startswith("status_average_")
-            and column_name.endswith("_rate")
             or column_name.startswith("status_")
             and column_name.endswith("_rate")
         ):
@@ -126,6 +154,9 @@ def test_perfcounters_correct_status_values() -> None:
             counter_name = column_name.split("_")[-2]
             assert column_value == c._rates.get(counter_name, 0.0)
 
+        elif (value_name := column_name.removeprefix("status_average_")) in c._value_weights:
+            assert column_value == c._values.get(value_name, 0.0)
+
         elif column_name.startswith("status_"):
             counter_name = "_".join(column_name.split("_")[1:])
             assert column_value == c._counters[counter_name], (
@@ -11,7 +11,12 @@ import pytest
 import cmk.ec.export as ec
 from cmk.ccc.site import SiteId
 from cmk.ec.config import MatchGroups, TextMatchResult
-from cmk.ec.rule_matcher import compile_matching_value, MatchPriority
+from cmk.ec.rule_matcher import (
+    compile_matching_value,
+    compile_rule,
+    MatchPriority,
+    PrefilteredRules,
+)
 
 
 @pytest.mark.parametrize(
@@ -463,3 +468,46 @@ def test_compile_matching_value_different_key(key: str) -> None:
     assert isinstance(compiled_pattern, re.Pattern)
     # Expect the original pattern since the key is not in {"match", "match_ok"}
     assert compiled_pattern.pattern == original_value
+
+
+def _compiled_rule(rule_id: str, **kwargs: object) -> ec.Rule:
+    rule: ec.Rule = ec.Rule(id=rule_id, **kwargs)  # type: ignore[typeddict-item]
+    compile_rule(rule)
+    return rule
+
+
+def test_prefiltered_rules_skips_rules_not_matching_the_text() -> None:
+    regex_rule = _compiled_rule("regex", match="disk.*full")
+    text_rule = _compiled_rule("text", match="Link Down")
+    cancel_rule = _compiled_rule("cancel", match="failed", match_ok="recovered")
+    catch_all = _compiled_rule("catch_all")
+    inverted = _compiled_rule("inverted", match="foo", invert_matching=True)
+    rules = [regex_rule, text_rule, catch_all, cancel_rule, inverted]
+    prefiltered = PrefilteredRules(rules)
+
+    assert prefiltered.candidates("something else") == [catch_all, inverted]
+    for text in ("DISK /var is full", "link down on eth0", "job FAILED", "job Recovered"):
+        assert prefiltered.candidates(text) == rules
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        pytest.param(r"(a+)-\1", id="backreference"),
+        pytest.param(r"(?P<x>a)(?P=x)", id="named backreference"),
+        pytest.param(r"(<)?b(?(1)>)", id="conditional reference"),
+        pytest.param(r"(?P<x><)?b(?(x)>)", id="named conditional reference"),
+        pytest.param(r"(?P<host>\w+) down", id="named group"),
+    ],
+)
+def test_prefiltered_rules_keeps_rules_with_groups(pattern: str) -> None:
+    with_groups = _compiled_rule("with_groups", match=pattern)
+    other = _compiled_rule("other", match="other")
+    prefiltered = PrefilteredRules([other, with_groups])
+
+    assert prefiltered.candidates("something") == [with_groups]
+
+
+def test_prefiltered_rules_falls_back_to_all_rules_for_uncombinable_patterns() -> None:
+    rules = [_compiled_rule("first", match="foo"), _compiled_rule("second", match="(?s)bar.*")]
+    assert PrefilteredRules(rules).candidates("something") == rules
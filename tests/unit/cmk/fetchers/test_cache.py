@@ -5,10 +5,16 @@
 
 import json
 import logging
+from pathlib import Path
 
+import pytest
+from pytest_mock import MockerFixture
+
+import cmk.ccc.store as _store
 from cmk.checkengine.parser import SectionStore
 from cmk.fetchers import Mode
 from cmk.fetchers.filecache import MaxAge
+from cmk.utils.sectionname import SectionName
 
 
 class TestSectionStore:
@@ -23,6 +29,89 @@ class TestSectionStore:
             str,
         )
 
+    @pytest.fixture
+    def store(self, tmp_path: Path) -> SectionStore[list[list[str]]]:
+        return SectionStore(tmp_path / "persisted" / "host", logger=logging.getLogger("test"))
+
+    def test_store_and_load(self, store: SectionStore[list[list[str]]]) -> None:
+        sections = {
+            SectionName("one"): (1, 2, [["a"]]),
+            SectionName("../two"): (3, 4, [["b"]]),
+        }
+        store.store(sections)
+
+        assert store.load() == sections
+        assert store.load_timestamps() == {
+            SectionName("one"): (1, 2),
+            SectionName("../two"): (3, 4),
+        }
+        assert {p.name for p in store.path.iterdir()} == {"index", "one.pkl", "..%2Ftwo.pkl"}
+
+        store.store({})
+        assert not store.path.exists()
+
+    def test_unchanged_sections_are_not_rewritten(
+        self, store: SectionStore[list[list[str]]]
+    ) -> None:
+        store.store({SectionName("one"): (1, 2, [["a"]]), SectionName("two"): (1, 2, [["b"]])})
+        inodes = {p.name: p.stat().st_ino for p in store.path.iterdir()}
+
+        sections = store.load()
+        sections[SectionName("one")] = (5, 6, [["a"]])
+        sections[SectionName("three")] = (5, 6, [["c"]])
+        del sections[SectionName("two")]
+        store.store(sections)
+
+        assert {p.name: p.stat().st_ino for p in store.path.iterdir()}["one.pkl"] == inodes[
+            "one.pkl"
+        ]
+        assert store.load() == {
+            SectionName("one"): (5, 6, [["a"]]),
+            SectionName("three"): (5, 6, [["c"]]),
+        }
+        assert not (store.path / "two.pkl").exists()
+
+    def test_content_is_read_on_access(self, store: SectionStore[list[list[str]]]) -> None:
+        store.store({SectionName("one"): (1, 2, [["a"]])})
+        (store.path / "one.pkl").unlink()
+
+        sections = store.load()
+        assert list(sections) == [SectionName("one")]
+        with pytest.raises(KeyError):
+            _ = sections[SectionName("one")]
+
+    def test_update_reads_persisted_sections_on_access(
+        self, store: SectionStore[list[list[str]]], mocker: MockerFixture
+    ) -> None:
+        store.store({SectionName("one"): (1, 2, [["a"]]), SectionName("two"): (1, 2, [["b"]])})
+        load_content = mocker.spy(store, "_load_content")
+        cache_info: dict[SectionName, tuple[int, int]] = {}
+
+        sections = store.update(
+            {SectionName("three"): [["c"]]},
+            cache_info,
+            lambda section_name: None,
+            lambda valid_until, now: False,
+            now=1,
+            keep_outdated=False,
+        )
+
+        assert list(sections) == [SectionName("three"), SectionName("one"), SectionName("two")]
+        assert cache_info == {SectionName("one"): (1, 1), SectionName("two"): (1, 1)}
+        load_content.assert_not_called()
+        assert sections[SectionName("two")] == [["b"]]
+        load_content.assert_called_once_with(SectionName("two"))
+
+    def test_load_legacy_format(self, store: SectionStore[list[list[str]]]) -> None:
+        store.path.parent.mkdir(parents=True)
+        _store.save_object_to_pickle_file(store.path, {"one": (1, 2, [["a"]])})
+
+        assert store.load() == {SectionName("one"): (1, 2, [["a"]])}
+
+        store.store(store.load())
+        assert store.path.is_dir()
+        assert store.load() == {SectionName("one"): (1, 2, [["a"]])}
+
 
 class TestMaxAge:
     def test_repr(self) -> None:
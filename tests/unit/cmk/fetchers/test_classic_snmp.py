@@ -4,16 +4,19 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 
+import sys
+import time
 from collections.abc import Sequence
 from typing import NamedTuple
 
 import pytest
+from pytest import MonkeyPatch
 
 import cmk.fetchers.snmp_backend.classic as classic_snmp
-from cmk.ccc.exceptions import MKGeneralException
+from cmk.ccc.exceptions import MKGeneralException, MKSNMPError
 from cmk.ccc.hostaddress import HostAddress, HostName
 from cmk.fetchers.snmp_backend import ClassicSNMPBackend
-from cmk.snmplib import SNMPBackendEnum, SNMPHostConfig, SNMPVersion
+from cmk.snmplib import SNMPBackendEnum, SNMPContext, SNMPHostConfig, SNMPVersion
 from cmk.utils.log import logger
 
 
@@ -327,3 +330,67 @@ def test_priv_proto(proto: str, result: str) -> None:
 def test_priv_proto_unknown(proto: str) -> None:
     with pytest.raises(MKGeneralException):
         classic_snmp._priv_proto_for(proto)
+
+
+def _fake_walk_command(oid: str, context: SNMPContext) -> list[str]:
+    if oid == ".1.2.9":
+        return [sys.executable, "-c", "import sys; sys.exit('Timeout: No Response')"]
+    if oid == ".1.2.10":
+        return [sys.executable, "-c", "import time; time.sleep(60)"]
+    output = (
+        f'{oid}.1 = "{context}"\n'
+        f'{oid}.2 = "ab cd\nef"\n'
+        f"{oid}.3 = No Such Instance currently exists\n"
+    )
+    return [sys.executable, "-c", f"import sys; sys.stdout.write({output!r})"]
+
+
+def _prefetching_backend(monkeypatch: MonkeyPatch) -> ClassicSNMPBackend:
+    snmp_config = SNMPHostConfig(
+        is_ipv6_primary=False,
+        hostname=HostName("localhost"),
+        ipaddress=HostAddress("127.0.0.1"),
+        credentials="public",
+        port=161,
+        bulkwalk_enabled=True,
+        snmp_version=SNMPVersion.V2C,
+        bulk_walk_size_of=10,
+        timing={},
+        oid_range_limits={},
+        snmpv3_contexts=[],
+        character_encoding=None,
+        snmp_backend=SNMPBackendEnum.CLASSIC,
+    )
+    backend = ClassicSNMPBackend(snmp_config, logger)
+    monkeypatch.setattr(backend, "_walk_command", _fake_walk_command)
+    return backend
+
+
+def test_walk_prefetched(monkeypatch: MonkeyPatch) -> None:
+    backend = _prefetching_backend(monkeypatch)
+    oids = [f".1.2.{n}" for n in range(1, 9)]
+    expected = {
+        (oid, context): backend.walk(oid, context=context) for oid in oids for context in ("a", "b")
+    }
+    assert expected[(".1.2.1", "a")] == [(".1.2.1.1", b"a"), (".1.2.1.2", b"ab cd ef")]
+
+    with backend.prefetching_walks(oids, contexts=["a", "b"]):
+        assert len(backend._prefetched) == 2 * len(oids)
+        for (oid, context), rowinfo in expected.items():
+            assert backend.walk(oid, context=context) == rowinfo
+
+    assert not backend._prefetched
+
+
+def test_walk_prefetched_stops_at_first_failure(monkeypatch: MonkeyPatch) -> None:
+    backend = _prefetching_backend(monkeypatch)
+    # the hanging walk is running, the last one still pending when the walk fails
+    oids = [".1.2.10", ".1.2.1", ".1.2.9", ".1.2.2"]
+
+    start = time.monotonic()
+    with backend.prefetching_walks(oids, contexts=["a", "b"]):
+        assert time.monotonic() - start < 30
+        assert len(backend._prefetched) == 2 * len(oids)
+        for oid, context in ((".1.2.10", "a"), (".1.2.9", "a"), (".1.2.2", "b")):
+            with pytest.raises(MKSNMPError, match="Timeout: No Response"):
+                backend.walk(oid, context=context)
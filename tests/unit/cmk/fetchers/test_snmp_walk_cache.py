@@ -5,9 +5,13 @@
 
 
 import logging
+import os
+import time
 from collections.abc import Iterable, MutableMapping
 from pathlib import Path
 
+import pytest
+
 from cmk.fetchers._snmp import WalkCache
 from cmk.snmplib import SNMPRowInfo
 
@@ -46,3 +50,64 @@ class TestWalkCache:
         assert (fetchoid, "12c3d4a", True) in cache
         cache.save()
         assert path in cache.mock_stored_on_fs
+
+    def test_save_writes_changed_walks_only(self, tmp_path: Path) -> None:
+        cache = WalkCache(tmp_path, logging.getLogger("test"))
+        cache[(".1.2.3", "12c3d4a", True)] = [(".1.2.3.1", b"43")]
+        cache[(".1.2.4", "12c3d4a", False)] = [(".1.2.4.1", b"44")]
+        cache.save()
+        assert [p.name for p in tmp_path.iterdir()] == ["OID.1.2.3-12c3d4a"]
+
+        os.utime(tmp_path / "OID.1.2.3-12c3d4a", (0, 0))
+        cache = WalkCache(tmp_path, logging.getLogger("test"))
+        cache.load()
+        cache.save()
+        assert (tmp_path / "OID.1.2.3-12c3d4a").stat().st_mtime == 0
+        assert cache[(".1.2.3", "12c3d4a", True)] == [(".1.2.3.1", b"43")]
+
+    def test_load_skips_outdated_walks(self, tmp_path: Path) -> None:
+        cache = WalkCache(tmp_path, logging.getLogger("test"))
+        cache[(".1.2.3", "12c3d4a", True)] = [(".1.2.3.1", b"43")]
+        cache[(".1.2.4", "12c3d4a", True)] = [(".1.2.4.1", b"44")]
+        cache.save()
+        os.utime(tmp_path / "OID.1.2.3-12c3d4a", (time.time() - 120,) * 2)
+
+        cache = WalkCache(tmp_path, logging.getLogger("test"), max_age=60)
+        cache.load()
+
+        assert list(cache) == [(".1.2.4", "12c3d4a", True)]
+
+    def test_load_keeps_walks_without_max_age(self, tmp_path: Path) -> None:
+        cache = WalkCache(tmp_path, logging.getLogger("test"))
+        cache[(".1.2.3", "12c3d4a", True)] = [(".1.2.3.1", b"43")]
+        cache.save()
+        os.utime(tmp_path / "OID.1.2.3-12c3d4a", (0, 0))
+
+        cache = WalkCache(tmp_path, logging.getLogger("test"))
+        cache.load()
+
+        assert list(cache) == [(".1.2.3", "12c3d4a", True)]
+
+    def test_save_evicts_oldest_walks(self, tmp_path: Path) -> None:
+        cache = WalkCache(tmp_path, logging.getLogger("test"), max_entries=2)
+        for n in range(3):
+            cache[(f".1.2.{n}", "12c3d4a", True)] = [(f".1.2.{n}.1", b"42")]
+            cache.save()
+            os.utime(tmp_path / f"OID.1.2.{n}-12c3d4a", (n, n))
+        cache.save()
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "OID.1.2.1-12c3d4a",
+            "OID.1.2.2-12c3d4a",
+        ]
+
+    def test_hits_and_misses(self, tmp_path: Path) -> None:
+        cache = WalkCache(tmp_path, logging.getLogger("test"))
+        cache[(".1.2.3", "12c3d4a", True)] = [(".1.2.3.1", b"43")]
+
+        assert (".1.2.4", "12c3d4a", True) not in cache
+        _ = cache[(".1.2.3", "12c3d4a", True)]
+        with pytest.raises(KeyError):
+            _ = cache[(".1.2.4", "12c3d4a", True)]
+
+        assert (cache.hits, cache.misses) == (1, 1)
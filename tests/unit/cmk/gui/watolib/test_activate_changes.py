@@ -546,6 +546,51 @@ def test_get_config_sync_file_infos() -> None:
     }
 
 
+def test_get_config_sync_file_infos_rehashes_only_modified_files(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    base_dir = cmk.utils.paths.omd_root / "replication"
+    _create_get_config_sync_file_infos_test_config(base_dir)
+    for path in base_dir.joinpath("etc/d4").rglob("*"):
+        os.utime(path, ns=(10**18, 10**18))
+    activate_changes.ConfigSyncHashCache.path().parent.mkdir(parents=True, exist_ok=True)
+    replication_paths = [
+        ReplicationPath.make(ty=ReplicationPathType.DIR, ident="d3", site_path="etc/d3"),
+        ReplicationPath.make(ty=ReplicationPathType.DIR, ident="d4", site_path="etc/d4"),
+    ]
+
+    def scan() -> dict[str, ConfigSyncFileInfo]:
+        hash_cache = activate_changes.ConfigSyncHashCache.load()
+        infos = activate_changes._get_config_sync_file_infos(
+            replication_paths, base_dir, hash_cache=hash_cache
+        )
+        hash_cache.save()
+        return infos
+
+    infos = scan()
+
+    hashed = []
+    create_hash = activate_changes._create_config_sync_file_hash
+
+    def _create_hash(file_path: str) -> str:
+        hashed.append(file_path)
+        return create_hash(file_path)
+
+    monkeypatch.setattr(activate_changes, "_create_config_sync_file_hash", _create_hash)
+    modified = base_dir / "etc/d4/x1"
+    modified.write_text("Däng3")
+    os.utime(modified, ns=(10**18, 2 * 10**18))
+
+    assert scan() == {
+        **infos,
+        "etc/d4/x1": infos["etc/d4/x1"]._replace(
+            file_hash="e019a9bc1f7cd811d8b29ce74b3f27db88a40bde9c727b4063cc2562f6efe348"
+        ),
+    }
+    # etc/d3/xyz has just been created, it is not cached yet
+    assert sorted(hashed) == [str(base_dir / "etc/d3/xyz"), str(modified)]
+
+
 def _create_get_config_sync_file_infos_test_config(base_dir: Path) -> None:
     base_dir.joinpath("etc/d1").mkdir(parents=True, exist_ok=True)
 
@@ -1208,3 +1208,35 @@ def test_subfolder_cache_invalidated() -> None:
     # subfolders are part of the tree
     with pytest.raises(AssertionError):
         assert subfolder.effective_attributes()["alias"] == "other_alias"
+
+
+def _age_files(path: str) -> None:
+    for root, dir_names, file_names in os.walk(path):
+        for name in [*dir_names, *file_names]:
+            os.utime(os.path.join(root, name), ns=(10**18, 10**18))
+    os.utime(path, ns=(10**18, 10**18))
+
+
+def test_folder_tree_index_reads_only_modified_folders(mocker: MagicMock) -> None:
+    tree = folder_tree()
+    root = tree.root_folder()
+    root.create_subfolder("foo", "Foo", {}, pprint_value=False).create_hosts(
+        [(HostName("host-1"), {}, [])], pprint_value=False
+    )
+    bar = root.create_subfolder("bar", "Bar", {}, pprint_value=False)
+    bar.create_hosts([(HostName("host-2"), {}, [])], pprint_value=False)
+    _age_files(root.filesystem_path())
+    assert hosts_and_folders.FolderTreeIndex(tree.get_root_dir()).host_folders() == {
+        "host-1": "foo",
+        "host-2": "bar",
+    }
+
+    bar.create_hosts([(HostName("host-3"), {}, [])], pprint_value=False)
+    load_hosts_file = mocker.spy(hosts_and_folders, "_load_hosts_file")
+
+    index = hosts_and_folders.FolderTreeIndex(tree.get_root_dir())
+    assert index.host_folders() == {"host-1": "foo", "host-2": "bar", "host-3": "bar"}
+    assert index.folder_info("foo")["title"] == "Foo"
+    assert [call.args for call in load_hosts_file.call_args_list] == [
+        (bar.hosts_file_path_without_extension(),)
+    ]
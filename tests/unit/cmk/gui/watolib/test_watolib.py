@@ -99,6 +99,7 @@ def test_registered_configvars() -> None:
         "crash_report_target",
         "crash_report_url",
         "custom_service_attributes",
+        "datagram_batch_size",
         "debug",
         "debug_livestatus_queries",
         "debug_rules",
@@ -119,6 +120,9 @@ def test_registered_configvars() -> None:
         "housekeeping_interval",
         "sqlite_housekeeping_interval",
         "sqlite_freelist_size",
+        "sqlite_synchronous",
+        "sqlite_write_buffer_size",
+        "sqlite_write_buffer_age",
         "user_security_notification_duration",
         "http_proxies",
         "inventory_check_autotrigger",
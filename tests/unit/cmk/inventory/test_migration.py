@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+# Copyright (C) 2025 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import json
+from pathlib import Path
+
+import cmk.ccc.store
+from cmk.ccc.hostaddress import HostName
+from cmk.inventory.migration import migrate_inventory_archive
+from cmk.utils.structured_data import DeltaArchive, SDKey, SDRawTree
+
+
+def test_migration_nothing_to_do(tmp_path: Path) -> None:
+    assert migrate_inventory_archive(omd_root=tmp_path, filter_host_names=[]) == 0
+
+
+def _raw_tree(value: str) -> SDRawTree:
+    return SDRawTree(Attributes={"Pairs": {SDKey("key"): value}}, Table={}, Nodes={})
+
+
+def test_migrate_inventory_archive(tmp_path: Path) -> None:
+    for raw_host_name in ("hostname1", "hostname2"):
+        for timestamp in (1, 2):
+            cmk.ccc.store.save_text_to_file(
+                tmp_path / f"var/check_mk/inventory_archive/{raw_host_name}/{timestamp}.json",
+                json.dumps(_raw_tree(f"val-{timestamp}")),
+            )
+
+    assert migrate_inventory_archive(omd_root=tmp_path, filter_host_names=["hostname1"]) == 0
+
+    delta_archive = DeltaArchive(tmp_path)
+    assert delta_archive.timestamps(host_name=HostName("hostname1")) == [1, 2]
+    assert not (tmp_path / "var/check_mk/inventory_archive/hostname1/1.json").exists()
+    assert not delta_archive.timestamps(host_name=HostName("hostname2"))
+    assert (tmp_path / "var/check_mk/inventory_archive/hostname2/1.json").exists()
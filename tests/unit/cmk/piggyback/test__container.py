@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# Copyright (C) 2024 Checkmk GmbH - License: GNU General Public License v2
+# This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
+# conditions defined in the file COPYING, which is part of this source code package.
+
+import os
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from cmk.ccc.hostaddress import HostName
+from cmk.piggyback.backend._container import (
+    container_index,
+    ContainerIndex,
+    rewrite_container,
+    store_in_container,
+)
+
+_SOURCE = HostName("source")
+
+
+def test_index_reads_appended_records_only(tmp_path: Path) -> None:
+    index = ContainerIndex(tmp_path)
+    assert not index.refresh()
+
+    store_in_container(_SOURCE, {HostName("a"): [b"1"], HostName("b"): [b"2"]}, 1, tmp_path)
+    assert sorted(index.refresh()) == [(_SOURCE, "a"), (_SOURCE, "b")]
+    assert not index.refresh()
+
+    store_in_container(_SOURCE, {HostName("b"): [b"3"]}, 2, tmp_path)
+    assert index.refresh() == [(_SOURCE, "b")]
+    assert index.read(_SOURCE, HostName("a")) == (1, b"1\n")
+    assert index.read(_SOURCE, HostName("b")) == (2, b"3\n")
+    assert index.piggybacked_hosts_of(_SOURCE) == ["a", "b"]
+
+
+def test_index_follows_replaced_container(tmp_path: Path) -> None:
+    store_in_container(_SOURCE, {HostName("a"): [b"1"], HostName("b"): [b"2"]}, 1, tmp_path)
+    index = ContainerIndex(tmp_path)
+    index.refresh()
+
+    rewrite_container(tmp_path, _SOURCE, lambda name, _record: name if name == "b" else None)
+
+    # reading detects the replaced container
+    assert index.read(_SOURCE, HostName("b")) == (1, b"2\n")
+    assert index.read(_SOURCE, HostName("a")) is None
+    assert not index.records_for(HostName("a"))
+
+
+def test_index_ignores_incomplete_record(tmp_path: Path) -> None:
+    store_in_container(_SOURCE, {HostName("a"): [b"1"]}, 1, tmp_path)
+    container = next((tmp_path / "tmp/check_mk/piggyback_containers").iterdir())
+    complete = container.read_bytes()
+    container.write_bytes(complete + complete[:-1])
+
+    index = ContainerIndex(tmp_path)
+    index.refresh()
+    assert index.read(_SOURCE, HostName("a")) == (1, b"1\n")
+
+
+def test_index_reports_no_updates_after_compaction(tmp_path: Path) -> None:
+    store_in_container(_SOURCE, {HostName("a"): [b"1"], HostName("b"): [b"2"]}, 1, tmp_path)
+    store_in_container(_SOURCE, {HostName("a"): [b"3"]}, 2, tmp_path)
+    index = ContainerIndex(tmp_path)
+    index.refresh()
+
+    rewrite_container(tmp_path, _SOURCE, lambda name, _record: name)
+
+    assert not index.refresh()
+    assert index.read(_SOURCE, HostName("a")) == (2, b"3\n")
+
+
+def test_cached_index_is_refreshed_on_write_only(tmp_path: Path, mocker: MockerFixture) -> None:
+    store_in_container(_SOURCE, {HostName("a"): [b"1"]}, 1, tmp_path)
+    container_dir = tmp_path / "tmp/check_mk/piggyback_containers"
+    os.utime(container_dir, ns=(10**18, 10**18))
+    refresh = mocker.spy(ContainerIndex, "refresh")
+
+    index = container_index(tmp_path)
+    assert container_index(tmp_path) is index
+    assert refresh.call_count == 1
+
+    store_in_container(_SOURCE, {HostName("b"): [b"2"]}, 2, tmp_path)
+    assert container_index(tmp_path).piggybacked_hosts_of(_SOURCE) == ["a", "b"]
+    assert refresh.call_count == 2
+
+
+def test_store_drops_interrupted_record(tmp_path: Path) -> None:
+    store_in_container(_SOURCE, {HostName("a"): [b"1"]}, 1, tmp_path)
+    container = next((tmp_path / "tmp/check_mk/piggyback_containers").iterdir())
+    complete = container.read_bytes()
+    container.write_bytes(complete + complete[:-3])
+
+    store_in_container(_SOURCE, {HostName("b"): [b"2"]}, 2, tmp_path)
+
+    index = ContainerIndex(tmp_path)
+    index.refresh()
+    assert index.read(_SOURCE, HostName("a")) == (1, b"1\n")
+    assert index.read(_SOURCE, HostName("b")) == (2, b"2\n")
+
+
+def test_index_stops_at_damaged_record(tmp_path: Path) -> None:
+    store_in_container(_SOURCE, {HostName("a"): [b"1"]}, 1, tmp_path)
+    container = next((tmp_path / "tmp/check_mk/piggyback_containers").iterdir())
+    complete = container.read_bytes()
+    # a header followed by a name that is no valid host name
+    container.write_bytes(complete + complete[:14] + b"\xff" + complete[15:])
+
+    index = ContainerIndex(tmp_path)
+    index.refresh()
+    assert index.read(_SOURCE, HostName("a")) == (1, b"1\n")
+    assert index.piggybacked_hosts_of(_SOURCE) == ["a"]
@@ -4,7 +4,9 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 
+import json
 import pprint
+from collections.abc import Sequence
 
 import cmk.utils.log
 import cmk.utils.paths
@@ -222,6 +224,111 @@ def test_get_source_and_piggyback_hosts() -> None:
     }
 
 
+def _enable_containers(enabled: bool) -> None:
+    config = cmk.utils.paths.omd_root / "etc/check_mk/piggyback_storage.json"
+    config.parent.mkdir(parents=True, exist_ok=True)
+    config.write_text(json.dumps({"containers": enabled}))
+
+
+def _store_in_container(
+    source: str, piggybacked_hosts: Sequence[str], timestamp: float, payload: Sequence[bytes]
+) -> None:
+    _enable_containers(True)
+    backend.store_piggyback_raw_data(
+        HostAddress(source),
+        {HostAddress(h): payload for h in piggybacked_hosts},
+        message_timestamp=timestamp,
+        contact_timestamp=timestamp,
+        omd_root=cmk.utils.paths.omd_root,
+    )
+    _enable_containers(False)
+
+
+def test_store_piggyback_raw_data_in_container() -> None:
+    _store_in_container("source1", ["test-host", "test-host2"], _REF_TIME, _PAYLOAD)
+    _store_in_container("source1", ["test-host2"], _REF_TIME + 10, (b"new",))
+
+    first = _get_only_raw_data_element(_TEST_HOST_NAME)
+    assert first.meta == backend.PiggybackMetaData(
+        source=HostAddress("source1"),
+        piggybacked=_TEST_HOST_NAME,
+        last_update=int(_REF_TIME),
+        last_contact=int(_REF_TIME + 10),
+    )
+    assert first.raw_data == b"pay\nload\n"
+    second = _get_only_raw_data_element(HostAddress("test-host2"))
+    assert second.meta.last_update == int(_REF_TIME + 10)
+    assert second.raw_data == b"new\n"
+
+    assert set(backend.get_piggybacked_host_with_sources(cmk.utils.paths.omd_root)) == {
+        HostAddress("test-host"),
+        HostAddress("test-host2"),
+    }
+    assert list(
+        backend.get_piggybacked_host_with_sources(cmk.utils.paths.omd_root, _TEST_HOST_NAME)
+    ) == [_TEST_HOST_NAME]
+
+
+def test_container_is_compacted() -> None:
+    for n in range(10):
+        _store_in_container("source1", ["test-host", "test-host2"], _REF_TIME + n, (b"%d" % n,))
+
+    container = next((cmk.utils.paths.omd_root / "tmp/check_mk/piggyback_containers").iterdir())
+    # 14 bytes header, the name and the payload per record
+    live_size = 2 * 14 + len(b"test-host") + len(b"test-host2") + 2 * len(b"9\n")
+    assert container.stat().st_size <= 2 * live_size
+    assert _get_only_raw_data_element(_TEST_HOST_NAME).raw_data == b"9\n"
+
+
+def test_more_recent_layout_wins() -> None:
+    backend.store_piggyback_raw_data(
+        HostAddress("source1"),
+        {_TEST_HOST_NAME: (b"file",)},
+        message_timestamp=_REF_TIME,
+        contact_timestamp=_REF_TIME,
+        omd_root=cmk.utils.paths.omd_root,
+    )
+    _store_in_container("source1", ["test-host"], _REF_TIME + 10, (b"container",))
+    _store_in_container("source2", ["test-host"], _REF_TIME, (b"other",))
+
+    assert [
+        (m.meta.source, m.raw_data)
+        for m in backend.get_messages_for(_TEST_HOST_NAME, cmk.utils.paths.omd_root)
+    ] == [("source1", b"container\n"), ("source2", b"other\n")]
+
+
+def test_cleanup_container_records() -> None:
+    _store_in_container("source1", ["test-host"], _REF_TIME - 10, _PAYLOAD)
+    _store_in_container("source1", ["test-host2"], _REF_TIME, _PAYLOAD)
+    _store_in_container("source2", ["test-host"], _REF_TIME - 10, _PAYLOAD)
+
+    backend.cleanup_piggyback_files(_REF_TIME - 5, cmk.utils.paths.omd_root)
+
+    assert not backend.get_messages_for(_TEST_HOST_NAME, cmk.utils.paths.omd_root)
+    assert _get_only_raw_data_element(HostAddress("test-host2")).meta.source == "source1"
+    assert [
+        p.name for p in (cmk.utils.paths.omd_root / "tmp/check_mk/piggyback_containers").iterdir()
+    ] == ["source1"]
+
+
+def test_move_for_host_rename_in_container() -> None:
+    _store_in_container("source1", ["test-host", "new-host"], _REF_TIME, _PAYLOAD)
+    _store_in_container("old-source", ["test-host"], _REF_TIME, (b"other",))
+
+    assert sorted(
+        backend.move_for_host_rename(cmk.utils.paths.omd_root, "test-host", "new-host")
+    ) == ["piggyback-load"]
+    assert sorted(
+        backend.move_for_host_rename(cmk.utils.paths.omd_root, "old-source", "new-source")
+    ) == ["piggyback-pig"]
+
+    assert not backend.get_messages_for(_TEST_HOST_NAME, cmk.utils.paths.omd_root)
+    assert [
+        (m.meta.source, m.raw_data)
+        for m in backend.get_messages_for(HostAddress("new-host"), cmk.utils.paths.omd_root)
+    ] == [("new-source", b"other\n"), ("source1", b"pay\nload\n")]
+
+
 class TestPiggybackMetaData:
     def test_serialization_roundtrip(self) -> None:
         pmd = backend.PiggybackMetaData(
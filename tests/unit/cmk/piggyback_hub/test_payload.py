@@ -42,3 +42,127 @@ def test__on_message() -> None:
     ]
     actual_payload = get_messages_for(HostName("target"), cmk.utils.paths.omd_root)
     assert actual_payload == expected_payload
+
+
+def _payload(source: str, target: str, raw_data: bytes) -> payload.PiggybackPayload:
+    return payload.PiggybackPayload(
+        source_host=HostName(source),
+        raw_data={HostName(target): [raw_data]},
+        message_timestamp=1640000020,
+        contact_timestamp=1640000000,
+    )
+
+
+def test_batch_roundtrip_uncompressed() -> None:
+    payloads = [_payload("source", "target", b"line1\nline2")]
+
+    batch = payload.PiggybackPayloadBatch.pack(payloads)
+
+    assert batch.compression == "none"
+    assert batch.unpack() == payloads
+
+
+def test_batch_roundtrip_compressed() -> None:
+    payloads = [_payload("source", f"target{n}", b"line\n" * 100) for n in range(10)]
+
+    batch = payload.PiggybackPayloadBatch.pack(payloads)
+
+    assert batch.compression == "zlib"
+    assert len(batch.data) < len(payload.PiggybackPayloadBatch.pack(payloads[:1]).data) * 10
+    assert payload.PiggybackPayloadBatch.model_validate_json(batch.model_dump_json()).unpack() == (
+        payloads
+    )
+
+
+def test__on_batch_message() -> None:
+    channel = Mock()
+    on_message = payload.save_payload_batch_on_message(
+        logging.getLogger("test"), cmk.utils.paths.omd_root
+    )
+
+    on_message(
+        channel,
+        DeliveryTag(0),
+        payload.PiggybackPayloadBatch.pack(
+            [
+                _payload("source", "target1", b"line1"),
+                _payload("source", "target2", b"line2"),
+            ]
+        ),
+    )
+
+    channel.acknowledge.assert_called_once_with(DeliveryTag(0))
+    assert [
+        (m.meta.piggybacked, m.raw_data)
+        for host in (HostName("target1"), HostName("target2"))
+        for m in get_messages_for(host, cmk.utils.paths.omd_root)
+    ] == [
+        (HostName("target1"), b"line1\n"),
+        (HostName("target2"), b"line2\n"),
+    ]
+
+
+def test_batches_due_by_delay() -> None:
+    batches = payload._Batches()
+    batches.add("site1", _payload("source", "target", b"line"), now=100.0)
+    batches.add("site2", _payload("source", "target", b"line"), now=100.5)
+
+    assert not batches.due(100.5)
+    assert batches.due(100.0 + payload.BATCH_MAX_DELAY) == ["site1"]
+    batches.remove("site1")
+    assert batches.all() == ["site2"]
+
+
+def test_batches_due_by_size() -> None:
+    batches = payload._Batches()
+    batches.add("site1", _payload("source", "target", b"x" * payload.BATCH_MAX_BYTES), now=100.0)
+
+    assert batches.due(100.0) == ["site1"]
+
+
+def test_publish_single_payloads_to_sites_without_batch_support() -> None:
+    payload_channel, batch_channel = Mock(), Mock()
+    channels = payload._Channels(payload=payload_channel, batch=batch_channel)
+    batches = payload._Batches()
+    payloads = [_payload("source", "target", b"line1"), _payload("source", "target", b"line2")]
+    for p in payloads:
+        batches.add("old_site", p, now=100.0)
+        batches.add("new_site", p, now=100.0)
+    statistics = payload._BatchStatistics("test")
+
+    payload._publish_batches(
+        logging.getLogger("test"),
+        "test",
+        channels,
+        batches,
+        batches.all(),
+        batch_sites=frozenset({"new_site"}),
+        statistics=statistics,
+    )
+
+    assert [c.args[:2] for c in payload_channel.publish_for_site.call_args_list] == [
+        ("old_site", p) for p in payloads
+    ]
+    assert [c.args[0] for c in batch_channel.publish_for_site.call_args_list] == ["new_site"]
+    assert not batches.all()
+    assert (statistics.batches, statistics.payloads, statistics.single_payloads) == (1, 2, 2)
+
+
+def test_batch_support_is_recorded_and_answered() -> None:
+    channel = Mock()
+    reload_config = Mock()
+    on_message = payload.handle_batch_support(
+        logging.getLogger("test"), cmk.utils.paths.omd_root, "my_site", reload_config
+    )
+
+    on_message(channel, DeliveryTag(0), payload.BatchSupport(site_id="other_site"))
+    on_message(channel, DeliveryTag(1), payload.BatchSupport(site_id="other_site", is_reply=True))
+
+    assert payload.load_batch_sites(cmk.utils.paths.omd_root) == {"other_site"}
+    reload_config.set.assert_called_once()
+    channel.publish_for_site.assert_called_once()
+    assert channel.publish_for_site.call_args.args[:2] == (
+        "other_site",
+        payload.BatchSupport(site_id="my_site", is_reply=True),
+    )
+    assert channel.acknowledge.call_count == 2
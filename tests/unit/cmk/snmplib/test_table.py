@@ -4,10 +4,11 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 
+import contextlib
 import dataclasses
 import logging
 import socket
-from collections.abc import Sequence
+from collections.abc import Iterator, Sequence
 from functools import partial
 from typing import NoReturn
 
@@ -108,6 +109,39 @@ def test_get_snmp_table(
     assert get_all_snmp_tables(snmp_info) == expected_values
 
 
+def test_get_snmp_table_announces_uncached_walks() -> None:
+    class Backend(SNMPTestBackend):
+        announced: list[tuple[Sequence[str], Sequence[str]]] = []
+
+        @contextlib.contextmanager
+        def prefetching_walks(self, oids, *, contexts) -> Iterator[None]:
+            self.announced.append((oids, contexts))
+            yield
+
+    tree = BackendSNMPTree(
+        base=".1.2",
+        oids=[
+            BackendOIDSpec(SpecialColumn.END, "string", False),
+            BackendOIDSpec("1", "string", False),
+            BackendOIDSpec("2", "string", True),
+            BackendOIDSpec("3", "string", False),
+        ],
+    )
+    backend = Backend(SNMPConfig, logger)
+    walk_cache = {(".1.2.2", _snmp_table._context_hash([""]), True): [(".1.2.2.1", b"x")]}
+
+    table = get_snmp_table(
+        section_name=SectionName("unit_test"),
+        tree=tree,
+        walk_cache=walk_cache,
+        backend=backend,
+        log=logger.debug,
+    )
+
+    assert backend.announced == [([".1.2.1", ".1.2.3"], [""])]
+    assert table[0] == ["1", "C0FEFE", "x", "C0FEFE"]
+
+
 @pytest.mark.parametrize(
     "encoding, columns, expected",
     [
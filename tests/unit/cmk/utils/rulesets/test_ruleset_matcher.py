@@ -12,6 +12,9 @@ from pytest import MonkeyPatch
 
 from cmk.ccc.hostaddress import HostName
 from cmk.utils.rulesets.ruleset_matcher import (
+    matches_host_name,
+    matches_host_tags,
+    matches_labels,
     matches_tag_condition,
     RuleConditionsSpec,
     RulesetMatcher,
@@ -880,6 +883,72 @@ def test_ruleset_matcher_get_host_values_changed_labels() -> None:
     assert matcher.get_host_values_all(HostName("host1"), rules, those_labels) == ["value_that"]
 
 
+_MANY_HOSTS = {
+    HostName(f"host{n}"): (
+        {
+            TagGroupID("criticality"): TagID(("prod", "test", "critical")[n % 3]),
+            TagGroupID("networking"): TagID(("lan", "wan")[n % 2]),
+        },
+        f"/wato/{('a', 'b', 'a/c')[n % 3]}/hosts.mk",
+        {"os": ("linux", "windows")[n % 2]} if n % 5 else {},
+    )
+    for n in range(200)
+}
+
+
+@pytest.mark.parametrize(
+    "condition",
+    [
+        {},
+        {"host_folder": "/wato/a/"},
+        {"host_folder": "/wato/a/c/"},
+        {"host_tags": {TagGroupID("criticality"): TagID("prod")}},
+        {"host_tags": {TagGroupID("criticality"): {"$ne": TagID("prod")}}},
+        {"host_tags": {TagGroupID("criticality"): {"$or": [TagID("prod"), TagID("test")]}}},
+        {
+            "host_tags": {
+                TagGroupID("criticality"): {"$nor": [TagID("prod"), TagID("test")]},
+                TagGroupID("networking"): TagID("lan"),
+            }
+        },
+        {"host_tags": {TagGroupID("unknown"): TagID("unknown")}},
+        {"host_name": ["host1", "host2", "unknown"]},
+        {"host_name": {"$nor": ["host1", "host2"]}},
+        {"host_name": [{"$regex": "host1"}, "host42"], "host_folder": "/wato/b/"},
+        {"host_name": {"$nor": [{"$regex": "host1"}]}},
+        {"host_label_groups": [("and", [("and", "os:linux")])]},
+        {"host_label_groups": [("and", [("not", "os:linux")])]},
+        {"host_label_groups": [("and", [("and", "os:linux"), ("or", "os:windows")])]},
+        {
+            "host_label_groups": [
+                ("and", [("and", "os:linux")]),
+                ("or", [("and", "os:windows")]),
+                ("not", [("and", "os:unknown")]),
+            ],
+            "host_tags": {TagGroupID("networking"): TagID("wan")},
+        },
+    ],
+)
+def test_ruleset_matcher_all_matching_hosts(condition: RuleConditionsSpec) -> None:
+    matcher = RulesetMatcher(
+        host_tags={host_name: tags for host_name, (tags, _path, _labels) in _MANY_HOSTS.items()},
+        host_paths={host_name: path for host_name, (_tags, path, _labels) in _MANY_HOSTS.items()},
+        all_configured_hosts=frozenset(_MANY_HOSTS),
+        clusters_of={},
+        nodes_of={},
+    )
+    assert matcher.ruleset_optimizer._all_matching_hosts(
+        condition, with_foreign_hosts=False, labels_of_host=lambda hn: _MANY_HOSTS[hn][2]
+    ) == {
+        host_name
+        for host_name, (tags, path, labels) in _MANY_HOSTS.items()
+        if path.startswith(condition.get("host_folder", "/"))
+        and matches_host_tags(set(tags.items()), condition.get("host_tags", {}))
+        and matches_host_name(condition.get("host_name"), host_name)
+        and matches_labels(labels, condition.get("host_label_groups", []))
+    }
+
+
 class TestSingleRulesetMatcher:
     @staticmethod
     def _make_matcher() -> RulesetMatcher:
@@ -8,14 +8,22 @@ import io
 import json
 from pathlib import Path
 
+from pytest_mock import MockerFixture
+
 import cmk.ccc.store
 from cmk.ccc.hostaddress import HostName
 from cmk.utils.structured_data import (
+    DeltaArchive,
     deserialize_tree,
     HistoryStore,
+    ImmutableAttributes,
+    ImmutableTable,
+    ImmutableTree,
+    InventoryPaths,
     InventoryStore,
     load_history,
     make_meta,
+    RetentionInterval,
     SDKey,
     SDMetaAndRawTree,
     SDNodeName,
@@ -191,10 +199,13 @@ def test_archive_inventory_tree(tmp_path: Path) -> None:
     assert not (tmp_path / "var/check_mk/inventory/hostname.json").exists()
     assert not (tmp_path / "var/check_mk/inventory/hostname.json.gz").exists()
 
-    archive_file_paths = list((tmp_path / "var/check_mk/inventory_archive/hostname").iterdir())
-    assert archive_file_paths
-    for archive_file_path in archive_file_paths:
-        assert archive_file_path.suffixes == [".json"]
+    delta_archive = DeltaArchive(tmp_path)
+    assert list(
+        delta_archive.load_trees(
+            host_name=host_name, timestamps=delta_archive.timestamps(host_name=host_name)
+        ).values()
+    ) == [deserialize_tree(raw_tree)]
+    assert inv_store.load_previous_inventory_tree(host_name=host_name) == deserialize_tree(raw_tree)
 
 
 def test_load_history(tmp_path: Path) -> None:
@@ -233,3 +244,171 @@ def test_load_history(tmp_path: Path) -> None:
     assert delta_cache_file_paths
     for delta_cache_file_path in delta_cache_file_paths:
         assert delta_cache_file_path.suffixes == [".json"]
+
+
+def _tree(idx: int) -> ImmutableTree:
+    return ImmutableTree(
+        attributes=ImmutableAttributes(
+            pairs={SDKey("key"): "val", SDKey("changing"): idx},
+            retentions={SDKey("key"): RetentionInterval(idx, 2, 3, "current")},
+        ),
+        nodes_by_name={
+            SDNodeName("hardware"): ImmutableTree(
+                path=(SDNodeName("hardware"),),
+                table=ImmutableTable(
+                    key_columns=[SDKey("index")],
+                    rows_by_ident={
+                        (i,): {SDKey("index"): i, SDKey("value"): f"val-{i}"}
+                        for i in range(idx % 3, 5)
+                    },
+                    retentions={(4,): {SDKey("value"): RetentionInterval(idx, 2, 3, "previous")}},
+                ),
+            ),
+            **(
+                {
+                    SDNodeName("software"): ImmutableTree(
+                        path=(SDNodeName("software"),),
+                        attributes=ImmutableAttributes(pairs={SDKey("version"): idx}),
+                    )
+                }
+                if idx % 4
+                else {}
+            ),
+        },
+    )
+
+
+def _assert_equal_content(left: ImmutableTree, right: ImmutableTree) -> None:
+    assert left == right
+    assert left.attributes.retentions == right.attributes.retentions
+    for name, node in left.nodes_by_name.items():
+        assert node.table.retentions == right.nodes_by_name[name].table.retentions
+
+
+def test_delta_archive_load_tree(tmp_path: Path) -> None:
+    host_name = HostName("hostname")
+    delta_archive = DeltaArchive(tmp_path)
+    # More than _DELTA_ARCHIVE_SNAPSHOT_INTERVAL versions
+    for idx in range(40):
+        delta_archive.append(host_name=host_name, timestamp=idx, tree=_tree(idx))
+
+    assert delta_archive.timestamps(host_name=host_name) == list(range(40))
+    for idx in (0, 17, 39):
+        _assert_equal_content(
+            delta_archive.load_tree(host_name=host_name, timestamp=idx), _tree(idx)
+        )
+    assert not delta_archive.load_tree(host_name=host_name, timestamp=40)
+
+
+def test_delta_archive_load_trees(tmp_path: Path) -> None:
+    host_name = HostName("hostname")
+    delta_archive = DeltaArchive(tmp_path)
+    for idx in range(40):
+        delta_archive.append(host_name=host_name, timestamp=idx, tree=_tree(idx))
+
+    trees = delta_archive.load_trees(host_name=host_name, timestamps={3, 17, 18, 39, 40})
+
+    assert list(trees) == [3, 17, 18, 39]
+    for idx, tree in trees.items():
+        _assert_equal_content(tree, _tree(idx))
+
+
+def test_history_store_loads_archive_index_once(tmp_path: Path, mocker: MockerFixture) -> None:
+    host_name = HostName("hostname")
+    delta_archive = DeltaArchive(tmp_path)
+    for idx in range(5):
+        delta_archive.append(host_name=host_name, timestamp=idx, tree=_tree(idx))
+    history_store = HistoryStore(tmp_path)
+    paths = [r.ok for r in history_store.collect_history_paths(host_name=host_name) if r.is_ok()]
+    load_index = mocker.spy(DeltaArchive, "_load_index")
+
+    history_store.load_archived_trees(host_name=host_name, paths=paths)
+    entries = [history_store.load_history_entry(host_name=host_name, path=p) for p in paths]
+
+    assert load_index.call_count == 1
+    assert [e.ok.current_timestamp for e in entries if e.is_ok()] == list(range(5))
+
+
+def test_delta_archive_append_out_of_order(tmp_path: Path) -> None:
+    host_name = HostName("hostname")
+    delta_archive = DeltaArchive(tmp_path)
+    for idx in (1, 3, 2, 3):
+        delta_archive.append(host_name=host_name, timestamp=idx, tree=_tree(idx))
+
+    assert delta_archive.timestamps(host_name=host_name) == [1, 2, 3]
+    assert sorted(
+        p.name for p in InventoryPaths(tmp_path).delta_archive_host(host_name).iterdir()
+    ) == [
+        "index.json",
+        "records.2",
+    ]
+    for idx in (1, 2, 3):
+        _assert_equal_content(
+            delta_archive.load_tree(host_name=host_name, timestamp=idx), _tree(idx)
+        )
+
+
+def test_delta_archive_ignores_interrupted_append(tmp_path: Path) -> None:
+    host_name = HostName("hostname")
+    delta_archive = DeltaArchive(tmp_path)
+    delta_archive.append(host_name=host_name, timestamp=1, tree=_tree(1))
+    with InventoryPaths(tmp_path).delta_archive_records(host_name, 0).open("ab") as f:
+        f.write(b'{"Pairs": {"key"')
+
+    delta_archive.append(host_name=host_name, timestamp=2, tree=_tree(2))
+    _assert_equal_content(delta_archive.load_tree(host_name=host_name, timestamp=2), _tree(2))
+
+
+def test_load_history_from_delta_archive(tmp_path: Path) -> None:
+    host_name = HostName("hostname")
+    for idx in range(3):
+        cmk.ccc.store.save_object_to_file(
+            tmp_path / f"var/check_mk/inventory_archive/hostname/{idx}", _raw_tree(f"val-{idx}")
+        )
+    delta_archive = DeltaArchive(tmp_path)
+    delta_archive.append(
+        host_name=host_name, timestamp=0, tree=deserialize_tree(_raw_tree("val-0"))
+    )
+    delta_archive.append(
+        host_name=host_name, timestamp=3, tree=deserialize_tree(_raw_tree("val-3"))
+    )
+
+    history = load_history(
+        HistoryStore(tmp_path),
+        host_name,
+        filter_history_paths=lambda paths: paths,
+        filter_delta_tree=None,
+    )
+    assert [(e.previous_timestamp, e.current_timestamp) for e in history.entries] == [
+        (-1, 0),
+        (0, 1),
+        (1, 2),
+        (2, 3),
+    ]
+    assert not history.corrupted
+
+
+def test_migrate_archive_trees(tmp_path: Path) -> None:
+    host_name = HostName("hostname")
+    cmk.ccc.store.save_object_to_file(
+        tmp_path / "var/check_mk/inventory_archive/hostname/1", _raw_tree("val-1")
+    )
+    cmk.ccc.store.save_text_to_file(
+        tmp_path / "var/check_mk/inventory_archive/hostname/3.json",
+        json.dumps(_raw_tree("val-3")),
+    )
+    delta_archive = DeltaArchive(tmp_path)
+    delta_archive.append(
+        host_name=host_name, timestamp=2, tree=deserialize_tree(_raw_tree("val-2"))
+    )
+
+    assert delta_archive.migrate_archive_trees(host_name=host_name) == 2
+    assert [p.name for p in (tmp_path / "var/check_mk/inventory_archive/hostname").iterdir()] == [
+        "delta"
+    ]
+    assert [
+        (timestamp, tree.get_attribute((), SDKey("key")))
+        for timestamp, tree in delta_archive.load_trees(
+            host_name=host_name, timestamps=delta_archive.timestamps(host_name=host_name)
+        ).items()
+    ] == [(1, "val-1"), (2, "val-2"), (3, "val-3")]
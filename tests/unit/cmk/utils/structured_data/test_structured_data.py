@@ -772,6 +772,22 @@ def test_filter_tree_wrong_node() -> None:
     assert len(filtered.get_tree((SDNodeName("path-to-nta"), SDNodeName("ta")))) == 6
 
 
+def test_filter_tree_shares_unfiltered_nodes() -> None:
+    filled_root = _create_filled_imm_tree()
+    filtered = filled_root.filter(
+        [
+            SDFilterChoice(
+                path=(SDNodeName("path-to-nta"), SDNodeName("ta")),
+                pairs="all",
+                columns="all",
+                nodes="all",
+            ),
+        ]
+    )
+    path = (SDNodeName("path-to-nta"), SDNodeName("ta"))
+    assert filtered.get_tree(path) is filled_root.get_tree(path)
+
+
 def test_filter_tree_paths_no_keys() -> None:
     filled_root = _create_filled_imm_tree()
     filters = [
@@ -1367,6 +1383,11 @@ def test_merge_with_empty_tables() -> None:
     assert ImmutableTree().merge(ImmutableTree()) == ImmutableTree()
 
 
+def test_merge_with_empty_tree_shares_nodes() -> None:
+    filled_root = _create_filled_imm_tree()
+    assert filled_root.merge(ImmutableTree()) is filled_root
+
+
 def test_merge_with_empty_left_table() -> None:
     assert ImmutableTree().merge(
         ImmutableTree(
@@ -3,6 +3,10 @@
 # This file is part of Checkmk (https://checkmk.com). It is subject to the terms and
 # conditions defined in the file COPYING, which is part of this source code package.
 
+import time
+
+import pytest
+
 import cmk.utils.caching
 
 
@@ -45,3 +49,62 @@ def test_populated() -> None:
     assert cache.is_populated()
     cache.clear()
     assert not cache.is_populated()
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    cache = cmk.utils.caching.LRUCache[str, int](maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1
+    cache["c"] = 3
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.evictions == 1
+
+
+def test_lru_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 1000.0
+    monkeypatch.setattr(time, "monotonic", lambda: now)
+    cache = cmk.utils.caching.LRUCache[str, int](ttl=10)
+    cache["a"] = 1
+
+    now += 5
+    assert cache["a"] == 1
+    now += 5
+    with pytest.raises(KeyError):
+        _ = cache["a"]
+    assert not cache
+
+
+def test_lru_cache_statistics() -> None:
+    cache = cmk.utils.caching.LRUCache[str, int](maxsize=1)
+    assert cache.get("a") is None
+    assert cache.setdefault("a", 1) == 1
+    assert cache.setdefault("a", 2) == 1
+    assert cache.get("a") == 1
+    cache["b"] = 2
+
+    statistics = cache.statistics()
+    assert (statistics.entries, statistics.hits, statistics.misses, statistics.evictions) == (
+        1,
+        1,
+        1,
+        1,
+    )
+    assert statistics.total_size > 0
+
+
+def test_make_lru_cache_replaces_registered_cache() -> None:
+    mgr = cmk.utils.caching.CacheManager()
+    previous: cmk.utils.caching.LRUCache[str, int] = mgr.make_lru_cache("test")
+    previous["a"] = 1
+    cache: cmk.utils.caching.LRUCache[str, int] = mgr.make_lru_cache("test")
+    cache["a"] = 1
+    cache["b"] = 2
+
+    assert mgr.dump_statistics()["test"].entries == 2
+    mgr.clear_all()
+    assert not cache
+    assert previous
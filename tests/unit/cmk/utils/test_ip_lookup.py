@@ -4,7 +4,9 @@
 # conditions defined in the file COPYING, which is part of this source code package.
 
 import socket
-from collections.abc import Mapping
+import threading
+import time
+from collections.abc import Mapping, Sequence
 from pathlib import Path
 from typing import Final, TypeAlias
 
@@ -28,6 +30,7 @@ _PersistedCache: TypeAlias = dict[ip_lookup.IPLookupCacheId, str | None]
 @pytest.fixture(autouse=True)
 def no_io_ip_lookup_cache(tmp_path, monkeypatch):
     monkeypatch.setattr(ip_lookup.IPLookupCache, "PATH", tmp_path / "cache")
+    monkeypatch.setattr(ip_lookup.IPLookupRefreshState, "PATH", tmp_path / "cache.state")
 
 
 def patch_config_cache(monkeypatch: MonkeyPatch, cache: _IPLookupCacheMapping) -> None:
@@ -532,6 +535,126 @@ def test_update_dns_cache(monkeypatch: MonkeyPatch) -> None:
     assert cache.get((HostName("dual"), socket.AF_INET6)) is None
 
 
+class _FakeResolver:
+    def __init__(self, addresses: Mapping[str, str]) -> None:
+        self.addresses = dict(addresses)
+        self.looked_up: list[str] = []
+
+    def __call__(self, host_name: HostName, family: socket.AddressFamily) -> HostAddress:
+        self.looked_up.append(host_name)
+        try:
+            return HostAddress(self.addresses[host_name])
+        except KeyError:
+            raise MKIPAddressLookupError(f"Failed to lookup {host_name}")
+
+
+def _update_dns_cache(
+    resolver: _FakeResolver,
+    hosts: Sequence[str],
+    *,
+    max_age: float = 0,
+    workers: int = 32,
+    timeout: float = 10.0,
+) -> tuple[int, Sequence[HostName]]:
+    cache_manager.clear()  # as in a new process
+    ip_lookup_cache = ip_lookup._get_ip_lookup_cache()
+
+    def lookup(host_name: HostName, family: socket.AddressFamily) -> HostAddress:
+        # the relevant part of the DNS cache layer
+        if cached := ip_lookup_cache.get((host_name, family)):
+            return cached
+        ip_lookup_cache[(host_name, family)] = (address := resolver(host_name, family))
+        return address
+
+    return ip_lookup.update_dns_cache(
+        hosts=[HostName(h) for h in hosts],
+        get_ip_stack_config=lambda h: ip_lookup.IPStackConfig.IPv4,
+        lookup_ip_address=lookup,
+        max_age=max_age,
+        workers=workers,
+        timeout=timeout,
+    )
+
+
+def _persisted_dns_cache() -> ip_lookup.IPLookupCache:
+    cache = ip_lookup.IPLookupCache({})
+    cache.load_persisted()
+    return cache
+
+
+def test_update_dns_cache_refreshes_stale_entries(monkeypatch: MonkeyPatch) -> None:
+    resolver = _FakeResolver({"fresh": "127.0.0.1", "stale": "127.0.0.2", "removed": "127.0.0.3"})
+    monkeypatch.setattr(time, "time", lambda: 1000.0)
+    assert _update_dns_cache(resolver, ["fresh", "stale", "removed"]) == (3, [])
+
+    state = ip_lookup.IPLookupRefreshState.load()
+    state.resolved[(HostName("stale"), socket.AF_INET)] = 0.0
+    state.save()
+
+    resolver.addresses = {"fresh": "127.0.0.11", "stale": "127.0.0.12"}
+    resolver.looked_up.clear()
+    assert _update_dns_cache(resolver, ["fresh", "stale"], max_age=600) == (2, [])
+
+    assert resolver.looked_up == ["stale"]
+    assert _persisted_dns_cache() == {
+        (HostName("fresh"), socket.AF_INET): HostAddress("127.0.0.1"),
+        (HostName("stale"), socket.AF_INET): HostAddress("127.0.0.12"),
+    }
+
+
+def test_update_dns_cache_backs_off_after_failures(monkeypatch: MonkeyPatch) -> None:
+    resolver = _FakeResolver({"ok": "127.0.0.1"})
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    assert _update_dns_cache(resolver, ["ok", "failing"], max_age=600) == (1, ["failing"])
+
+    # not retried during the backoff
+    resolver.looked_up.clear()
+    now += 30
+    assert _update_dns_cache(resolver, ["ok", "failing"], max_age=600) == (1, ["failing"])
+    assert not resolver.looked_up
+
+    # retried afterwards, the backoff is doubled
+    now += 60
+    assert _update_dns_cache(resolver, ["ok", "failing"], max_age=600) == (1, ["failing"])
+    assert resolver.looked_up == ["failing"]
+    assert ip_lookup.IPLookupRefreshState.load().failed == {
+        (HostName("failing"), socket.AF_INET): (2, now + 120)
+    }
+
+    # a full refresh retries anyway
+    resolver.addresses["failing"] = "127.0.0.2"
+    assert _update_dns_cache(resolver, ["ok", "failing"]) == (2, [])
+    assert not ip_lookup.IPLookupRefreshState.load().failed
+
+
+def test_update_dns_cache_abandons_hanging_lookups() -> None:
+    released = threading.Event()
+
+    class HangingResolver(_FakeResolver):
+        def __call__(self, host_name: HostName, family: socket.AddressFamily) -> HostAddress:
+            if host_name == "hanging":
+                released.wait()
+            return super().__call__(host_name, family)
+
+    resolver = HangingResolver({f"host{n}": f"127.0.0.{n}" for n in range(10)})
+    resolver.addresses["hanging"] = "127.0.1.1"
+    try:
+        assert _update_dns_cache(
+            resolver, ["hanging", *(f"host{n}" for n in range(10))], workers=4, timeout=0.1
+        ) == (10, ["hanging"])
+    finally:
+        released.set()
+
+    # the abandoned lookup succeeds eventually, but does not update the cache
+    for thread in threading.enumerate():
+        if thread.name == "dns-lookup":
+            thread.join()
+    assert _persisted_dns_cache() == {
+        (HostName(f"host{n}"), socket.AF_INET): HostAddress(f"127.0.0.{n}") for n in range(10)
+    }
+
+
 @pytest.mark.parametrize(
     "hostname_str, tags, result_address",
     [
@@ -7,8 +7,9 @@
 import errno
 import socket
 import ssl
+import threading
 from collections.abc import Sequence
-from contextlib import closing
+from contextlib import closing, suppress
 from pathlib import Path
 
 import pytest
@@ -253,6 +254,66 @@ def test_local_connection(patch_omd_site: None, mock_livestatus: MockLiveStatusC
         livestatus.LocalConnection().query_value("GET status\nColumns: program_start")
 
 
+@pytest.mark.parametrize(
+    "raw_response,result",
+    [
+        (b"[]\n", []),
+        (b'[["a",1]]\n', [["a", 1]]),
+        (
+            b'[["None",None,1.5,{"k":[]}],\n["x,b",b"\\x00\\x22","\\u00e4\\U0001f648"]]\n',
+            [["None", None, 1.5, {"k": []}], ["x,b", b'\x00"', "ä🙈"]],
+        ),
+        # Not rendered one row per line
+        (b"[['a', u'b'], [1, {}]]", [["a", "b"], [1, {}]]),
+    ],
+)
+def test_parse_raw_response_python(raw_response: bytes, result: list[list[object]]) -> None:
+    live = livestatus.SingleSiteConnection("unix:/tmp/xyz")
+    assert live.parse_raw_response(raw_response, livestatus.Query("GET hosts")) == result
+
+
+def test_parse_raw_response_python_malformed() -> None:
+    live = livestatus.SingleSiteConnection("unix:/tmp/xyz")
+    with pytest.raises(livestatus.MKLivestatusQueryError, match="Malformed"):
+        live.parse_raw_response(b'[["a",\n', livestatus.Query("GET hosts"))
+
+
+def _respond(sock: socket.socket, response: bytes) -> None:
+    query = b""
+    while not query.endswith(b"\n\n"):
+        query += sock.recv(4096)
+    # The client may close the connection before having read the whole response
+    with suppress(BrokenPipeError):
+        sock.sendall(b"200 %11d\n" % len(response) + response)
+
+
+def test_query_rows() -> None:
+    client, server = socket.socketpair()
+    with closing(client), closing(server):
+        live = livestatus.SingleSiteConnection("unix:/tmp/xyz")
+        live.socket = client
+        response = b"[" + b",\n".join(b'["host%d",None]' % i for i in range(10000)) + b"]\n"
+        thread = threading.Thread(target=_respond, args=(server, response))
+        thread.start()
+        assert list(live.query_rows("GET hosts")) == [[f"host{i}", None] for i in range(10000)]
+        thread.join()
+
+
+def test_query_rows_closes_connection_when_not_completed() -> None:
+    client, server = socket.socketpair()
+    with closing(client), closing(server):
+        live = livestatus.SingleSiteConnection("unix:/tmp/xyz")
+        live.socket = client
+        response = b"[" + b",\n".join(b'["host%d"]' % i for i in range(100000)) + b"]\n"
+        thread = threading.Thread(target=_respond, args=(server, response))
+        thread.start()
+        rows = live.query_rows("GET hosts")
+        assert next(rows) == ["host0"]
+        rows.close()
+        assert live.socket is None
+        thread.join()
+
+
 # Regression test for Werk 14384
 @pytest.mark.parametrize(
     "user_id,allowed",